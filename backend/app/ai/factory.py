@@ -1,5 +1,5 @@
 """Factory for creating AI components."""
-from app.ai.summaries import RuleBasedSummaryGenerator, LLMSummaryGenerator
+from app.ai.summaries import RuleBasedSummaryGenerator, LLMSummaryGenerator, CachedSummaryGenerator, summary_cache
 from app.ai.intents import RuleBasedIntentClassifier, LLMIntentClassifier
 from app.ai.trends import RuleBasedTrendSummarizer, LLMTrendSummarizer
 
@@ -21,12 +21,17 @@ def _get_llm_client():
     return GeminiClient(api_key, settings.LLM_MODEL)
 
 def get_summary_generator(): 
-    """Factory function to get the appropriate summary generator."""
+    """Factory function to get the appropriate summary generator (memoized unless SUMMARY_CACHE_ENABLED is off)."""
+    from app.config import settings
     client = _get_llm_client()
     
     if client:
-        return LLMSummaryGenerator(client)
-    return RuleBasedSummaryGenerator()
+        generator, kind = LLMSummaryGenerator(client), f"llm:{settings.LLM_MODEL}"
+    else:
+        generator, kind = RuleBasedSummaryGenerator(), "rule_based"
+    if summary_cache.enabled:
+        return CachedSummaryGenerator(generator, kind)
+    return generator
 
 def get_intent_classifier():
     """Factory function to get the appropriate intent classifier."""
@@ -6,6 +6,7 @@ warnings.filterwarnings("ignore", message="All support for the `google.generativ
 
 import google.generativeai as genai
 from app.config import settings
+from app.observability.tracing import traced
 
 
 class GeminiClient:
@@ -19,6 +20,7 @@ class GeminiClient:
         genai.configure(api_key=api_key)
         self.model = genai.GenerativeModel(model_name)
     
+    @traced("llm")
     def generate(self, prompt: str) -> str:
         response = self.model.generate_content(prompt)
         return response.text.strip()
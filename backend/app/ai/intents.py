@@ -1,7 +1,9 @@
 """Intent classification strategies."""
 from app.ai.prompts import get_intent_classification_prompt
 import re
+from app.observability.tracing import traced_class
 
+@traced_class("ai")
 class RuleBasedIntentClassifier:
     """Classify intent using keyword matching rules."""
     
@@ -39,6 +41,7 @@ class RuleBasedIntentClassifier:
         
         return "UNKNOWN"
 
+@traced_class("ai")
 class LLMIntentClassifier:
     """Classify intent using an LLM."""
     
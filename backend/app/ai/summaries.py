@@ -1,7 +1,97 @@
 """Summary generation strategies for parcel reports."""
+from types import SimpleNamespace
+from typing import List, Sequence
+import numpy as np
+from app.analytics.interpretation import GRADE_CODES, GRADES, TABLES, classify_many
+from app.analytics.series import INDEX_NAMES
 from app.services.index_service import IndexInterpretationService
 from app.ai.prompts import get_parcel_summary_prompt
+from app.config import settings
+from app.storage.result_cache import ResultCache
+from app.observability.tracing import traced_class
 
+# Keyed by (parcel_id, reading date, crop, generator, parcel name, area, reading values);
+# IndexStatsService invalidates a parcel's entries when it gets new readings
+summary_cache = ResultCache(
+    "summaries",
+    max_entries=settings.SUMMARY_CACHE_SIZE,
+    sqlite_path=settings.RESULT_CACHE_PATH,
+    enabled=str(settings.SUMMARY_CACHE_ENABLED).lower() == "true",
+)
+
+# Heading of each index's line in the rule-based summary
+SUMMARY_HEADINGS = {
+    "ndvi": "Vegetation (NDVI: {value:.2f})",
+    "ndmi": "Moisture (NDMI: {value:.2f})",
+    "ndwi": "Water (NDWI: {value:.2f})",
+    "soc": "Soil Organic Carbon (SOC: {value:.2f})",
+    "nitrogen": "Nitrogen (N: {value:.2f})",
+    "phosphorus": "Phosphorus (P: {value:.2f})",
+    "potassium": "Potassium (K: {value:.2f})",
+    "ph": "pH Level ({value:.2f})",
+}
+
+# Overall parcel status: (label, recommendation), picked by overall_status()
+OVERALL_STATUSES = [
+    (" **EXCELLENT** - Parcel is in great condition",
+     "Continue current management practices. This parcel is performing optimally. Monitor regularly to maintain these excellent conditions."),
+    (" **GOOD** - Parcel is performing well with minor areas for improvement",
+     "The parcel is in good health. Focus on improving the moderate indices through targeted interventions such as adjusting irrigation or applying specific fertilizers where needed."),
+    (" **NEEDS ATTENTION** - Multiple indices require immediate action",
+     "Immediate action required. Review poor indices and implement corrective measures: consider soil amendments, adjust irrigation schedules, apply necessary fertilizers, and consult an agronomist if conditions persist."),
+    (" **MODERATE** - Parcel needs monitoring and possible interventions",
+     "Regular monitoring is advised. Address declining indices before they become critical. Consider preventive measures such as balanced fertilization and proper water management."),
+]
+
+# Templates compiled once: one line per (index, band) and one footer per overall status
+HEADER_TEMPLATE = "**Current Status for Parcel %s - %s**\n(%s ha, %s)\n\n"
+LINE_TEMPLATES = [
+    [f"**{SUMMARY_HEADINGS[name].replace('{value:.2f}', '%.2f')}:** {band.description}\n\n" for band in TABLES[name]]
+    for name in INDEX_NAMES
+]
+FOOTER_TEMPLATES = [
+    "---\n\n**Overall Parcel Status:**\n"
+    "- Good: %d/%d indices\n- Moderate: %d/%d indices\n- Poor: %d/%d indices\n\n"
+    f"**Summary: {overall}. **\n\n{recommendation}. \n\n"
+    for overall, recommendation in OVERALL_STATUSES
+]
+
+def _render_lines(j: int, column: np.ndarray) -> tuple[list, np.ndarray]:
+    """
+    Summary lines and grade codes of one index column (NaN = missing).
+
+    Readings are stored with two decimals, so a column holds few distinct
+    values: each is classified and rendered once, then spread back.
+    """
+    name = INDEX_NAMES[j]
+    # Unique bit patterns rather than values, so -0.0 keeps rendering as "-0.00"
+    uniques, inverse = np.unique(np.ascontiguousarray(column).view(np.int64), return_inverse=True)
+    uniques = uniques.view(np.float64)
+    bands = classify_many(name, uniques)
+    lines = np.array([
+        LINE_TEMPLATES[j][band] % value if band >= 0 else ""
+        for band, value in zip(bands.tolist(), uniques.tolist())
+    ], dtype=object)
+    inverse = inverse.ravel()
+    return lines[inverse].tolist(), GRADE_CODES[name][bands][inverse]
+
+def overall_status(good: np.ndarray, moderate: np.ndarray, poor: np.ndarray) -> np.ndarray:
+    """Position in OVERALL_STATUSES for each parcel's grade counts, -1 when it has no graded index."""
+    total = good + moderate + poor
+    return np.select(
+        [total == 0, good >= total * 0.6, good + moderate >= total * 0.7, poor >= total * 0.5],
+        [-1, 0, 1, 2],
+        default=3,
+    )
+
+class FallbackText(str):
+    """Rule-based text returned by an LLM generator whose LLM call failed; never cached under the LLM's key."""
+
+def _reading_row(latest) -> tuple:
+    """(date, ndvi, ..., ph) of a reading object."""
+    return (latest.date, *(getattr(latest, name) for name in INDEX_NAMES))
+
+@traced_class("ai")
 class RuleBasedSummaryGenerator:
     """Generate summaries using rule-based interpretation."""
     
@@ -11,149 +101,59 @@ class RuleBasedSummaryGenerator:
     def generate_parcel_summary(self, parcel_id: str, indices_data: dict) -> str:
         """Generate a rule-based summary."""
         latest = indices_data.get("latest_index")
-        parcel_name = indices_data.get("parcel_name", parcel_id)
-        area = indices_data.get("area_ha", "?")
-        crop = indices_data.get("crop", "Unknown")
-        
         if not latest:
             return f"Parcel {parcel_id}: no data available yet"
+        return self.generate_parcel_summaries([{"parcel_id": parcel_id, **indices_data}], [_reading_row(latest)])[0]
+    
+    def generate_parcel_summaries(self, parcels: Sequence[dict], readings: Sequence[tuple | None]) -> List[str]:
+        """
+        Summaries of many parcels at once, e.g. a whole report run.
         
-        # Counters for overall status
-        good_count = 0
-        moderate_count = 0
-        poor_count = 0
-        total_indices = 0
-        
-        # Generate status summary
-        summary = f"**Current Status for Parcel {parcel_id} - {parcel_name}**\n"
-        summary += f"({area} ha, {crop})\n\n"
-        
-        # Vegetation status (NDVI)
-        if latest.ndvi is not None:
-            total_indices += 1
-            status_text = self.interpretation_service.ndvi_status(latest.ndvi)
-            if latest.ndvi >= 0.55:
-                good_count += 1
-            elif latest.ndvi >= 0.30:
-                moderate_count += 1
-            else:
-                poor_count += 1
-            summary += f"**Vegetation (NDVI: {latest.ndvi:.2f}):** {status_text}\n\n"
-        
-        # Moisture status (NDMI)
-        if latest.ndmi is not None:
-            total_indices += 1
-            status_text = self.interpretation_service.ndmi_status(latest.ndmi)
-            if latest.ndmi > 0.30:
-                good_count += 1
-            elif latest.ndmi >= 0.15:
-                moderate_count += 1
-            else:
-                poor_count += 1
-            summary += f"**Moisture (NDMI: {latest.ndmi:.2f}):** {status_text}\n\n"
-        
-        # Water status (NDWI)
-        if latest.ndwi is not None:
-            total_indices += 1
-            status_text = self.interpretation_service.ndwi_status(latest.ndwi)
-            if latest.ndwi > 0.25:
-                good_count += 1
-            elif latest.ndwi >= 0.10:
-                moderate_count += 1
-            else:
-                poor_count += 1
-            summary += f"**Water (NDWI: {latest.ndwi:.2f}):** {status_text}\n\n"
-        
-        # Soil organic carbon (SOC)
-        if latest.soc is not None:
-            total_indices += 1
-            status_text = self.interpretation_service.soc_status(latest.soc)
-            if latest.soc > 2.5:
-                good_count += 1
-            elif latest.soc >= 1.5:
-                moderate_count += 1
-            else:
-                poor_count += 1
-            summary += f"**Soil Organic Carbon (SOC: {latest.soc:.2f}):** {status_text}\n\n"
-        
-        # Nitrogen
-        if latest.nitrogen is not None:
-            total_indices += 1
-            status_text = self.interpretation_service.nitrogen_status(latest.nitrogen)
-            if latest.nitrogen > 1.0:
-                good_count += 1
-            elif latest.nitrogen >= 0.7:
-                moderate_count += 1
-            else:
-                poor_count += 1
-            summary += f"**Nitrogen (N: {latest.nitrogen:.2f}):** {status_text}\n\n"
+        parcels are dicts with parcel_id (and optionally parcel_name, area_ha,
+        crop); readings holds each parcel's latest (date, ndvi, ..., ph) tuple,
+        or None when it has none. Grades and overall statuses are computed for
+        all parcels with array operations; only the text is rendered per parcel,
+        from the templates above.
+        """
+        summaries = [f"Parcel {parcel['parcel_id']}: no data available yet" for parcel in parcels]
+        rows = [i for i, reading in enumerate(readings) if reading]
+        if not rows:
+            return summaries
         
-        # Phosphorus
-        if latest.phosphorus is not None:
-            total_indices += 1
-            status_text = self.interpretation_service.phosphorus_status(latest.phosphorus)
-            if latest.phosphorus > 0.45:
-                good_count += 1
-            elif latest.phosphorus >= 0.35:
-                moderate_count += 1
-            else:
-                poor_count += 1
-            summary += f"**Phosphorus (P: {latest.phosphorus:.2f}):** {status_text}\n\n"
+        # float dtype turns missing (None) values into NaN
+        values = np.array([readings[i][1:] for i in rows], dtype=float).reshape(len(rows), len(INDEX_NAMES))
+        columns = [[
+            HEADER_TEMPLATE % (parcel["parcel_id"], parcel.get("parcel_name", parcel["parcel_id"]), parcel.get("area_ha", "?"), parcel.get("crop", "Unknown"))
+            for parcel in (parcels[i] for i in rows)
+        ]]
         
-        # Potassium
-        if latest.potassium is not None:
-            total_indices += 1
-            status_text = self.interpretation_service.potassium_status(latest.potassium)
-            if latest.potassium > 0.7:
-                good_count += 1
-            elif latest.potassium >= 0.55:
-                moderate_count += 1
-            else:
-                poor_count += 1
-            summary += f"**Potassium (K: {latest.potassium:.2f}):** {status_text}\n\n"
+        counts = np.zeros((len(rows), len(GRADES)), dtype=np.int64)
+        for j in range(len(INDEX_NAMES)):
+            lines, grades = _render_lines(j, values[:, j])
+            counts += grades[:, None] == np.arange(len(GRADES))
+            columns.append(lines)
         
-        # pH
-        if latest.ph is not None:
-            total_indices += 1
-            status_text = self.interpretation_service.ph_status(latest.ph)
-            if 6.0 <= latest.ph <= 7.0:
-                good_count += 1
-            elif 5.5 <= latest.ph < 6.0 or 7.0 < latest.ph <= 7.5:
-                moderate_count += 1
-            else:
-                poor_count += 1
-            summary += f"**pH Level ({latest.ph:.2f}):** {status_text}\n\n"
+        # The footer only depends on the grade counts (0-8 each): render each distinct combination once
+        poor, moderate, good = counts.T
+        combos, inverse = np.unique((good * 10 + moderate) * 10 + poor, return_inverse=True)
+        combo_good, combo_moderate, combo_poor = combos // 100, combos // 10 % 10, combos % 10
+        footers = np.array([
+            FOOTER_TEMPLATES[status] % (g, g + m + p, m, g + m + p, p, g + m + p) if status >= 0 else ""
+            for status, g, m, p in zip(
+                overall_status(combo_good, combo_moderate, combo_poor).tolist(),
+                combo_good.tolist(), combo_moderate.tolist(), combo_poor.tolist(),
+            )
+        ], dtype=object)
+        columns.append(footers[inverse.ravel()].tolist())
         
-        # Calculate overall status
-        if total_indices > 0:
-            summary += "---\n\n"
-            summary += f"**Overall Parcel Status:**\n"
-            summary += f"- Good: {good_count}/{total_indices} indices\n"
-            summary += f"- Moderate: {moderate_count}/{total_indices} indices\n"
-            summary += f"- Poor: {poor_count}/{total_indices} indices\n\n"
-            
-            # Determine overall status based on majority
-            if good_count >= total_indices * 0.6:
-                overall = " **EXCELLENT** - Parcel is in great condition"
-                recommendation = "Continue current management practices. This parcel is performing optimally. Monitor regularly to maintain these excellent conditions."
-            elif good_count + moderate_count >= total_indices * 0.7:
-                overall = " **GOOD** - Parcel is performing well with minor areas for improvement"
-                recommendation = "The parcel is in good health. Focus on improving the moderate indices through targeted interventions such as adjusting irrigation or applying specific fertilizers where needed."
-            elif poor_count >= total_indices * 0.5:
-                overall = " **NEEDS ATTENTION** - Multiple indices require immediate action"
-                recommendation = "Immediate action required. Review poor indices and implement corrective measures: consider soil amendments, adjust irrigation schedules, apply necessary fertilizers, and consult an agronomist if conditions persist."
-            else:
-                overall = " **MODERATE** - Parcel needs monitoring and possible interventions"
-                recommendation = "Regular monitoring is advised. Address declining indices before they become critical. Consider preventive measures such as balanced fertilization and proper water management."
-            
-            summary += f"**Summary: {overall}. **\n\n"
-            summary += f"{recommendation}. \n\n"
-            
-        summary += f"Last measured on {latest.date}.\n\n"
+        columns.append([f"Last measured on {readings[i][0]}.\n\n" for i in rows])
         
-        return summary
+        for i, parts in zip(rows, zip(*columns)):
+            summaries[i] = "".join(parts)
+        return summaries
 
 
+@traced_class("ai")
 class LLMSummaryGenerator:
     """Generate natural language summaries using an LLM."""
     
@@ -183,10 +183,10 @@ class LLMSummaryGenerator:
         
         # Get rule-based interpretations to provide context to LLM
         interpretations = {
-            "vegetation": self.interpretation_service.vegetation_status(latest_index.ndvi),
-            "moisture": self.interpretation_service.moisture_status(latest_index.ndmi),
-            "nitrogen": self.interpretation_service.soil_nitrogen_status(latest_index.nitrogen),
-            "ph": self.interpretation_service.soil_ph_status(latest_index.ph),
+            "vegetation": self.interpretation_service.label("ndvi", latest_index.ndvi),
+            "moisture": self.interpretation_service.label("ndmi", latest_index.ndmi),
+            "nitrogen": self.interpretation_service.label("nitrogen", latest_index.nitrogen),
+            "ph": self.interpretation_service.label("ph", latest_index.ph),
             "date": str(latest_index.date)
         }
         
@@ -200,4 +200,64 @@ class LLMSummaryGenerator:
             # Fallback to rule-based if LLM fails
             print(f"LLM generation failed: {e}. Falling back to rule-based.")
             rule_based = RuleBasedSummaryGenerator()
-            return rule_based.generate_parcel_summary(parcel_id, indices_data)
+            return FallbackText(rule_based.generate_parcel_summary(parcel_id, indices_data))
+    
+    def generate_parcel_summaries(self, parcels: Sequence[dict], readings: Sequence[tuple | None]) -> List[str]:
+        """Same contract as RuleBasedSummaryGenerator.generate_parcel_summaries; one prompt per parcel."""
+        return [
+            self.generate_parcel_summary(parcel["parcel_id"], {
+                **parcel,
+                "latest_index": SimpleNamespace(date=reading[0], **dict(zip(INDEX_NAMES, reading[1:]))) if reading else None,
+            })
+            for parcel, reading in zip(parcels, readings)
+        ]
+
+
+@traced_class("ai")
+class CachedSummaryGenerator:
+    """
+    Memoizes another summary generator per parcel and latest reading.
+    
+    The key holds everything the summary is rendered from, so an entry is
+    never served for other data, even in a worker that missed an invalidation.
+    Fallback text (FallbackText) is returned but not cached, so the next call
+    tries the LLM again.
+    """
+    
+    def __init__(self, generator, kind: str, cache: ResultCache = summary_cache):
+        self.generator = generator
+        self.kind = kind  # Generator identity, e.g. "rule_based" or "llm:<model>"
+        self.cache = cache
+    
+    def generate_parcel_summary(self, parcel_id: str, indices_data: dict) -> str:
+        latest = indices_data.get("latest_index")
+        if not latest:
+            return self.generator.generate_parcel_summary(parcel_id, indices_data)
+        key = self._key({"parcel_id": parcel_id, **indices_data}, _reading_row(latest))
+        summary = self.cache.get(key)
+        if summary is None:
+            summary = self.generator.generate_parcel_summary(parcel_id, indices_data)
+            if not isinstance(summary, FallbackText):
+                self.cache.set(key, summary)
+        return summary
+    
+    def generate_parcel_summaries(self, parcels: Sequence[dict], readings: Sequence[tuple | None]) -> List[str]:
+        """Cached summaries where available; the rest in one call to the wrapped generator."""
+        keys = [self._key(parcel, reading) if reading else None for parcel, reading in zip(parcels, readings)]
+        summaries = [self.cache.get(key) if key else None for key in keys]
+        missing = [i for i, summary in enumerate(summaries) if summary is None]
+        if missing:
+            generated = self.generator.generate_parcel_summaries([parcels[i] for i in missing], [readings[i] for i in missing])
+            for i, summary in zip(missing, generated):
+                summaries[i] = summary
+                if keys[i] and not isinstance(summary, FallbackText):
+                    self.cache.set(keys[i], summary)
+        return summaries
+    
+    def _key(self, parcel: dict, reading: tuple) -> tuple:
+        parcel_id = parcel["parcel_id"]
+        # JSON-friendly, as persisted keys are stored as JSON
+        return (
+            parcel_id, str(reading[0]), parcel.get("crop"), self.kind,
+            parcel.get("parcel_name", parcel_id), str(parcel.get("area_ha")), *reading[1:],
+        )
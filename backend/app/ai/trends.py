@@ -1,7 +1,10 @@
 """Trend summary generation strategies."""
 from typing import Dict
 from app.ai.prompts import get_trend_analysis_summary_prompt
+from app.ai.summaries import FallbackText
+from app.observability.tracing import traced_class
 
+@traced_class("ai")
 class RuleBasedTrendSummarizer:
     """Generate trend summaries using rule-based templates."""
     
@@ -23,6 +26,7 @@ class RuleBasedTrendSummarizer:
             
         return f"Trend Analysis for {parcel_name}: " + ", ".join(summary_parts)
 
+@traced_class("ai")
 class LLMTrendSummarizer:
     """Generate trend summaries using an LLM."""
     
@@ -41,4 +45,4 @@ class LLMTrendSummarizer:
         except Exception as e:
             print(f"LLM trend summary generation failed: {e}. Falling back to rule-based.")
             rule_based = RuleBasedTrendSummarizer()
-            return rule_based.generate_trend_summary(parcel_id, parcel_name, trends_data)
+            return FallbackText(rule_based.generate_trend_summary(parcel_id, parcel_name, trends_data))
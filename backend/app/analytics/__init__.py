@@ -0,0 +1 @@
+"""Vectorized (NumPy) analytics over parcel index time series."""
@@ -0,0 +1,105 @@
+"""
+Alert rules evaluated incrementally as new readings arrive.
+
+A rule looks at one index of one reading and, at most, the previous reading of
+that index on the same parcel:
+- drop: the value fell by more than the threshold since the previous reading
+- below / above: the value crossed the threshold (the previous reading was on
+  the other side, or there was none), so a persistent condition fires once
+
+Rules are written as "<index> <condition> <threshold> [critical]", e.g.
+"ndvi drop 0.1" or "ph below 5.5"; several are separated by ";".
+"""
+from dataclasses import dataclass
+import math
+from typing import Iterable, Sequence
+from app.analytics.series import INDEX_NAMES, EPOCH_ORDINAL
+
+CONDITIONS = ("drop", "below", "above")
+
+@dataclass(frozen=True)
+class AlertRule:
+    index_name: str
+    condition: str  # One of CONDITIONS
+    threshold: float
+    severity: str = "warning"  # "warning" or "critical"
+
+    @property
+    def name(self) -> str:
+        return f"{self.index_name}_{self.condition}_{self.threshold:g}"
+
+    def check(self, value: float, previous: float) -> bool:
+        """Whether a reading triggers the rule; previous is NaN without a previous reading."""
+        if self.condition == "drop":
+            return previous - value > self.threshold
+        if self.condition == "below":
+            return value < self.threshold and not previous < self.threshold
+        return value > self.threshold and not previous > self.threshold
+
+DEFAULT_RULES = "ndvi drop 0.1; ndmi drop 0.1; ph below 5.5; ph above 8.5"
+
+@dataclass
+class RuleHit:
+    parcel_id: str
+    day: int  # Days since 1970-01-01
+    rule: AlertRule
+    value: float
+    previous: float  # Previous reading of the index, NaN if none
+
+    @property
+    def reference(self) -> float:
+        """Value the reading was compared with: the previous reading for drops, else the threshold."""
+        return self.previous if self.rule.condition == "drop" else self.rule.threshold
+
+    @property
+    def score(self) -> float:
+        return abs(self.reference - self.value)
+
+def parse_rules(spec: str) -> list[AlertRule]:
+    """Rules from "<index> <condition> <threshold> [severity]; ..." (ValueError on a malformed rule)."""
+    rules = []
+    for part in spec.split(";"):
+        words = part.split()
+        if not words:
+            continue
+        if len(words) not in (3, 4) or words[0] not in INDEX_NAMES or words[1] not in CONDITIONS:
+            raise ValueError(f"Invalid alert rule {part.strip()!r}, expected '<index> <drop|below|above> <threshold> [critical]'")
+        severity = words[3] if len(words) == 4 else "warning"
+        if severity not in ("warning", "critical"):
+            raise ValueError(f"Invalid alert rule severity {severity!r}")
+        rules.append(AlertRule(words[0], words[1], float(words[2]), severity))
+    return rules
+
+def evaluate_rules(rows: Iterable[Sequence], last_readings: dict[str, dict[str, tuple[int, float]]],
+                   rules: Sequence[AlertRule]) -> list[RuleHit]:
+    """
+    Rule hits among new readings.
+
+    rows are (parcel_id, date, ndvi, ..., ph) tuples ordered by parcel and date.
+    last_readings maps parcel_id -> {index name -> (day, value)} of the latest
+    reading stored before these rows. Each reading is compared only with the
+    previous reading of its own parcel; readings not newer than it (backfills,
+    re-sent readings) are skipped. The work is proportional to the new rows.
+    """
+    columns = {name: 2 + j for j, name in enumerate(INDEX_NAMES)}
+    by_index = {}
+    for rule in rules:
+        by_index.setdefault(rule.index_name, []).append(rule)
+
+    hits = []
+    parcel_id, latest = None, {}
+    for row in rows:
+        if row[0] != parcel_id:
+            parcel_id = row[0]
+            latest = dict(last_readings.get(parcel_id, {}))
+        day = row[1].toordinal() - EPOCH_ORDINAL
+        for index_name, index_rules in by_index.items():
+            value = row[columns[index_name]]
+            if value is None or math.isnan(value):
+                continue
+            last_day, previous = latest.get(index_name, (-1, math.nan))
+            if day <= last_day:
+                continue
+            hits.extend(RuleHit(parcel_id, day, rule, value, previous) for rule in index_rules if rule.check(value, previous))
+            latest[index_name] = (day, value)
+    return hits
@@ -0,0 +1,158 @@
+"""
+Anomaly detection over parcel index time series, vectorized across parcels.
+
+Three detectors run on a SeriesBatch, using only non-null readings:
+- zscore: a reading more than Z_THRESHOLD residual standard deviations from
+  the line fitted to the parcel's previous ROLLING_WINDOW readings of that index
+- drop: NDVI / NDMI falling by more than DROP_THRESHOLDS since the previous reading
+- range: a reading leaving the range typical for the parcel's crop (the first
+  reading of a series, or one whose previous reading was in range), so a
+  persistent condition raises one alert rather than one per reading
+"""
+from dataclasses import dataclass
+import datetime
+import numpy as np
+from app.analytics.series import INDEX_NAMES, SeriesBatch, day_to_date
+
+ROLLING_WINDOW = 8  # Previous readings the z-score compares against
+MIN_PERIODS = 6  # Fewer previous readings than this: no z-score
+Z_THRESHOLD = 3.0
+# Floor on the rolling std per index (about the measurement noise), so near-flat
+# series do not flag noise as anomalies
+MIN_STD = {
+    "ndvi": 0.03, "ndmi": 0.03, "ndwi": 0.03, "soc": 0.10,
+    "nitrogen": 0.05, "phosphorus": 0.03, "potassium": 0.03, "ph": 0.10,
+}
+DROP_THRESHOLDS = {"ndvi": 0.15, "ndmi": 0.10}
+
+# Typical ranges per index; crops override some of them
+DEFAULT_RANGES = {
+    "ndvi": (0.10, 0.95),
+    "ndmi": (-0.20, 0.60),
+    "ndwi": (-0.40, 0.50),
+    "soc": (0.80, 6.00),
+    "nitrogen": (0.40, 2.00),
+    "phosphorus": (0.20, 0.80),
+    "potassium": (0.30, 1.20),
+    "ph": (5.50, 8.00),
+}
+CROP_RANGES = {
+    "Wheat": {"ph": (5.5, 7.5)},
+    "Maize": {"ph": (5.8, 7.5)},
+    "Corn": {"ph": (5.8, 7.5)},
+    "Alfalfa": {"ph": (6.2, 7.8), "ndvi": (0.15, 0.95)},
+    "Sunflower": {"ph": (6.0, 7.5)},
+    "Soybean": {"ph": (6.0, 7.0)},
+    "Barley": {"ph": (6.0, 7.5)},
+    "Rapeseed": {"ph": (5.8, 7.5)},
+    "Apples": {"ph": (5.5, 7.0), "ndvi": (0.20, 0.95)},
+    "Pasture": {"ph": (5.5, 7.5), "ndvi": (0.20, 0.95)},
+}
+KINDS = ("zscore", "drop", "range")
+
+@dataclass
+class Anomaly:
+    parcel_id: str
+    date: datetime.date
+    index_name: str
+    kind: str  # One of KINDS
+    value: float
+    reference: float  # Value expected from the rolling window, previous reading or the violated bound
+    score: float  # |z|, size of the drop, or distance outside the range
+    severity: str  # "warning" or "critical"
+
+def _range_table(crops: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """(parcels, indices) lower and upper bounds for the given crops."""
+    table = {}
+    lower = np.empty((len(crops), len(INDEX_NAMES)))
+    upper = np.empty((len(crops), len(INDEX_NAMES)))
+    for i, crop in enumerate(crops):
+        if crop not in table:
+            ranges = {**DEFAULT_RANGES, **CROP_RANGES.get(crop, {})}
+            table[crop] = [ranges[name] for name in INDEX_NAMES]
+        lower[i], upper[i] = np.array(table[crop]).T
+    return lower, upper
+
+def detect_anomalies(batch: SeriesBatch, crops: list[str], window: int = ROLLING_WINDOW) -> list[Anomaly]:
+    """All anomalies in a batch; crops[i] is the crop of batch.parcel_ids[i]."""
+    if not len(batch):
+        return []
+    values = batch.values
+    valid = ~np.isnan(values)
+    rows = np.arange(len(values))
+    start_of_row = batch.per_row(batch.starts)
+
+    columns = np.arange(values.shape[1])[None, :]
+
+    # Row of the previous valid reading of the same series (-1 if none)
+    last_valid = np.maximum.accumulate(np.where(valid, rows[:, None], -1), axis=0)
+    previous = np.vstack([np.full((1, values.shape[1]), -1), last_valid[:-1]])
+    previous = np.where(previous >= start_of_row[:, None], previous, -1)
+
+    # Rolling window = the previous `window` valid readings of the series. With
+    # valid readings numbered per column across the whole batch, that is the
+    # numbers [before - k, before), so prefix sums over the valid readings give
+    # the window's least-squares line; z is the distance from that line's
+    # prediction, so a steady seasonal rise or fall is not flagged.
+    t = (batch.days - batch.days[start_of_row]).astype(np.float64)
+    valid_before = np.vstack([np.zeros((1, values.shape[1]), dtype=np.int64), np.cumsum(valid, axis=0)])
+    before = valid_before[rows]
+    count = np.minimum(before - valid_before[start_of_row], window)
+    expected, spread, floor = (np.full(values.shape, np.nan) for _ in range(3))
+    for j in range(values.shape[1]):
+        ts, ys = t[valid[:, j]], values[valid[:, j], j]
+        prefix = [np.concatenate([[0.0], np.cumsum(a)]) for a in (ts, ys, ts * ts, ts * ys, ys * ys)]
+        hi, lo = before[:, j], before[:, j] - count[:, j]
+        n = count[:, j].astype(np.float64)
+        s_t, s_y, s_tt, s_ty, s_yy = (c[hi] - c[lo] for c in prefix)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t_mean, y_mean = s_t / n, s_y / n
+            sxx, sxy, syy = s_tt - s_t * t_mean, s_ty - s_t * y_mean, s_yy - s_y * y_mean
+            slope = np.where(sxx > 0, sxy / sxx, 0.0)
+            expected[:, j] = y_mean + slope * (t - t_mean)
+            residual = np.sqrt(np.maximum(syy - slope * sxy, 0.0) / (n - 2))
+            # Standard error of a prediction at t, which grows when extrapolating past the window
+            leverage = 1 + 1 / n + np.where(sxx > 0, (t - t_mean) ** 2 / sxx, 0.0)
+            spread[:, j] = residual * np.sqrt(leverage)
+            floor[:, j] = MIN_STD[INDEX_NAMES[j]] * np.sqrt(leverage)
+
+    with np.errstate(invalid="ignore"):
+        z = (values - expected) / np.maximum(spread, floor)
+    z_hit = valid & (count >= MIN_PERIODS) & (np.abs(z) > Z_THRESHOLD)
+
+    previous_value = np.where(previous >= 0, values[np.maximum(previous, 0), columns], np.nan)
+    drop = previous_value - values
+    drop_threshold = np.array([DROP_THRESHOLDS.get(name, np.inf) for name in INDEX_NAMES])[None, :]
+    with np.errstate(invalid="ignore"):
+        drop_hit = valid & (previous >= 0) & (drop > drop_threshold)
+
+    lower, upper = _range_table(crops)
+    lower, upper = batch.per_row(lower), batch.per_row(upper)
+    with np.errstate(invalid="ignore"):
+        outside = (values < lower) | (values > upper)
+        was_outside = np.where(previous >= 0, outside[np.maximum(previous, 0), columns], False)
+        below = valid & (values < lower) & ~was_outside
+        above = valid & (values > upper) & ~was_outside
+
+    parcel_of_row = np.repeat(np.arange(len(batch)), batch.lengths)
+    anomalies = []
+
+    def add(kind, mask, reference, score, critical):
+        for row, j in zip(*np.nonzero(mask)):
+            anomalies.append(Anomaly(
+                parcel_id=batch.parcel_ids[parcel_of_row[row]],
+                date=day_to_date(batch.days[row]),
+                index_name=INDEX_NAMES[j],
+                kind=kind,
+                value=float(values[row, j]),
+                reference=round(float(reference[row, j]), 4),
+                score=round(float(score[row, j]), 4),
+                severity="critical" if critical[row, j] else "warning",
+            ))
+
+    add("zscore", z_hit, expected, np.abs(z), np.abs(z) > 2 * Z_THRESHOLD)
+    add("drop", drop_hit, previous_value, drop, drop > 2 * drop_threshold)
+    width = upper - lower
+    add("range", below, lower, lower - values, (lower - values) > 0.1 * width)
+    add("range", above, upper, values - upper, (values - upper) > 0.1 * width)
+    return anomalies
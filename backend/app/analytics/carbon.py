@@ -0,0 +1,76 @@
+"""
+Soil organic carbon stock and CO2 equivalent of parcels, vectorized over readings.
+
+    stock (t C/ha) = SOC (%) x bulk density (g/cm3) x sampling depth (cm)
+    CO2e (t)       = stock x area (ha) x 44/12
+
+One hectare of soil 1 cm deep at 1 g/cm3 weighs 100 t, so 1% SOC is 1 t C/ha
+per cm. Only readings with a SOC value count; a parcel's balance is its latest
+one, compared with the previous reading (change) and the first (baseline).
+"""
+from dataclasses import dataclass
+import numpy as np
+from app.analytics.series import INDEX_NAMES, SeriesBatch
+
+CO2_PER_C = 44.0 / 12.0  # t CO2 per t C
+SOC_COLUMN = INDEX_NAMES.index("soc")
+
+def stock_per_ha(soc, bulk_density: float, depth_cm: float):
+    """t C/ha from SOC in percent (scalars or arrays)."""
+    return np.asarray(soc, dtype=float) * bulk_density * depth_cm
+
+@dataclass
+class CarbonBalances:
+    """
+    Carbon balance of each parcel of a SeriesBatch with at least one SOC reading.
+
+    rows index the batch's readings (latest, previous and first SOC reading of
+    each parcel); a parcel with a single SOC reading has previous == first ==
+    latest and NaN changes.
+    """
+    parcels: np.ndarray  # Position of each parcel in the batch
+    latest: np.ndarray
+    previous: np.ndarray
+    first: np.ndarray
+    stock_t_c_ha: np.ndarray  # Latest stock per hectare
+    co2e_t: np.ndarray  # Latest stock of the whole parcel in t CO2e
+    change_co2e_t: np.ndarray  # Since the previous SOC reading
+    baseline_change_co2e_t: np.ndarray  # Since the first SOC reading
+
+def carbon_balances(batch: SeriesBatch, areas: np.ndarray, bulk_density: float, depth_cm: float) -> CarbonBalances:
+    """Balances of all parcels of a batch at once; areas holds each parcel's hectares."""
+    rows = np.flatnonzero(~np.isnan(batch.values[:, SOC_COLUMN]))
+    parcels = np.repeat(np.arange(len(batch)), batch.lengths)[rows]
+    # Rows are grouped by parcel and dated within it: SOC readings of a parcel are a contiguous run
+    # (sliced so that a batch without any SOC reading gives empty runs)
+    run_start = np.r_[True, parcels[1:] != parcels[:-1]][:len(rows)]
+    run_end = np.r_[parcels[1:] != parcels[:-1], True][:len(rows)]
+    starts, ends = np.flatnonzero(run_start), np.flatnonzero(run_end)
+    has_previous = ends > starts
+    previous = np.where(has_previous, ends - 1, ends)
+
+    stocks = stock_per_ha(batch.values[rows, SOC_COLUMN], bulk_density, depth_cm)
+    to_co2e = areas[parcels[ends]] * CO2_PER_C
+    return CarbonBalances(
+        parcels=parcels[ends],
+        latest=rows[ends],
+        previous=rows[previous],
+        first=rows[starts],
+        stock_t_c_ha=stocks[ends],
+        co2e_t=stocks[ends] * to_co2e,
+        change_co2e_t=np.where(has_previous, (stocks[ends] - stocks[previous]) * to_co2e, np.nan),
+        baseline_change_co2e_t=np.where(has_previous, (stocks[ends] - stocks[starts]) * to_co2e, np.nan),
+    )
+
+def reading_balances(soc: np.ndarray, area: float, bulk_density: float, depth_cm: float):
+    """
+    Stock (t C/ha), CO2e (t) and change since the previous SOC reading (t CO2e)
+    of each reading of one parcel, NaN where a reading has no SOC (the change
+    skips over such readings).
+    """
+    stocks = stock_per_ha(soc, bulk_density, depth_cm)
+    co2e = stocks * area * CO2_PER_C
+    change = np.full(len(co2e), np.nan)
+    valid = np.flatnonzero(~np.isnan(co2e))
+    change[valid[1:]] = np.diff(co2e[valid])
+    return stocks, co2e, change
@@ -0,0 +1,108 @@
+"""
+Next-pass forecasts of every index of every parcel, vectorized over a SeriesBatch.
+
+The next pass is expected one revisit interval after a parcel's latest
+reading, the interval being the mean spacing of its last `window` readings.
+Each index is extrapolated from a least-squares line through its last
+`window` measured values, with a 95% prediction interval:
+
+    value ± t(n - 2) · s · sqrt(1 + 1/n + (x0 - mean x)² / Sxx)
+
+A single value is carried forward without a band, two give a line but no
+band. Values and bands are clipped to the index's possible range. Only
+measured values are used: gap-filled ones would narrow the bands without
+adding information.
+"""
+from dataclasses import dataclass
+import numpy as np
+from app.analytics.series import INDEX_NAMES, SeriesBatch
+
+DEFAULT_WINDOW = 6
+
+# Two-sided 95% Student t quantiles by degrees of freedom (1-30); 1.96 beyond
+T95 = np.array([
+    np.nan, 12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042,
+])
+
+# Index -> (lowest, highest) possible value
+VALUE_RANGES = {
+    "ndvi": (-1.0, 1.0),
+    "ndmi": (-1.0, 1.0),
+    "ndwi": (-1.0, 1.0),
+    "soc": (0.0, np.inf),
+    "nitrogen": (0.0, np.inf),
+    "phosphorus": (0.0, np.inf),
+    "potassium": (0.0, np.inf),
+    "ph": (0.0, 14.0),
+}
+LOWEST = np.array([VALUE_RANGES[name][0] for name in INDEX_NAMES])
+HIGHEST = np.array([VALUE_RANGES[name][1] for name in INDEX_NAMES])
+
+@dataclass
+class Forecasts:
+    """Forecasts of a batch: per parcel dates, per (parcel, index) values; NaN where undefined."""
+    day: np.ndarray  # (parcels,) forecast day, days since 1970-01-01
+    points: np.ndarray  # (parcels, indices) measured values the forecast is based on
+    value: np.ndarray
+    lower: np.ndarray
+    upper: np.ndarray
+
+def t_quantile(df: np.ndarray) -> np.ndarray:
+    """95% two-sided t quantiles of an array of degrees of freedom (NaN below 1)."""
+    df = np.asarray(df)
+    return np.where(df > 30, 1.96, T95[np.clip(df, 0, 30)])
+
+def forecast_next(batch: SeriesBatch, window: int = DEFAULT_WINDOW, default_interval: int = 15) -> Forecasts:
+    """
+    Forecasts of all parcels of a batch at once from segmented sums.
+
+    default_interval is the revisit interval (days) of parcels with a single reading.
+    """
+    values = batch.values
+    valid = ~np.isnan(values)
+    ends = batch.offsets[1:] - 1
+
+    # Revisit interval from the parcel's last readings (any index)
+    back = np.maximum(batch.starts, ends - (window - 1))
+    steps = ends - back
+    with np.errstate(divide="ignore", invalid="ignore"):
+        interval = np.where(steps > 0, np.round((batch.days[ends] - batch.days[back]) / steps), default_interval)
+    interval = np.maximum(interval, 1).astype(np.int64)
+    last_day = batch.days[ends]
+
+    # Last `window` measured values of each series, as in trend_engine
+    cumulative = np.cumsum(valid, axis=0)
+    rank = cumulative - batch.per_row(cumulative[batch.starts] - valid[batch.starts])
+    count = batch.segment_sum(valid.astype(np.int64))
+    used = valid & (rank > batch.per_row(count) - window)
+
+    # x = days relative to the latest reading keeps the sums small
+    x = np.where(used, (batch.days - batch.per_row(last_day))[:, None].astype(np.float64), 0.0)
+    y = np.where(used, values, 0.0)
+    n = batch.segment_sum(used.astype(np.int64))
+    sum_x, sum_y = batch.segment_sum(x), batch.segment_sum(y)
+    sum_xx, sum_xy, sum_yy = batch.segment_sum(x * x), batch.segment_sum(x * y), batch.segment_sum(y * y)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_x, mean_y = sum_x / n, sum_y / n
+        sxx = sum_xx - sum_x * mean_x
+        sxy = sum_xy - sum_x * mean_y
+        syy = sum_yy - sum_y * mean_y
+        slope = np.where((n >= 2) & (sxx > 0), sxy / sxx, 0.0)
+        x0 = interval[:, None].astype(np.float64)
+        value = np.where(n > 0, mean_y + slope * (x0 - mean_x), np.nan)
+
+        df = n - 2
+        residual = np.sqrt(np.maximum(syy - slope * sxy, 0.0) / df)
+        spread = residual * np.sqrt(1 + 1 / n + (x0 - mean_x) ** 2 / sxx)
+        margin = np.where((df >= 1) & (sxx > 0), t_quantile(df) * spread, np.nan)
+
+    return Forecasts(
+        day=last_day + interval,
+        points=n,
+        value=np.clip(value, LOWEST, HIGHEST),
+        lower=np.clip(value - margin, LOWEST, HIGHEST),
+        upper=np.clip(value + margin, LOWEST, HIGHEST),
+    )
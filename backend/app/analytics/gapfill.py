@@ -0,0 +1,62 @@
+"""
+Gap filling of missing index values, vectorized over a whole SeriesBatch.
+
+A missing value between two readings of the same index is interpolated
+linearly in time (weighted by the days to each neighbour) when those readings
+are at most max_gap_days apart. A missing value after the last reading of an
+index is carried forward for max_gap_days. Values before an index's first
+reading are never invented. Every value is flagged, so consumers can tell
+measured from estimated ones.
+"""
+import numpy as np
+from app.analytics.series import SeriesBatch
+
+FLAG_MISSING = -1  # Still missing after filling
+FLAG_OBSERVED = 0
+FLAG_INTERPOLATED = 1
+FLAG_CARRIED = 2
+FLAG_NAMES = {FLAG_INTERPOLATED: "interpolated", FLAG_CARRIED: "carried_forward"}
+
+def fill_gaps(batch: SeriesBatch, max_gap_days: int):
+    """
+    Filled values and flags, both of shape (readings, indices), of a batch.
+
+    The neighbouring readings of every cell come from running max / min
+    accumulations over row numbers, so the cost grows with the number of
+    readings only.
+    """
+    values = batch.values
+    observed = ~np.isnan(values)
+    readings, indices = values.shape
+    rows = np.arange(readings)[:, None]
+    first_row = batch.per_row(batch.starts)[:, None]
+    last_row = batch.per_row(batch.offsets[1:] - 1)[:, None]
+
+    # Nearest observed row at or before / after each cell, within the parcel
+    previous = np.maximum.accumulate(np.where(observed, rows, -1), axis=0)
+    following = np.minimum.accumulate(np.where(observed, rows, readings)[::-1], axis=0)[::-1]
+    has_previous = previous >= first_row
+    has_following = following <= last_row
+    previous = np.where(has_previous, previous, 0)
+    following = np.where(has_following, following, 0)
+
+    days = batch.days
+    since = days[:, None] - days[previous]
+    span = days[following] - days[previous]
+    missing = ~observed
+    interpolated = missing & has_previous & has_following & (span <= max_gap_days)
+    carried = missing & has_previous & ~has_following & (since <= max_gap_days)
+
+    columns = np.arange(indices)[None, :]
+    before, after = values[previous, columns], values[following, columns]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weight = np.where(span > 0, since / span, 0.0)
+    filled = values.copy()
+    filled[interpolated] = (before + (after - before) * weight)[interpolated]
+    filled[carried] = before[carried]
+
+    flags = np.full(values.shape, FLAG_OBSERVED, dtype=np.int8)
+    flags[missing] = FLAG_MISSING
+    flags[interpolated] = FLAG_INTERPOLATED
+    flags[carried] = FLAG_CARRIED
+    return filled, flags
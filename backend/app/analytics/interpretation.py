@@ -0,0 +1,108 @@
+"""
+Threshold tables interpreting index values - the one source of truth for the
+summaries, reports and anything else that labels readings.
+
+Each index has an ordered list of bands. A band covers the values up to its
+upper bound (included or not) and carries a grade (poor / moderate / good, what
+the overall parcel status counts), a short label and a full sentence.
+Scalars are classified with bisect and arrays with np.searchsorted, both on
+the same edges, so a value gets the same band either way.
+"""
+from bisect import bisect_left
+from dataclasses import dataclass
+import math
+import numpy as np
+
+GRADES = ("poor", "moderate", "good")
+
+@dataclass(frozen=True)
+class Band:
+    upper: float  # Upper bound of the band; math.inf for the last one
+    inclusive: bool  # Whether a value equal to upper falls in this band
+    grade: str  # One of GRADES
+    label: str  # Short label, e.g. "vegetation is poor"
+    description: str  # Sentence used in summaries
+
+INF = math.inf
+
+TABLES = {
+    "ndvi": [
+        Band(0.30, False, "poor", "vegetation is poor", "Vegetation is poor and may be stressed."),
+        Band(0.55, False, "moderate", "vegetation is moderate", "Vegetation is developing with moderate health."),
+        Band(0.75, True, "good", "vegetation is healthy", "Vegetation is healthy and dense."),
+        Band(INF, True, "good", "vegetation is very vigorous", "Vegetation is extremely vigorous."),
+    ],
+    "ndmi": [
+        Band(0.15, False, "poor", "moisture is low", "Low moisture - possible drought stress."),
+        Band(0.30, True, "moderate", "moisture is moderate", "Moderate moisture levels."),
+        Band(INF, True, "good", "moisture is high", "High moisture - healthy water content."),
+    ],
+    "ndwi": [
+        Band(0.10, False, "poor", "water presence is low", "Low water presence."),
+        Band(0.25, True, "moderate", "water content is moderate", "Moderate water content."),
+        Band(INF, True, "good", "water presence is strong", "Strong water presence."),
+    ],
+    "soc": [
+        Band(1.5, False, "poor", "organic carbon is low", "Low soil organic matter - poor soil quality."),
+        Band(2.5, True, "moderate", "organic carbon is moderate", "Moderate soil organic content."),
+        Band(INF, True, "good", "organic carbon is high", "High organic content - rich soil quality."),
+    ],
+    "nitrogen": [
+        Band(0.7, False, "poor", "nitrogen is low", "Low nitrogen - crop may need fertilization."),
+        Band(1.0, True, "moderate", "nitrogen is adequate", "Adequate nitrogen levels."),
+        Band(INF, True, "good", "nitrogen is high", "High nitrogen levels - good for crop growth."),
+    ],
+    "phosphorus": [
+        Band(0.35, False, "poor", "phosphorus is low", "Low phosphorus levels."),
+        Band(0.45, True, "moderate", "phosphorus is adequate", "Adequate phosphorus levels."),
+        Band(INF, True, "good", "phosphorus is high", "High phosphorus levels."),
+    ],
+    "potassium": [
+        Band(0.55, False, "poor", "potassium is low", "Low potassium levels."),
+        Band(0.7, True, "moderate", "potassium is adequate", "Adequate potassium levels."),
+        Band(INF, True, "good", "potassium is high", "High potassium levels - good for crop health."),
+    ],
+    # Both sides of the 6.0-7.0 optimum are graded, so pH has more bands than labels
+    "ph": [
+        Band(5.5, False, "poor", "pH is acidic", "Acidic soil - problematic for most crops."),
+        Band(6.0, False, "moderate", "pH is neutral", "Slightly acidic - acceptable for most crops."),
+        Band(7.0, True, "good", "pH is neutral", "Good pH - ideal for most crops."),
+        Band(7.5, True, "moderate", "pH is neutral", "Alkaline soil - may cause nutrient availability issues."),
+        Band(INF, True, "poor", "pH is alkaline", "Alkaline soil - may cause nutrient availability issues."),
+    ],
+}
+
+def _edges(bands: list[Band]) -> list[float]:
+    """
+    Inclusive upper edges of every band but the last: a value's band is the
+    number of edges below it. An exclusive bound becomes the float just below it.
+    """
+    return [band.upper if band.inclusive else float(np.nextafter(band.upper, -INF)) for band in bands[:-1]]
+
+EDGES = {name: _edges(bands) for name, bands in TABLES.items()}
+EDGE_ARRAYS = {name: np.array(edges) for name, edges in EDGES.items()}
+
+def classify(index_name: str, value: float | None) -> int | None:
+    """Position of the value's band in TABLES[index_name], or None for a missing value."""
+    if value is None or value != value:  # NaN
+        return None
+    return bisect_left(EDGES[index_name], value)
+
+def classify_many(index_name: str, values) -> np.ndarray:
+    """Band positions of an array of values (int8), -1 where a value is NaN."""
+    values = np.asarray(values, dtype=float)
+    positions = np.searchsorted(EDGE_ARRAYS[index_name], values, side="left").astype(np.int8)
+    positions[np.isnan(values)] = -1
+    return positions
+
+def band_of(index_name: str, value: float | None) -> Band | None:
+    """The band a value falls in, or None for a missing value."""
+    position = classify(index_name, value)
+    return None if position is None else TABLES[index_name][position]
+
+# Grade codes (position in GRADES) of every band, with -1 appended for missing values
+GRADE_CODES = {name: np.array([GRADES.index(band.grade) for band in bands] + [-1], dtype=np.int8) for name, bands in TABLES.items()}
+
+def grade_many(index_name: str, values) -> np.ndarray:
+    """Grade codes (positions in GRADES) of an array of values (int8), -1 where a value is NaN."""
+    return GRADE_CODES[index_name][classify_many(index_name, values)]
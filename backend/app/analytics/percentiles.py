@@ -0,0 +1,76 @@
+"""
+Crop cohort percentiles: where a parcel's reading stands among the readings of
+the other parcels growing the same crop in the same date window.
+
+Windows are window_days-day spans counted from 1970-01-01. A parcel counts
+once per window and index, with its latest value in that window. Each cohort
+is stored as its 0th..100th percentiles, so placing a value is a bisect over
+101 points however many parcels the cohort has.
+"""
+from bisect import bisect_left, bisect_right
+from typing import Dict, Sequence, Tuple
+import numpy as np
+from app.analytics.series import INDEX_NAMES, SeriesBatch
+
+PERCENTILES = 101  # Points stored per cohort: the 0th to the 100th percentile
+
+def window_start(day: int, window_days: int) -> int:
+    """First day (days since 1970-01-01) of the window holding a day."""
+    return day // window_days * window_days
+
+def cohort_values(batch: SeriesBatch, crop_codes: np.ndarray, window_days: int) -> Dict[str, Tuple[np.ndarray, ...]]:
+    """
+    Index name -> (crop codes, window starts, values) with each parcel's latest
+    value of that index in every window it has one.
+
+    crop_codes holds an integer per parcel of the batch.
+    """
+    parcel_rows = np.repeat(np.arange(len(batch)), batch.lengths)
+    windows = batch.days // window_days * window_days
+    result = {}
+    for j, name in enumerate(INDEX_NAMES):
+        valid = ~np.isnan(batch.values[:, j])
+        parcels, parcel_windows, values = parcel_rows[valid], windows[valid], batch.values[valid, j]
+        # Rows are ordered by parcel and date: the last row of each (parcel, window) run is the latest
+        last = np.ones(len(values), dtype=bool)
+        last[:-1] = (parcels[1:] != parcels[:-1]) | (parcel_windows[1:] != parcel_windows[:-1])
+        result[name] = (crop_codes[parcels[last]], parcel_windows[last], values[last])
+    return result
+
+def cohort_percentiles(crops: np.ndarray, windows: np.ndarray, values: np.ndarray, min_size: int):
+    """
+    Percentile points of every (crop, window) cohort with at least min_size values.
+
+    Returns (crops, windows, sizes, points) with one entry per cohort and
+    points of shape (cohorts, PERCENTILES), interpolated like np.quantile.
+    All cohorts are computed together from one sort.
+    """
+    order = np.lexsort((values, windows, crops))
+    crops, windows, values = crops[order], windows[order], values[order]
+    starts = np.flatnonzero(np.r_[True, (crops[1:] != crops[:-1]) | (windows[1:] != windows[:-1])]) if len(values) else np.zeros(0, dtype=np.int64)
+    sizes = np.diff(np.r_[starts, len(values)])
+    keep = sizes >= min_size
+    starts, sizes = starts[keep], sizes[keep]
+
+    # Fractional position of each percentile inside its cohort's sorted values
+    positions = starts[:, None] + (sizes[:, None] - 1) * np.linspace(0.0, 1.0, PERCENTILES)
+    below = np.floor(positions).astype(np.int64)
+    above = np.minimum(below + 1, (starts + sizes - 1)[:, None])
+    fraction = positions - below
+    points = values[below] + (values[above] - values[below]) * fraction
+    return crops[starts], windows[starts], sizes, points
+
+def percentile_of(points: Sequence[float], value: float) -> float:
+    """
+    Percentile (0-100) of a value in a cohort from its stored points: linear
+    between neighbouring points, the middle of a run of equal points on a tie.
+    """
+    last = len(points) - 1
+    if value < points[0]:
+        return 0.0
+    if value > points[-1]:
+        return 100.0
+    low, high = bisect_left(points, value), bisect_right(points, value)
+    if high > low:  # Equal to one or more points
+        return (low + high - 1) / 2 * 100 / last
+    return (low - 1 + (value - points[low - 1]) / (points[low] - points[low - 1])) * 100 / last
@@ -0,0 +1,230 @@
+"""
+Running aggregates per (parcel, index) series, for trends without rereading history.
+
+Each series keeps its count, sums of t, t², y, y² and t·y (t = days since the
+series' first reading), first/last reading and its last few readings. Two
+aggregates of the same series merge in O(1), and slope, mean and variance
+come straight from the sums.
+
+The first and last RECENT_WINDOW readings of every series, plus the days of
+the parcel's last RECENT_WINDOW readings, are also all that next-pass
+forecasts (window <= RECENT_WINDOW) and carbon balances look at, so
+batch_from_running() rebuilds a stand-in history they give the same results on.
+"""
+from dataclasses import dataclass, field, replace
+import math
+import numpy as np
+from app.analytics.series import INDEX_NAMES, SeriesBatch
+from app.analytics.trend_engine import TrendStats, assemble, regression
+
+READINGS_KEY = "_readings"  # Pseudo index counting whole readings (any index present) per parcel
+RECENT_WINDOW = 6  # Last readings kept per series for the rolling mean and the forecasts
+COLUMNS = {name: j for j, name in enumerate(INDEX_NAMES)}
+
+@dataclass
+class RunningStats:
+    """Aggregates of one series; days are days since 1970-01-01."""
+    count: int = 0
+    origin: int = 0  # Day that t is measured from (the first reading's day)
+    sum_t: float = 0.0
+    sum_tt: float = 0.0
+    sum_y: float = 0.0
+    sum_yy: float = 0.0
+    sum_ty: float = 0.0
+    first_day: int = -1
+    first_value: float = math.nan
+    last_day: int = -1
+    last_value: float = math.nan
+    recent: list = field(default_factory=list)  # [(day, value)] oldest first, at most RECENT_WINDOW
+
+    @property
+    def mean(self) -> float:
+        return self.sum_y / self.count if self.count else math.nan
+
+    @property
+    def variance(self) -> float:
+        """Population variance of the values."""
+        if not self.count:
+            return math.nan
+        return max(self.sum_yy / self.count - self.mean ** 2, 0.0)
+
+    def shifted(self, origin: int) -> "RunningStats":
+        """The same aggregates with t measured from an earlier origin."""
+        d = float(self.origin - origin)
+        if not d or not self.count:
+            return replace(self, origin=origin)
+        return replace(
+            self,
+            origin=origin,
+            sum_t=self.sum_t + self.count * d,
+            sum_tt=self.sum_tt + 2 * d * self.sum_t + self.count * d * d,
+            sum_ty=self.sum_ty + d * self.sum_y,
+        )
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        """Aggregates over the readings of both (which must not overlap)."""
+        if not other.count:
+            return self
+        if not self.count:
+            return other
+        origin = min(self.origin, other.origin)
+        a, b = self.shifted(origin), other.shifted(origin)
+        first = a if (a.first_day, 0) <= (b.first_day, 1) else b
+        last = b if (b.last_day, 1) >= (a.last_day, 0) else a
+        return RunningStats(
+            count=a.count + b.count,
+            origin=origin,
+            sum_t=a.sum_t + b.sum_t,
+            sum_tt=a.sum_tt + b.sum_tt,
+            sum_y=a.sum_y + b.sum_y,
+            sum_yy=a.sum_yy + b.sum_yy,
+            sum_ty=a.sum_ty + b.sum_ty,
+            first_day=first.first_day,
+            first_value=first.first_value,
+            last_day=last.last_day,
+            last_value=last.last_value,
+            recent=sorted(a.recent + b.recent, key=lambda reading: reading[0])[-RECENT_WINDOW:],
+        )
+
+def running_stats_from_batch(batch: SeriesBatch) -> dict[str, dict[str, RunningStats]]:
+    """
+    Aggregates of every series in a batch: parcel_id -> {index name -> RunningStats}.
+
+    Each parcel also gets a READINGS_KEY entry counting its readings (values
+    unset, recent holding the days of its last readings). Indices without any
+    reading in the batch are left out.
+    """
+    values = batch.values
+    valid = ~np.isnan(values)
+    rows = np.arange(len(values))[:, None]
+    if not len(batch):
+        return {}
+
+    count = batch.segment_sum(valid.astype(np.int64))
+    first_row = np.minimum.reduceat(np.where(valid, rows, len(values)), batch.starts, axis=0)
+    last_row = np.maximum.reduceat(np.where(valid, rows, -1), batch.starts, axis=0)
+    has_data = count > 0
+    first_row, last_row = np.where(has_data, first_row, 0), np.where(has_data, last_row, 0)
+    origin = batch.days[first_row]
+
+    t = np.where(valid, (batch.days[:, None] - batch.per_row(origin)).astype(np.float64), 0.0)
+    y = np.where(valid, values, 0.0)
+    sums = [batch.segment_sum(a).tolist() for a in (t, t * t, y, y * y, t * y)]
+
+    columns = np.arange(values.shape[1])[None, :]
+    first_value, last_value = values[first_row, columns].tolist(), values[last_row, columns].tolist()
+    first_day, last_day, origin = batch.days[first_row].tolist(), batch.days[last_row].tolist(), origin.tolist()
+
+    # Last RECENT_WINDOW valid readings of each series
+    rank = np.cumsum(valid, axis=0) - batch.per_row(np.cumsum(valid, axis=0)[batch.starts] - valid[batch.starts])
+    in_window = valid & (rank > batch.per_row(count) - RECENT_WINDOW)
+    recent = {}
+    parcel_of_row = np.repeat(np.arange(len(batch)), batch.lengths)
+    for row, j in zip(*np.nonzero(in_window)):
+        recent.setdefault((parcel_of_row[row], j), []).append((int(batch.days[row]), float(values[row, j])))
+
+    # Whole readings: only the t sums, so that shifting their origin stays consistent
+    reading_t = (batch.days - batch.per_row(batch.days[batch.starts])).astype(np.float64)
+    reading_sum_t, reading_sum_tt = batch.segment_sum(reading_t).tolist(), batch.segment_sum(reading_t * reading_t).tolist()
+
+    counts, lengths = count.tolist(), batch.lengths.tolist()
+    result = {}
+    for i, parcel_id in enumerate(batch.parcel_ids):
+        start, end = batch.offsets[i], batch.offsets[i + 1] - 1
+        series = {READINGS_KEY: RunningStats(
+            count=lengths[i], origin=int(batch.days[start]),
+            sum_t=reading_sum_t[i], sum_tt=reading_sum_tt[i],
+            first_day=int(batch.days[start]), last_day=int(batch.days[end]),
+            recent=[(day, math.nan) for day in batch.days[max(start, end - RECENT_WINDOW + 1):end + 1].tolist()],
+        )}
+        for j, index_name in enumerate(INDEX_NAMES):
+            if not counts[i][j]:
+                continue
+            series[index_name] = RunningStats(
+                count=counts[i][j], origin=origin[i][j],
+                sum_t=sums[0][i][j], sum_tt=sums[1][i][j], sum_y=sums[2][i][j],
+                sum_yy=sums[3][i][j], sum_ty=sums[4][i][j],
+                first_day=first_day[i][j], first_value=first_value[i][j],
+                last_day=last_day[i][j], last_value=last_value[i][j],
+                recent=recent.get((i, j), []),
+            )
+        result[parcel_id] = series
+    return result
+
+def has_recent(series: dict[str, RunningStats]) -> bool:
+    """Whether every series of a parcel keeps its last RECENT_WINDOW readings (aggregates stored before it grew may not)."""
+    return READINGS_KEY in series and all(len(s.recent) == min(s.count, RECENT_WINDOW) for s in series.values())
+
+def batch_from_running(stats: dict[str, dict[str, RunningStats]]) -> SeriesBatch:
+    """
+    Stand-in SeriesBatch of parcels from their aggregates (see has_recent): the
+    parcel's recent reading days, each series' first reading and last readings.
+
+    Each index keeps its first value and last RECENT_WINDOW values and the last
+    RECENT_WINDOW rows are the parcel's last readings, so forecast_next (window
+    <= RECENT_WINDOW) and carbon_balances give the same results as on the full history.
+    """
+    parcel_ids = sorted(stats)
+    offsets, days, values = [0], [], []
+    for parcel_id in parcel_ids:
+        readings = {}
+        for index_name, series in stats[parcel_id].items():
+            if index_name == READINGS_KEY:
+                for day, _ in series.recent:
+                    readings.setdefault(day, [math.nan] * len(INDEX_NAMES))
+                continue
+            j = COLUMNS[index_name]
+            readings.setdefault(series.first_day, [math.nan] * len(INDEX_NAMES))[j] = series.first_value
+            for day, value in series.recent:
+                readings.setdefault(day, [math.nan] * len(INDEX_NAMES))[j] = value
+        for day in sorted(readings):
+            days.append(day)
+            values.append(readings[day])
+        offsets.append(len(days))
+    return SeriesBatch(
+        parcel_ids, np.array(offsets, dtype=np.int64), np.array(days, dtype=np.int64),
+        np.array(values, dtype=np.float64).reshape(len(days), len(INDEX_NAMES)),
+    )
+
+def readings_in_span(readings: RunningStats, series: RunningStats) -> int | None:
+    """
+    Readings of a parcel (its READINGS_KEY aggregates) dated from a series'
+    first to its last value, or None when the aggregates cannot tell.
+
+    A series with fewer values than that misses readings inside its span.
+    """
+    days = [day for day, _ in readings.recent]
+    if len(days) == readings.count:
+        return sum(series.first_day <= day <= series.last_day for day in days)
+    if series.first_day != readings.first_day:
+        return None
+    if series.last_day == readings.last_day:
+        return readings.count
+    # Every reading after the series' last value is among the recent ones
+    if days and days[0] <= series.last_day:
+        return readings.count - sum(day > series.last_day for day in days)
+    return None
+
+def trends_from_running(series: dict[str, RunningStats], window: int = RECENT_WINDOW) -> TrendStats:
+    """TrendStats (one parcel x INDEX_NAMES) from stored aggregates, without any readings."""
+    if window > RECENT_WINDOW:
+        raise ValueError(f"Running stats keep only the last {RECENT_WINDOW} readings")
+
+    empty = RunningStats()
+    stats = [series.get(name, empty) for name in INDEX_NAMES]
+
+    def column(attribute, dtype=np.float64):
+        return np.array([[getattr(s, attribute) for s in stats]], dtype=dtype)
+
+    count = column("count", np.int64)
+    slope, r_squared = regression(
+        count, column("sum_t"), column("sum_y"), column("sum_tt"), column("sum_ty"), column("sum_yy"),
+    )
+    rolling_mean = np.array([[
+        sum(value for _, value in s.recent[-window:]) / len(s.recent[-window:]) if s.recent else math.nan
+        for s in stats
+    ]])
+    return assemble(
+        count, column("first_value"), column("last_value"),
+        column("first_day", np.int64), column("last_day", np.int64), slope, r_squared, rolling_mean,
+    )
@@ -0,0 +1,90 @@
+"""Parcel index readings as NumPy arrays, grouped by parcel."""
+from dataclasses import dataclass
+from itertools import groupby
+from operator import itemgetter
+from datetime import date, timedelta
+from typing import Iterable, Sequence
+import numpy as np
+
+INDEX_NAMES = ("ndvi", "ndmi", "ndwi", "soc", "nitrogen", "phosphorus", "potassium", "ph")
+
+EPOCH = date(1970, 1, 1)
+EPOCH_ORDINAL = EPOCH.toordinal()
+
+def day_to_date(day: int) -> date:
+    return EPOCH + timedelta(days=int(day))
+
+@dataclass
+class SeriesBatch:
+    """
+    Readings of one or more parcels as a (readings x indices) array.
+
+    Rows are grouped by parcel and sorted by date within a parcel; parcel i owns
+    rows offsets[i]:offsets[i + 1]. Missing values are NaN.
+    """
+    parcel_ids: list[str]
+    offsets: np.ndarray  # (parcels + 1,) row offsets
+    days: np.ndarray  # (readings,) int64 days since 1970-01-01
+    values: np.ndarray  # (readings, len(INDEX_NAMES)) float64
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence]) -> "SeriesBatch":
+        """
+        Build from (parcel_id, date, ndvi, ..., ph) rows ordered by parcel_id, date.
+
+        Every parcel in the result has at least one reading.
+        """
+        rows = list(rows)
+        if not rows:
+            return cls([], np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros((0, len(INDEX_NAMES))))
+
+        parcel_column = [row[0] for row in rows]
+        # toordinal is much faster than converting date objects to datetime64
+        days = np.fromiter((row[1].toordinal() for row in rows), np.int64, len(rows)) - EPOCH_ORDINAL
+        values = np.array([row[2:] for row in rows], dtype=np.float64)  # None -> NaN
+
+        starts = [0] + [i for i in range(1, len(rows)) if parcel_column[i] != parcel_column[i - 1]]
+        parcel_ids = [parcel_column[i] for i in starts]
+        offsets = np.array(starts + [len(rows)], dtype=np.int64)
+        return cls(parcel_ids, offsets, days, values)
+
+    @classmethod
+    def from_indices(cls, indices: Sequence) -> "SeriesBatch":
+        """Build from ParcelIndex objects (any order)."""
+        ordered = sorted(indices, key=lambda x: (x.parcel_id, x.date))
+        return cls.from_rows(
+            (index.parcel_id, index.date, *(getattr(index, name) for name in INDEX_NAMES)) for index in ordered
+        )
+
+    def __len__(self) -> int:
+        return len(self.parcel_ids)
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    @property
+    def starts(self) -> np.ndarray:
+        return self.offsets[:-1]
+
+    def segment_sum(self, array: np.ndarray) -> np.ndarray:
+        """Sum rows of array per parcel."""
+        if not len(self):
+            return np.zeros((0,) + array.shape[1:], dtype=array.dtype)
+        return np.add.reduceat(array, self.starts, axis=0)
+
+    def per_row(self, per_parcel: np.ndarray) -> np.ndarray:
+        """Repeat a per-parcel array onto that parcel's rows."""
+        return np.repeat(per_parcel, self.lengths, axis=0)
+
+def parcel_chunks(rows: Iterable[Sequence], chunk_parcels: int):
+    """Group rows ordered by parcel into lists holding up to chunk_parcels whole parcels."""
+    chunk, parcels = [], 0
+    for _, parcel_rows in groupby(rows, key=itemgetter(0)):
+        chunk.extend(parcel_rows)
+        parcels += 1
+        if parcels >= chunk_parcels:
+            yield chunk
+            chunk, parcels = [], 0
+    if chunk:
+        yield chunk
@@ -0,0 +1,94 @@
+"""
+Full-history trend statistics for every parcel and index in one pass.
+
+For each (parcel, index) series, using only non-null readings:
+least-squares slope per day, R², first/last value, change, percent change,
+fitted change over the period (slope x days covered) and the mean of the last
+`window` readings. All parcels of a SeriesBatch are computed together with
+segment sums, so cost grows with the number of readings, not of parcels.
+"""
+from dataclasses import dataclass
+import numpy as np
+from app.analytics.series import SeriesBatch
+
+DEFAULT_WINDOW = 3
+
+@dataclass
+class TrendStats:
+    """Per (parcel, index) statistics, each of shape (parcels, indices); NaN where undefined."""
+    count: np.ndarray
+    first_value: np.ndarray
+    last_value: np.ndarray
+    first_day: np.ndarray
+    last_day: np.ndarray
+    change: np.ndarray
+    percent_change: np.ndarray
+    slope_per_day: np.ndarray
+    fitted_change: np.ndarray
+    r_squared: np.ndarray
+    rolling_mean: np.ndarray
+
+def compute_trends(batch: SeriesBatch, window: int = DEFAULT_WINDOW) -> TrendStats:
+    values = batch.values
+    valid = ~np.isnan(values)
+    rows = np.arange(len(values))[:, None]
+
+    count = batch.segment_sum(valid.astype(np.int64))
+
+    # x = days since the parcel's first reading keeps the sums small and well conditioned
+    x = (batch.days - batch.per_row(batch.days[batch.starts]))[:, None].astype(np.float64)
+    x = np.where(valid, x, 0.0)
+    y = np.where(valid, values, 0.0)
+
+    slope, r_squared = regression(
+        count, batch.segment_sum(x), batch.segment_sum(y),
+        batch.segment_sum(x * x), batch.segment_sum(x * y), batch.segment_sum(y * y),
+    )
+
+    # First/last non-null reading per series
+    if len(batch):
+        first_row = np.minimum.reduceat(np.where(valid, rows, len(values)), batch.starts, axis=0)
+        last_row = np.maximum.reduceat(np.where(valid, rows, -1), batch.starts, axis=0)
+    else:
+        first_row = last_row = np.zeros((0, values.shape[1]), dtype=np.int64)
+    has_data = count > 0
+    columns = np.arange(values.shape[1])[None, :]
+    first_value = np.where(has_data, values[np.where(has_data, first_row, 0), columns], np.nan)
+    last_value = np.where(has_data, values[np.where(has_data, last_row, 0), columns], np.nan)
+    first_day = np.where(has_data, batch.days[np.where(has_data, first_row, 0)], -1)
+    last_day = np.where(has_data, batch.days[np.where(has_data, last_row, 0)], -1)
+
+    # Mean of the last `window` non-null readings: rank each valid reading within its series
+    rank = np.cumsum(valid, axis=0) - batch.per_row(np.cumsum(valid, axis=0)[batch.starts] - valid[batch.starts])
+    in_window = valid & (rank > batch.per_row(count) - window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rolling_mean = batch.segment_sum(np.where(in_window, values, 0.0)) / np.minimum(count, window)
+    rolling_mean = np.where(has_data, rolling_mean, np.nan)
+
+    return assemble(count, first_value, last_value, first_day, last_day, slope, r_squared, rolling_mean)
+
+def regression(count, sum_x, sum_y, sum_xx, sum_xy, sum_yy):
+    """Least-squares slope and R² from raw sums (any shape); NaN where undefined."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        n = np.asarray(count, dtype=np.float64)
+        sxx = sum_xx - sum_x * sum_x / n
+        sxy = sum_xy - sum_x * sum_y / n
+        syy = sum_yy - sum_y * sum_y / n
+
+        slope = np.where((count >= 2) & (sxx > 0), sxy / sxx, np.nan)
+        # R² is undefined for a flat series (no variance to explain)
+        r_squared = np.where((count >= 2) & (sxx > 0) & (syy > 1e-12), sxy * sxy / (sxx * syy), np.nan)
+    return slope, np.clip(r_squared, 0.0, 1.0)
+
+def assemble(count, first_value, last_value, first_day, last_day, slope, r_squared, rolling_mean) -> TrendStats:
+    """Derive change, percent change and fitted change and bundle everything as TrendStats."""
+    change = last_value - first_value
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percent_change = np.where(first_value != 0, change / np.abs(first_value) * 100, np.nan)
+    fitted_change = slope * (last_day - first_day)
+
+    return TrendStats(
+        count=count, first_value=first_value, last_value=last_value,
+        first_day=first_day, last_day=last_day, change=change, percent_change=percent_change,
+        slope_per_day=slope, fitted_change=fitted_change, r_squared=r_squared, rolling_mean=rolling_mean,
+    )
@@ -0,0 +1,114 @@
+"""Admin-only endpoints (profiles, traces, diagnostics, fleet analytics), guarded by the X-Admin-Token header."""
+import hmac
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.api.streaming import stream_trends
+from app.services.trend_analysis_service import TrendAnalysisService, trend_cache
+from app.services.anomaly_service import AnomalyService
+from app.services.alert_rule_service import AlertRuleService
+from app.services.cohort_service import CohortService
+from app.services.carbon_service import CarbonService
+from app.services.forecast_service import ForecastService
+from app.api.schemas import AlertItem, AlertNotifyResponse, AlertScanResponse, CohortRefreshResponse
+from datetime import date
+from typing import Optional
+from app.storage.database import get_db, get_read_db
+from app.storage.result_cache import CACHES
+from app.observability.profiling import list_profiles, get_profile_path
+from app.observability.tracing import trace_store
+
+def require_admin(x_admin_token: str = Header(default="")):
+    """Reject requests without the configured admin token."""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_TOKEN not set)")
+    # Bytes: compare_digest raises TypeError on str with non-ASCII characters
+    if not hmac.compare_digest(x_admin_token.encode(), settings.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+@router.get("/profiles")
+def get_profiles():
+    """List recent request profiles, newest first."""
+    return {"profiles": list_profiles()}
+
+@router.get("/profiles/{name}")
+def download_profile(name: str):
+    """Download a profile in folded-stack format (flamegraph.pl, speedscope, inferno)."""
+    path = get_profile_path(name)
+    if not path:
+        raise HTTPException(status_code=404, detail=f"Profile {name} not found")
+    return FileResponse(path, media_type="text/plain", filename=name)
+
+@router.get("/traces")
+def get_traces(limit: int = Query(default=20, ge=1, le=200)):
+    """Recent request traces, newest first, with db / llm / format time breakdowns."""
+    return {"traces": [trace.summary() for trace in trace_store.recent(limit)]}
+
+@router.get("/traces/{trace_id}")
+def get_trace(trace_id: str):
+    """All spans of one trace (the X-Trace-Id response header)."""
+    trace = trace_store.get(trace_id)
+    if not trace:
+        raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found")
+    return trace.to_dict()
+
+@router.get("/cache")
+def get_cache_stats():
+    """Entries, hits, misses and hit rate of each result cache (this worker)."""
+    return {"caches": {name: cache.stats() for name, cache in CACHES.items()}}
+
+@router.get("/trends")
+def get_fleet_trends(summary: bool = Query(default=False),
+                     db: Session = Depends(get_db), read_db: Session = Depends(get_read_db)):
+    """Trend analysis for every parcel, streamed as one JSON object per line."""
+    session = read_db or db
+    trend_service = TrendAnalysisService(session)
+    return stream_trends(trend_service.iter_bulk_trends(include_summary=summary), session)
+
+@router.post("/alerts/scan", response_model=AlertScanResponse)
+def scan_alerts(farmer_id: Optional[str] = None, db: Session = Depends(get_db)):
+    """Run the anomaly detectors over every parcel's history (or one farmer's) and record new alerts."""
+    return AnomalyService(db).scan(farmer_id)
+
+@router.post("/alerts/notify", response_model=AlertNotifyResponse)
+def notify_alerts(db: Session = Depends(get_db)):
+    """Send the rule alert notifications held back during quiet hours (run after they end, e.g. from cron)."""
+    return AlertRuleService(db).flush_pending()
+
+@router.post("/cohorts/refresh", response_model=CohortRefreshResponse)
+def refresh_cohorts(db: Session = Depends(get_db)):
+    """Recompute the per-crop percentile distributions of every index (run nightly, e.g. from cron)."""
+    return CohortService(db).refresh()
+
+@router.get("/carbon")
+def get_fleet_carbon(by: str = Query(default="crop", pattern="^(crop|farmer)$"),
+                     db: Session = Depends(get_db), read_db: Session = Depends(get_read_db)):
+    """Carbon stock and CO2e totals over every parcel, rolled up per crop or per farmer."""
+    return CarbonService(read_db or db).fleet_summary(by)
+
+@router.post("/carbon/rebuild")
+def rebuild_carbon(db: Session = Depends(get_db)):
+    """Recompute every parcel's carbon balance (after changing CARBON_BULK_DENSITY or CARBON_DEPTH_CM)."""
+    parcels = CarbonService(db).rebuild()
+    db.commit()
+    return {"parcels": parcels}
+
+@router.post("/forecasts/rebuild")
+def rebuild_forecasts(db: Session = Depends(get_db)):
+    """Recompute every parcel's next-pass forecasts (after changing FORECAST_WINDOW or FORECAST_INTERVAL_DAYS)."""
+    parcels = ForecastService(db).rebuild()
+    db.commit()
+    # Cached trends embed the forecasts they were built with
+    trend_cache.clear()
+    return {"parcels": parcels}
+
+@router.get("/alerts", response_model=list[AlertItem])
+def get_alerts(farmer_id: Optional[str] = None, parcel_id: Optional[str] = None, kind: Optional[str] = None,
+               severity: Optional[str] = None, since: Optional[date] = None,
+               limit: int = Query(default=100, ge=1, le=1000),
+               db: Session = Depends(get_db), read_db: Session = Depends(get_read_db)):
+    """Recorded anomaly and rule alerts across all parcels, newest reading first."""
+    return AnomalyService(read_db or db).list_alerts(farmer_id, parcel_id, kind, severity, since, limit)
@@ -1,19 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import Union
-from app.storage.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, Union
+from datetime import date
+from app.storage.database import get_db, get_read_db, get_async_db, async_db_enabled
 from app.services.intent_service import IntentService
 from app.services.farmer_service import FarmerService
 from app.services.report_service import ReportService
 from app.services.trend_analysis_service import TrendAnalysisService
-from app.api.schemas import MessageRequest, MessageResponse, LinkRequest, LinkResponse, ReportItem, ParcelListResponse, ParcelDetailsResponse
+from app.services.anomaly_service import AnomalyService
+from app.services.farm_summary_service import FarmSummaryService
+from app.services.carbon_service import CarbonService
+from app.services.gapfill_service import GapFillService
+from app.services.index_ingest_service import IndexIngestService, read_records
+from app.repositories.farmer_repo import FarmerRepository
+from app.repositories.parcel_repo import ParcelRepository
+from app.api.streaming import stream_trends
+from app.api.schemas import MessageRequest, MessageResponse, LinkRequest, LinkResponse, ReportItem, ParcelListResponse, ParcelDetailsResponse, AlertItem, IngestResponse, FarmSummaryResponse
 
 router = APIRouter(tags=["message"])
 
-@router.post("/message", response_model=Union[MessageResponse, ParcelListResponse, ParcelDetailsResponse])
-def message(payload: MessageRequest, db: Session = Depends(get_db)):
-    intent_service = IntentService(db)
-    reply = intent_service.handle_message(payload.from_, payload.text)
+def _handle_message(db: Session, phone: str, text: str, read_db: Session = None):
+    intent_service = IntentService(db, read_db)
+    reply = intent_service.handle_message(phone, text)
     
     # If reply is a dict (structured response), return it directly
     if isinstance(reply, dict):
@@ -22,6 +32,17 @@ def message(payload: MessageRequest, db: Session = Depends(get_db)):
     # Otherwise, wrap string reply in MessageResponse
     return {"reply": reply}
 
+if async_db_enabled():
+    @router.post("/message", response_model=Union[MessageResponse, ParcelListResponse, ParcelDetailsResponse])
+    async def message(payload: MessageRequest, db: AsyncSession = Depends(get_async_db)):
+        # The service stack runs inside the async session's greenlet, so DB waits
+        # yield to the event loop instead of holding a threadpool thread
+        return await db.run_sync(_handle_message, payload.from_, payload.text)
+else:
+    @router.post("/message", response_model=Union[MessageResponse, ParcelListResponse, ParcelDetailsResponse])
+    def message(payload: MessageRequest, db: Session = Depends(get_db), read_db: Session = Depends(get_read_db)):
+        return _handle_message(db, payload.from_, payload.text, read_db)
+
 @router.post("/link", response_model=LinkResponse)
 def link_account(payload: LinkRequest, db: Session = Depends(get_db)):
     farmer_service = FarmerService(db)
@@ -29,13 +50,13 @@ def link_account(payload: LinkRequest, db: Session = Depends(get_db)):
     return {"reply": reply}
 
 @router.post("/generate-reports", response_model=list[ReportItem])
-def generate_reports(db: Session = Depends(get_db)):
-    report_service = ReportService(db)
+def generate_reports(db: Session = Depends(get_db), read_db: Session = Depends(get_read_db)):
+    report_service = ReportService(db, read_db)
     reports = report_service.generate_reports()
     return reports
 
 @router.get("/parcel/{parcel_id}/trends")
-def get_parcel_trends(parcel_id: str, db: Session = Depends(get_db)):
+def get_parcel_trends(parcel_id: str, db: Session = Depends(get_db), read_db: Session = Depends(get_read_db)):
     """
     Analyze trends for a parcel's indices over time.
     
@@ -44,10 +65,122 @@ def get_parcel_trends(parcel_id: str, db: Session = Depends(get_db)):
     Returns trend analysis showing if indices are increasing, decreasing, or stable.
     Uses standard thresholds optimized for each index type.
     """
-    trend_service = TrendAnalysisService(db)
+    trend_service = TrendAnalysisService(read_db or db)
     trends = trend_service.analyze_parcel_trends(parcel_id)
     
     if trends.get("status") == "insufficient_data":
         raise HTTPException(status_code=400, detail=trends["message"])
     
     return trends
+
+@router.get("/parcel/{parcel_id}/carbon")
+def get_parcel_carbon(parcel_id: str, db: Session = Depends(get_db), read_db: Session = Depends(get_read_db)):
+    """
+    Soil carbon stock (t C/ha), CO2e (t) and change since the previous reading
+    for every SOC reading of a parcel.
+    """
+    history = CarbonService(read_db or db).parcel_history(parcel_id)
+    if history is None:
+        raise HTTPException(status_code=404, detail=f"Parcel {parcel_id} not found")
+    return history
+
+@router.get("/parcel/{parcel_id}/series")
+def get_parcel_series(parcel_id: str, db: Session = Depends(get_db), read_db: Session = Depends(get_read_db)):
+    """
+    A parcel's readings with missing values gap-filled (see GAPFILL_MAX_DAYS).
+    
+    Each reading's "filled" maps the estimated indices to "interpolated" or
+    "carried_forward"; values that could not be filled stay null.
+    """
+    session = read_db or db
+    if not ParcelRepository(session).get_by_id(parcel_id):
+        raise HTTPException(status_code=404, detail=f"Parcel {parcel_id} not found")
+    return GapFillService(session).parcel_series(parcel_id)
+
+@router.get("/farmers/{farmer_id}/trends")
+def get_farmer_trends(farmer_id: str, summary: bool = Query(default=False),
+                      db: Session = Depends(get_db), read_db: Session = Depends(get_read_db)):
+    """
+    Trend analysis for all parcels of a farmer, streamed as one JSON object per line.
+    
+    - **farmer_id**: The farmer identifier
+    - **summary**: Also generate a trend summary per parcel (one summarizer call each)
+    
+    Series are fetched with a single query and analyzed in vectorized batches.
+    Parcels with fewer than 2 readings are returned with status "insufficient_data".
+    """
+    session = read_db or db
+    if not FarmerRepository(session).get_by_id(farmer_id):
+        raise HTTPException(status_code=404, detail=f"Farmer {farmer_id} not found")
+    
+    trend_service = TrendAnalysisService(session)
+    return stream_trends(trend_service.iter_bulk_trends(farmer_id, include_summary=summary), session)
+
+@router.get("/farmers/{farmer_id}/summary", response_model=FarmSummaryResponse)
+def get_farmer_summary(farmer_id: str, worst: int = Query(default=5, ge=0, le=100),
+                       db: Session = Depends(get_db), read_db: Session = Depends(get_read_db)):
+    """
+    Overview of a farmer's holding from each parcel's latest reading.
+    
+    - **worst**: number of parcels with the weakest readings to list
+    
+    Returns area-weighted average NDVI/NDMI/SOC, area per crop, parcel counts per
+    overall status (as in the parcel summaries) and the worst parcels, aggregated
+    in SQL whatever the number of parcels.
+    """
+    session = read_db or db
+    if not FarmerRepository(session).get_by_id(farmer_id):
+        raise HTTPException(status_code=404, detail=f"Farmer {farmer_id} not found")
+    return FarmSummaryService(session).get_summary(farmer_id, worst=worst)
+
+@router.get("/farmers/{farmer_id}/carbon")
+def get_farmer_carbon(farmer_id: str, db: Session = Depends(get_db), read_db: Session = Depends(get_read_db)):
+    """
+    Carbon stock and CO2e of a farmer's parcels: totals, per crop and per parcel,
+    with the change since each parcel's previous and first SOC reading.
+    
+    Read from the balances stored per parcel, kept current as readings are ingested.
+    """
+    session = read_db or db
+    if not FarmerRepository(session).get_by_id(farmer_id):
+        raise HTTPException(status_code=404, detail=f"Farmer {farmer_id} not found")
+    return CarbonService(session).farmer_summary(farmer_id)
+
+@router.get("/farmers/{farmer_id}/alerts", response_model=list[AlertItem])
+def get_farmer_alerts(farmer_id: str, kind: Optional[str] = None, severity: Optional[str] = None,
+                      since: Optional[date] = None, limit: int = Query(default=100, ge=1, le=1000),
+                      db: Session = Depends(get_db), read_db: Session = Depends(get_read_db)):
+    """
+    Anomaly alerts for a farmer's parcels, newest reading first.
+    
+    - **kind**: zscore, drop, range or rule
+    - **severity**: warning or critical
+    - **since**: only readings on or after this date
+    """
+    session = read_db or db
+    if not FarmerRepository(session).get_by_id(farmer_id):
+        raise HTTPException(status_code=404, detail=f"Farmer {farmer_id} not found")
+    return AnomalyService(session).list_alerts(farmer_id, kind=kind, severity=severity, since=since, limit=limit)
+
+@router.post("/indices:batch", response_model=IngestResponse)
+async def ingest_indices(request: Request,
+                         format: Optional[str] = Query(default=None, pattern="^(jsonl|csv)$"),
+                         db: Session = Depends(get_db)):
+    """
+    Upsert many index readings at once, keyed on (parcel_id, date).
+    
+    The body is JSON lines (one reading object per line) or CSV with a header
+    row; **format** defaults to csv for a text/csv body and jsonl otherwise.
+    Invalid readings are reported by line and the rest are stored. Sending the
+    same batch again changes nothing. The running stats, carbon balances and
+    forecasts of the parcels written are updated with them.
+    """
+    if format is None:
+        format = "csv" if request.headers.get("content-type", "").startswith("text/csv") else "jsonl"
+    body = await request.body()
+    try:
+        lines = body.decode("utf-8-sig").splitlines()
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Body must be UTF-8 text")
+    # Validation and writes are blocking; keep them off the event loop
+    return await run_in_threadpool(IndexIngestService(db).ingest, read_records(lines, format))
@@ -0,0 +1,11 @@
+"""Prometheus scrape endpoint."""
+from fastapi import APIRouter, Response
+from app.observability.metrics import render_metrics
+
+router = APIRouter(tags=["metrics"])
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    """Expose request, intent, report-run and DB pool metrics for Prometheus."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
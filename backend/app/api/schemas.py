@@ -29,6 +29,13 @@ class ParcelIndicesDetail(BaseModel):
     potassium: float | None = None
     ph: float | None = None
 
+class IndexForecast(BaseModel):
+    date: str  # Expected next pass
+    value: float
+    lower: float | None = None  # 95% prediction interval; None from fewer than 3 readings
+    upper: float | None = None
+    points: int  # Readings the forecast is based on
+
 class ParcelDetailsResponse(BaseModel):
     parcel_id: str
     name: str
@@ -36,6 +43,8 @@ class ParcelDetailsResponse(BaseModel):
     crop: str
     data_date: str | None = None
     indices: ParcelIndicesDetail | None = None
+    filled: dict[str, str] | None = None  # Gap-filled index -> "interpolated" / "carried_forward"
+    forecast: dict[str, IndexForecast] | None = None
 
 # /link
 class LinkRequest(BaseModel):
@@ -49,6 +58,7 @@ class LinkResponse(BaseModel):
 class IndexDetail(BaseModel):
     value: float
     status: str
+    percentile: int | None = None  # Among the same crop's parcels in the reading's window
 
 class ParcelIndices(BaseModel):
     ndvi: IndexDetail
@@ -75,3 +85,91 @@ class ReportItem(BaseModel):
     report_type: str
     generated_at: str
     parcels: list[ParcelReportDetail]
+
+# /alerts
+class AlertItem(BaseModel):
+    id: str
+    parcel_id: str
+    date: str
+    index_name: str
+    kind: str
+    severity: str
+    value: float
+    reference: float | None = None
+    score: float
+    message: str
+    created_at: str
+    rule: str | None = None
+    notification: str | None = None
+
+class AlertScanResponse(BaseModel):
+    parcels: int
+    anomalies: int
+    new_alerts: int
+
+class AlertNotifyResponse(BaseModel):
+    sent: int
+    pending: int
+    duplicate: int
+    failed: int
+    no_phone: int
+
+# /admin/cohorts/refresh
+class CohortRefreshResponse(BaseModel):
+    cohorts: int
+    distributions: int
+
+# /indices:batch
+class IngestError(BaseModel):
+    line: int
+    error: str
+
+class IngestResponse(BaseModel):
+    received: int
+    inserted: int
+    updated: int
+    unchanged: int
+    rejected: int
+    alerts: int
+    errors: list[IngestError]
+
+# /farmers/{id}/summary
+class FarmAverages(BaseModel):
+    ndvi: float | None = None
+    ndmi: float | None = None
+    soc: float | None = None
+
+class CropArea(BaseModel):
+    crop: str
+    parcels: int
+    area_ha: float
+
+class StatusCounts(BaseModel):
+    excellent: int
+    good: int
+    moderate: int
+    needs_attention: int
+    no_data: int
+
+class WorstParcel(BaseModel):
+    parcel_id: str
+    name: str
+    crop: str
+    area_ha: float
+    data_date: str
+    ndvi: float | None = None
+    ndmi: float | None = None
+    soc: float | None = None
+    good: int
+    moderate: int
+    poor: int
+    status: str
+
+class FarmSummaryResponse(BaseModel):
+    farmer_id: str
+    parcels: int
+    area_ha: float
+    averages: FarmAverages
+    crops: list[CropArea]
+    statuses: StatusCounts
+    worst_parcels: list[WorstParcel]
@@ -0,0 +1,16 @@
+"""Streamed responses shared by the routers."""
+import json
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+def stream_trends(trends, db: Session) -> StreamingResponse:
+    """Stream per-parcel trend dicts as newline-delimited JSON."""
+    def lines():
+        # The request's session is released before a streamed body is sent;
+        # it reconnects for the query and is closed again once the stream ends
+        try:
+            for parcel_trends in trends:
+                yield json.dumps(parcel_trends) + "\n"
+        finally:
+            db.close()
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -1,9 +1,12 @@
 """WhatsApp webhook endpoints for receiving messages from Twilio."""
+from typing import Union
 from fastapi import APIRouter, Request, Depends, HTTPException
 from sqlalchemy.orm import Session
-from app.storage.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.storage.database import get_db, get_read_db, get_async_db, async_db_enabled
 from app.config import settings
 import logging
+from app.observability.tracing import traced
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +22,7 @@ def get_messenger_lazy():
     return get_messenger()
 
 
+@traced("format")
 def format_whatsapp_message(data) -> str:
     """Format response data into a nice WhatsApp message."""
     # If already a string, check if it needs formatting
@@ -70,17 +74,19 @@ def format_whatsapp_message(data) -> str:
             if data['indices']:
                 msg += f"📅 Data from: {data['data_date']}\n\n"
                 indices = data['indices']
+                # Gap-filled values are marked as estimates
+                est = {name: " (est.)" for name in data.get('filled') or {}}
                 msg += "*Vegetation Indices:*\n"
-                if indices.get('ndvi'): msg += f"  NDVI: {indices['ndvi']}\n"
-                if indices.get('ndmi'): msg += f"  NDMI: {indices['ndmi']}\n"
-                if indices.get('ndwi'): msg += f"  NDWI: {indices['ndwi']}\n"
+                if indices.get('ndvi'): msg += f"  NDVI: {indices['ndvi']}{est.get('ndvi', '')}\n"
+                if indices.get('ndmi'): msg += f"  NDMI: {indices['ndmi']}{est.get('ndmi', '')}\n"
+                if indices.get('ndwi'): msg += f"  NDWI: {indices['ndwi']}{est.get('ndwi', '')}\n"
                 
                 msg += "\n*Soil Properties:*\n"
-                if indices.get('soc'): msg += f"  SOC: {indices['soc']}%\n"
-                if indices.get('nitrogen'): msg += f"  Nitrogen: {indices['nitrogen']} ppm\n"
-                if indices.get('phosphorus'): msg += f"  Phosphorus: {indices['phosphorus']} ppm\n"
-                if indices.get('potassium'): msg += f"  Potassium: {indices['potassium']} ppm\n"
-                if indices.get('ph'): msg += f"  pH: {indices['ph']}\n"
+                if indices.get('soc'): msg += f"  SOC: {indices['soc']}%{est.get('soc', '')}\n"
+                if indices.get('nitrogen'): msg += f"  Nitrogen: {indices['nitrogen']} ppm{est.get('nitrogen', '')}\n"
+                if indices.get('phosphorus'): msg += f"  Phosphorus: {indices['phosphorus']} ppm{est.get('phosphorus', '')}\n"
+                if indices.get('potassium'): msg += f"  Potassium: {indices['potassium']} ppm{est.get('potassium', '')}\n"
+                if indices.get('ph'): msg += f"  pH: {indices['ph']}{est.get('ph', '')}\n"
             else:
                 msg += "⚠️ No data available yet."
             
@@ -91,7 +97,11 @@ def format_whatsapp_message(data) -> str:
 
 
 @router.post("/whatsapp")
-async def receive_whatsapp_message(request: Request, db: Session = Depends(get_db)):
+async def receive_whatsapp_message(
+    request: Request,
+    db: Union[Session, AsyncSession] = Depends(get_async_db if async_db_enabled() else get_db),
+    read_db: Session = Depends(get_read_db),
+):
     """
     Webhook endpoint for receiving WhatsApp messages from Twilio.
     
@@ -138,8 +148,14 @@ async def receive_whatsapp_message(request: Request, db: Session = Depends(get_d
         
         # Process message using existing intent service
         IntentService = get_intent_service_lazy()
-        intent_service = IntentService(db)
-        response_data = intent_service.handle_message(clean_phone, message_body)
+        if isinstance(db, AsyncSession):
+            # Async engine: DB waits yield to the event loop instead of blocking it
+            response_data = await db.run_sync(
+                lambda session: IntentService(session).handle_message(clean_phone, message_body)
+            )
+        else:
+            intent_service = IntentService(db, read_db)
+            response_data = intent_service.handle_message(clean_phone, message_body)
         
         # Format response for WhatsApp
         response_text = format_whatsapp_message(response_data)
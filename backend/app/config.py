@@ -8,13 +8,84 @@ DB_PATH = BACKEND_DIR / "farmers.sqlite"
 
 class Settings(BaseSettings):
     DATABASE_URL: str = f"sqlite:///{DB_PATH}"
-    
+
+    # SQLite Storage Profile
+    SQLITE_PROFILE: str = "default"  # Options: "default", "tuned" (WAL, pragmas, read pool, single writer)
+    SQLITE_CACHE_SIZE_KB: int = 65536  # Page cache per connection (64 MiB)
+    SQLITE_MMAP_SIZE: int = 268435456  # Memory-mapped I/O window (256 MiB)
+    SQLITE_READ_POOL_SIZE: int = 8  # Read-only connections used by the read repositories
+
+    # Connection Pool (PostgreSQL and other server databases)
+    DB_POOL_SIZE: int = 10  # Persistent connections per worker process
+    DB_MAX_OVERFLOW: int = 20  # Extra connections allowed under bursts
+    DB_POOL_TIMEOUT: int = 30  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # Recycle connections older than this (seconds)
+    REPORT_STREAM_BATCH_SIZE: int = 500  # Rows fetched per round trip when streaming report data
+
+    # Async Database Configuration (Optional)
+    USE_ASYNC_DB: str = "false"  # Serve /message and the webhook through the async engine
+    ASYNC_DATABASE_URL: Optional[str] = None  # Derived from DATABASE_URL when not set (sqlite -> aiosqlite)
+
     # LLM Configuration (Optional)
     USE_LLM: str = "false"
     LLM_PROVIDER: str = "gemini"
     LLM_API_KEY: Optional[str] = None
     LLM_MODEL: str = "gemma-3-12b"  # Default model, can be overridden in .env (e.g., gemma-2-9b-it)
     
+    # Query Instrumentation
+    DEBUG: str = "false"  # Adds X-DB-Query-Count / X-DB-Time-Ms headers to every response
+    SLOW_QUERY_MS: float = 100.0  # Log single statements slower than this
+    QUERY_COUNT_WARN_THRESHOLD: int = 50  # Log requests issuing more queries than this
+    DB_TIME_WARN_MS: float = 500.0  # Log requests spending longer than this in the database
+    
+    # Metrics
+    METRICS_ENABLED: str = "true"  # Prometheus /metrics endpoint and per-route latency histograms
+    
+    # Admin & Profiling
+    ADMIN_TOKEN: Optional[str] = None  # Required in the X-Admin-Token header for /admin endpoints
+    PROFILING_ENABLED: str = "false"  # Installs the profiling middleware (no overhead when false)
+    PROFILING_SAMPLE_RATE: float = 0.0  # Fraction of requests profiled without the X-Profile header
+    PROFILING_INTERVAL_MS: float = 5.0  # Stack sampling interval
+    PROFILE_DIR: Optional[str] = None  # Defaults to backend/profiles
+    PROFILE_KEEP: int = 50  # Most recent profiles kept on disk
+
+    # Tracing
+    TRACING_ENABLED: str = "false"  # Record spans per request (service, db, ai, llm, format)
+    TRACE_BUFFER_SIZE: int = 200  # Most recent traces kept in memory for /admin/traces
+    TRACE_FILE: Optional[str] = None  # Also append finished traces to this JSON lines file
+
+    # Result Caches
+    TREND_CACHE_ENABLED: str = "true"  # Reuse trend results until a parcel gets new readings
+    TREND_CACHE_SIZE: int = 10000  # Entries kept in memory per worker (least recently used evicted)
+    SUMMARY_CACHE_ENABLED: str = "true"  # Reuse parcel summaries until the parcel gets new readings
+    SUMMARY_CACHE_SIZE: int = 50000  # Entries kept in memory per worker (least recently used evicted)
+    GAPFILL_CACHE_ENABLED: str = "true"  # Reuse gap-filled series until a parcel gets new readings
+    GAPFILL_CACHE_SIZE: int = 10000  # Entries kept in memory per worker (least recently used evicted)
+    RESULT_CACHE_PATH: Optional[str] = None  # SQLite file persisting cached results across restarts and workers
+
+    # Alert Rules
+    ALERT_RULES_ENABLED: str = "true"  # Check new readings against the alert rules and notify farmers
+    ALERT_RULES: Optional[str] = None  # e.g. "ndvi drop 0.1; ph below 5.5 critical" (defaults in app/analytics/alert_rules.py)
+    ALERT_DEDUP_HOURS: float = 24.0  # The same rule on the same parcel notifies a farmer at most once per window
+    ALERT_QUIET_HOURS: Optional[str] = "21-7"  # Local hours (start-end) when notifications are held back
+    ALERT_TIMEZONE: str = "Europe/Bucharest"  # Time zone of the quiet hours
+    ALERT_MAX_LINES: int = 10  # Alerts listed in one message; the rest are summarized as a count
+
+    # Gap Filling
+    GAPFILL_MAX_DAYS: int = 45  # Missing values are interpolated between readings at most this far apart, or carried forward this long; 0 disables
+
+    # Forecasts (changing these requires POST /admin/forecasts/rebuild)
+    FORECAST_WINDOW: int = 6  # Latest readings each index's next-pass forecast is fitted to
+    FORECAST_INTERVAL_DAYS: int = 15  # Revisit interval assumed for parcels with a single reading
+
+    # Crop Cohort Percentiles (rebuilt by POST /admin/cohorts/refresh, e.g. nightly)
+    COHORT_WINDOW_DAYS: int = 30  # Readings of a crop are compared within windows of this many days
+    COHORT_MIN_PARCELS: int = 5  # Smaller cohorts get no percentiles
+
+    # Soil Carbon (changing these requires POST /admin/carbon/rebuild)
+    CARBON_BULK_DENSITY: float = 1.3  # Soil bulk density in g/cm3
+    CARBON_DEPTH_CM: float = 30.0  # Sampling depth the SOC readings stand for
+
     # Messaging Configuration
     MESSAGING_PROVIDER: str = "mock"  # Options: "twilio", "meta", "mock"
     
@@ -22,6 +93,7 @@ class Settings(BaseSettings):
     TWILIO_ACCOUNT_SID: Optional[str] = None
     TWILIO_AUTH_TOKEN: Optional[str] = None
     TWILIO_PHONE_NUMBER: Optional[str] = None  # Twilio WhatsApp number (e.g., +14155238886)
+    TWILIO_API_BASE_URL: Optional[str] = None  # Send Twilio API calls elsewhere (e.g., the load-test stand-in)
     
     model_config = SettingsConfigDict(
         env_file=".env",
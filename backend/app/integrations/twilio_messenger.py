@@ -2,19 +2,36 @@
 try:
     from twilio.rest import Client
     from twilio.request_validator import RequestValidator
+    from twilio.http.http_client import TwilioHttpClient
     TWILIO_AVAILABLE = True
 except ImportError:
     TWILIO_AVAILABLE = False
     Client = None
     RequestValidator = None
+    TwilioHttpClient = object
 
 from app.integrations.base_messenger import BaseMessenger
 from app.config import settings
+from urllib.parse import urlsplit, urlunsplit
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+class BaseUrlHttpClient(TwilioHttpClient):
+    """Twilio HTTP client sending every API request to another host (e.g. a local stand-in)."""
+    
+    def __init__(self, base_url: str, **kwargs):
+        super().__init__(**kwargs)
+        base = urlsplit(base_url)
+        self.scheme, self.netloc = base.scheme, base.netloc
+    
+    def request(self, method, url, *args, **kwargs):
+        parts = urlsplit(url)
+        url = urlunsplit((self.scheme, self.netloc, parts.path, parts.query, parts.fragment))
+        return super().request(method, url, *args, **kwargs)
+
+
 class TwilioMessenger(BaseMessenger):
     """Twilio WhatsApp messaging implementation."""
     
@@ -33,7 +50,9 @@ class TwilioMessenger(BaseMessenger):
                 "Please set TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, and TWILIO_PHONE_NUMBER in .env"
             )
         
-        self.client = Client(self.account_sid, self.auth_token)
+        # TWILIO_API_BASE_URL points the REST client at a stand-in (load tests); api.twilio.com otherwise
+        http_client = BaseUrlHttpClient(settings.TWILIO_API_BASE_URL) if settings.TWILIO_API_BASE_URL else None
+        self.client = Client(self.account_sid, self.auth_token, http_client=http_client)
         self.validator = RequestValidator(self.auth_token)
         logger.info("Twilio messenger initialized successfully")
     
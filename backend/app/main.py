@@ -1,6 +1,11 @@
 from fastapi import FastAPI
 from app.storage.database import init_db # load Json files and create tables 
-from app.api import manage, whatsapp_webhook #import router modules
+from app.api import manage, whatsapp_webhook, metrics, admin #import router modules
+from app.config import settings
+from app.observability.queries import QueryStatsMiddleware, install_query_instrumentation
+from app.observability.metrics import MetricsMiddleware
+from app.observability.profiling import ProfilingMiddleware
+from app.observability.tracing import TracingMiddleware, install_sql_spans
 
 # Ensure python-multipart is loaded for form data parsing
 try:
@@ -10,12 +15,33 @@ except ImportError:
 
 app = FastAPI(title="Farmers Parcel Assistant API")
 
+# Per-request query count / DB time (catches N+1 regressions in the services)
+install_query_instrumentation()
+app.add_middleware(QueryStatsMiddleware)
+
+# Opt-in request profiling (X-Profile: 1 + X-Admin-Token, or PROFILING_SAMPLE_RATE)
+if str(settings.PROFILING_ENABLED).lower() == "true":
+    app.add_middleware(ProfilingMiddleware)
+
+# Request tracing (service / db / ai / llm / format spans, browsable under /admin/traces)
+if str(settings.TRACING_ENABLED).lower() == "true":
+    install_sql_spans()
+    app.add_middleware(TracingMiddleware)
+
+# Prometheus request counts / latency histograms (outermost, so it times the whole request)
+metrics_enabled = str(settings.METRICS_ENABLED).lower() == "true"
+if metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
 @app.on_event("startup") #when fast api starts
 def startup():
     init_db() 
 
 app.include_router(manage.router) #takes routes defined in manage.py and mounts them to the app
 app.include_router(whatsapp_webhook.router) # WhatsApp webhook for Twilio/Meta integration
+if metrics_enabled:
+    app.include_router(metrics.router) # Prometheus scrape endpoint
+app.include_router(admin.router) # Admin-only diagnostics (profiles, traces)
 
 @app.get("/") # verify that the API is running
 def root():
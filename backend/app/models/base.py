@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, Date, ForeignKey
+from sqlalchemy import Column, String, Float, Date, DateTime, Integer, ForeignKey, Index
 from sqlalchemy.orm import declarative_base, relationship
 
 #ORM models
@@ -16,6 +16,8 @@ class Farmer(Base):
 
 class Parcel(Base):
     __tablename__ = "parcels"
+    # A farmer's parcels are looked up by farmer for lists, reports and the farm summary
+    __table_args__ = (Index("ix_parcels_farmer_id", "farmer_id"),)
     
     id = Column(String, primary_key=True)
     farmer_id = Column(String, ForeignKey("farmers.id"), nullable=False)
@@ -28,8 +30,10 @@ class Parcel(Base):
 
 class ParcelIndex(Base):
     __tablename__ = "parcel_indices"
+    # One reading per parcel and day: the key batch ingestion upserts on, and the parcel lookup index
+    __table_args__ = (Index("ux_parcel_indices_parcel_date", "parcel_id", "date", unique=True),)
     
-    id = Column(String, primary_key=True)
+    id = Column(String, primary_key=True)  # {parcel_id}_{yyyymmdd} for ingested readings ({parcel_id}_IDX{n} from the seed data)
     parcel_id = Column(String, ForeignKey("parcels.id"), nullable=False)
     date = Column(Date, nullable=False)
     ndvi = Column(Float, nullable=True)
@@ -40,9 +44,93 @@ class ParcelIndex(Base):
     phosphorus = Column(Float, nullable=True)
     potassium = Column(Float, nullable=True)
     ph = Column(Float, nullable=True)
+    revision = Column(Integer, nullable=True, default=0)  # Times ingest replaced the values (NULL = 0); versions cached results
     
     parcel = relationship("Parcel", back_populates="indices")
 
+class ParcelIndexStats(Base):
+    """Running aggregates of one index of a parcel, updated when readings are ingested."""
+    __tablename__ = "parcel_index_stats"
+    
+    parcel_id = Column(String, ForeignKey("parcels.id"), primary_key=True)
+    index_name = Column(String, primary_key=True)  # An index column, or "_readings" for whole readings
+    count = Column(Integer, nullable=False)
+    origin = Column(Date, nullable=False)  # t = days since origin in the sums below
+    sum_t = Column(Float, nullable=False)
+    sum_tt = Column(Float, nullable=False)
+    sum_y = Column(Float, nullable=False)
+    sum_yy = Column(Float, nullable=False)
+    sum_ty = Column(Float, nullable=False)
+    first_date = Column(Date, nullable=False)
+    first_value = Column(Float, nullable=True)
+    last_date = Column(Date, nullable=False)
+    last_value = Column(Float, nullable=True)
+    recent = Column(String, nullable=False)  # JSON [[date, value], ...] of the last readings
+    revision = Column(Integer, nullable=True)  # "_readings" row: sum of the parcel's reading revisions when aggregated
+
+class ParcelCarbon(Base):
+    """Soil carbon balance of a parcel from its SOC readings, refreshed as readings are ingested."""
+    __tablename__ = "parcel_carbon"
+    
+    parcel_id = Column(String, ForeignKey("parcels.id"), primary_key=True)
+    soc_date = Column(Date, nullable=True)  # Latest SOC reading; the columns below are NULL without one
+    soc = Column(Float, nullable=True)
+    stock_t_c_ha = Column(Float, nullable=True)
+    co2e_t = Column(Float, nullable=True)  # Whole-parcel stock in t CO2e
+    previous_date = Column(Date, nullable=True)  # Previous SOC reading (NULL with a single one)
+    change_co2e_t = Column(Float, nullable=True)
+    baseline_date = Column(Date, nullable=True)  # First SOC reading
+    baseline_change_co2e_t = Column(Float, nullable=True)
+
+class ParcelForecast(Base):
+    """Next-pass forecast of one index of a parcel, refreshed as readings are ingested."""
+    __tablename__ = "parcel_forecasts"
+    
+    parcel_id = Column(String, ForeignKey("parcels.id"), primary_key=True)
+    index_name = Column(String, primary_key=True)
+    base_date = Column(Date, nullable=False)  # Latest reading of the parcel
+    forecast_date = Column(Date, nullable=False)  # Expected next pass
+    value = Column(Float, nullable=False)
+    lower = Column(Float, nullable=True)  # 95% prediction interval; NULL from fewer than 3 values
+    upper = Column(Float, nullable=True)
+    points = Column(Integer, nullable=False)  # Measured values the forecast is based on
+
+class CropPercentiles(Base):
+    """Percentile distribution of one index over the parcels of a crop in one date window."""
+    __tablename__ = "crop_percentiles"
+    
+    crop = Column(String, primary_key=True)
+    window_start = Column(Date, primary_key=True)  # First day of the COHORT_WINDOW_DAYS-day window
+    index_name = Column(String, primary_key=True)
+    window_days = Column(Integer, nullable=False)
+    parcels = Column(Integer, nullable=False)  # Cohort size: parcels with a value in the window
+    points = Column(String, nullable=False)  # JSON [0th, 1st, ..., 100th percentile]
+    computed_at = Column(DateTime, nullable=False)
+
+class Alert(Base):
+    """An anomalous reading found by the anomaly detectors or an alert rule."""
+    __tablename__ = "alerts"
+    __table_args__ = (
+        Index("ix_alerts_parcel_date", "parcel_id", "date"),
+        Index("ix_alerts_notification", "notification"),
+    )
+    
+    # {parcel_id}_{yyyymmdd}_{index}_{kind} or {parcel_id}_{yyyymmdd}_{rule}, so rescans and re-sent readings do not duplicate
+    id = Column(String, primary_key=True)
+    parcel_id = Column(String, ForeignKey("parcels.id"), nullable=False)
+    date = Column(Date, nullable=False)  # Date of the anomalous reading
+    index_name = Column(String, nullable=False)
+    kind = Column(String, nullable=False)  # zscore, drop, range or rule
+    severity = Column(String, nullable=False)  # warning or critical
+    value = Column(Float, nullable=False)
+    reference = Column(Float, nullable=True)  # Expected value, previous reading or violated bound
+    score = Column(Float, nullable=False)
+    message = Column(String, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    rule = Column(String, nullable=True)  # Name of the alert rule that fired (rule alerts only)
+    notification = Column(String, nullable=True)  # pending, sent, duplicate, failed or no_phone (rule alerts only)
+    notified_at = Column(DateTime, nullable=True)
+
 class FarmerReport(Base):
     __tablename__ = "farmer_reports"
     
@@ -0,0 +1 @@
+"""Observability helpers: query statistics, metrics, profiling and tracing."""
@@ -0,0 +1,108 @@
+"""
+Prometheus metrics: per-route request counts and latency, intent distribution,
+report-run durations, result cache hits and database pool stats.
+
+Multiple uvicorn workers: set PROMETHEUS_MULTIPROC_DIR to an empty, writable
+directory before starting the server. Every worker then writes its samples to
+that directory and /metrics aggregates them, whichever worker answers.
+"""
+import os
+import time
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+REPORT_RUN_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route and status code", ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+INTENTS = Counter("chat_intents_total", "Classified chat message intents", ["intent"])
+REPORT_RUN_DURATION = Histogram(
+    "report_run_duration_seconds", "Duration of report generation runs", buckets=REPORT_RUN_BUCKETS
+)
+REPORTS_GENERATED = Counter("reports_generated_total", "Farmer reports generated")
+CACHE_REQUESTS = Counter("result_cache_requests_total", "Result cache lookups", ["cache", "result"])
+
+class DatabasePoolCollector:
+    """Connection pool gauges, read from the engines at scrape time."""
+
+    def describe(self):
+        # Nothing to pre-register; keeps registration from opening the database
+        return []
+
+    def collect(self):
+        from app.storage.database import engine, read_engine
+
+        engines = {"writer": engine}
+        if read_engine is not engine:
+            engines["reader"] = read_engine
+
+        pid = str(os.getpid())
+        gauges = {
+            "size": GaugeMetricFamily("db_pool_size", "Configured pool size", labels=["engine", "pid"]),
+            "checkedout": GaugeMetricFamily("db_pool_checked_out", "Connections in use", labels=["engine", "pid"]),
+            "checkedin": GaugeMetricFamily("db_pool_checked_in", "Idle connections in the pool", labels=["engine", "pid"]),
+            "overflow": GaugeMetricFamily("db_pool_overflow", "Connections above pool size", labels=["engine", "pid"]),
+        }
+        for name, target in engines.items():
+            pool = target.pool
+            for stat, gauge in gauges.items():
+                # Only QueuePool-style pools expose these counters
+                if hasattr(pool, stat):
+                    gauge.add_metric([name, pid], getattr(pool, stat)())
+        yield from gauges.values()
+
+_pool_collector = DatabasePoolCollector()
+if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+    REGISTRY.register(_pool_collector)
+
+def render_metrics() -> tuple[bytes, str]:
+    """Render all metrics in the Prometheus text format."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(_pool_collector)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+class MetricsMiddleware:
+    """ASGI middleware recording request count and latency per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Label by route template (/parcel/{parcel_id}/trends), never the raw path
+            route = scope.get("route")
+            route_label = getattr(route, "path", None) or "unmatched"
+            HTTP_LATENCY.labels(scope["method"], route_label).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(scope["method"], route_label, str(status["code"])).inc()
@@ -0,0 +1,156 @@
+"""
+On-demand statistical request profiling.
+
+A background thread samples the Python stacks of busy threads while a selected
+request runs, and the samples are saved in the folded-stack format used by
+flamegraph.pl, speedscope and inferno (one "root;...;leaf count" line per stack).
+
+Sync endpoints run on the threadpool, so every busy thread is sampled; profiles
+taken under heavy concurrency can include frames from other in-flight requests.
+"""
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from starlette.concurrency import run_in_threadpool
+from app.config import settings, BACKEND_DIR
+
+PROFILE_NAME_PATTERN = re.compile(r"^[\w.-]+\.folded$")
+
+# Innermost frames of threads that are parked, not doing work
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+}
+
+def get_profile_dir() -> Path:
+    return Path(settings.PROFILE_DIR) if settings.PROFILE_DIR else BACKEND_DIR / "profiles"
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class StackSampler:
+    """Collects folded stacks of all busy threads at a fixed interval."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_ident, frame in sys._current_frames().items():
+                if thread_ident == own_ident:
+                    continue
+                if (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+
+def should_profile(headers: dict) -> bool:
+    """Profile when an admin asks for it via headers, or when the request is sampled."""
+    if headers.get("x-profile") == "1" and settings.ADMIN_TOKEN:
+        token = headers.get("x-admin-token", "")
+        # Bytes: compare_digest rejects str with non-ASCII characters
+        if hmac.compare_digest(token.encode(), settings.ADMIN_TOKEN.encode()):
+            return True
+    return settings.PROFILING_SAMPLE_RATE > 0 and random.random() < settings.PROFILING_SAMPLE_RATE
+
+def save_profile(samples: Counter, method: str, path: str) -> Path | None:
+    """Write samples as a folded-stack file and prune old profiles."""
+    if not samples:
+        return None
+
+    profile_dir = get_profile_dir()
+    profile_dir.mkdir(parents=True, exist_ok=True)
+
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    slug = re.sub(r"[^\w-]+", "_", path.strip("/")) or "root"
+    target = profile_dir / f"{timestamp}_{method}_{slug}.folded"
+    target.write_text(
+        "".join(f"{stack} {count}\n" for stack, count in samples.most_common()),
+        encoding="utf-8",
+    )
+
+    # Keep only the most recent PROFILE_KEEP files
+    for old in list_profiles()[settings.PROFILE_KEEP:]:
+        (profile_dir / old["name"]).unlink(missing_ok=True)
+
+    return target
+
+def list_profiles() -> list[dict]:
+    """Saved profiles, newest first."""
+    profile_dir = get_profile_dir()
+    if not profile_dir.exists():
+        return []
+
+    profiles = []
+    for entry in profile_dir.glob("*.folded"):
+        stat = entry.stat()
+        profiles.append({
+            "name": entry.name,
+            "size_bytes": stat.st_size,
+            "created_at": datetime.fromtimestamp(stat.st_mtime, timezone.utc).isoformat(),
+        })
+    return sorted(profiles, key=lambda p: p["name"], reverse=True)
+
+def get_profile_path(name: str) -> Path | None:
+    """Resolve a profile file name, rejecting anything outside the profile directory."""
+    if not PROFILE_NAME_PATTERN.match(name):
+        return None
+    target = get_profile_dir() / name
+    return target if target.is_file() else None
+
+def finish_profile(sampler: StackSampler, method: str, path: str) -> Path | None:
+    """Stop a request's sampler and save what it collected."""
+    return save_profile(sampler.stop(), method, path)
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling requests selected by header or sampling rate.
+
+    Only installed when PROFILING_ENABLED is true, so there is no cost otherwise.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        if not should_profile(headers):
+            await self.app(scope, receive, send)
+            return
+
+        sampler = StackSampler(settings.PROFILING_INTERVAL_MS / 1000)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            # Joining the sampler thread and writing the file block; keep them off the event loop
+            await run_in_threadpool(finish_profile, sampler, scope["method"], scope["path"])
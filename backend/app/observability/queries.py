@@ -0,0 +1,127 @@
+"""Per-request database query statistics collected from SQLAlchemy engine events."""
+import bisect
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_current_stats: ContextVar[Optional["QueryStats"]] = ContextVar("query_stats", default=None)
+_installed = False
+
+class QueryStats:
+    """Query count, total DB time and the slowest statements of one unit of work."""
+    
+    def __init__(self, keep_slowest: int = 5):
+        self.count = 0
+        self.total_time = 0.0
+        self.keep_slowest = keep_slowest
+        self._slowest: list[tuple[float, str]] = []  # sorted ascending by duration
+    
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.total_time += duration
+        if len(self._slowest) < self.keep_slowest or duration > self._slowest[0][0]:
+            bisect.insort(self._slowest, (duration, statement))
+            if len(self._slowest) > self.keep_slowest:
+                self._slowest.pop(0)
+    
+    @property
+    def total_ms(self) -> float:
+        return self.total_time * 1000
+    
+    @property
+    def slowest(self) -> list[dict]:
+        """Slowest statements, slowest first."""
+        return [
+            {"duration_ms": round(duration * 1000, 2), "statement": statement}
+            for duration, statement in reversed(self._slowest)
+        ]
+
+def current_stats() -> Optional[QueryStats]:
+    """Get the statistics of the unit of work being tracked, if any."""
+    return _current_stats.get()
+
+@contextmanager
+def track_queries(keep_slowest: int = 5):
+    """Collect query statistics for every statement executed inside the block."""
+    stats = QueryStats(keep_slowest)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("query_started_at")
+    stats = _current_stats.get()
+    if not started or stats is None:
+        return
+    duration = time.perf_counter() - started.pop()
+    stats.record(statement, duration)
+
+    if duration * 1000 >= settings.SLOW_QUERY_MS:
+        logger.warning(f"Slow query ({duration * 1000:.1f} ms): {statement}")
+
+def install_query_instrumentation():
+    """Attach the statement timing listeners to every engine (idempotent)."""
+    global _installed
+    if _installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    _installed = True
+
+def check_thresholds(stats: QueryStats, label: str):
+    """Log a warning when a request issued too many queries or spent too long in the DB."""
+    too_many = stats.count > settings.QUERY_COUNT_WARN_THRESHOLD
+    too_slow = stats.total_ms > settings.DB_TIME_WARN_MS
+    if not (too_many or too_slow):
+        return
+    slowest = "; ".join(f"{s['duration_ms']} ms: {s['statement'][:200]}" for s in stats.slowest[:3])
+    logger.warning(
+        f"{label} issued {stats.count} queries in {stats.total_ms:.1f} ms "
+        f"(thresholds: {settings.QUERY_COUNT_WARN_THRESHOLD} queries / {settings.DB_TIME_WARN_MS} ms). "
+        f"Slowest: {slowest}"
+    )
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware tracking the queries of each HTTP request.
+
+    Logs requests that exceed the thresholds and, when DEBUG is on, adds
+    X-DB-Query-Count and X-DB-Time-Ms headers to the response.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+        self.debug = str(settings.DEBUG).lower() == "true"
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        try:
+            with track_queries() as stats:
+                async def send_with_headers(message):
+                    if self.debug and message["type"] == "http.response.start":
+                        headers = list(message.get("headers", []))
+                        headers.append((b"x-db-query-count", str(stats.count).encode()))
+                        headers.append((b"x-db-time-ms", f"{stats.total_ms:.2f}".encode()))
+                        message = {**message, "headers": headers}
+                    await send(message)
+                
+                await self.app(scope, receive, send_with_headers)
+        finally:
+            # Failing requests are often the expensive ones; check them too
+            check_thresholds(stats, f"{scope['method']} {scope['path']}")
@@ -0,0 +1,224 @@
+"""
+Lightweight request tracing.
+
+Spans are opened at the service, repository, AI strategy and LLM client
+boundaries (plus one span per SQL statement) and kept in an in-memory ring
+buffer, optionally mirrored to a JSON lines file. Each trace can be broken down
+into self time per span kind, e.g. db vs llm vs format time.
+
+When no trace is active (tracing disabled or outside a request) the decorators
+cost a single ContextVar lookup.
+"""
+import functools
+import inspect
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.config import settings
+
+SPAN_KINDS = ("request", "service", "db", "ai", "llm", "format")
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+_current_span_id: ContextVar[Optional[str]] = ContextVar("current_span_id", default=None)
+_sql_listeners_installed = False
+
+class Trace:
+    """All spans recorded for one request."""
+
+    def __init__(self, name: str):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.started_at = time.time()
+        self.spans: list[dict] = []
+
+    @property
+    def duration_ms(self) -> float:
+        roots = [s for s in self.spans if s["parent_id"] is None]
+        return round(sum(s["duration_ms"] for s in roots), 3)
+
+    def breakdown(self) -> dict:
+        """Self time (span time minus child span time) summed per span kind, in ms."""
+        child_time: dict[str, float] = {}
+        for s in self.spans:
+            if s["parent_id"] is not None:
+                child_time[s["parent_id"]] = child_time.get(s["parent_id"], 0.0) + s["duration_ms"]
+
+        totals = {kind: 0.0 for kind in SPAN_KINDS}
+        for s in self.spans:
+            self_time = max(0.0, s["duration_ms"] - child_time.get(s["span_id"], 0.0))
+            totals[s["kind"]] = totals.get(s["kind"], 0.0) + self_time
+        return {kind: round(value, 3) for kind, value in totals.items()}
+
+    def summary(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "span_count": len(self.spans),
+            "breakdown_ms": self.breakdown(),
+        }
+
+    def to_dict(self) -> dict:
+        return {**self.summary(), "spans": self.spans}
+
+class TraceStore:
+    """Ring buffer of finished traces, optionally appended to a JSON lines file."""
+
+    def __init__(self, size: int, file_path: Optional[str] = None):
+        self._traces: deque = deque(maxlen=size)
+        self._file_path = file_path
+        self._lock = threading.Lock()
+
+    def add(self, trace: Trace):
+        with self._lock:
+            self._traces.append(trace)
+            if self._file_path:
+                with open(self._file_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(trace.to_dict(), default=str) + "\n")
+
+    def recent(self, limit: int = 20) -> list[Trace]:
+        with self._lock:
+            return list(self._traces)[-limit:][::-1]
+
+    def get(self, trace_id: str) -> Optional[Trace]:
+        with self._lock:
+            return next((t for t in self._traces if t.trace_id == trace_id), None)
+
+trace_store = TraceStore(settings.TRACE_BUFFER_SIZE, settings.TRACE_FILE)
+
+@contextmanager
+def start_trace(name: str):
+    """Make a new trace current for the block and store it when the block ends."""
+    trace = Trace(name)
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span_id.set(None)
+    try:
+        with span(name, "request"):
+            yield trace
+    finally:
+        _current_span_id.reset(span_token)
+        _current_trace.reset(trace_token)
+        trace_store.add(trace)
+
+@contextmanager
+def span(name: str, kind: str = "service", **attributes):
+    """Record a child span of the current span; a no-op when no trace is active."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+
+    span_id = uuid.uuid4().hex[:16]
+    parent_id = _current_span_id.get()
+    token = _current_span_id.set(span_id)
+    started = time.perf_counter()
+    started_at = time.time()
+    try:
+        yield
+    finally:
+        _current_span_id.reset(token)
+        trace.spans.append({
+            "span_id": span_id,
+            "parent_id": parent_id,
+            "name": name,
+            "kind": kind,
+            "start_offset_ms": round((started_at - trace.started_at) * 1000, 3),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+            "attributes": attributes,
+        })
+
+def traced(kind: str, name: Optional[str] = None):
+    """Decorator recording a span around each call of a function or method."""
+    def decorator(func):
+        label = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _current_trace.get() is None:
+                    return await func(*args, **kwargs)
+                with span(label, kind):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_trace.get() is None:
+                return func(*args, **kwargs)
+            with span(label, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def traced_class(kind: str):
+    """
+    Class decorator applying traced(kind) to every public method.
+
+    Generator methods are left alone: their span would close before iteration
+    starts. The SQL statements they issue are still recorded.
+    """
+    def decorator(cls):
+        for attr, value in list(vars(cls).items()):
+            if attr.startswith("_") or not inspect.isfunction(value) or inspect.isgeneratorfunction(value):
+                continue
+            setattr(cls, attr, traced(kind, f"{cls.__name__}.{attr}")(value))
+        return cls
+    return decorator
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_trace.get() is not None:
+        conn.info.setdefault("trace_started_at", []).append((time.perf_counter(), time.time()))
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    trace = _current_trace.get()
+    started = conn.info.get("trace_started_at")
+    if trace is None or not started:
+        return
+    started_perf, started_at = started.pop()
+    trace.spans.append({
+        "span_id": uuid.uuid4().hex[:16],
+        "parent_id": _current_span_id.get(),
+        "name": "sql",
+        "kind": "db",
+        "start_offset_ms": round((started_at - trace.started_at) * 1000, 3),
+        "duration_ms": round((time.perf_counter() - started_perf) * 1000, 3),
+        "attributes": {"statement": statement[:500]},
+    })
+
+def install_sql_spans():
+    """Record a db span for every SQL statement executed inside a trace (idempotent)."""
+    global _sql_listeners_installed
+    if _sql_listeners_installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    _sql_listeners_installed = True
+
+class TracingMiddleware:
+    """ASGI middleware opening a trace per HTTP request and returning its id in X-Trace-Id."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with start_trace(f"{scope['method']} {scope['path']}") as trace:
+            async def send_with_trace_id(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-trace-id", trace.trace_id.encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_with_trace_id)
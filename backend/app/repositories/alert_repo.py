@@ -0,0 +1,64 @@
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from app.models.base import Alert, Parcel
+from app.storage.bulk_load import bulk_load
+from app.observability.tracing import traced_class
+
+@traced_class("db")
+class AlertRepository:
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def insert_new(self, rows: list[dict], chunk_size: int = 1000) -> list[dict]:
+        """Insert the alerts whose id is not stored yet (caller commits); returns the inserted rows."""
+        new_rows = []
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            existing = set(self.db.scalars(select(Alert.id).where(Alert.id.in_([row["id"] for row in chunk]))))
+            new_rows.extend(row for row in chunk if row["id"] not in existing)
+        bulk_load(self.db, Alert, new_rows)
+        return new_rows
+    
+    def recently_notified(self, parcel_ids, since, chunk_size: int = 1000) -> set[tuple[str, str]]:
+        """(parcel_id, rule) pairs of rule alerts sent to the farmer since the given time."""
+        parcel_ids = list(parcel_ids)
+        pairs = set()
+        for start in range(0, len(parcel_ids), chunk_size):
+            stmt = select(Alert.parcel_id, Alert.rule).where(
+                Alert.parcel_id.in_(parcel_ids[start:start + chunk_size]),
+                Alert.notification == "sent",
+                Alert.notified_at >= since,
+            )
+            pairs.update(tuple(row) for row in self.db.execute(stmt))
+        return pairs
+    
+    def get_pending(self, limit: int = 10000):
+        """Rule alerts not notified yet (just ingested or held back by quiet hours), oldest first."""
+        stmt = select(Alert).where(Alert.notification == "pending").order_by(Alert.created_at, Alert.id).limit(limit)
+        return self.db.scalars(stmt).all()
+    
+    def set_notification(self, ids: list[str], status: str, notified_at=None, chunk_size: int = 1000):
+        """Record the notification outcome of rule alerts (caller commits)."""
+        for start in range(0, len(ids), chunk_size):
+            self.db.execute(
+                update(Alert)
+                .where(Alert.id.in_(ids[start:start + chunk_size]))
+                .values(notification=status, notified_at=notified_at)
+            )
+    
+    def query(self, farmer_id: str = None, parcel_id: str = None, kind: str = None,
+              severity: str = None, since=None, limit: int = 100):
+        """Alerts matching the filters, newest reading first."""
+        stmt = select(Alert)
+        if farmer_id is not None:
+            stmt = stmt.join(Parcel, Parcel.id == Alert.parcel_id).where(Parcel.farmer_id == farmer_id)
+        if parcel_id is not None:
+            stmt = stmt.where(Alert.parcel_id == parcel_id)
+        if kind is not None:
+            stmt = stmt.where(Alert.kind == kind)
+        if severity is not None:
+            stmt = stmt.where(Alert.severity == severity)
+        if since is not None:
+            stmt = stmt.where(Alert.date >= since)
+        stmt = stmt.order_by(Alert.date.desc(), Alert.id).limit(limit)
+        return self.db.scalars(stmt).all()
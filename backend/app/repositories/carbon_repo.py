@@ -0,0 +1,72 @@
+from sqlalchemy import case, delete, exists, func, select
+from sqlalchemy.orm import Session
+from app.models.base import Parcel, ParcelCarbon, ParcelIndex
+from app.storage.bulk_load import bulk_load
+from app.observability.tracing import traced_class
+
+ROLLUPS = {"crop": Parcel.crop, "farmer": Parcel.farmer_id}
+
+@traced_class("db")
+class CarbonRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_missing_parcel_ids(self) -> list[str]:
+        """Parcels that have readings but no stored carbon balance."""
+        stmt = select(Parcel.id).where(
+            exists().where(ParcelIndex.parcel_id == Parcel.id),
+            ~exists().where(ParcelCarbon.parcel_id == Parcel.id),
+        ).order_by(Parcel.id)
+        return list(self.db.scalars(stmt))
+
+    def insert_many(self, rows) -> int:
+        """Insert balances of parcels that have none stored yet (caller commits)."""
+        return bulk_load(self.db, ParcelCarbon, rows)
+
+    def replace_many(self, rows: list[dict]) -> int:
+        """Store these balances in place of the parcels' current ones (caller commits)."""
+        self.delete_many([row["parcel_id"] for row in rows])
+        return self.insert_many(rows)
+
+    def delete_many(self, parcel_ids: list[str], chunk_size: int = 1000):
+        """Remove the balances of these parcels (caller commits)."""
+        for start in range(0, len(parcel_ids), chunk_size):
+            self.db.execute(delete(ParcelCarbon).where(ParcelCarbon.parcel_id.in_(parcel_ids[start:start + chunk_size])))
+
+    def delete_all(self):
+        """Remove all balances (caller commits)."""
+        self.db.execute(delete(ParcelCarbon))
+
+    def get_by_farmer_id(self, farmer_id: str) -> list:
+        """(parcel, balance) pairs of a farmer's parcels with a stored balance, by parcel id."""
+        stmt = (
+            select(Parcel, ParcelCarbon)
+            .join(ParcelCarbon, ParcelCarbon.parcel_id == Parcel.id)
+            .where(Parcel.farmer_id == farmer_id)
+            .order_by(Parcel.id)
+        )
+        return self.db.execute(stmt).all()
+
+    def get_totals(self, by: str, farmer_id: str = None) -> list:
+        """
+        Sums of the stored balances per crop or farmer (ROLLUPS), in one query:
+        key, parcels, parcels with SOC, their area, CO2e, change and baseline change.
+        """
+        key = ROLLUPS[by]
+        stmt = (
+            select(
+                key,
+                func.count(),
+                func.count(ParcelCarbon.soc_date),
+                func.sum(case((ParcelCarbon.soc_date.isnot(None), Parcel.area_ha))),
+                func.sum(ParcelCarbon.co2e_t),
+                func.sum(ParcelCarbon.change_co2e_t),
+                func.sum(ParcelCarbon.baseline_change_co2e_t),
+            )
+            .join(Parcel, Parcel.id == ParcelCarbon.parcel_id)
+            .group_by(key)
+            .order_by(key)
+        )
+        if farmer_id is not None:
+            stmt = stmt.where(Parcel.farmer_id == farmer_id)
+        return self.db.execute(stmt).all()
@@ -0,0 +1,32 @@
+import json
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.orm import Session
+from app.models.base import CropPercentiles
+from app.storage.bulk_load import bulk_load
+from app.observability.tracing import traced_class
+
+@traced_class("db")
+class CohortRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def replace_all(self, rows) -> int:
+        """Replace every stored distribution with rows of CropPercentiles columns (caller commits)."""
+        self.db.execute(delete(CropPercentiles))
+        return bulk_load(self.db, CropPercentiles, rows)
+
+    def get_many(self, keys, window_days: int, chunk_size: int = 500) -> dict:
+        """(crop, window_start, index_name) -> (parcels, points) of the distributions stored for (crop, window_start) keys."""
+        keys = list(keys)
+        found = {}
+        for start in range(0, len(keys), chunk_size):
+            stmt = select(
+                CropPercentiles.crop, CropPercentiles.window_start, CropPercentiles.index_name,
+                CropPercentiles.parcels, CropPercentiles.points,
+            ).where(
+                tuple_(CropPercentiles.crop, CropPercentiles.window_start).in_(keys[start:start + chunk_size]),
+                CropPercentiles.window_days == window_days,
+            )
+            for crop, window_start, index_name, parcels, points in self.db.execute(stmt):
+                found[(crop, window_start, index_name)] = (parcels, json.loads(points))
+        return found
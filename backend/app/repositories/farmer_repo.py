@@ -1,6 +1,10 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.base import Farmer
+from app.observability.tracing import traced_class
 
+@traced_class("db")
 class FarmerRepository:
     def __init__(self, db: Session):
         self.db = db
@@ -17,6 +21,20 @@ class FarmerRepository:
     def get_by_username(self, username: str):
         return self.db.query(Farmer).filter(Farmer.username == username).first()
     
+    def iter_linked(self, batch_size: int = 500):
+        """Stream farmers with a linked phone, fetching batch_size rows per round trip.
+        
+        On PostgreSQL this uses a server-side cursor, so the caller must not
+        commit the session until it has finished iterating.
+        """
+        stmt = (
+            select(Farmer)
+            .where(Farmer.phone.isnot(None))
+            .order_by(Farmer.id)
+            .execution_options(yield_per=batch_size)
+        )
+        return self.db.scalars(stmt)
+    
     def link_phone_to_farmer(self, farmer: Farmer, phone: str):
         """Link a phone number to a farmer account."""
         farmer.phone = phone
@@ -26,4 +44,36 @@ class FarmerRepository:
     
     def refresh_session(self):
         """Expire all cached instances to ensure fresh data from database."""
-        self.db.expire_all()
\ No newline at end of file
+        self.db.expire_all()
+
+@traced_class("db")
+class AsyncFarmerRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def get_all(self):
+        result = await self.db.execute(select(Farmer))
+        return result.scalars().all()
+    
+    async def get_by_id(self, farmer_id: str):
+        result = await self.db.execute(select(Farmer).where(Farmer.id == farmer_id))
+        return result.scalars().first()
+    
+    async def get_by_phone(self, phone: str):
+        result = await self.db.execute(select(Farmer).where(Farmer.phone == phone))
+        return result.scalars().first()
+    
+    async def get_by_username(self, username: str):
+        result = await self.db.execute(select(Farmer).where(Farmer.username == username))
+        return result.scalars().first()
+    
+    async def link_phone_to_farmer(self, farmer: Farmer, phone: str):
+        """Link a phone number to a farmer account."""
+        farmer.phone = phone
+        await self.db.commit()
+        await self.db.refresh(farmer)
+        return farmer
+    
+    def refresh_session(self):
+        """Expire all cached instances to ensure fresh data from database."""
+        self.db.expire_all()
@@ -0,0 +1,39 @@
+from sqlalchemy import delete, exists, select
+from sqlalchemy.orm import Session
+from app.models.base import Parcel, ParcelForecast, ParcelIndex
+from app.storage.bulk_load import bulk_load
+from app.observability.tracing import traced_class
+
+@traced_class("db")
+class ForecastRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_missing_parcel_ids(self) -> list[str]:
+        """Parcels that have readings but no stored forecasts."""
+        stmt = select(Parcel.id).where(
+            exists().where(ParcelIndex.parcel_id == Parcel.id),
+            ~exists().where(ParcelForecast.parcel_id == Parcel.id),
+        ).order_by(Parcel.id)
+        return list(self.db.scalars(stmt))
+
+    def get_by_parcel_id(self, parcel_id: str) -> list[ParcelForecast]:
+        return list(self.db.scalars(select(ParcelForecast).where(ParcelForecast.parcel_id == parcel_id)))
+
+    def insert_many(self, rows) -> int:
+        """Insert forecasts of parcels that have none stored yet (caller commits)."""
+        return bulk_load(self.db, ParcelForecast, rows)
+
+    def replace_many(self, parcel_ids: list[str], rows) -> int:
+        """Store these forecasts in place of the current ones of the parcels (caller commits)."""
+        self.delete_many(parcel_ids)
+        return self.insert_many(rows)
+
+    def delete_many(self, parcel_ids: list[str], chunk_size: int = 1000):
+        """Remove the forecasts of these parcels (caller commits)."""
+        for start in range(0, len(parcel_ids), chunk_size):
+            self.db.execute(delete(ParcelForecast).where(ParcelForecast.parcel_id.in_(parcel_ids[start:start + chunk_size])))
+
+    def delete_all(self):
+        """Remove all forecasts (caller commits)."""
+        self.db.execute(delete(ParcelForecast))
@@ -1,6 +1,36 @@
-from sqlalchemy.orm import Session
-from app.models.base import ParcelIndex
+from sqlalchemy import and_, case, func, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.base import Parcel, ParcelIndex
+from app.observability.tracing import traced_class
+from app.analytics.series import INDEX_NAMES
+from app.analytics.interpretation import EDGES, GRADE_CODES
 
+SERIES_COLUMNS = [getattr(ParcelIndex, name) for name in INDEX_NAMES]
+UPSERT_DIALECTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+FARM_AVERAGE_INDICES = ("ndvi", "ndmi", "soc")  # Area-weighted in get_farm_groups
+
+def grade_case(index_name: str, column):
+    """SQL grade code (position in GRADES) of an index column from the threshold tables; NULL when missing."""
+    codes = GRADE_CODES[index_name]
+    return case(
+        *[(column <= edge, int(code)) for edge, code in zip(EDGES[index_name], codes)],
+        else_=case((column.isnot(None), int(codes[len(EDGES[index_name])]))),
+    )
+
+def status_case(good, moderate, poor):
+    """SQL position in OVERALL_STATUSES - the rules of app.ai.summaries.overall_status - or -1 without graded indices."""
+    total = good + moderate + poor
+    return case(
+        (total == 0, -1),
+        (good >= total * 0.6, 0),
+        (good + moderate >= total * 0.7, 1),
+        (poor >= total * 0.5, 2),
+        else_=3,
+    )
+
+@traced_class("db")
 class IndexRepository:
     def __init__(self, db: Session):
         self.db = db
@@ -8,3 +38,202 @@ class IndexRepository:
     def get_by_parcel_id(self, parcel_id: str):
         return self.db.query(ParcelIndex).filter(ParcelIndex.parcel_id == parcel_id).all()
     
+    def get_series(self, parcel_ids: list[str]):
+        """(parcel_id, date, ndvi, ..., ph) rows ordered by parcel and date - plain tuples, no ORM objects."""
+        stmt = (
+            select(ParcelIndex.parcel_id, ParcelIndex.date, *SERIES_COLUMNS)
+            .where(ParcelIndex.parcel_id.in_(parcel_ids))
+            .order_by(ParcelIndex.parcel_id, ParcelIndex.date)
+        )
+        return self.db.execute(stmt).all()
+    
+    def get_version(self, parcel_id: str):
+        """(reading count, latest reading date, revisions) of a parcel; revisions counts replaced readings."""
+        stmt = select(func.count(), func.max(ParcelIndex.date), func.coalesce(func.sum(ParcelIndex.revision), 0)).where(
+            ParcelIndex.parcel_id == parcel_id
+        )
+        return tuple(self.db.execute(stmt).one())
+    
+    def get_revisions(self, parcel_ids: list[str], chunk_size: int = 1000) -> dict:
+        """Parcel id -> times its readings were replaced, for the given parcels that have any."""
+        revisions = {}
+        for start in range(0, len(parcel_ids), chunk_size):
+            stmt = (
+                select(ParcelIndex.parcel_id, func.sum(ParcelIndex.revision))
+                .where(ParcelIndex.parcel_id.in_(parcel_ids[start:start + chunk_size]), ParcelIndex.revision > 0)
+                .group_by(ParcelIndex.parcel_id)
+            )
+            revisions.update(self.db.execute(stmt).all())
+        return revisions
+    
+    def get_readings(self, keys: list[tuple], chunk_size: int = 1000) -> dict:
+        """(parcel_id, date) -> (ndvi, ..., ph) of the stored readings among keys."""
+        if not keys:
+            return {}
+        wanted = set(keys)
+        parcel_ids = sorted({parcel_id for parcel_id, _ in wanted})
+        first, last = min(day for _, day in wanted), max(day for _, day in wanted)
+        readings = {}
+        for start in range(0, len(parcel_ids), chunk_size):
+            # A date range per parcel is a range scan of the (parcel_id, date) index; row-value
+            # IN lists are not planned as well on SQLite
+            stmt = select(ParcelIndex.parcel_id, ParcelIndex.date, *SERIES_COLUMNS).where(
+                ParcelIndex.parcel_id.in_(parcel_ids[start:start + chunk_size]),
+                ParcelIndex.date.between(first, last),
+            )
+            for parcel_id, reading_date, *values in self.db.connection().execute(stmt):
+                if (parcel_id, reading_date) in wanted:
+                    readings[(parcel_id, reading_date)] = tuple(values)
+        return readings
+    
+    def get_latest(self, parcel_ids: list[str], chunk_size: int = 1000) -> dict:
+        """parcel_id -> (date, ndvi, ..., ph) of each parcel's latest reading (parcels without readings are left out)."""
+        latest = {}
+        for start in range(0, len(parcel_ids), chunk_size):
+            last_dates = (
+                select(ParcelIndex.parcel_id, func.max(ParcelIndex.date).label("date"))
+                .where(ParcelIndex.parcel_id.in_(parcel_ids[start:start + chunk_size]))
+                .group_by(ParcelIndex.parcel_id)
+                .subquery()
+            )
+            stmt = select(ParcelIndex.parcel_id, ParcelIndex.date, *SERIES_COLUMNS).join(
+                last_dates, and_(ParcelIndex.parcel_id == last_dates.c.parcel_id, ParcelIndex.date == last_dates.c.date)
+            )
+            for parcel_id, *reading in self.db.connection().execute(stmt):
+                latest[parcel_id] = tuple(reading)
+        return latest
+    
+    def get_last_readings(self, parcel_ids: list[str], chunk_size: int = 1000) -> dict:
+        """parcel_id -> {index: (date, value)} of the latest stored value of each index."""
+        last, gaps = {}, []
+        for parcel_id, (reading_date, *values) in self.get_latest(parcel_ids, chunk_size).items():
+            last[parcel_id] = {name: (reading_date, value) for name, value in zip(INDEX_NAMES, values) if value is not None}
+            if len(last[parcel_id]) < len(INDEX_NAMES):
+                gaps.append(parcel_id)
+
+        # Indices missing from a parcel's latest reading come from the last reading that has them
+        for start in range(0, len(gaps), chunk_size):
+            stmt = (
+                select(ParcelIndex.parcel_id, *[func.max(case((column.isnot(None), ParcelIndex.date))) for column in SERIES_COLUMNS])
+                .where(ParcelIndex.parcel_id.in_(gaps[start:start + chunk_size]))
+                .group_by(ParcelIndex.parcel_id)
+            )
+            wanted = {
+                (parcel_id, name): reading_date
+                for parcel_id, *dates in self.db.connection().execute(stmt)
+                for name, reading_date in zip(INDEX_NAMES, dates)
+                if reading_date is not None and name not in last[parcel_id]
+            }
+            readings = self.get_readings(list({(parcel_id, reading_date) for (parcel_id, _), reading_date in wanted.items()}))
+            for (parcel_id, name), reading_date in wanted.items():
+                last[parcel_id][name] = (reading_date, readings[(parcel_id, reading_date)][INDEX_NAMES.index(name)])
+        return last
+    
+    def _graded_latest(self, farmer_id: str):
+        """
+        One row per parcel of a farmer with its latest reading's date and
+        FARM_AVERAGE_INDICES values, the grade counts of that reading and its
+        overall status (-1 without a reading).
+        """
+        # Correlated per parcel: a seek on the (parcel_id, date) index rather than a scan of every reading
+        readings = aliased(ParcelIndex)
+        last_date = select(func.max(readings.date)).where(readings.parcel_id == Parcel.id).correlate(Parcel).scalar_subquery()
+        grades = (
+            select(
+                Parcel.id, Parcel.name, Parcel.crop, Parcel.area_ha, ParcelIndex.date,
+                *[getattr(ParcelIndex, name) for name in FARM_AVERAGE_INDICES],
+                *[grade_case(name, column).label(f"{name}_grade") for name, column in zip(INDEX_NAMES, SERIES_COLUMNS)],
+            )
+            .select_from(Parcel)
+            .outerjoin(ParcelIndex, and_(ParcelIndex.parcel_id == Parcel.id, ParcelIndex.date == last_date))
+            .where(Parcel.farmer_id == farmer_id)
+            .cte("grades")
+        )
+        graded = select(
+            *[grades.c[name] for name in ("id", "name", "crop", "area_ha", "date", *FARM_AVERAGE_INDICES)],
+            *[
+                sum((case((grades.c[f"{name}_grade"] == code, 1), else_=0) for name in INDEX_NAMES), literal(0)).label(label)
+                for code, label in ((2, "good"), (1, "moderate"), (0, "poor"))
+            ],
+        ).cte("graded")
+        return select(graded, status_case(graded.c.good, graded.c.moderate, graded.c.poor).label("status")).cte("latest")
+    
+    def get_farm_groups(self, farmer_id: str) -> list:
+        """
+        Aggregates of a farmer's parcels per (crop, overall status) in one query:
+        crop, status, parcels, area, then per FARM_AVERAGE_INDICES index the sum of
+        area * value and the area of the parcels with a value.
+        """
+        latest = self._graded_latest(farmer_id)
+        area = latest.c.area_ha
+        stmt = select(
+            latest.c.crop, latest.c.status, func.count(), func.sum(area),
+            *[
+                aggregate
+                for name in FARM_AVERAGE_INDICES
+                for aggregate in (func.sum(area * latest.c[name]), func.sum(case((latest.c[name].isnot(None), area))))
+            ],
+        ).group_by(latest.c.crop, latest.c.status)
+        return self.db.execute(stmt).all()
+    
+    def get_worst_parcels(self, farmer_id: str, limit: int) -> list:
+        """
+        The limit parcels of a farmer with the lowest share of good grades in
+        their latest reading (poor counting against it), as
+        (parcel_id, name, crop, area, date, ndvi, ndmi, soc, good, moderate, poor, status) rows.
+        """
+        latest = self._graded_latest(farmer_id)
+        graded = latest.c.good + latest.c.moderate + latest.c.poor
+        score = (latest.c.good * 2 + latest.c.moderate) * 1.0 / graded
+        stmt = (
+            select(latest)
+            .where(graded > 0)
+            .order_by(score, latest.c.poor.desc(), latest.c.id)
+            .limit(limit)
+        )
+        return self.db.execute(stmt).all()
+    
+    def upsert_many(self, rows: list[tuple], chunk_size: int = 5000) -> int:
+        """
+        Insert (parcel_id, date, ndvi, ..., ph) readings, replacing the values of
+        readings already stored for the same parcel and date (caller commits).
+        
+        New readings get the id {parcel_id}_{yyyymmdd}; replaced ones keep theirs
+        and have their revision bumped, which changes the parcel's version.
+        """
+        insert = UPSERT_DIALECTS[self.db.get_bind().dialect.name]
+        table = ParcelIndex.__table__
+        # Core statement on the session's connection, skipping the ORM bulk-insert bookkeeping
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["parcel_id", "date"],
+            set_={**{name: stmt.excluded[name] for name in INDEX_NAMES}, "revision": func.coalesce(table.c.revision, 0) + 1},
+        )
+        for start in range(0, len(rows), chunk_size):
+            self.db.connection().execute(stmt, [
+                {"id": f"{row[0]}_{row[1]:%Y%m%d}", "parcel_id": row[0], "date": row[1], "revision": 0, **dict(zip(INDEX_NAMES, row[2:]))}
+                for row in rows[start:start + chunk_size]
+            ])
+        return len(rows)
+    
+    def iter_series(self, farmer_id: str = None, batch_size: int = 500):
+        """Stream the series rows of one farmer's parcels (or of every parcel), batch_size rows per round trip.
+        
+        Same row layout and order as get_series. On PostgreSQL this uses a
+        server-side cursor, so the caller must not commit until it has finished iterating.
+        """
+        stmt = select(ParcelIndex.parcel_id, ParcelIndex.date, *SERIES_COLUMNS)
+        if farmer_id is not None:
+            stmt = stmt.join(Parcel, Parcel.id == ParcelIndex.parcel_id).where(Parcel.farmer_id == farmer_id)
+        stmt = stmt.order_by(ParcelIndex.parcel_id, ParcelIndex.date).execution_options(yield_per=batch_size)
+        # Plain column rows need no ORM row processing; run on the session's connection
+        return self.db.connection().execute(stmt)
+
+@traced_class("db")
+class AsyncIndexRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def get_by_parcel_id(self, parcel_id: str):
+        result = await self.db.execute(select(ParcelIndex).where(ParcelIndex.parcel_id == parcel_id))
+        return list(result.scalars().all())
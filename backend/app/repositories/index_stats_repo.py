@@ -0,0 +1,140 @@
+import json
+import math
+from sqlalchemy import delete, exists, select
+from sqlalchemy.orm import Session
+from app.models.base import Parcel, ParcelIndex, ParcelIndexStats
+from app.analytics.running_stats import READINGS_KEY, RunningStats
+from app.analytics.series import EPOCH_ORDINAL, day_to_date
+from app.storage.bulk_load import bulk_load
+from app.observability.tracing import traced_class
+
+def _day(value) -> int:
+    return value.toordinal() - EPOCH_ORDINAL
+
+# Columns _from_row reads, in order
+STATS_COLUMNS = (
+    ParcelIndexStats.count, ParcelIndexStats.origin, ParcelIndexStats.sum_t, ParcelIndexStats.sum_tt,
+    ParcelIndexStats.sum_y, ParcelIndexStats.sum_yy, ParcelIndexStats.sum_ty, ParcelIndexStats.first_date,
+    ParcelIndexStats.first_value, ParcelIndexStats.last_date, ParcelIndexStats.last_value, ParcelIndexStats.recent,
+)
+
+def _from_row(row) -> RunningStats:
+    count, origin, sum_t, sum_tt, sum_y, sum_yy, sum_ty, first_date, first_value, last_date, last_value, recent = row
+    return RunningStats(
+        count=count,
+        origin=_day(origin),
+        sum_t=sum_t,
+        sum_tt=sum_tt,
+        sum_y=sum_y,
+        sum_yy=sum_yy,
+        sum_ty=sum_ty,
+        first_day=_day(first_date),
+        first_value=math.nan if first_value is None else first_value,
+        last_day=_day(last_date),
+        last_value=math.nan if last_value is None else last_value,
+        recent=[(int(day), value) for day, value in json.loads(recent)],
+    )
+
+def _to_row(parcel_id: str, index_name: str, stats: RunningStats, revision: int) -> dict:
+    return {
+        "parcel_id": parcel_id,
+        "index_name": index_name,
+        "count": stats.count,
+        "origin": day_to_date(stats.origin),
+        "sum_t": stats.sum_t,
+        "sum_tt": stats.sum_tt,
+        "sum_y": stats.sum_y,
+        "sum_yy": stats.sum_yy,
+        "sum_ty": stats.sum_ty,
+        "first_date": day_to_date(stats.first_day),
+        "first_value": None if math.isnan(stats.first_value) else stats.first_value,
+        "last_date": day_to_date(stats.last_day),
+        "last_value": None if math.isnan(stats.last_value) else stats.last_value,
+        # Days rather than dates keep the JSON short
+        "recent": json.dumps(stats.recent),
+        "revision": revision if index_name == READINGS_KEY else None,
+    }
+
+@traced_class("db")
+class IndexStatsRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_by_parcel_id(self, parcel_id: str) -> dict[str, RunningStats]:
+        """Index name -> running aggregates of one parcel (empty when none are stored)."""
+        stmt = select(ParcelIndexStats.index_name, *STATS_COLUMNS).where(ParcelIndexStats.parcel_id == parcel_id)
+        return {index_name: _from_row(row) for index_name, *row in self.db.execute(stmt)}
+
+    def get_many(self, parcel_ids: list[str], chunk_size: int = 1000) -> tuple[dict, dict]:
+        """
+        Aggregates of the parcels that have them (parcel_id -> {index name -> RunningStats})
+        and their stored revisions (parcel_id -> revisions, as passed to insert_many).
+        """
+        stats, revisions = {}, {}
+        for start in range(0, len(parcel_ids), chunk_size):
+            stmt = select(ParcelIndexStats.parcel_id, ParcelIndexStats.index_name, ParcelIndexStats.revision, *STATS_COLUMNS).where(
+                ParcelIndexStats.parcel_id.in_(parcel_ids[start:start + chunk_size])
+            )
+            # Plain rows: ORM objects would cost more than the query
+            for parcel_id, index_name, revision, *row in self.db.connection().execute(stmt).all():
+                stats.setdefault(parcel_id, {})[index_name] = _from_row(row)
+                if index_name == READINGS_KEY:
+                    revisions[parcel_id] = revision or 0
+        return stats, revisions
+    
+    def get_version(self, parcel_id: str):
+        """(reading count, latest reading date, revisions) from the stored aggregates, or None without them."""
+        stmt = select(ParcelIndexStats.count, ParcelIndexStats.last_date, ParcelIndexStats.revision).where(
+            ParcelIndexStats.parcel_id == parcel_id, ParcelIndexStats.index_name == READINGS_KEY
+        )
+        row = self.db.execute(stmt).first()
+        return (row.count, row.last_date, row.revision or 0) if row else None
+
+    def get_missing_parcel_ids(self) -> list[str]:
+        """Parcels that have readings but no stored aggregates."""
+        stmt = select(Parcel.id).where(
+            exists().where(ParcelIndex.parcel_id == Parcel.id),
+            ~exists().where(ParcelIndexStats.parcel_id == Parcel.id),
+        ).order_by(Parcel.id)
+        return list(self.db.scalars(stmt))
+
+    def replace_many(self, stats: dict[str, dict[str, RunningStats]], revisions: dict[str, int], chunk_size: int = 1000) -> int:
+        """Store the aggregates of these parcels in place of their current ones (caller commits)."""
+        self.delete_many(list(stats), chunk_size)
+        return self.insert_many(stats, revisions)
+
+    def replace_series(self, stats: dict[str, dict[str, RunningStats]], revisions: dict[str, int], chunk_size: int = 1000) -> int:
+        """Store these series in place of the same parcels' current ones, leaving their other series as they are (caller commits)."""
+        by_names = {}
+        for parcel_id, by_index in stats.items():
+            by_names.setdefault(tuple(sorted(by_index)), []).append(parcel_id)
+        for index_names, parcel_ids in by_names.items():
+            for start in range(0, len(parcel_ids), chunk_size):
+                self.db.execute(delete(ParcelIndexStats).where(
+                    ParcelIndexStats.parcel_id.in_(parcel_ids[start:start + chunk_size]),
+                    ParcelIndexStats.index_name.in_(index_names),
+                ))
+        return self.insert_many(stats, revisions)
+    
+    def delete_many(self, parcel_ids: list[str], chunk_size: int = 1000):
+        """Remove the aggregates of these parcels (caller commits)."""
+        for start in range(0, len(parcel_ids), chunk_size):
+            chunk = parcel_ids[start:start + chunk_size]
+            self.db.execute(delete(ParcelIndexStats).where(ParcelIndexStats.parcel_id.in_(chunk)))
+
+    def insert_many(self, stats: dict[str, dict[str, RunningStats]], revisions: dict[str, int]) -> int:
+        """
+        Insert aggregates of parcels that have none stored yet (caller commits).
+
+        revisions holds each parcel's reading revisions (IndexRepository.get_revisions), 0 when missing.
+        """
+        rows = (
+            _to_row(parcel_id, index_name, series, revisions.get(parcel_id, 0))
+            for parcel_id, by_index in stats.items()
+            for index_name, series in by_index.items()
+        )
+        return bulk_load(self.db, ParcelIndexStats, rows)
+
+    def delete_all(self):
+        """Remove all aggregates (caller commits)."""
+        self.db.execute(delete(ParcelIndexStats))
@@ -1,6 +1,10 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from app.models.base import Parcel
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.base import Farmer, Parcel
+from app.observability.tracing import traced_class
 
+@traced_class("db")
 class ParcelRepository:
     def __init__(self, db: Session):
         self.db = db
@@ -11,6 +15,96 @@ class ParcelRepository:
     def get_by_farmer_id(self, farmer_id: str):
         return self.db.query(Parcel).filter(Parcel.farmer_id == farmer_id).all()
     
+    def get_by_farmer_ids(self, farmer_ids: list[str], chunk_size: int = 1000) -> dict:
+        """Farmer id -> that farmer's parcels, for many farmers in a few queries."""
+        parcels = {}
+        for start in range(0, len(farmer_ids), chunk_size):
+            chunk = farmer_ids[start:start + chunk_size]
+            for parcel in self.db.query(Parcel).filter(Parcel.farmer_id.in_(chunk)).all():
+                parcels.setdefault(parcel.farmer_id, []).append(parcel)
+        return parcels
+    
     def get_by_id(self, parcel_id: str):
         """Get parcel by ID."""
         return self.db.query(Parcel).filter(Parcel.id == parcel_id).first()
+    
+    def get_crops(self, farmer_id: str = None) -> dict:
+        """Parcel id -> crop for one farmer (or all parcels)."""
+        stmt = select(Parcel.id, Parcel.crop)
+        if farmer_id is not None:
+            stmt = stmt.where(Parcel.farmer_id == farmer_id)
+        return dict(self.db.execute(stmt).all())
+    
+    def get_areas(self, farmer_id: str = None, parcel_ids: list[str] = None, chunk_size: int = 1000) -> dict:
+        """Parcel id -> area in hectares for one farmer, the given parcels, or all parcels."""
+        stmt = select(Parcel.id, Parcel.area_ha)
+        if farmer_id is not None:
+            stmt = stmt.where(Parcel.farmer_id == farmer_id)
+        if parcel_ids is None:
+            return dict(self.db.execute(stmt).all())
+        areas = {}
+        for start in range(0, len(parcel_ids), chunk_size):
+            areas.update(self.db.execute(stmt.where(Parcel.id.in_(parcel_ids[start:start + chunk_size]))).all())
+        return areas
+    
+    def get_names(self, farmer_id: str = None) -> dict:
+        """Parcel id -> name for one farmer (or all parcels), without loading ORM objects."""
+        stmt = select(Parcel.id, Parcel.name)
+        if farmer_id is not None:
+            stmt = stmt.where(Parcel.farmer_id == farmer_id)
+        return dict(self.db.execute(stmt).all())
+    
+    def lock(self, parcel_ids, chunk_size: int = 1000):
+        """
+        Lock the rows of these parcels until the transaction ends (a no-op on
+        SQLite, which serializes writers). Rows are locked in id order, so
+        callers locking overlapping parcels cannot deadlock.
+        """
+        parcel_ids = sorted(parcel_ids)
+        for start in range(0, len(parcel_ids), chunk_size):
+            stmt = (
+                select(Parcel.id)
+                .where(Parcel.id.in_(parcel_ids[start:start + chunk_size]))
+                .order_by(Parcel.id)
+                .with_for_update(key_share=True)  # FOR NO KEY UPDATE: readings can still reference them
+            )
+            self.db.execute(stmt).all()
+    
+    def existing_ids(self, parcel_ids, chunk_size: int = 1000) -> set:
+        """The given parcel ids that exist."""
+        parcel_ids = list(parcel_ids)
+        found = set()
+        for start in range(0, len(parcel_ids), chunk_size):
+            found.update(self.db.scalars(select(Parcel.id).where(Parcel.id.in_(parcel_ids[start:start + chunk_size]))))
+        return found
+    
+    def get_owners(self, parcel_ids, chunk_size: int = 1000) -> dict:
+        """Parcel id -> (farmer id, farmer phone, parcel name) for the given parcels."""
+        parcel_ids = list(parcel_ids)
+        owners = {}
+        for start in range(0, len(parcel_ids), chunk_size):
+            stmt = (
+                select(Parcel.id, Parcel.farmer_id, Farmer.phone, Parcel.name)
+                .join(Farmer, Farmer.id == Parcel.farmer_id)
+                .where(Parcel.id.in_(parcel_ids[start:start + chunk_size]))
+            )
+            owners.update((parcel_id, tuple(owner)) for parcel_id, *owner in self.db.execute(stmt))
+        return owners
+
+@traced_class("db")
+class AsyncParcelRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def get_all(self):
+        result = await self.db.execute(select(Parcel))
+        return result.scalars().all()
+    
+    async def get_by_farmer_id(self, farmer_id: str):
+        result = await self.db.execute(select(Parcel).where(Parcel.farmer_id == farmer_id))
+        return result.scalars().all()
+    
+    async def get_by_id(self, parcel_id: str):
+        """Get parcel by ID."""
+        result = await self.db.execute(select(Parcel).where(Parcel.id == parcel_id))
+        return result.scalars().first()
@@ -1,7 +1,11 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.base import FarmerReport
 import uuid
+from app.observability.tracing import traced_class
 
+@traced_class("db")
 class ReportRepository:
     def __init__(self, db: Session):
         self.db = db
@@ -10,6 +14,14 @@ class ReportRepository:
         """Get farmer report by phone number."""
         return self.db.query(FarmerReport).filter(FarmerReport.phone == phone).first()
     
+    def get_by_phones(self, phones: list[str], chunk_size: int = 1000) -> dict:
+        """Phone -> farmer report, for the given phones that have one, with one query per chunk."""
+        reports = {}
+        for start in range(0, len(phones), chunk_size):
+            chunk = phones[start:start + chunk_size]
+            reports.update((report.phone, report) for report in self.db.query(FarmerReport).filter(FarmerReport.phone.in_(chunk)))
+        return reports
+    
     def create_or_update(self, phone: str, report_frequency: str):
         """Create or update a farmer report."""
         report = self.get_by_phone(phone)
@@ -33,3 +45,46 @@ class ReportRepository:
         if report:
             report.last_sent = sent_date
             self.db.commit()
+    
+    def update_last_sent_many(self, phones: list[str], sent_date, chunk_size: int = 1000):
+        """Update the last_sent date for many farmer reports with one UPDATE per chunk."""
+        for start in range(0, len(phones), chunk_size):
+            chunk = phones[start:start + chunk_size]
+            self.db.query(FarmerReport).filter(FarmerReport.phone.in_(chunk)).update(
+                {FarmerReport.last_sent: sent_date}, synchronize_session=False
+            )
+        self.db.commit()
+
+@traced_class("db")
+class AsyncReportRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def get_by_phone(self, phone: str):
+        """Get farmer report by phone number."""
+        result = await self.db.execute(select(FarmerReport).where(FarmerReport.phone == phone))
+        return result.scalars().first()
+    
+    async def create_or_update(self, phone: str, report_frequency: str):
+        """Create or update a farmer report."""
+        report = await self.get_by_phone(phone)
+        
+        if report:
+            report.report_frequency = report_frequency
+        else:
+            report = FarmerReport(
+                id=f"REP_{uuid.uuid4().hex[:8].upper()}",
+                phone=phone,
+                report_frequency=report_frequency
+            )
+            self.db.add(report)
+        
+        await self.db.commit()
+        return report
+    
+    async def update_last_sent(self, phone: str, sent_date):
+        """Update the last_sent date for a farmer report."""
+        report = await self.get_by_phone(phone)
+        if report:
+            report.last_sent = sent_date
+            await self.db.commit()
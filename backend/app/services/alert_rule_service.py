@@ -0,0 +1,171 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Sequence
+from zoneinfo import ZoneInfo
+from sqlalchemy.orm import Session
+from app.repositories.alert_repo import AlertRepository
+from app.repositories.index_repo import IndexRepository
+from app.repositories.parcel_repo import ParcelRepository
+from app.analytics.alert_rules import DEFAULT_RULES, AlertRule, RuleHit, evaluate_rules, parse_rules
+from app.analytics.series import EPOCH_ORDINAL, day_to_date
+from app.integrations.base_messenger import BaseMessenger
+from app.services.anomaly_service import INDEX_LABELS
+from app.config import settings
+from app.observability.tracing import traced
+import logging
+
+logger = logging.getLogger(__name__)
+
+def in_quiet_hours(now: datetime, spec: Optional[str] = None, tz: Optional[str] = None) -> bool:
+    """Whether a naive UTC time falls in the "start-end" local quiet hours (which may wrap midnight)."""
+    spec = settings.ALERT_QUIET_HOURS if spec is None else spec
+    if not spec:
+        return False
+    start, end = (int(hour) for hour in spec.split("-"))
+    hour = now.replace(tzinfo=timezone.utc).astimezone(ZoneInfo(tz or settings.ALERT_TIMEZONE)).hour
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+class AlertRuleService:
+    """Checks newly ingested readings against the alert rules and notifies the parcels' farmers."""
+
+    def __init__(self, db: Session, messenger: BaseMessenger = None, rules: Sequence[AlertRule] = None):
+        self.db = db
+        self.alert_repo = AlertRepository(db)
+        self.parcel_repo = ParcelRepository(db)
+        self.index_repo = IndexRepository(db)
+        self.rules = list(rules) if rules is not None else parse_rules(settings.ALERT_RULES or DEFAULT_RULES)
+        self._messenger = messenger
+
+    @property
+    def messenger(self) -> BaseMessenger:
+        if self._messenger is None:
+            from app.services.messaging_service import get_messenger
+            self._messenger = get_messenger()
+        return self._messenger
+
+    @traced("service")
+    def evaluate(self, rows: Iterable[Sequence], now: datetime = None) -> Dict:
+        """
+        Check new readings against the rules and store the alerts as pending (caller commits).
+
+        rows are (parcel_id, date, ndvi, ..., ph) tuples. Must run before the
+        readings are stored: the latest stored value of each index of the affected
+        parcels is the "previous reading" rules compare with, so only those
+        parcels' readings are read. Nothing is sent here, so no messaging call
+        runs inside the caller's transaction: flush_pending() notifies the
+        farmers once it has committed.
+        """
+        result = {"alerts": 0, "new_alerts": 0}
+        if str(settings.ALERT_RULES_ENABLED).lower() != "true" or not self.rules:
+            return result
+        rows = sorted(rows, key=lambda row: (row[0], row[1]))
+        if not rows:
+            return result
+
+        stored = self.index_repo.get_last_readings(list(dict.fromkeys(row[0] for row in rows)))
+        last_readings = {
+            parcel_id: {name: (day.toordinal() - EPOCH_ORDINAL, value) for name, (day, value) in series.items()}
+            for parcel_id, series in stored.items()
+        }
+        hits = evaluate_rules(rows, last_readings, self.rules)
+        if not hits:
+            return result
+
+        now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+        # Alerts of re-sent readings are stored already and are not notified again
+        new_rows = self.alert_repo.insert_new([self.to_alert_row(hit, now) for hit in hits])
+        result.update(alerts=len(hits), new_alerts=len(new_rows))
+        return result
+
+    @traced("service")
+    def flush_pending(self, now: datetime = None) -> Dict:
+        """Send the pending notifications and commit their outcome (those of quiet hours stay pending while they last)."""
+        now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+        result = {"sent": 0, "pending": 0, "duplicate": 0, "failed": 0, "no_phone": 0}
+        alerts = [
+            {"id": alert.id, "parcel_id": alert.parcel_id, "date": alert.date, "rule": alert.rule, "message": alert.message}
+            for alert in self.alert_repo.get_pending()
+        ]
+        if alerts:
+            owners = self.parcel_repo.get_owners({alert["parcel_id"] for alert in alerts})
+            result.update(self._notify(alerts, owners, now))
+            self.db.commit()
+        return result
+
+    def _notify(self, alerts: List[Dict], owners: Dict, now: datetime) -> Dict[str, int]:
+        """
+        One message per farmer listing their new alerts; records each alert's outcome.
+
+        An alert whose rule already notified the farmer about the same parcel
+        within ALERT_DEDUP_HOURS (or earlier in this batch) is not repeated.
+        """
+        outcome = {}
+        if in_quiet_hours(now):
+            return {"pending": len(alerts)}
+
+        recent = self.alert_repo.recently_notified(
+            {alert["parcel_id"] for alert in alerts}, now - timedelta(hours=settings.ALERT_DEDUP_HOURS)
+        )
+        by_farmer = {}
+        # Newest reading first, so it is the one reported when a batch repeats a rule
+        for alert in sorted(alerts, key=lambda alert: alert["date"], reverse=True):
+            farmer_id, phone, parcel_name = owners.get(alert["parcel_id"], (None, None, alert["parcel_id"]))
+            if not phone:
+                outcome.setdefault("no_phone", []).append(alert["id"])
+            elif (alert["parcel_id"], alert["rule"]) in recent:
+                outcome.setdefault("duplicate", []).append(alert["id"])
+            else:
+                recent.add((alert["parcel_id"], alert["rule"]))
+                by_farmer.setdefault((farmer_id, phone), []).append((parcel_name, alert))
+
+        for (farmer_id, phone), farmer_alerts in by_farmer.items():
+            try:
+                sent = self.messenger.send_message(phone, self.format_message(farmer_alerts))
+            except Exception as e:
+                logger.error(f"Failed to send alerts to farmer {farmer_id}: {e}")
+                sent = False
+            outcome.setdefault("sent" if sent else "failed", []).extend(alert["id"] for _, alert in farmer_alerts)
+
+        for status, ids in outcome.items():
+            self.alert_repo.set_notification(ids, status, now if status == "sent" else None)
+        return {status: len(ids) for status, ids in outcome.items()}
+
+    @staticmethod
+    def format_message(farmer_alerts: List[tuple]) -> str:
+        """WhatsApp text for one farmer's (parcel name, alert) pairs."""
+        lines = [f"📍 *{parcel_name}* ({alert['date']}): {alert['message']}"
+                 for parcel_name, alert in farmer_alerts[:settings.ALERT_MAX_LINES]]
+        more = len(farmer_alerts) - len(lines)
+        if more > 0:
+            lines.append(f"…and {more} more alert{'s' if more > 1 else ''}.")
+        return "⚠️ *Parcel Alerts*\n\n" + "\n".join(lines)
+
+    @staticmethod
+    def to_alert_row(hit: RuleHit, created_at: datetime) -> Dict:
+        rule = hit.rule
+        reading_date = day_to_date(hit.day)
+        return {
+            "id": f"{hit.parcel_id}_{reading_date:%Y%m%d}_{rule.name}",
+            "parcel_id": hit.parcel_id,
+            "date": reading_date,
+            "index_name": rule.index_name,
+            "kind": "rule",
+            "severity": rule.severity,
+            "value": hit.value,
+            "reference": hit.reference,
+            "score": round(hit.score, 4),
+            "message": AlertRuleService.describe(hit),
+            "created_at": created_at,
+            "rule": rule.name,
+            "notification": "pending",
+            "notified_at": None,
+        }
+
+    @staticmethod
+    def describe(hit: RuleHit) -> str:
+        label = INDEX_LABELS[hit.rule.index_name]
+        if hit.rule.condition == "drop":
+            return (f"{label} dropped from {hit.previous:.2f} to {hit.value:.2f} "
+                    f"(-{hit.score:.2f}) since the previous reading.")
+        return f"{label} {hit.value:.2f} is {hit.rule.condition} {hit.rule.threshold:g}."
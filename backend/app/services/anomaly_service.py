@@ -0,0 +1,103 @@
+from datetime import date, datetime, timezone
+from typing import Dict, List
+from sqlalchemy.orm import Session
+from app.repositories.alert_repo import AlertRepository
+from app.repositories.index_repo import IndexRepository
+from app.repositories.parcel_repo import ParcelRepository
+from app.analytics.anomalies import CROP_RANGES, DEFAULT_RANGES, Anomaly, detect_anomalies
+from app.analytics.series import SeriesBatch, parcel_chunks
+from app.config import settings
+from app.observability.tracing import traced
+
+SCAN_CHUNK_PARCELS = 2000  # Parcels per vectorized batch when scanning
+
+INDEX_LABELS = {
+    "ndvi": "NDVI", "ndmi": "NDMI", "ndwi": "NDWI", "soc": "SOC",
+    "nitrogen": "Nitrogen", "phosphorus": "Phosphorus", "potassium": "Potassium", "ph": "pH",
+}
+
+class AnomalyService:
+    """Finds anomalous readings across parcel histories and records them as alerts."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.index_repo = IndexRepository(db)
+        self.parcel_repo = ParcelRepository(db)
+        self.alert_repo = AlertRepository(db)
+
+    @traced("service")
+    def scan(self, farmer_id: str = None, chunk_parcels: int = SCAN_CHUNK_PARCELS) -> Dict:
+        """
+        Run the detectors over the full history of a farmer's parcels (or all parcels).
+
+        Series are streamed with one query and checked in vectorized chunks.
+        Alerts already recorded by an earlier scan are skipped, so rescans are safe.
+        """
+        crops = self.parcel_repo.get_crops(farmer_id)
+        rows = self.index_repo.iter_series(farmer_id, settings.REPORT_STREAM_BATCH_SIZE)
+        created_at = datetime.now(timezone.utc).replace(tzinfo=None)
+
+        parcels = found = inserted = 0
+        for chunk in parcel_chunks(rows, chunk_parcels):
+            batch = SeriesBatch.from_rows(chunk)
+            parcel_crops = [crops.get(parcel_id, "") for parcel_id in batch.parcel_ids]
+            anomalies = detect_anomalies(batch, parcel_crops)
+            parcels += len(batch)
+            found += len(anomalies)
+            alert_rows = [self.to_alert_row(anomaly, crops.get(anomaly.parcel_id, ""), created_at) for anomaly in anomalies]
+            inserted += len(self.alert_repo.insert_new(alert_rows))
+
+        self.db.commit()
+        return {"parcels": parcels, "anomalies": found, "new_alerts": inserted}
+
+    def list_alerts(self, farmer_id: str = None, parcel_id: str = None, kind: str = None,
+                    severity: str = None, since: date = None, limit: int = 100) -> List[Dict]:
+        alerts = self.alert_repo.query(farmer_id, parcel_id, kind, severity, since, limit)
+        return [
+            {
+                "id": alert.id,
+                "parcel_id": alert.parcel_id,
+                "date": str(alert.date),
+                "index_name": alert.index_name,
+                "kind": alert.kind,
+                "severity": alert.severity,
+                "value": alert.value,
+                "reference": alert.reference,
+                "score": alert.score,
+                "message": alert.message,
+                "created_at": alert.created_at.isoformat(),
+                "rule": alert.rule,
+                "notification": alert.notification,
+            }
+            for alert in alerts
+        ]
+
+    @staticmethod
+    def to_alert_row(anomaly: Anomaly, crop: str, created_at: datetime) -> Dict:
+        return {
+            "id": f"{anomaly.parcel_id}_{anomaly.date:%Y%m%d}_{anomaly.index_name}_{anomaly.kind}",
+            "parcel_id": anomaly.parcel_id,
+            "date": anomaly.date,
+            "index_name": anomaly.index_name,
+            "kind": anomaly.kind,
+            "severity": anomaly.severity,
+            "value": anomaly.value,
+            "reference": anomaly.reference,
+            "score": anomaly.score,
+            "message": AnomalyService.describe(anomaly, crop),
+            "created_at": created_at,
+        }
+
+    @staticmethod
+    def describe(anomaly: Anomaly, crop: str) -> str:
+        label = INDEX_LABELS[anomaly.index_name]
+        if anomaly.kind == "drop":
+            return (f"{label} dropped from {anomaly.reference:.2f} to {anomaly.value:.2f} "
+                    f"(-{anomaly.score:.2f}) since the previous reading.")
+        if anomaly.kind == "zscore":
+            direction = "above" if anomaly.value > anomaly.reference else "below"
+            return (f"{label} reading {anomaly.value:.2f} is {anomaly.score:.1f} standard deviations "
+                    f"{direction} the {anomaly.reference:.2f} expected from its recent readings.")
+        low, high = CROP_RANGES.get(crop, {}).get(anomaly.index_name, DEFAULT_RANGES[anomaly.index_name])
+        crop_text = f" for {crop}" if crop in CROP_RANGES else ""
+        return f"{label} {anomaly.value:.2f} is outside the typical range{crop_text} ({low:g}-{high:g})."
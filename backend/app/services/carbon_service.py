@@ -0,0 +1,164 @@
+import math
+from typing import Dict, List, Optional
+import numpy as np
+from sqlalchemy.orm import Session
+from app.repositories.carbon_repo import CarbonRepository
+from app.repositories.index_repo import IndexRepository
+from app.repositories.parcel_repo import ParcelRepository
+from app.analytics.carbon import CO2_PER_C, SOC_COLUMN, carbon_balances, reading_balances
+from app.analytics.series import SeriesBatch, day_to_date, parcel_chunks
+from app.config import settings
+from app.observability.tracing import traced
+
+CARBON_CHUNK_PARCELS = 1000  # Parcels whose balances are computed and written together
+BALANCE_FIELDS = ("soc_date", "soc", "stock_t_c_ha", "co2e_t", "previous_date", "change_co2e_t", "baseline_date", "baseline_change_co2e_t")
+ROLLUP_KEYS = {"crop": "crop", "farmer": "farmer_id"}  # Roll-up -> key field of its groups
+TOTAL_FIELDS = ("parcels", "parcels_with_soc", "area_ha", "stock_t_c", "co2e_t", "change_co2e_t", "baseline_change_co2e_t")
+
+def _number(value, decimals: int = 3) -> Optional[float]:
+    """Rounded float, None for NaN / missing."""
+    return None if value is None or math.isnan(value) else round(float(value), decimals)
+
+class CarbonService:
+    """
+    Soil carbon stock and CO2e of parcels from their SOC readings.
+
+    Each parcel's balance is stored in parcel_carbon and only recomputed when
+    the parcel gets new readings, so farmer, crop and fleet totals are sums
+    over one row per parcel.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.carbon_repo = CarbonRepository(db)
+        self.index_repo = IndexRepository(db)
+        self.parcel_repo = ParcelRepository(db)
+        self.bulk_density = settings.CARBON_BULK_DENSITY
+        self.depth_cm = settings.CARBON_DEPTH_CM
+
+    def update(self, batch: SeriesBatch) -> int:
+        """Recompute the balances of the parcels of a batch - their full history - in place (caller commits)."""
+        areas = self.parcel_repo.get_areas(parcel_ids=batch.parcel_ids)
+        return self.carbon_repo.replace_many(self._rows(batch, areas))
+
+    @traced("service")
+    def refresh(self, chunk_parcels: int = CARBON_CHUNK_PARCELS) -> int:
+        """
+        Compute the balance of every parcel with readings but none stored (e.g.
+        readings written outside IndexIngestService), committing per chunk.
+
+        Returns the number of parcels refreshed.
+        """
+        parcel_ids = self.carbon_repo.get_missing_parcel_ids()
+        for start in range(0, len(parcel_ids), chunk_parcels):
+            chunk = parcel_ids[start:start + chunk_parcels]
+            # Locked like ingest, so an ingest of these parcels cannot commit between the read and the write
+            self.parcel_repo.lock(chunk)
+            self.update(SeriesBatch.from_rows(self.index_repo.get_series(chunk)))
+            self.db.commit()
+        return len(parcel_ids)
+
+    @traced("service")
+    def rebuild(self, chunk_parcels: int = CARBON_CHUNK_PARCELS) -> int:
+        """Recompute every balance from parcel_indices in one streamed pass (caller commits)."""
+        self.carbon_repo.delete_all()
+        areas = self.parcel_repo.get_areas()
+        parcels = 0
+        rows = self.index_repo.iter_series(batch_size=settings.REPORT_STREAM_BATCH_SIZE)
+        for chunk in parcel_chunks(rows, chunk_parcels):
+            batch = SeriesBatch.from_rows(chunk)
+            parcels += self.carbon_repo.insert_many(self._rows(batch, areas))
+        return parcels
+
+    def _rows(self, batch: SeriesBatch, areas: Dict[str, float]) -> List[Dict]:
+        """parcel_carbon rows of every parcel of a batch (empty balances for parcels without SOC)."""
+        area_array = np.array([areas[parcel_id] for parcel_id in batch.parcel_ids], dtype=float)
+        balances = carbon_balances(batch, area_array, self.bulk_density, self.depth_cm)
+        rows = {parcel_id: {"parcel_id": parcel_id, **dict.fromkeys(BALANCE_FIELDS)} for parcel_id in batch.parcel_ids}
+        for i, parcel in enumerate(balances.parcels.tolist()):
+            has_previous = balances.previous[i] != balances.latest[i]
+            rows[batch.parcel_ids[parcel]].update(
+                soc_date=day_to_date(batch.days[balances.latest[i]]),
+                soc=float(batch.values[balances.latest[i], SOC_COLUMN]),
+                stock_t_c_ha=_number(balances.stock_t_c_ha[i], 4),
+                co2e_t=_number(balances.co2e_t[i], 4),
+                previous_date=day_to_date(batch.days[balances.previous[i]]) if has_previous else None,
+                change_co2e_t=_number(balances.change_co2e_t[i], 4),
+                baseline_date=day_to_date(batch.days[balances.first[i]]),
+                baseline_change_co2e_t=_number(balances.baseline_change_co2e_t[i], 4),
+            )
+        return list(rows.values())
+
+    def parcel_history(self, parcel_id: str) -> Optional[Dict]:
+        """Stock, CO2e and change of every SOC reading of a parcel (None for an unknown parcel)."""
+        parcel = self.parcel_repo.get_by_id(parcel_id)
+        if not parcel:
+            return None
+        batch = SeriesBatch.from_rows(self.index_repo.get_series([parcel_id]))
+        soc = batch.values[:, SOC_COLUMN]
+        stocks, co2e, change = reading_balances(soc, parcel.area_ha, self.bulk_density, self.depth_cm)
+        return {
+            "parcel_id": parcel.id,
+            "area_ha": float(parcel.area_ha),
+            "readings": [
+                {
+                    "date": str(day_to_date(day)),
+                    "soc": _number(soc[i], 2),
+                    "stock_t_c_ha": _number(stocks[i], 2),
+                    "co2e_t": _number(co2e[i], 2),
+                    "change_co2e_t": _number(change[i], 2),
+                }
+                for i, day in enumerate(batch.days.tolist())
+                if not math.isnan(soc[i])
+            ],
+        }
+
+    @traced("service")
+    def farmer_summary(self, farmer_id: str) -> Dict:
+        """A farmer's totals, per crop and per parcel, from the stored balances."""
+        groups = [self._totals("crop", row) for row in self.carbon_repo.get_totals("crop", farmer_id)]
+        return {
+            "farmer_id": farmer_id,
+            **self._sum(groups),
+            "crops": groups,
+            "parcel_balances": [
+                {
+                    "parcel_id": parcel.id,
+                    "name": parcel.name,
+                    "crop": parcel.crop,
+                    "area_ha": float(parcel.area_ha),
+                    "soc_date": str(balance.soc_date) if balance.soc_date else None,
+                    "soc": balance.soc,
+                    "stock_t_c_ha": _number(balance.stock_t_c_ha, 2),
+                    "co2e_t": _number(balance.co2e_t, 2),
+                    "change_co2e_t": _number(balance.change_co2e_t, 2),
+                    "baseline_date": str(balance.baseline_date) if balance.baseline_date else None,
+                    "baseline_change_co2e_t": _number(balance.baseline_change_co2e_t, 2),
+                }
+                for parcel, balance in self.carbon_repo.get_by_farmer_id(farmer_id)
+            ],
+        }
+
+    @traced("service")
+    def fleet_summary(self, by: str = "crop") -> Dict:
+        """Totals over every parcel, rolled up per crop or per farmer."""
+        groups = [self._totals(by, row) for row in self.carbon_repo.get_totals(by)]
+        return {**self._sum(groups), "by": by, "groups": groups}
+
+    @staticmethod
+    def _totals(by: str, row) -> Dict:
+        key, parcels, with_soc, area, co2e, change, baseline_change = row
+        return {
+            ROLLUP_KEYS[by]: key,
+            "parcels": parcels,
+            "parcels_with_soc": with_soc,
+            "area_ha": round(area or 0.0, 2),
+            "stock_t_c": round((co2e or 0.0) / CO2_PER_C, 2),
+            "co2e_t": round(co2e or 0.0, 2),
+            "change_co2e_t": round(change or 0.0, 2),
+            "baseline_change_co2e_t": round(baseline_change or 0.0, 2),
+        }
+
+    @staticmethod
+    def _sum(groups: List[Dict]) -> Dict:
+        return {field: round(sum(group[field] for group in groups), 2) for field in TOTAL_FIELDS}
@@ -0,0 +1,127 @@
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from app.repositories.cohort_repo import CohortRepository
+from app.repositories.index_repo import IndexRepository
+from app.repositories.parcel_repo import ParcelRepository
+from app.analytics.percentiles import cohort_percentiles, cohort_values, percentile_of, window_start
+from app.analytics.series import EPOCH_ORDINAL, INDEX_NAMES, SeriesBatch, day_to_date, parcel_chunks
+from app.services.anomaly_service import INDEX_LABELS
+from app.config import settings
+from app.observability.tracing import traced
+
+COHORT_CHUNK_PARCELS = 1000  # Parcels whose series are turned into cohort values at a time
+
+def ordinal(n: int) -> str:
+    """1st, 2nd, 3rd, 4th, ..., 11th, 12th, 13th, ..., 21st."""
+    suffix = "th" if 10 <= n % 100 <= 20 else {1: "st", 2: "nd", 3: "rd"}.get(n % 10, "th")
+    return f"{n}{suffix}"
+
+class CohortService:
+    """Per-crop percentile distributions of every index, and where a parcel's reading falls in them."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.cohort_repo = CohortRepository(db)
+        self.index_repo = IndexRepository(db)
+        self.parcel_repo = ParcelRepository(db)
+        self.window_days = settings.COHORT_WINDOW_DAYS
+
+    @traced("service")
+    def refresh(self, chunk_parcels: int = COHORT_CHUNK_PARCELS) -> Dict:
+        """
+        Recompute every distribution from parcel_indices in one streamed pass and
+        replace the stored ones (commits). Meant to run nightly.
+
+        Only one value per parcel, window and index is kept while streaming;
+        all cohorts are then computed together with array operations.
+        """
+        crops = self.parcel_repo.get_crops()
+        crop_names = sorted(set(crops.values()))
+        codes = {crop: code for code, crop in enumerate(crop_names)}
+
+        collected = {name: [] for name in INDEX_NAMES}
+        rows = self.index_repo.iter_series(batch_size=settings.REPORT_STREAM_BATCH_SIZE)
+        for chunk in parcel_chunks(rows, chunk_parcels):
+            batch = SeriesBatch.from_rows(chunk)
+            crop_codes = np.array([codes[crops[parcel_id]] for parcel_id in batch.parcel_ids], dtype=np.int64)
+            for name, arrays in cohort_values(batch, crop_codes, self.window_days).items():
+                collected[name].append(arrays)
+
+        computed_at = datetime.now(timezone.utc).replace(tzinfo=None)
+        stored = []
+        for name, parts in collected.items():
+            if not parts:
+                continue
+            columns = (np.concatenate(column) for column in zip(*parts))
+            for code, window, size, points in zip(*cohort_percentiles(*columns, settings.COHORT_MIN_PARCELS)):
+                stored.append({
+                    "crop": crop_names[code],
+                    "window_start": day_to_date(window),
+                    "index_name": name,
+                    "window_days": self.window_days,
+                    "parcels": int(size),
+                    # Readings have two decimals; four keep interpolated points exact enough
+                    "points": json.dumps(np.round(points, 4).tolist()),
+                    "computed_at": computed_at,
+                })
+        self.cohort_repo.replace_all(stored)
+        self.db.commit()
+        return {"cohorts": len({(row["crop"], row["window_start"]) for row in stored}), "distributions": len(stored)}
+
+    def percentiles(self, crop: str, reading: tuple) -> Dict[str, Tuple[float, int, object]]:
+        """Index name -> (percentile, cohort size, window start) of a (date, ndvi, ..., ph) reading."""
+        return self.percentiles_many([(crop, reading)])[0]
+
+    def percentiles_many(self, items: Sequence[Tuple[str, tuple]]) -> List[Dict[str, Tuple[float, int, object]]]:
+        """
+        percentiles() of many (crop, reading) pairs, with the distributions read
+        in one query.
+
+        A reading is compared with its own window, or with the previous one
+        while its window has no distribution yet (e.g. before the nightly refresh).
+        Indices without a value or a large enough cohort are left out.
+        """
+        windows = []
+        for crop, reading in items:
+            day = reading[0].toordinal() - EPOCH_ORDINAL
+            current = day_to_date(window_start(day, self.window_days))
+            windows.append((current, current - timedelta(days=self.window_days)))
+        keys = {(crop, window) for (crop, _), pair in zip(items, windows) for window in pair}
+        distributions = self.cohort_repo.get_many(keys, self.window_days)
+
+        results = []
+        for (crop, reading), pair in zip(items, windows):
+            result = {}
+            for name, value in zip(INDEX_NAMES, reading[1:]):
+                if value is None:
+                    continue
+                for window in pair:
+                    found = distributions.get((crop, window, name))
+                    if found:
+                        parcels, points = found
+                        result[name] = (percentile_of(points, value), parcels, window)
+                        break
+            results.append(result)
+        return results
+
+    def describe(self, crop: str, percentiles: Dict[str, Tuple[float, int, object]]) -> str:
+        """
+        Summary section placing each index among the crop's parcels ("" without percentiles).
+
+        Indices can come from different cohorts (sizes differ per index, and
+        some may fall back to the previous window), so the lines are grouped
+        under a header per (window, cohort size).
+        """
+        groups: Dict[Tuple[object, int], List[str]] = {}
+        for name, (percentile, parcels, window) in percentiles.items():
+            # The extremes read better as 1st and 99th
+            line = f"- {INDEX_LABELS[name]} is in the {ordinal(min(max(round(percentile), 1), 99))} percentile for {crop}\n"
+            groups.setdefault((window, parcels), []).append(line)
+        sections = []
+        for (window, parcels), lines in groups.items():
+            end = window + timedelta(days=self.window_days - 1)
+            sections.append(f"**Compared with {parcels} {crop} parcels ({window} to {end}):**\n" + "".join(lines) + "\n")
+        return "".join(sections)
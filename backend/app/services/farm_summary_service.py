@@ -0,0 +1,73 @@
+from typing import Dict
+from sqlalchemy.orm import Session
+from app.repositories.index_repo import IndexRepository, FARM_AVERAGE_INDICES
+from app.observability.tracing import traced
+
+# Overall status classes, in the order of app.ai.summaries.OVERALL_STATUSES
+STATUS_CLASSES = ("excellent", "good", "needs_attention", "moderate")
+NO_DATA = "no_data"
+
+class FarmSummaryService:
+    """Overview of a farmer's whole holding from the latest reading of each parcel."""
+
+    def __init__(self, db: Session):
+        self.index_repo = IndexRepository(db)
+
+    @traced("service")
+    def get_summary(self, farmer_id: str, worst: int = 5) -> Dict:
+        """
+        Parcel count and area in total, per crop and per overall status,
+        area-weighted averages of FARM_AVERAGE_INDICES and the worst parcels.
+
+        Everything is aggregated in the database, so the cost does not grow with
+        the number of parcels read back. Averages weight each parcel's latest value
+        by its area and are None when no parcel has the index.
+        """
+        totals = {"parcels": 0, "area_ha": 0.0}
+        crops, statuses = {}, dict.fromkeys(STATUS_CLASSES + (NO_DATA,), 0)
+        weighted = {name: [0.0, 0.0] for name in FARM_AVERAGE_INDICES}  # sum(area * value), area
+        for crop, status, parcels, area, *sums in self.index_repo.get_farm_groups(farmer_id):
+            totals["parcels"] += parcels
+            totals["area_ha"] += area
+            crop_totals = crops.setdefault(crop, {"parcels": 0, "area_ha": 0.0})
+            crop_totals["parcels"] += parcels
+            crop_totals["area_ha"] += area
+            statuses[self._status_class(status)] += parcels
+            for j, name in enumerate(FARM_AVERAGE_INDICES):
+                weighted[name][0] += sums[2 * j] or 0.0
+                weighted[name][1] += sums[2 * j + 1] or 0.0
+
+        return {
+            "farmer_id": farmer_id,
+            "parcels": totals["parcels"],
+            "area_ha": round(totals["area_ha"], 2),
+            "averages": {
+                name: round(value_area / area, 3) if area else None
+                for name, (value_area, area) in weighted.items()
+            },
+            "crops": [
+                {"crop": crop, "parcels": crop_totals["parcels"], "area_ha": round(crop_totals["area_ha"], 2)}
+                for crop, crop_totals in sorted(crops.items(), key=lambda item: -item[1]["area_ha"])
+            ],
+            "statuses": statuses,
+            "worst_parcels": [
+                {
+                    "parcel_id": parcel_id,
+                    "name": name,
+                    "crop": crop,
+                    "area_ha": area,
+                    "data_date": str(reading_date),
+                    **dict(zip(FARM_AVERAGE_INDICES, values)),
+                    "good": good,
+                    "moderate": moderate,
+                    "poor": poor,
+                    "status": self._status_class(status),
+                }
+                for parcel_id, name, crop, area, reading_date, *values, good, moderate, poor, status
+                in (self.index_repo.get_worst_parcels(farmer_id, worst) if worst > 0 else [])
+            ],
+        }
+
+    @staticmethod
+    def _status_class(status: int) -> str:
+        return STATUS_CLASSES[status] if status >= 0 else NO_DATA
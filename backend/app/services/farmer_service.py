@@ -1,17 +1,21 @@
 from sqlalchemy.orm import Session
 from app.repositories.farmer_repo import FarmerRepository
+from app.observability.tracing import traced_class
 
+@traced_class("service")
 class FarmerService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, read_db: Session = None):
         self.farmer_repo = FarmerRepository(db)
+        # Plain lookups can go through the read pool; link_account stays on the writer session
+        self.read_farmer_repo = FarmerRepository(read_db or db)
     
     def get_by_phone(self, phone: str):
         """Get farmer by phone number."""
-        return self.farmer_repo.get_by_phone(phone)
+        return self.read_farmer_repo.get_by_phone(phone)
     
     def get_by_username(self, username: str):
         """Get farmer by username."""
-        return self.farmer_repo.get_by_username(username)
+        return self.read_farmer_repo.get_by_username(username)
     
     def link_account(self, phone: str, username: str) -> str:
         """Link a phone number to a farmer account."""
@@ -0,0 +1,127 @@
+from typing import Dict, Iterable
+from sqlalchemy.orm import Session
+from app.repositories.forecast_repo import ForecastRepository
+from app.repositories.index_repo import IndexRepository
+from app.repositories.parcel_repo import ParcelRepository
+from app.analytics.forecast import Forecasts, forecast_next
+from app.analytics.series import INDEX_NAMES, SeriesBatch, day_to_date, parcel_chunks
+from app.config import settings
+from app.observability.tracing import traced
+
+FORECAST_CHUNK_PARCELS = 5000  # Parcels forecast and written together
+
+def _number(value):
+    """Rounded float, None for NaN / missing."""
+    return None if value is None or value != value else round(float(value), 3)
+
+class ForecastService:
+    """
+    Next-pass forecast of every index of every parcel (see app/analytics/forecast.py).
+
+    Forecasts are stored in parcel_forecasts and only recomputed for parcels
+    that get new readings, like the running stats.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.forecast_repo = ForecastRepository(db)
+        self.index_repo = IndexRepository(db)
+        self.parcel_repo = ParcelRepository(db)
+        self.window = settings.FORECAST_WINDOW
+        self.default_interval = settings.FORECAST_INTERVAL_DAYS
+
+    def update(self, batch: SeriesBatch) -> int:
+        """Recompute the forecasts of the parcels of a batch - their full history - in place (caller commits)."""
+        self.forecast_repo.replace_many(batch.parcel_ids, self._rows(batch))
+        return len(batch)
+
+    @traced("service")
+    def refresh(self, chunk_parcels: int = FORECAST_CHUNK_PARCELS) -> int:
+        """
+        Forecast every parcel with readings but no stored forecasts (e.g.
+        readings written outside IndexIngestService), committing per chunk.
+
+        Returns the number of parcels refreshed.
+        """
+        parcel_ids = self.forecast_repo.get_missing_parcel_ids()
+        for start in range(0, len(parcel_ids), chunk_parcels):
+            chunk = parcel_ids[start:start + chunk_parcels]
+            # Locked like ingest, so an ingest of these parcels cannot commit between the read and the write
+            self.parcel_repo.lock(chunk)
+            self.update(SeriesBatch.from_rows(self.index_repo.get_series(chunk)))
+            self.db.commit()
+        return len(parcel_ids)
+
+    @traced("service")
+    def rebuild(self, chunk_parcels: int = FORECAST_CHUNK_PARCELS) -> int:
+        """Forecast every parcel from parcel_indices in one streamed pass (caller commits)."""
+        self.forecast_repo.delete_all()
+        parcels = 0
+        rows = self.index_repo.iter_series(batch_size=settings.REPORT_STREAM_BATCH_SIZE)
+        for chunk in parcel_chunks(rows, chunk_parcels):
+            batch = SeriesBatch.from_rows(chunk)
+            self.forecast_repo.insert_many(self._rows(batch))
+            parcels += len(batch)
+        return parcels
+
+    def forecast(self, batch: SeriesBatch) -> Forecasts:
+        return forecast_next(batch, self.window, self.default_interval)
+
+    def _rows(self, batch: SeriesBatch) -> Iterable[Dict]:
+        """parcel_forecasts rows of a batch (indices never measured get none)."""
+        forecasts = self.forecast(batch)
+        base_days = batch.days[batch.offsets[1:] - 1].tolist()
+        days, points = forecasts.day.tolist(), forecasts.points.tolist()
+        value, lower, upper = forecasts.value.tolist(), forecasts.lower.tolist(), forecasts.upper.tolist()
+        for i, parcel_id in enumerate(batch.parcel_ids):
+            base_date, forecast_date = day_to_date(base_days[i]), day_to_date(days[i])
+            for j, index_name in enumerate(INDEX_NAMES):
+                if points[i][j]:
+                    yield {
+                        "parcel_id": parcel_id,
+                        "index_name": index_name,
+                        "base_date": base_date,
+                        "forecast_date": forecast_date,
+                        "value": round(value[i][j], 4),
+                        "lower": None if lower[i][j] != lower[i][j] else round(lower[i][j], 4),
+                        "upper": None if upper[i][j] != upper[i][j] else round(upper[i][j], 4),
+                        "points": points[i][j],
+                    }
+
+    @staticmethod
+    def describe(forecasts: Forecasts, i: int) -> Dict[str, Dict]:
+        """Index name -> forecast of parcel i of computed forecasts, as returned by the API."""
+        date = str(day_to_date(forecasts.day[i]))
+        return {
+            name: {
+                "date": date,
+                "value": _number(forecasts.value[i, j]),
+                "lower": _number(forecasts.lower[i, j]),
+                "upper": _number(forecasts.upper[i, j]),
+                "points": int(forecasts.points[i, j]),
+            }
+            for j, name in enumerate(INDEX_NAMES)
+            if forecasts.points[i, j]
+        }
+
+    def parcel_forecasts(self, parcel_id: str) -> Dict[str, Dict]:
+        """
+        Index name -> next-pass forecast of a parcel (empty without readings).
+
+        Read from parcel_forecasts; computed from the parcel's history when none
+        are stored (until refresh()).
+        """
+        stored = self.forecast_repo.get_by_parcel_id(parcel_id)
+        if stored:
+            return {
+                row.index_name: {
+                    "date": str(row.forecast_date),
+                    "value": _number(row.value),
+                    "lower": _number(row.lower),
+                    "upper": _number(row.upper),
+                    "points": row.points,
+                }
+                for row in sorted(stored, key=lambda row: INDEX_NAMES.index(row.index_name))
+            }
+        batch = SeriesBatch.from_rows(self.index_repo.get_series([parcel_id]))
+        return self.describe(self.forecast(batch), 0) if len(batch) else {}
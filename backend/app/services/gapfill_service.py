@@ -0,0 +1,75 @@
+from typing import Dict, Optional, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from app.repositories.index_repo import IndexRepository
+from app.repositories.index_stats_repo import IndexStatsRepository
+from app.analytics.gapfill import FLAG_NAMES, fill_gaps
+from app.analytics.series import INDEX_NAMES, SeriesBatch, day_to_date
+from app.config import settings
+from app.storage.result_cache import ResultCache
+
+# Keyed by (parcel_id, latest reading date, reading count, max gap); IndexStatsService invalidates on ingest
+gapfill_cache = ResultCache(
+    "gapfill",
+    max_entries=settings.GAPFILL_CACHE_SIZE,
+    sqlite_path=settings.RESULT_CACHE_PATH,
+    enabled=str(settings.GAPFILL_CACHE_ENABLED).lower() == "true",
+)
+
+def _cell(value: float) -> Optional[float]:
+    return None if value != value else value  # NaN -> None
+
+class GapFillService:
+    """Gap-filled, flagged index series of parcels (see app/analytics/gapfill.py)."""
+
+    def __init__(self, db: Session):
+        self.index_repo = IndexRepository(db)
+        self.stats_repo = IndexStatsRepository(db)
+        self.max_gap_days = settings.GAPFILL_MAX_DAYS
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_gap_days > 0
+
+    def fill(self, batch: SeriesBatch) -> Tuple[SeriesBatch, np.ndarray]:
+        """The batch with its gaps filled, and the flag of every value."""
+        values, flags = fill_gaps(batch, self.max_gap_days)
+        return SeriesBatch(batch.parcel_ids, batch.offsets, batch.days, values), flags
+
+    def parcel_batch(self, parcel_id: str, version: tuple = None) -> Tuple[SeriesBatch, np.ndarray]:
+        """
+        fill() of one parcel's full history, cached until the parcel gets new or corrected readings.
+
+        version is the parcel's (reading count, latest date, revisions) when the
+        caller already has it.
+        """
+        count, latest_date, revisions = version or self.stats_repo.get_version(parcel_id) or self.index_repo.get_version(parcel_id)
+        cache_key = (parcel_id, str(latest_date), count, revisions, self.max_gap_days)
+        cached = gapfill_cache.get(cache_key)
+        if cached is not None:
+            days = np.array(cached["days"], dtype=np.int64)
+            values = np.array(cached["values"], dtype=np.float64).reshape(len(days), len(INDEX_NAMES))  # None -> NaN
+            flags = np.array(cached["flags"], dtype=np.int8).reshape(values.shape)
+            offsets = np.array([0, len(days)] if len(days) else [0], dtype=np.int64)
+            return SeriesBatch([parcel_id] if len(days) else [], offsets, days, values), flags
+
+        batch, flags = self.fill(SeriesBatch.from_rows(self.index_repo.get_series([parcel_id])))
+        if len(batch):
+            gapfill_cache.set(cache_key, {
+                "days": batch.days.tolist(),
+                "values": [[_cell(value) for value in row] for row in batch.values.tolist()],
+                "flags": flags.tolist(),
+            })
+        return batch, flags
+
+    def parcel_series(self, parcel_id: str) -> Dict:
+        """A parcel's readings with gaps filled; "filled" names how each estimated value was obtained."""
+        batch, flags = self.parcel_batch(parcel_id)
+        readings = []
+        for day, row, row_flags in zip(batch.days.tolist(), batch.values.tolist(), flags.tolist()):
+            readings.append({
+                "date": str(day_to_date(day)),
+                "values": {name: None if value != value else round(value, 3) for name, value in zip(INDEX_NAMES, row)},
+                "filled": {name: FLAG_NAMES[flag] for name, flag in zip(INDEX_NAMES, row_flags) if flag in FLAG_NAMES},
+            })
+        return {"parcel_id": parcel_id, "max_gap_days": self.max_gap_days, "readings": readings}
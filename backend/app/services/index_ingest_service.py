@@ -0,0 +1,209 @@
+import csv
+import json
+from datetime import date
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.repositories.index_repo import IndexRepository
+from app.repositories.parcel_repo import ParcelRepository
+from app.analytics.running_stats import RECENT_WINDOW
+from app.analytics.series import INDEX_NAMES, SeriesBatch
+from app.services.alert_rule_service import AlertRuleService
+from app.services.index_stats_service import IndexStatsService
+from app.services.carbon_service import CarbonService
+from app.services.forecast_service import ForecastService
+from app.observability.tracing import traced
+
+INGEST_CHUNK_ROWS = 10000  # Readings validated, written and committed together
+MAX_ERRORS = 100  # Rejected readings reported back in detail
+FORMATS = ("jsonl", "csv")
+FIELDS = {"parcel_id", "date", *INDEX_NAMES}
+
+# Plausible value ranges, to catch unit and column mix-ups
+VALUE_RANGES = {
+    "ndvi": (-1.0, 1.0),
+    "ndmi": (-1.0, 1.0),
+    "ndwi": (-1.0, 1.0),
+    "soc": (0.0, 100.0),
+    "nitrogen": (0.0, 100.0),
+    "phosphorus": (0.0, 100.0),
+    "potassium": (0.0, 100.0),
+    "ph": (0.0, 14.0),
+}
+
+def read_records(lines: Iterable[str], fmt: str) -> Iterator[Tuple[int, Any]]:
+    """
+    (line number, record) pairs from JSON lines or CSV with a header row.
+
+    A record is a dict, or the error message of a line that could not be read.
+    """
+    if fmt == "jsonl":
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError as e:
+                yield line_number, f"invalid JSON: {e}"
+    elif fmt == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, {key: (value if value != "" else None) for key, value in record.items()}
+    else:
+        raise ValueError(f"Unsupported format: {fmt}. Supported formats: {', '.join(FORMATS)}")
+
+def parse_reading(record: Any) -> Tuple[Optional[tuple], Optional[str]]:
+    """((parcel_id, date, ndvi, ..., ph), None) for a valid record, else (None, error)."""
+    if isinstance(record, str):
+        return None, record
+    if not isinstance(record, dict):
+        return None, "expected an object"
+    unknown = set(record) - FIELDS
+    if unknown:
+        return None, f"unknown fields: {', '.join(sorted(map(str, unknown)))}"
+
+    parcel_id = record.get("parcel_id")
+    if not parcel_id or not isinstance(parcel_id, str):
+        return None, "missing parcel_id"
+    try:
+        reading_date = date.fromisoformat(record.get("date") or "")
+    except (TypeError, ValueError):
+        return None, "date must be YYYY-MM-DD"
+
+    values = []
+    for name in INDEX_NAMES:
+        value = record.get(name)
+        if value is not None:
+            try:
+                if isinstance(value, bool):
+                    raise ValueError
+                value = float(value)
+            except (TypeError, ValueError):
+                return None, f"{name} must be a number"
+            low, high = VALUE_RANGES[name]
+            if not (low <= value <= high):  # Also rejects NaN
+                return None, f"{name} {value:g} is outside {low:g}..{high:g}"
+        values.append(value)
+    if all(value is None for value in values):
+        return None, "no index values"
+    return (parcel_id, reading_date, *values), None
+
+class IndexIngestService:
+    """Bulk ingestion of parcel index readings, upserted on (parcel_id, date)."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.index_repo = IndexRepository(db)
+        self.parcel_repo = ParcelRepository(db)
+        self.stats_service = IndexStatsService(db)
+        self.carbon_service = CarbonService(db)
+        self.forecast_service = ForecastService(db)
+        self.alert_service = AlertRuleService(db)
+
+    @traced("service")
+    def ingest(self, records: Iterable[Tuple[int, Any]], chunk_rows: int = INGEST_CHUNK_ROWS) -> Dict:
+        """
+        Validate and store readings, committing every chunk_rows records.
+
+        Invalid records are rejected (the first MAX_ERRORS with their line number)
+        and the rest are stored. A reading for a parcel and date already stored
+        replaces it; re-sending identical readings changes nothing, so a failed
+        or repeated upload can simply be sent again.
+
+        The running stats, carbon balances and forecasts of the parcels written
+        are brought up to date in the same transaction, so they never lag the
+        readings: readings appended after a parcel's latest one are folded into
+        its stored aggregates, and only parcels with corrected or backfilled
+        readings are recomputed from their history. The parcels are locked
+        until then, so concurrent ingests and refreshes of the same parcels take turns.
+
+        Alerts raised by the readings are stored with them and sent to the
+        farmers after the chunk commits, outside the transaction.
+        """
+        result = {"received": 0, "inserted": 0, "updated": 0, "unchanged": 0, "rejected": 0, "alerts": 0, "errors": []}
+        seen = set()
+        iterator = iter(records)
+        while True:
+            chunk = list(islice(iterator, chunk_rows))
+            if not chunk:
+                break
+            alerts = result["alerts"]
+            self._ingest_chunk(chunk, seen, result)
+            self.db.commit()
+            if result["alerts"] > alerts:
+                self.alert_service.flush_pending()
+        return result
+
+    def _ingest_chunk(self, chunk: List[Tuple[int, Any]], seen: set, result: Dict):
+        result["received"] += len(chunk)
+        rows, lines = [], []
+        for line_number, record in chunk:
+            row, error = parse_reading(record)
+            if row is not None:
+                if (row[0], row[1]) in seen:
+                    row, error = None, f"duplicate reading for {row[0]} on {row[1]}"
+                else:
+                    seen.add((row[0], row[1]))
+            if error:
+                self._reject(result, line_number, error)
+            else:
+                rows.append(row)
+                lines.append(line_number)
+
+        known = self.parcel_repo.existing_ids({row[0] for row in rows})
+        valid = []
+        for row, line_number in zip(rows, lines):
+            if row[0] in known:
+                valid.append(row)
+            else:
+                self._reject(result, line_number, f"unknown parcel {row[0]}")
+
+        self.parcel_repo.lock({row[0] for row in valid})
+        existing = self.index_repo.get_readings([(row[0], row[1]) for row in valid])
+        new, changed = [], []
+        for row in valid:
+            current = existing.get((row[0], row[1]))
+            if current is None:
+                new.append(row)
+            elif current != row[2:]:
+                changed.append(row)
+        result["unchanged"] += len(valid) - len(new) - len(changed)
+        if not new and not changed:
+            return
+
+        # Rules compare with the parcel's latest stored reading, so they run before the upsert
+        result["alerts"] += self.alert_service.evaluate(new)["new_alerts"]
+        self.index_repo.upsert_many(new + changed)
+
+        appended = []
+        # Forecasts of appended parcels come from the aggregates' recent readings, which must cover their window
+        if self.forecast_service.window <= RECENT_WINDOW:
+            corrected = {row[0] for row in changed}
+            batch = self.stats_service.append([row for row in new if row[0] not in corrected])
+            if len(batch):
+                self.carbon_service.update(batch)
+                self.forecast_service.update(batch)
+            appended = batch.parcel_ids
+
+        # One read of the other parcels' history feeds every aggregate
+        recompute = sorted({row[0] for row in new + changed}.difference(appended))
+        if recompute:
+            batch = SeriesBatch.from_rows(self.index_repo.get_series(recompute))
+            self.stats_service.update(batch)
+            self.carbon_service.update(batch)
+            self.forecast_service.update(batch)
+        result["inserted"] += len(new)
+        result["updated"] += len(changed)
+
+    @traced("service")
+    def refresh_stats(self) -> int:
+        """Aggregate the parcels whose readings were written without ingest() (commits). Returns the parcels refreshed."""
+        self.carbon_service.refresh()
+        self.forecast_service.refresh()
+        return self.stats_service.refresh()
+
+    @staticmethod
+    def _reject(result: Dict, line_number: int, error: str):
+        result["rejected"] += 1
+        if len(result["errors"]) < MAX_ERRORS:
+            result["errors"].append({"line": line_number, "error": error})
@@ -1,152 +1,87 @@
+import numpy as np
+from app.analytics.interpretation import TABLES, Band, band_of, classify_many
+
 class IndexInterpretationService:
-    """Service for interpreting parcel index values with rule-based logic."""
-    
+    """Service for interpreting parcel index values from the shared threshold tables."""
+
+    @staticmethod
+    def band(index_name: str, value: float | None) -> Band | None:
+        """The threshold band of a value (None when missing)."""
+        return band_of(index_name, value)
+
+    @staticmethod
+    def label(index_name: str, value: float | None) -> str | None:
+        """Short label, e.g. "vegetation is healthy" (None when missing)."""
+        band = band_of(index_name, value)
+        return band.label if band else None
+
+    @staticmethod
+    def describe(index_name: str, value: float | None) -> str:
+        """Full sentence for summaries."""
+        band = band_of(index_name, value)
+        return band.description if band else "No data available"
+
+    @staticmethod
+    def grade(index_name: str, value: float | None) -> str | None:
+        """poor, moderate or good (None when missing)."""
+        band = band_of(index_name, value)
+        return band.grade if band else None
+
+    @staticmethod
+    def classify_many(index_name: str, values, field: str = "grade") -> np.ndarray:
+        """
+        The band field (grade, label or description) of every value of an array
+        at once, as an object array with None where a value is NaN.
+        """
+        lookup = np.array([getattr(band, field) for band in TABLES[index_name]] + [None], dtype=object)
+        return lookup[classify_many(index_name, values)]  # -1 picks the trailing None
+
+    # Named shortcuts kept for existing callers
+
     @staticmethod
     def vegetation_status(value: float | None) -> str | None:
-        """Interpret NDVI (Normalized Difference Vegetation Index)."""
-        if value is None:
-            return None
-        if value < 0.30:
-            return "vegetation is poor"
-        elif value < 0.55:
-            return "vegetation is moderate"
-        elif value <= 0.75:
-            return "vegetation is healthy"
-        else:
-            return "vegetation is very vigorous"
-    
+        return IndexInterpretationService.label("ndvi", value)
+
     @staticmethod
     def ndvi_status(value: float) -> str:
-        """Interpret NDVI (Normalized Difference Vegetation Index)."""
-        if value is None:
-            return "No data available"
-        if value < 0.30:
-            return "Vegetation is poor and may be stressed."
-        elif value < 0.55:
-            return "Vegetation is developing with moderate health."
-        elif value <= 0.75:
-            return "Vegetation is healthy and dense."
-        else:
-            return "Vegetation is extremely vigorous."
-    
+        return IndexInterpretationService.describe("ndvi", value)
+
     @staticmethod
     def moisture_status(value: float | None) -> str | None:
-        """Interpret NDMI (Moisture Index)."""
-        if value is None:
-            return None
-        if value < 0.15:
-            return "moisture is low"
-        elif value <= 0.30:
-            return "moisture is moderate"
-        else:
-            return "moisture is high"
-    
+        return IndexInterpretationService.label("ndmi", value)
+
     @staticmethod
     def ndmi_status(value: float) -> str:
-        """Interpret NDMI (Moisture Index)."""
-        if value is None:
-            return "No data available"
-        if value < 0.15:
-            return "Low moisture - possible drought stress."
-        elif value <= 0.30:
-            return "Moderate moisture levels."
-        else:
-            return "High moisture - healthy water content."
-    
+        return IndexInterpretationService.describe("ndmi", value)
+
     @staticmethod
     def ndwi_status(value: float) -> str:
-        """Interpret NDWI (Water Index)."""
-        if value is None:
-            return "No data available"
-        if value < 0.10:
-            return "Low water presence."
-        elif value <= 0.25:
-            return "Moderate water content."
-        else:
-            return "Strong water presence."
-    
+        return IndexInterpretationService.describe("ndwi", value)
+
     @staticmethod
     def soc_status(value: float) -> str:
-        """Interpret SOC (Soil Organic Carbon)."""
-        if value is None:
-            return "No data available"
-        if value < 1.5:
-            return "Low soil organic matter - poor soil quality."
-        elif value <= 2.5:
-            return "Moderate soil organic content."
-        else:
-            return "High organic content - rich soil quality."
-    
+        return IndexInterpretationService.describe("soc", value)
+
     @staticmethod
     def soil_nitrogen_status(value: float | None) -> str | None:
-        """Interpret Nitrogen levels."""
-        if value is None:
-            return None
-        if value < 0.7:
-            return "nitrogen is low"
-        elif value <= 1.0:
-            return "nitrogen is adequate"
-        else:
-            return "nitrogen is high"
-    
+        return IndexInterpretationService.label("nitrogen", value)
+
     @staticmethod
     def nitrogen_status(value: float) -> str:
-        """Interpret Nitrogen levels."""
-        if value is None:
-            return "No data available"
-        if value < 0.7:
-            return "Low nitrogen - crop may need fertilization."
-        elif value <= 1.0:
-            return "Adequate nitrogen levels."
-        else:
-            return "High nitrogen levels - good for crop growth."
-    
+        return IndexInterpretationService.describe("nitrogen", value)
+
     @staticmethod
     def phosphorus_status(value: float) -> str:
-        """Interpret Phosphorus levels."""
-        if value is None:
-            return "No data available"
-        if value < 0.35:
-            return "Low phosphorus levels."
-        elif value <= 0.45:
-            return "Adequate phosphorus levels."
-        else:
-            return "High phosphorus levels."
-    
-    @staticmethod
-    def soil_ph_status(value: float | None) -> str | None:
-        """Interpret pH levels."""
-        if value is None:
-            return None
-        if value < 5.5:
-            return "pH is acidic"
-        elif value <= 7.5:
-            return "pH is neutral"
-        else:
-            return "pH is alkaline"
-    
+        return IndexInterpretationService.describe("phosphorus", value)
+
     @staticmethod
     def potassium_status(value: float) -> str:
-        """Interpret Potassium levels."""
-        if value is None:
-            return "No data available"
-        if value < 0.55:
-            return "Low potassium levels."
-        elif value <= 0.7:
-            return "Adequate potassium levels."
-        else:
-            return "High potassium levels - good for crop health."
-    
+        return IndexInterpretationService.describe("potassium", value)
+
+    @staticmethod
+    def soil_ph_status(value: float | None) -> str | None:
+        return IndexInterpretationService.label("ph", value)
+
     @staticmethod
     def ph_status(value: float) -> str:
-        """Interpret pH levels."""
-        if value is None:
-            return "No data available"
-        if value < 5.5:
-            return "Acidic soil - problematic for most crops."
-        elif value < 6.0:
-            return "Slightly acidic - acceptable for most crops."
-        elif value <= 7.0:
-            return "Good pH - ideal for most crops."
-        else:
-            return "Alkaline soil - may cause nutrient availability issues."
+        return IndexInterpretationService.describe("ph", value)
@@ -0,0 +1,112 @@
+from sqlalchemy.orm import Session
+from app.repositories.index_repo import IndexRepository
+from app.repositories.index_stats_repo import IndexStatsRepository
+from app.repositories.parcel_repo import ParcelRepository
+from typing import Sequence
+from app.analytics.running_stats import READINGS_KEY, RunningStats, batch_from_running, has_recent, running_stats_from_batch
+from app.analytics.series import EPOCH_ORDINAL, SeriesBatch, parcel_chunks
+from app.config import settings
+from app.services.trend_analysis_service import trend_cache
+from app.services.gapfill_service import gapfill_cache
+from app.ai.summaries import summary_cache
+from app.observability.tracing import traced
+
+REBUILD_CHUNK_PARCELS = 5000  # Parcels aggregated per pass when rebuilding from parcel_indices
+REFRESH_CHUNK_PARCELS = 1000  # Parcels refreshed (and committed) together
+
+class IndexStatsService:
+    """Keeps the per (parcel, index) running aggregates in step with ingested readings."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.index_repo = IndexRepository(db)
+        self.stats_repo = IndexStatsRepository(db)
+        self.parcel_repo = ParcelRepository(db)
+
+    @traced("service")
+    def update(self, batch: SeriesBatch) -> int:
+        """
+        Recompute the aggregates of the parcels of a batch - their full history - in place (caller commits).
+
+        A corrected reading cannot be taken back out of folded aggregates (the
+        first, last and recent values would need the readings around it), so
+        the parcels written are aggregated again rather than merged.
+        Their cached trends, summaries and gap-filled series are dropped too.
+        """
+        stats = running_stats_from_batch(batch)
+        self.stats_repo.replace_many(stats, self.index_repo.get_revisions(batch.parcel_ids))
+        self._invalidate(batch.parcel_ids)
+        return len(stats)
+
+    @traced("service")
+    def append(self, rows: Sequence[Sequence]) -> SeriesBatch:
+        """
+        Fold new (parcel_id, date, ndvi, ..., ph) readings into the stored aggregates (caller commits).
+
+        Only parcels whose readings all come after their stored ones are folded,
+        with RunningStats.merge and without reading their history; the rest
+        (backfills, parcels without aggregates) are left to update(). Returns
+        the folded parcels' batch_from_running, which carbon balances and
+        forecasts can be computed from in place of their history.
+        """
+        stored, revisions = self.stats_repo.get_many(sorted({row[0] for row in rows}))
+        last_days = {
+            parcel_id: series[READINGS_KEY].last_day
+            for parcel_id, series in stored.items()
+            if has_recent(series)
+        }
+        appended = sorted(
+            (row for row in rows if row[0] in last_days),
+            key=lambda row: (row[0], row[1]),
+        )
+        backfilled = {row[0] for row in appended if row[1].toordinal() - EPOCH_ORDINAL <= last_days[row[0]]}
+        appended = [row for row in appended if row[0] not in backfilled]
+
+        merged = {}
+        for parcel_id, added in running_stats_from_batch(SeriesBatch.from_rows(appended)).items():
+            series = stored[parcel_id]
+            # Only the indices measured by the new readings (and READINGS_KEY) change
+            merged[parcel_id] = {name: series.get(name, RunningStats()).merge(stats) for name, stats in added.items()}
+        self.stats_repo.replace_series(merged, revisions)
+        self._invalidate(list(merged))
+        return batch_from_running({parcel_id: {**stored[parcel_id], **series} for parcel_id, series in merged.items()})
+
+    @staticmethod
+    def _invalidate(parcel_ids: list[str]):
+        # Versioned keys already keep stale results from being served; this frees them right away
+        trend_cache.invalidate(parcel_ids)
+        summary_cache.invalidate(parcel_ids)
+        gapfill_cache.invalidate(parcel_ids)
+
+    @traced("service")
+    def refresh(self, chunk_parcels: int = REFRESH_CHUNK_PARCELS) -> int:
+        """
+        Recompute the aggregates of every parcel with readings but none stored
+        (e.g. readings written outside IndexIngestService), committing per chunk.
+
+        Returns the number of parcels refreshed.
+        """
+        parcel_ids = self.stats_repo.get_missing_parcel_ids()
+        for start in range(0, len(parcel_ids), chunk_parcels):
+            chunk = parcel_ids[start:start + chunk_parcels]
+            # Locked like ingest, so an ingest of these parcels cannot commit between the read and the write
+            self.parcel_repo.lock(chunk)
+            self.update(SeriesBatch.from_rows(self.index_repo.get_series(chunk)))
+            self.db.commit()
+        return len(parcel_ids)
+
+    @traced("service")
+    def rebuild(self, chunk_parcels: int = REBUILD_CHUNK_PARCELS) -> int:
+        """Recompute every aggregate from parcel_indices in one streamed pass (caller commits)."""
+        self.stats_repo.delete_all()
+
+        parcels = 0
+        rows = self.index_repo.iter_series(batch_size=settings.REPORT_STREAM_BATCH_SIZE)
+        for chunk in parcel_chunks(rows, chunk_parcels):
+            stats = running_stats_from_batch(SeriesBatch.from_rows(chunk))
+            self.stats_repo.insert_many(stats, self.index_repo.get_revisions(list(stats)))
+            parcels += len(stats)
+        trend_cache.clear()
+        summary_cache.clear()
+        gapfill_cache.clear()
+        return parcels
@@ -5,16 +5,19 @@ from app.ai.factory import get_intent_classifier
 from app.services.farmer_service import FarmerService
 from app.services.parcel_service import ParcelService
 from app.services.report_service import ReportService
+from app.observability.metrics import INTENTS
+from app.observability.tracing import traced
 
 class IntentService:
-    def __init__(self, db: Session = None):
+    def __init__(self, db: Session = None, read_db: Session = None):
         # db is optional to maintain backward compatibility if used statically, 
         # but required for full chat handling
         if db:
-            self.farmer_service = FarmerService(db)
-            self.parcel_service = ParcelService(db)
-            self.report_service = ReportService(db)
+            self.farmer_service = FarmerService(db, read_db)
+            self.parcel_service = ParcelService(read_db or db)
+            self.report_service = ReportService(db, read_db)
     
+    @traced("service")
     def handle_message(self, phone: str, text: str) -> str:
         """Handle incoming chat message and return appropriate response."""
         if not hasattr(self, 'farmer_service'):
@@ -28,6 +31,7 @@ class IntentService:
         
         # User is linked - detect intent
         intent = self.detect_intent(text)
+        INTENTS.labels(intent=intent).inc()
         
         if intent == "LIST_PARCELS":
             return self.parcel_service.format_parcels_list(farmer)
@@ -2,13 +2,23 @@ from sqlalchemy.orm import Session
 from app.models.base import Farmer
 from app.repositories.parcel_repo import ParcelRepository
 from app.services.index_service import IndexInterpretationService
+from app.services.cohort_service import CohortService
+from app.services.gapfill_service import GapFillService
+from app.services.forecast_service import ForecastService
+from app.analytics.gapfill import FLAG_NAMES
+from app.analytics.series import INDEX_NAMES
 from app.ai.factory import get_summary_generator
+from app.observability.tracing import traced_class
 
+@traced_class("service")
 class ParcelService:
     def __init__(self, db: Session):
         self.parcel_repo = ParcelRepository(db)
         self.index_interpreter = IndexInterpretationService()
         self.summary_generator = get_summary_generator()
+        self.cohort_service = CohortService(db)
+        self.gapfill_service = GapFillService(db)
+        self.forecast_service = ForecastService(db)
     
     def get_all_parcels(self):
         """Get all parcels."""
@@ -35,7 +45,13 @@ class ParcelService:
         }
     
     def get_parcel_details(self, parcel_id: str, farmer: Farmer):
-        """Get detailed information about a specific parcel including latest indices."""
+        """
+        Get detailed information about a specific parcel including latest indices.
+        
+        Indices missing from the latest reading are gap-filled where possible;
+        "filled" names each estimated index and how it was obtained, and
+        "forecast" holds each index's expected value at the next pass.
+        """
         parcel = self.parcel_repo.get_by_id(parcel_id)
         
         if not parcel:
@@ -54,7 +70,9 @@ class ParcelService:
             "area_ha": float(parcel.area_ha),
             "crop": parcel.crop,
             "data_date": None,
-            "indices": None
+            "indices": None,
+            "filled": None,
+            "forecast": None
         }
         
         if indices:
@@ -70,6 +88,14 @@ class ParcelService:
                 "potassium": round(float(latest.potassium), 2) if latest.potassium is not None else None,
                 "ph": round(float(latest.ph), 2) if latest.ph is not None else None
             }
+            details["filled"] = {}
+            if self.gapfill_service.enabled:
+                batch, flags = self.gapfill_service.parcel_batch(parcel.id)
+                for j, (name, flag) in enumerate(zip(INDEX_NAMES, flags[-1].tolist())):
+                    if flag in FLAG_NAMES:
+                        details["indices"][name] = round(float(batch.values[-1, j]), 2)
+                        details["filled"][name] = FLAG_NAMES[flag]
+            details["forecast"] = self.forecast_service.parcel_forecasts(parcel.id)
         
         return details
     
@@ -101,4 +127,11 @@ class ParcelService:
         }
         
         # Generate summary using the configured strategy (AI or Rule-Based)
-        return self.summary_generator.generate_parcel_summary(parcel.id, indices_data)
+        summary = self.summary_generator.generate_parcel_summary(parcel.id, indices_data)
+        
+        # Where the reading stands among the same crop's parcels (precomputed distributions)
+        reading = (latest.date, *(getattr(latest, name) for name in INDEX_NAMES))
+        cohort = self.cohort_service.describe(parcel.crop, self.cohort_service.percentiles(parcel.crop, reading))
+        if cohort:
+            summary = summary.rstrip("\n") + "\n\n" + cohort
+        return summary
@@ -5,17 +5,32 @@ from app.repositories.parcel_repo import ParcelRepository
 from app.repositories.index_repo import IndexRepository
 from app.ai.factory import get_summary_generator
 from app.services.index_service import IndexInterpretationService
+from app.services.cohort_service import CohortService
+from app.config import settings
+from app.observability.metrics import REPORT_RUN_DURATION, REPORTS_GENERATED
 from datetime import date
+from app.observability.tracing import traced
+from itertools import islice
 from typing import List, Dict
+import numpy as np
+from app.analytics.series import INDEX_NAMES
+
+# Report key -> index column; every status comes from the shared threshold tables
+REPORT_INDICES = {
+    "ndvi": "ndvi", "ndmi": "ndmi", "ndwi": "ndwi", "soc": "soc",
+    "n": "nitrogen", "p": "phosphorus", "k": "potassium", "ph": "ph",
+}
 
 class ReportService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, read_db: Session = None):
         self.report_repo = ReportRepository(db)
-        self.farmer_repo = FarmerRepository(db)
-        self.parcel_repo = ParcelRepository(db)
-        self.index_repo = IndexRepository(db)
+        # Farmers, parcels and indices are only read here, so they can use the read pool
+        self.farmer_repo = FarmerRepository(read_db or db)
+        self.parcel_repo = ParcelRepository(read_db or db)
+        self.index_repo = IndexRepository(read_db or db)
         self.summary_generator = get_summary_generator()
         self.interpretation_service = IndexInterpretationService()
+        self.cohort_service = CohortService(read_db or db)
     
     def set_report_frequency(self, phone: str, frequency: str) -> str:
         """Set report frequency for a farmer."""
@@ -40,28 +55,36 @@ class ReportService:
         
         return "none"  # Default frequency
 
+    @traced("service")
     def generate_reports(self) -> List[Dict]:
         """Generate reports for all farmers who should receive one today."""
+        with REPORT_RUN_DURATION.time():
+            reports = self._generate_due_reports()
+        REPORTS_GENERATED.inc(len(reports))
+        return reports
+    
+    def _generate_due_reports(self) -> List[Dict]:
         reports = []
+        sent_phones = []
         
-        # Get all farmers with phone numbers (linked farmers)
-        all_farmers = self.farmer_repo.get_all()
-        linked_farmers = [f for f in all_farmers if f.phone]
-        
-        for farmer in linked_farmers:
+        # Stream linked farmers in batches (server-side cursor on PostgreSQL) instead of loading all of them
+        farmers = self.farmer_repo.iter_linked(settings.REPORT_STREAM_BATCH_SIZE)
+        while batch := list(islice(farmers, settings.REPORT_STREAM_BATCH_SIZE)):
+            # Report preferences of the whole batch in one query
+            preferences = self.report_repo.get_by_phones([farmer.phone for farmer in batch])
             # Check if farmer should receive report today
-            if self._should_receive_report_today(farmer.phone):
-                report = self._generate_farmer_report(farmer)
-                reports.append(report)
-                # Update last_sent date
-                self.report_repo.update_last_sent(farmer.phone, date.today())
+            due = [farmer for farmer in batch if self._should_receive_report_today(preferences.get(farmer.phone))]
+            if due:
+                reports.extend(self._generate_farmer_reports(due, preferences))
+                sent_phones.extend(farmer.phone for farmer in due)
+        
+        # Update last_sent once the stream is consumed - committing earlier would close the cursor
+        self.report_repo.update_last_sent_many(sent_phones, date.today())
         
         return reports
     
-    def _should_receive_report_today(self, phone: str) -> bool:
-        """Determine if a farmer should receive a report today based on their frequency."""
-        farmer_report = self.report_repo.get_by_phone(phone)
-        
+    def _should_receive_report_today(self, farmer_report) -> bool:
+        """Determine if a farmer should receive a report today based on their FarmerReport row (None without one)."""
         if not farmer_report:
             # No preference set, don't send report
             return False
@@ -95,92 +118,70 @@ class ReportService:
     
     def _generate_farmer_report(self, farmer) -> Dict:
         """Generate a comprehensive report for a farmer about all their parcels."""
-        parcels = self.parcel_repo.get_by_farmer_id(farmer.id)
+        return self._generate_farmer_reports([farmer])[0]
+    
+    @traced("service")
+    def _generate_farmer_reports(self, farmers: List, preferences: Dict = None) -> List[Dict]:
+        """
+        Reports of a batch of farmers: their parcels and latest readings are read
+        in a few queries, and all parcel summaries are generated in one call.
+        preferences maps phone -> FarmerReport when the caller already has them.
+        """
+        if preferences is None:
+            preferences = self.report_repo.get_by_phones([farmer.phone for farmer in farmers])
+        parcels_by_farmer = self.parcel_repo.get_by_farmer_ids([farmer.id for farmer in farmers])
+        parcels = [parcel for farmer in farmers for parcel in parcels_by_farmer.get(farmer.id, [])]
+        latest = self.index_repo.get_latest([parcel.id for parcel in parcels])
+        parcels = [parcel for parcel in parcels if parcel.id in latest]
+        readings = [latest[parcel.id] for parcel in parcels]
+        
+        # Use factory-generated summary generator (rule-based or LLM)
+        summaries = self.summary_generator.generate_parcel_summaries(
+            [{"parcel_id": parcel.id, "parcel_name": parcel.name, "area_ha": parcel.area_ha, "crop": parcel.crop} for parcel in parcels],
+            readings,
+        )
+        
+        # Statuses of every reading of the batch, one array lookup per index
+        values = np.array([reading[1:] for reading in readings], dtype=float).reshape(len(readings), len(INDEX_NAMES))
+        statuses = {
+            name: self.interpretation_service.classify_many(name, values[:, j], "label").tolist()
+            for j, name in enumerate(INDEX_NAMES)
+        }
         
-        # Get report frequency to determine report type
-        frequency = self.get_report_frequency(farmer.phone)
+        # Percentile of each value among the same crop's parcels, where a distribution is stored
+        cohorts = self.cohort_service.percentiles_many([(parcel.crop, reading) for parcel, reading in zip(parcels, readings)])
         
-        report_data = {
-            "to": farmer.phone,
-            "farmer": farmer.name,
-            "report_type": frequency,
-            "generated_at": date.today().strftime('%Y-%m-%d'),
-            "parcels": []
-        }
+        def safe_round(value, decimals=2):
+            return round(float(value), decimals) if value is not None else 0.0
         
-        if not parcels:
-            return report_data
-        
-        # Build report with summaries (rule-based or LLM-powered)
-        for parcel in parcels:
-            # Get latest indices for this parcel
-            indices = self.index_repo.get_by_parcel_id(parcel.id)
-            
-            if not indices:
-                continue
-            
-            # Sort indices by date to ensure we get the latest one
-            indices.sort(key=lambda x: x.date)
-            
-            # Get the most recent index
-            latest_index = indices[-1]
-            
-            # Use factory-generated summary generator (rule-based or LLM)
-            indices_data = {
-                "latest_index": latest_index,
-                "parcel_name": parcel.name,
-                "area_ha": parcel.area_ha,
-                "crop": parcel.crop
-            }
-            summary = self.summary_generator.generate_parcel_summary(parcel.id, indices_data)
-            
-            # Build structured parcel data
-            def safe_round(value, decimals=2):
-                return round(float(value), decimals) if value is not None else 0.0
-            
-            parcel_data = {
+        parcel_data = {}
+        for i, (parcel, reading, summary) in enumerate(zip(parcels, readings, summaries)):
+            values_by_index = dict(zip(INDEX_NAMES, reading[1:]))
+            parcel_data[parcel.id] = {
                 "parcel_id": parcel.id,
                 "name": parcel.name,
                 "area_ha": float(parcel.area_ha),
                 "crop": parcel.crop,
-                "data_date": str(latest_index.date),
+                "data_date": str(reading[0]),
                 "indices": {
-                    "ndvi": {
-                        "value": safe_round(latest_index.ndvi),
-                        "status": self.interpretation_service.vegetation_status(latest_index.ndvi) if latest_index.ndvi else "unknown"
-                    },
-                    "ndmi": {
-                        "value": safe_round(latest_index.ndmi),
-                        "status": self.interpretation_service.moisture_status(latest_index.ndmi) if latest_index.ndmi else "unknown"
-                    },
-                    "ndwi": {
-                        "value": safe_round(latest_index.ndwi),
-                        "status": "moderate_water"
-                    },
-                    "soc": {
-                        "value": safe_round(latest_index.soc),
-                        "status": "moderate"
-                    },
-                    "n": {
-                        "value": safe_round(latest_index.nitrogen),
-                        "status": self.interpretation_service.soil_nitrogen_status(latest_index.nitrogen) if latest_index.nitrogen else "unknown"
-                    },
-                    "p": {
-                        "value": safe_round(latest_index.phosphorus),
-                        "status": "moderate"
-                    },
-                    "k": {
-                        "value": safe_round(latest_index.potassium),
-                        "status": "moderate"
-                    },
-                    "ph": {
-                        "value": safe_round(latest_index.ph),
-                        "status": self.interpretation_service.soil_ph_status(latest_index.ph) if latest_index.ph else "unknown"
+                    key: {
+                        "value": safe_round(values_by_index[index_name]),
+                        "status": statuses[index_name][i] or "unknown",
+                        "percentile": round(cohorts[i][index_name][0]) if index_name in cohorts[i] else None
                     }
+                    for key, index_name in REPORT_INDICES.items()
                 },
                 "summary": summary
             }
-            
-            report_data["parcels"].append(parcel_data)
         
-        return report_data
+        reports = []
+        for farmer in farmers:
+            reports.append({
+                "to": farmer.phone,
+                "farmer": farmer.name,
+                # Get report frequency to determine report type
+                "report_type": preferences[farmer.phone].report_frequency if farmer.phone in preferences else "none",
+                "generated_at": date.today().strftime('%Y-%m-%d'),
+                "parcels": [parcel_data[parcel.id] for parcel in parcels_by_farmer.get(farmer.id, []) if parcel.id in parcel_data]
+            })
+        return reports
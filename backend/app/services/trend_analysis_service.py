@@ -1,26 +1,129 @@
+import math
+import numpy as np
 from sqlalchemy.orm import Session
 from app.repositories.index_repo import IndexRepository
 from app.repositories.parcel_repo import ParcelRepository
+from app.repositories.index_stats_repo import IndexStatsRepository
 from app.ai.factory import get_trend_summarizer
-from typing import Dict
+from app.ai.summaries import FallbackText
+from app.ai.trends import LLMTrendSummarizer
+from app.analytics.series import INDEX_NAMES, SeriesBatch, day_to_date, parcel_chunks
+from app.analytics.trend_engine import DEFAULT_WINDOW, TrendStats, compute_trends
+from app.analytics.running_stats import READINGS_KEY, RECENT_WINDOW, readings_in_span, trends_from_running
+from app.analytics.gapfill import FLAG_CARRIED, FLAG_OBSERVED
+from app.services.gapfill_service import GapFillService
+from app.services.forecast_service import ForecastService
+from app.config import settings
+from app.storage.result_cache import ResultCache
+from app.observability.tracing import traced
+from typing import Dict, Iterator
+
+# Index -> (metric name, increasing message, decreasing message)
+INDEX_TRENDS = {
+    "ndvi": ("vegetation", "improving", "declining"),
+    "ndmi": ("moisture", "increasing", "decreasing"),
+    "ndwi": ("water content", "increasing", "decreasing"),
+    "soc": ("soil organic carbon", "increasing", "decreasing"),
+    "nitrogen": ("nitrogen", "increasing", "decreasing - potential nutrient depletion"),
+    "phosphorus": ("phosphorus", "increasing", "decreasing"),
+    "potassium": ("potassium", "increasing", "decreasing"),
+    "ph": ("pH", "increasing (more alkaline)", "decreasing (more acidic)"),
+}
+
+TREND_THRESHOLD = 0.05  # Minimum fitted change over the period to call a direction
+MIN_R_SQUARED = 0.25  # With 3+ readings, weaker fits are too noisy to call a direction
+BULK_CHUNK_PARCELS = 2000  # Parcels per vectorized batch when streaming bulk trends
+
+# Keyed by (parcel_id, latest reading date, reading count, revisions, summarizer, window, max gap, forecast window and interval);
+# IndexStatsService invalidates on ingest
+trend_cache = ResultCache(
+    "trends",
+    max_entries=settings.TREND_CACHE_SIZE,
+    sqlite_path=settings.RESULT_CACHE_PATH,
+    enabled=str(settings.TREND_CACHE_ENABLED).lower() == "true",
+)
+
+# Reported statistic -> decimal places
+ROUNDING = {
+    "first_value": 3,
+    "last_value": 3,
+    "change": 3,
+    "percent_change": 1,
+    "slope_per_day": 6,
+    "r_squared": 3,
+    "rolling_mean": 3,
+}
+
+def _period(batch: SeriesBatch, i: int) -> Dict:
+    start, end = batch.offsets[i], batch.offsets[i + 1] - 1
+    return {
+        "start_date": str(day_to_date(batch.days[start])),
+        "end_date": str(day_to_date(batch.days[end])),
+        "data_points": int(end - start + 1)
+    }
+
+def _stat_columns(stats: TrendStats, observed: np.ndarray = None) -> Dict[str, list]:
+    """
+    Per-parcel statistics as nested Python lists ([parcel][index]).
+    
+    Converting whole arrays once per batch is far cheaper than reading NumPy
+    scalars per parcel; reported fields are rounded with NaN as None.
+    observed holds the measured (not gap-filled) reading counts when stats
+    were computed from a gap-filled series.
+    """
+    observed = stats.count if observed is None else observed
+    columns = {
+        "count": observed.tolist(),
+        "filled": (stats.count - observed).tolist(),
+        "fitted_change": stats.fitted_change.tolist(),
+        "raw_change": stats.change.tolist(),
+        "raw_r_squared": stats.r_squared.tolist(),
+    }
+    for field, digits in ROUNDING.items():
+        values = np.round(getattr(stats, field), digits)
+        columns[field] = np.where(np.isnan(values), None, values).tolist()
+    return columns
 
 class TrendAnalysisService:
     """Service for analyzing trends in parcel indices over time."""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, window: int = DEFAULT_WINDOW):
         self.index_repo = IndexRepository(db)
         self.parcel_repo = ParcelRepository(db)
+        self.stats_repo = IndexStatsRepository(db)
         self.summarizer = get_trend_summarizer()
+        self.gapfill = GapFillService(db)
+        self.forecast_service = ForecastService(db)
+        self.window = window
     
+    @traced("service")
     def analyze_parcel_trends(self, parcel_id: str) -> Dict:
         """
-        Analyze trends for all indices of a parcel.
-        Uses a standard threshold of 0.05 for all indices to provide accurate trend detection.
+        Analyze trends for all indices of a parcel over its full history.
+        
+        Each index is fitted with least squares over all of its non-null readings:
+        - Fitted change (slope x days covered) > 0.05 → increasing trend
+        - Fitted change < -0.05 → decreasing trend
+        - Otherwise, or R² < 0.25 with 3+ readings → stable
+        
+        Missing values are gap-filled first (GapFillService), so a null between
+        two readings counts at its interpolated value; values carried forward
+        past an index's last reading are shown in details and series but left
+        out of the fit. Each index reports how many of its points were
+        interpolated. At least 2 measured values are still required.
+        Each index also carries its stored next-pass forecast (ForecastService).
+        
+        With two readings this is exactly last - first. Slope, R², percent change
+        and the rolling mean of the last readings are returned for every index.
         
-        Threshold: 0.05 (5% change)
-        - Change > 0.05 → increasing trend
-        - Change < -0.05 → decreasing trend
-        - Change between -0.05 and 0.05 → stable
+        When the parcel has running aggregates (kept up to date on ingest by
+        IndexStatsService) the result comes from them in constant time;
+        otherwise, or when an index misses readings between its first and
+        last value (gaps that would be interpolated), the full history is
+        read. Results, summary and forecasts included (but not an LLM
+        summary that fell back to the rules), are
+        cached until the parcel's reading count, latest date or revisions
+        (readings replaced by ingest) change.
         
         Args:
             parcel_id: The parcel ID
@@ -28,140 +131,163 @@ class TrendAnalysisService:
         Returns:
             Dictionary with trend analysis for each index
         """
-        indices = self.index_repo.get_by_parcel_id(parcel_id)
+        version = self.stats_repo.get_version(parcel_id) or self.index_repo.get_version(parcel_id)
+        count, latest_date, revisions = version
+        cache_key = (parcel_id, str(latest_date), count, revisions, self._summarizer_key(), self.window, self.gapfill.max_gap_days,
+                     self.forecast_service.window, self.forecast_service.default_interval)
+        cached = trend_cache.get(cache_key)
+        if cached is not None:
+            return cached
         
-        if not indices or len(indices) < 2:
-            return {
-                "status": "insufficient_data",
-                "message": "Need at least 2 data points for trend analysis",
-                "data_points": len(indices) if indices else 0
-            }
+        trends = self._trends_from_stats(parcel_id) if self.window <= RECENT_WINDOW else None
+        if trends is None:
+            batch, flags = self.gapfill.parcel_batch(parcel_id, version)
+            if len(batch.days) < 2:
+                return self._insufficient_data(parcel_id, None, len(batch.days))
+            trends = self._parcel_trends(_period(batch, 0), self._columns(batch, flags), 0)
+        elif trends["period"]["data_points"] < 2:
+            return self._insufficient_data(parcel_id, None, trends["period"]["data_points"])
+        self._add_forecasts(trends, self.forecast_service.parcel_forecasts(parcel_id))
         
         # Get parcel name
         parcel = self.parcel_repo.get_by_id(parcel_id)
         parcel_name = parcel.name if parcel else parcel_id
         
-        # Sort by date
-        indices.sort(key=lambda x: x.date)
-        
-        first = indices[0]
-        last = indices[-1]
-        
-        trends = {
-            "period": {
-                "start_date": str(first.date),
-                "end_date": str(last.date),
-                "data_points": len(indices)
-            },
-            "trends": {}
-        }
-        
-        # Analyze each index with standard 0.05 threshold
-        if first.ndvi is not None and last.ndvi is not None:
-            analysis = self._analyze_trend(
-                first.ndvi, last.ndvi, 0.05,
-                "vegetation", "improving", "declining"
-            )
-            analysis["recommendation"] = self._get_recommendation("ndvi", analysis["trend"], last.ndvi)
-            trends["trends"]["ndvi"] = analysis
-        
-        if first.ndmi is not None and last.ndmi is not None:
-            analysis = self._analyze_trend(
-                first.ndmi, last.ndmi, 0.05,
-                "moisture", "increasing", "decreasing"
-            )
-            analysis["recommendation"] = self._get_recommendation("ndmi", analysis["trend"], last.ndmi)
-            trends["trends"]["ndmi"] = analysis
-        
-        if first.ndwi is not None and last.ndwi is not None:
-            analysis = self._analyze_trend(
-                first.ndwi, last.ndwi, 0.05,
-                "water content", "increasing", "decreasing"
-            )
-            analysis["recommendation"] = self._get_recommendation("ndwi", analysis["trend"], last.ndwi)
-            trends["trends"]["ndwi"] = analysis
-        
-        if first.soc is not None and last.soc is not None:
-            analysis = self._analyze_trend(
-                first.soc, last.soc, 0.05,
-                "soil organic carbon", "increasing", "decreasing"
-            )
-            analysis["recommendation"] = self._get_recommendation("soc", analysis["trend"], last.soc)
-            trends["trends"]["soc"] = analysis
-        
-        if first.nitrogen is not None and last.nitrogen is not None:
-            analysis = self._analyze_trend(
-                first.nitrogen, last.nitrogen, 0.05,
-                "nitrogen", "increasing", "decreasing - potential nutrient depletion"
-            )
-            analysis["recommendation"] = self._get_recommendation("nitrogen", analysis["trend"], last.nitrogen)
-            trends["trends"]["nitrogen"] = analysis
-        
-        if first.phosphorus is not None and last.phosphorus is not None:
-            analysis = self._analyze_trend(
-                first.phosphorus, last.phosphorus, 0.05,
-                "phosphorus", "increasing", "decreasing"
-            )
-            analysis["recommendation"] = self._get_recommendation("phosphorus", analysis["trend"], last.phosphorus)
-            trends["trends"]["phosphorus"] = analysis
-        
-        if first.potassium is not None and last.potassium is not None:
-            analysis = self._analyze_trend(
-                first.potassium, last.potassium, 0.05,
-                "potassium", "increasing", "decreasing"
-            )
-            analysis["recommendation"] = self._get_recommendation("potassium", analysis["trend"], last.potassium)
-            trends["trends"]["potassium"] = analysis
-        
-        if first.ph is not None and last.ph is not None:
-            analysis = self._analyze_trend(
-                first.ph, last.ph, 0.05,
-                "pH", "increasing (more alkaline)", "decreasing (more acidic)"
-            )
-            analysis["recommendation"] = self._get_recommendation("ph", analysis["trend"], last.ph)
-            trends["trends"]["ph"] = analysis
-        
         # Generate summary using the configured strategy (Rule-based or LLM)
         trends["summary"] = self.summarizer.generate_trend_summary(parcel_id, parcel_name, trends)
         
+        # A failed LLM call's rule-based summary is not kept under the LLM's key
+        if not isinstance(trends["summary"], FallbackText):
+            trend_cache.set(cache_key, trends)
         return trends
     
-    def _analyze_trend(
-        self, 
-        first_value: float, 
-        last_value: float, 
-        threshold: float,
-        metric_name: str,
-        increasing_msg: str,
-        decreasing_msg: str
-    ) -> Dict:
+    def iter_bulk_trends(self, farmer_id: str = None, include_summary: bool = False,
+                         chunk_parcels: int = BULK_CHUNK_PARCELS) -> Iterator[Dict]:
         """
-        Analyze trend for a single metric.
+        Trend analysis for every parcel of a farmer (or of every farmer), one dict per parcel.
         
-        Formulas:
-        - Increasing: last_value - first_value > threshold
-        - Decreasing: last_value - first_value < -threshold
-        - Stable: abs(last_value - first_value) <= threshold
+        All series come from a single streamed query and are analyzed in
+        vectorized chunks of chunk_parcels parcels (gap-filled a chunk at a
+        time, with forecasts computed in the same pass), so memory stays
+        bounded for the whole fleet. Parcels without readings are yielded last. Summaries
+        are only generated on request, since an LLM summarizer would make one
+        call per parcel.
         """
-        difference = last_value - first_value
+        names = self.parcel_repo.get_names(farmer_id)
+        rows = self.index_repo.iter_series(farmer_id, settings.REPORT_STREAM_BATCH_SIZE)
         
-        if difference > threshold:
-            trend = "increasing"
-            interpretation = f"{metric_name} is {increasing_msg}"
-        elif difference < -threshold:
-            trend = "decreasing"
-            interpretation = f"{metric_name} is {decreasing_msg}"
-        else:
-            trend = "stable"
-            interpretation = f"{metric_name} is stable"
+        seen = set()
+        for chunk in parcel_chunks(rows, chunk_parcels):
+            measured = SeriesBatch.from_rows(chunk)
+            forecasts = self.forecast_service.forecast(measured)
+            batch, flags = self.gapfill.fill(measured)
+            columns = self._columns(batch, flags)
+            for i, (parcel_id, data_points) in enumerate(zip(batch.parcel_ids, batch.lengths.tolist())):
+                seen.add(parcel_id)
+                parcel_name = names.get(parcel_id, parcel_id)
+                if data_points < 2:
+                    yield self._insufficient_data(parcel_id, parcel_name, data_points)
+                    continue
+                
+                trends = {"parcel_id": parcel_id, "parcel_name": parcel_name, **self._parcel_trends(_period(batch, i), columns, i)}
+                self._add_forecasts(trends, ForecastService.describe(forecasts, i))
+                if include_summary:
+                    trends["summary"] = self.summarizer.generate_trend_summary(parcel_id, parcel_name, trends)
+                yield trends
         
-        return {
-            "trend": trend,
-            "first_value": round(first_value, 3),
-            "last_value": round(last_value, 3),
-            "change": round(difference, 3),
-            "interpretation": interpretation
+        for parcel_id, parcel_name in names.items():
+            if parcel_id not in seen:
+                yield self._insufficient_data(parcel_id, parcel_name, 0)
+    
+    def _columns(self, batch: SeriesBatch, flags: np.ndarray) -> Dict[str, list]:
+        """_stat_columns of a gap-filled batch, with measured and filled points told apart."""
+        # Carried-forward values repeat the last reading and would pull slopes toward zero
+        values = np.where(flags == FLAG_CARRIED, np.nan, batch.values)
+        fitted = SeriesBatch(batch.parcel_ids, batch.offsets, batch.days, values)
+        observed = batch.segment_sum((flags == FLAG_OBSERVED).astype(np.int64))
+        return _stat_columns(compute_trends(fitted, self.window), observed)
+    
+    @staticmethod
+    def _add_forecasts(trends: Dict, forecasts: Dict[str, Dict]):
+        for index_name, trend in trends["trends"].items():
+            trend["forecast"] = forecasts.get(index_name)
+    
+    def _summarizer_key(self) -> str:
+        if isinstance(self.summarizer, LLMTrendSummarizer):
+            return f"llm:{settings.LLM_MODEL}"
+        return "rule_based"
+    
+    @staticmethod
+    def _insufficient_data(parcel_id: str, parcel_name: str | None, data_points: int) -> Dict:
+        result = {
+            "status": "insufficient_data",
+            "message": "Need at least 2 data points for trend analysis",
+            "data_points": data_points
         }
+        if parcel_name is None:
+            return result
+        return {"parcel_id": parcel_id, "parcel_name": parcel_name, **result}
+    
+    def _trends_from_stats(self, parcel_id: str) -> Dict | None:
+        """Trend analysis from the stored running aggregates, or None when the parcel has none."""
+        series = self.stats_repo.get_by_parcel_id(parcel_id)
+        readings = series.pop(READINGS_KEY, None)
+        if readings is None:
+            return None
+        # Gap filling would interpolate an index missing from readings inside its span, which the
+        # aggregates know nothing about; values carried past its last one are left out of the fit
+        if self.gapfill.enabled and any(readings_in_span(readings, stats) != stats.count for stats in series.values()):
+            return None
+        period = {
+            "start_date": str(day_to_date(readings.first_day)),
+            "end_date": str(day_to_date(readings.last_day)),
+            "data_points": readings.count
+        }
+        return self._parcel_trends(period, _stat_columns(trends_from_running(series, self.window)), 0)
+    
+    def _parcel_trends(self, period: Dict, columns: Dict[str, list], i: int) -> Dict:
+        """Trend analysis of parcel i of computed statistics (without the summary); columns from _stat_columns."""
+        trends = {"period": period, "trends": {}}
+        
+        counts = columns["count"][i]
+        for j, index_name in enumerate(INDEX_NAMES):
+            count = counts[j]
+            if count < 2:
+                continue
+            
+            trend = self._classify_trend(columns["fitted_change"][i][j], columns["raw_change"][i][j], columns["raw_r_squared"][i][j], count)
+            stats = {field: columns[field][i][j] for field in ROUNDING}
+            trends["trends"][index_name] = {
+                "trend": trend,
+                **stats,
+                "data_points": count,
+                "filled_points": columns["filled"][i][j],
+                "interpretation": self._interpret(index_name, trend),
+                "recommendation": self._get_recommendation(index_name, trend, stats["last_value"]),
+            }
+        
+        return trends
+    
+    @staticmethod
+    def _classify_trend(fitted_change: float, change: float, r_squared: float, count: int) -> str:
+        # Readings all on one date have no slope; fall back to the plain change
+        difference = change if math.isnan(fitted_change) else fitted_change
+        if count >= 3 and not math.isnan(r_squared) and r_squared < MIN_R_SQUARED:
+            return "stable"
+        if difference > TREND_THRESHOLD:
+            return "increasing"
+        if difference < -TREND_THRESHOLD:
+            return "decreasing"
+        return "stable"
+    
+    @staticmethod
+    def _interpret(index_name: str, trend: str) -> str:
+        metric_name, increasing_msg, decreasing_msg = INDEX_TRENDS[index_name]
+        if trend == "increasing":
+            return f"{metric_name} is {increasing_msg}"
+        if trend == "decreasing":
+            return f"{metric_name} is {decreasing_msg}"
+        return f"{metric_name} is stable"
     
     def _get_recommendation(self, index_name: str, trend: str, last_value: float) -> str:
         """Get explanation based on index trend and current value."""
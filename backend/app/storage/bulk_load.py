@@ -0,0 +1,90 @@
+"""Bulk row loading - COPY on PostgreSQL, batched executemany elsewhere."""
+from itertools import chain, islice
+from typing import Iterable
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+BATCH_SIZE = 10000
+
+def _batches(rows: Iterable[dict], size: int):
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+def _copy_rows(db: Session, table, rows: Iterable[dict]) -> int:
+    """Stream rows into a PostgreSQL table with COPY FROM STDIN."""
+    iterator = iter(rows)
+    first = next(iterator, None)
+    if first is None:
+        return 0
+
+    columns = list(first.keys())
+    column_list = ", ".join(table.c[name].name for name in columns)
+    # The raw psycopg connection of the session's current transaction
+    dbapi_connection = db.connection().connection.dbapi_connection
+
+    count = 0
+    with dbapi_connection.cursor() as cursor:
+        with cursor.copy(f"COPY {table.name} ({column_list}) FROM STDIN") as copy:
+            copy.write_row([first[name] for name in columns])
+            count += 1
+            for row in iterator:
+                copy.write_row([row[name] for name in columns])
+                count += 1
+    return count
+
+def _executemany_rows(db: Session, table, rows: Iterable[dict], batch_size: int) -> int:
+    """
+    Batched executemany on the DB-API cursor with positional parameters.
+
+    Column types' bind processors (e.g. dates to text on SQLite) are applied
+    here once per value, skipping SQLAlchemy's per-row parameter handling,
+    which costs more than the insert itself for narrow rows.
+    """
+    iterator = iter(rows)
+    first = next(iterator, None)
+    if first is None:
+        return 0
+
+    dialect = db.get_bind().dialect
+    columns = list(first.keys())
+    processors = [(name, table.c[name].type.bind_processor(dialect)) for name in columns]
+    column_list = ", ".join(dialect.identifier_preparer.quote(table.c[name].name) for name in columns)
+    placeholders = ", ".join(["?"] * len(columns))
+    sql = f"INSERT INTO {dialect.identifier_preparer.format_table(table)} ({column_list}) VALUES ({placeholders})"
+
+    def to_tuple(row):
+        return tuple(row[name] if process is None or row[name] is None else process(row[name]) for name, process in processors)
+
+    count = 0
+    cursor = db.connection().connection.dbapi_connection.cursor()
+    try:
+        for batch in _batches(chain([first], iterator), batch_size):
+            cursor.executemany(sql, [to_tuple(row) for row in batch])
+            count += len(batch)
+    finally:
+        cursor.close()
+    return count
+
+def bulk_load(db: Session, model, rows: Iterable[dict], batch_size: int = BATCH_SIZE) -> int:
+    """
+    Insert many rows of a model in the session's transaction (caller commits).
+
+    Every row must have the same keys. Returns the number of rows loaded.
+    """
+    table = model.__table__
+
+    if db.get_bind().dialect.name == "postgresql":
+        return _copy_rows(db, table, rows)
+
+    if db.get_bind().dialect.paramstyle == "qmark":  # SQLite
+        return _executemany_rows(db, table, rows, batch_size)
+
+    count = 0
+    for batch in _batches(rows, batch_size):
+        db.execute(insert(table), batch)
+        count += len(batch)
+    return count
@@ -1,13 +1,113 @@
-from sqlalchemy import create_engine #doorway to the database
+from sqlalchemy import create_engine, event, inspect, text #doorway to the database
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker #machine that produces DB sessions
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from app.config import settings
 from app.models.base import Base #declarative base class
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False, "timeout": 30}
-) #create single engine object  using the database URL from config
+SQLITE_PROFILES = {"default", "tuned"}
+
+# Async drivers used when ASYNC_DATABASE_URL is not set explicitly
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+psycopg",
+}
+
+def normalize_database_url(database_url: str) -> str:
+    """Use psycopg 3 (the driver we ship) for plain postgresql:// URLs."""
+    url = make_url(database_url)
+    if url.drivername in ("postgresql", "postgres"):
+        url = url.set(drivername="postgresql+psycopg")
+    return url.render_as_string(hide_password=False)
+
+def is_sqlite_file(database_url: str) -> bool:
+    """Check whether the URL points at an on-disk SQLite database."""
+    url = make_url(database_url)
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+def _sqlite_pragmas(readonly: bool = False) -> list[str]:
+    """PRAGMAs applied to every connection of the tuned SQLite profile."""
+    pragmas = [
+        "PRAGMA synchronous=NORMAL",  # safe with WAL, avoids an fsync per commit
+        f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}",  # negative = size in KiB
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA busy_timeout=30000",
+    ]
+    if not readonly:
+        # WAL lets readers keep going while the writer commits; it is persisted in the file
+        pragmas.insert(0, "PRAGMA journal_mode=WAL")
+    return pragmas
+
+def _install_pragmas(target_engine, readonly: bool = False):
+    pragmas = _sqlite_pragmas(readonly)
+
+    @event.listens_for(target_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+def build_engines(database_url: str, profile: str = "default"):
+    """
+    Create the (writer, reader) engine pair for a database URL.
+
+    The "tuned" profile only applies to on-disk SQLite: WAL and tuned pragmas,
+    a single pooled writer connection so writes are serialized in-process, and a
+    separate read-only pool for the read repositories. Everything else gets one
+    engine used for both reads and writes.
+    """
+    profile = profile.lower()
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown SQLITE_PROFILE '{profile}'. Supported: {sorted(SQLITE_PROFILES)}")
+
+    database_url = normalize_database_url(database_url)
+    if make_url(database_url).get_backend_name() != "sqlite":
+        writer = create_engine(
+            database_url,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=True,  # drop connections the server closed while idle
+        )
+        return writer, writer
+
+    connect_args = {"check_same_thread": False, "timeout": 30}
+
+    if profile != "tuned" or not is_sqlite_file(database_url):
+        writer = create_engine(database_url, connect_args=connect_args)
+        return writer, writer
+
+    writer = create_engine(
+        database_url,
+        connect_args=connect_args,
+        pool_size=1,  # single serialized writer
+        max_overflow=0,
+        pool_timeout=30,
+    )
+    _install_pragmas(writer)
+
+    # mode=ro makes SQLite itself refuse writes on the read pool
+    db_path = make_url(database_url).database
+    reader = create_engine(
+        f"sqlite:///file:{db_path}?mode=ro&uri=true",
+        connect_args=connect_args,
+        pool_size=settings.SQLITE_READ_POOL_SIZE,
+        max_overflow=0,
+        pool_timeout=30,
+    )
+    _install_pragmas(reader, readonly=True)
+    return writer, reader
+
+engine, read_engine = build_engines(settings.DATABASE_URL, settings.SQLITE_PROFILE) #create engines using the database URL from config
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# The async engine is created on first use so the sync-only setup never needs aiosqlite installed
+_async_engine = None
+_AsyncSessionLocal = None
 
 def get_db():
     db = SessionLocal() #returns new Session object
@@ -16,5 +116,85 @@ def get_db():
     finally:
         db.close()
 
+def get_read_db():
+    """
+    Session on the read-only pool for the read repositories.
+
+    Yields None when there is no separate read pool, so services fall back to
+    the request's main session instead of opening a second one.
+    """
+    if read_engine is engine:
+        yield None
+        return
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def create_schema(bind):
+    """
+    Create missing tables, then the nullable columns and indexes added to
+    existing tables since they were created (create_all alone skips those).
+    """
+    Base.metadata.create_all(bind=bind) #metadata like an blueprint
+    inspector = inspect(bind)
+    with bind.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing and column.nullable:
+                    column_type = column.type.compile(dialect=bind.dialect)
+                    connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+
 def init_db():
-    Base.metadata.create_all(bind=engine) #metadata like an blueprint
+    create_schema(engine)
+
+def async_db_enabled() -> bool:
+    """Check whether the API should use the async engine."""
+    return str(settings.USE_ASYNC_DB).lower() == "true"
+
+def get_async_database_url() -> str:
+    """Get the async database URL, deriving it from DATABASE_URL if needed."""
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+
+    url = make_url(settings.DATABASE_URL)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if not driver:
+        raise ValueError(
+            f"No async driver known for '{url.get_backend_name()}'. "
+            f"Set ASYNC_DATABASE_URL explicitly."
+        )
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+def get_async_engine():
+    """Get (and lazily create) the async engine."""
+    global _async_engine, _AsyncSessionLocal
+
+    if _async_engine is None:
+        url = get_async_database_url()
+        if make_url(url).get_backend_name() == "sqlite":
+            _async_engine = create_async_engine(url, connect_args={"timeout": 30})
+        else:
+            _async_engine = create_async_engine(
+                url,
+                pool_size=settings.DB_POOL_SIZE,
+                max_overflow=settings.DB_MAX_OVERFLOW,
+                pool_timeout=settings.DB_POOL_TIMEOUT,
+                pool_recycle=settings.DB_POOL_RECYCLE,
+                pool_pre_ping=True,
+            )
+        if settings.SQLITE_PROFILE.lower() == "tuned" and is_sqlite_file(url):
+            _install_pragmas(_async_engine.sync_engine)
+        # expire_on_commit=False - async sessions can't lazy-load attributes after a commit
+        _AsyncSessionLocal = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+async def get_async_db():
+    get_async_engine()
+    async with _AsyncSessionLocal() as db: #returns new AsyncSession object
+        yield db
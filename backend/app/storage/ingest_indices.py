@@ -0,0 +1,66 @@
+"""
+Ingest parcel index readings from JSON lines or CSV files, without reloading the database.
+
+    python -m app.storage.ingest_indices readings.jsonl
+    python -m app.storage.ingest_indices readings.csv
+    cat readings.jsonl | python -m app.storage.ingest_indices - --format jsonl
+
+Each record has parcel_id, date (YYYY-MM-DD) and any of the index columns.
+Readings are upserted on (parcel_id, date), so a file can be ingested again safely.
+The running stats, carbon balances and forecasts of the parcels written are
+updated with each chunk; once the file is in, parcels whose readings were
+loaded some other way are aggregated too.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from sqlalchemy.orm import sessionmaker
+from app.services.index_ingest_service import FORMATS, INGEST_CHUNK_ROWS, IndexIngestService, read_records
+
+def detect_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    raise SystemExit(f"Cannot tell the format of {path}; pass --format {'/'.join(FORMATS)}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest parcel index readings (upsert on parcel_id and date)")
+    parser.add_argument("path", help="JSON lines or CSV file, or - for stdin")
+    parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension")
+    parser.add_argument("--chunk-rows", type=int, default=INGEST_CHUNK_ROWS, help="Readings committed together")
+    parser.add_argument("--database-url", help="Defaults to DATABASE_URL")
+    args = parser.parse_args()
+
+    fmt = args.format or detect_format(args.path)
+
+    from app.config import settings
+    from app.storage.database import build_engines, create_schema, normalize_database_url
+
+    engine, _ = build_engines(normalize_database_url(args.database_url or settings.DATABASE_URL), settings.SQLITE_PROFILE)
+    create_schema(engine)
+    db = sessionmaker(bind=engine)()
+    source = sys.stdin if args.path == "-" else open(args.path, newline="", encoding="utf-8")
+    started = time.perf_counter()
+    try:
+        service = IndexIngestService(db)
+        result = service.ingest(read_records(source, fmt), args.chunk_rows)
+        elapsed = time.perf_counter() - started
+        refresh_started = time.perf_counter()
+        result["stats_refreshed"] = service.refresh_stats()
+        result["stats_seconds"] = round(time.perf_counter() - refresh_started, 2)
+    finally:
+        db.close()
+        if source is not sys.stdin:
+            source.close()
+
+    result.update(seconds=round(elapsed, 2), rows_per_second=round(result["received"] / elapsed) if elapsed else None)
+    print(json.dumps(result))
+    if result["rejected"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
 import json
+import os
 from datetime import datetime
 from sqlalchemy.orm import Session
 from app.storage.database import SessionLocal, init_db
-from app.models.base import Farmer, Parcel, ParcelIndex, FarmerReport
+from app.models.base import Farmer, Parcel, ParcelIndex, ParcelIndexStats, ParcelCarbon, ParcelForecast, Alert, FarmerReport
+from app.storage.bulk_load import bulk_load
+from app.services.index_stats_service import IndexStatsService
+from app.services.carbon_service import CarbonService
+from app.services.forecast_service import ForecastService
 import uuid
 
 #sql injection safe  
@@ -11,15 +16,21 @@ def load_json_file(filepath: str):
     with open(filepath, 'r', encoding='utf-8') as f:
         return json.load(f)
 
-def populate_database():
-    print("Initializing database...")
-    init_db()
-    
-    db: Session = SessionLocal()
+def populate_database(data_dir: str = "data", db: Session = None):
+    """Reload all data from the JSON files in data_dir (into db, or the configured database)."""
+    owns_session = db is None
+    if owns_session:
+        print("Initializing database...")
+        init_db()
+        db = SessionLocal()
     
     try:
         # Clear existing data
         print("Clearing existing data...")
+        db.query(ParcelIndexStats).delete()
+        db.query(ParcelCarbon).delete()
+        db.query(ParcelForecast).delete()
+        db.query(Alert).delete()
         db.query(ParcelIndex).delete()
         db.query(Parcel).delete()
         db.query(FarmerReport).delete()
@@ -27,68 +38,89 @@ def populate_database():
         db.commit() #save changes
         print("Database cleared")
         
+        # Rows are loaded in bulk - COPY on PostgreSQL, batched inserts elsewhere
         print("Loading farmers...")
-        farmers_data = load_json_file('data/farmers.json')
-        for farmer_data in farmers_data:
-            farmer = Farmer(
-                id=farmer_data['id'], # must exist
-                username=farmer_data['username'],
-                name=farmer_data['name'],
-                phone=farmer_data.get('phone') #may exist
-            )
-            db.add(farmer)
+        farmers_data = load_json_file(os.path.join(data_dir, 'farmers.json'))
+        farmer_rows = [
+            {
+                "id": farmer_data['id'], # must exist
+                "username": farmer_data['username'],
+                "name": farmer_data['name'],
+                "phone": farmer_data.get('phone') #may exist
+            }
+            for farmer_data in farmers_data
+        ]
+        bulk_load(db, Farmer, farmer_rows)
         db.commit()
         print(f"Loaded {len(farmers_data)} farmers")
         
         print("Loading parcels...")
-        parcels_data = load_json_file('data/parcels.json')
-        for parcel_data in parcels_data:
-            parcel = Parcel(
-                id=parcel_data['id'],
-                farmer_id=parcel_data['farmer_id'],
-                name=parcel_data['name'],
-                area_ha=parcel_data['area_ha'],
-                crop=parcel_data['crop']
-            )
-            db.add(parcel)
+        parcels_data = load_json_file(os.path.join(data_dir, 'parcels.json'))
+        parcel_rows = [
+            {
+                "id": parcel_data['id'],
+                "farmer_id": parcel_data['farmer_id'],
+                "name": parcel_data['name'],
+                "area_ha": parcel_data['area_ha'],
+                "crop": parcel_data['crop']
+            }
+            for parcel_data in parcels_data
+        ]
+        bulk_load(db, Parcel, parcel_rows)
         db.commit()
         print(f"Loaded {len(parcels_data)} parcels")
         
         print("Loading parcel indices...")
-        indices_data = load_json_file('data/parcel_indices.json')
-        index_count = 0
-        for parcel_id, indices in indices_data.items():
-            for idx, index_data in enumerate(indices):
-                index = ParcelIndex(
-                    id=f"{parcel_id}_IDX{idx+1}",
-                    parcel_id=parcel_id,
-                    date=datetime.strptime(index_data['date'], '%Y-%m-%d').date(),
-                    ndvi=index_data.get('ndvi'),
-                    ndmi=index_data.get('ndmi'),
-                    ndwi=index_data.get('ndwi'),
-                    soc=index_data.get('soc'),
-                    nitrogen=index_data.get('nitrogen'),
-                    phosphorus=index_data.get('phosphorus'),
-                    potassium=index_data.get('potassium'),
-                    ph=index_data.get('ph')
-                )
-                db.add(index)
-                index_count += 1
+        indices_data = load_json_file(os.path.join(data_dir, 'parcel_indices.json'))
+        index_rows = (
+            {
+                "id": f"{parcel_id}_IDX{idx+1}",
+                "parcel_id": parcel_id,
+                "date": datetime.strptime(index_data['date'], '%Y-%m-%d').date(),
+                "ndvi": index_data.get('ndvi'),
+                "ndmi": index_data.get('ndmi'),
+                "ndwi": index_data.get('ndwi'),
+                "soc": index_data.get('soc'),
+                "nitrogen": index_data.get('nitrogen'),
+                "phosphorus": index_data.get('phosphorus'),
+                "potassium": index_data.get('potassium'),
+                "ph": index_data.get('ph')
+            }
+            for parcel_id, indices in indices_data.items()
+            for idx, index_data in enumerate(indices)
+        )
+        index_count = bulk_load(db, ParcelIndex, index_rows)
         db.commit()
         print(f"Loaded {index_count} parcel indices")
         
+        # Running aggregates for constant-time trends
+        stats_count = IndexStatsService(db).rebuild()
+        db.commit()
+        print(f"Computed running statistics for {stats_count} parcels")
+        
+        carbon_count = CarbonService(db).rebuild()
+        db.commit()
+        print(f"Computed carbon balances for {carbon_count} parcels")
+        
+        forecast_count = ForecastService(db).rebuild()
+        db.commit()
+        print(f"Computed forecasts for {forecast_count} parcels")
+        
         print("Initializing farmer reports...")
         # Initialize farmer_reports for all linked farmers with frequency "none"
-        farmers = db.query(Farmer).filter(Farmer.phone.isnot(None)).all()
-        for farmer in farmers:
-            farmer_report = FarmerReport(
-                id=f"REP_{uuid.uuid4().hex[:8].upper()}",
-                phone=farmer.phone,
-                report_frequency="none"
-            )
-            db.add(farmer_report)
+        report_rows = [
+            {
+                "id": f"REP_{uuid.uuid4().hex[:8].upper()}",
+                "phone": farmer_row["phone"],
+                "report_frequency": "none",
+                "last_sent": None
+            }
+            for farmer_row in farmer_rows
+            if farmer_row["phone"] is not None
+        ]
+        bulk_load(db, FarmerReport, report_rows)
         db.commit()
-        print(f"Initialized {len(farmers)} farmer reports with frequency 'none'")
+        print(f"Initialized {len(report_rows)} farmer reports with frequency 'none'")
         
         print("Database populated successfully!")
         
@@ -96,7 +128,8 @@ def populate_database():
         print(f"Error: {e}")
         db.rollback()#undoes all changes made since the last commit().
     finally:
-        db.close()
+        if owns_session:
+            db.close()
 
 if __name__ == "__main__":
     populate_database()
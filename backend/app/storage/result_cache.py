@@ -0,0 +1,118 @@
+"""
+Versioned result caches: in-memory LRU with optional SQLite persistence.
+
+Keys are tuples whose first element is the group (a parcel id) used for
+invalidation; the rest should identify the data version the result was
+computed from, so a stale entry can never be served even in a worker that
+missed an invalidation. Values must be JSON-serializable when persisted.
+"""
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Iterable, Optional
+from app.observability.metrics import CACHE_REQUESTS
+
+CACHES: dict[str, "ResultCache"] = {}  # Every cache by name, for /admin/cache
+
+class ResultCache:
+    def __init__(self, name: str, max_entries: int = 10000, sqlite_path: Optional[str] = None, enabled: bool = True):
+        self.name = name
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._groups: dict[str, set] = {}  # group -> its keys in memory, so invalidation skips the rest
+        self._lock = threading.Lock()
+        self._store = None
+        if enabled and sqlite_path:
+            self._store = sqlite3.connect(sqlite_path, check_same_thread=False, isolation_level=None)
+            self._store.execute("PRAGMA journal_mode=WAL")
+            self._store.execute(
+                "CREATE TABLE IF NOT EXISTS result_cache ("
+                "cache TEXT NOT NULL, grp TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "PRIMARY KEY (cache, key))"
+            )
+            self._store.execute("CREATE INDEX IF NOT EXISTS ix_result_cache_grp ON result_cache (cache, grp)")
+        CACHES[name] = self
+
+    def get(self, key: tuple) -> Any:
+        """Cached value for key, or None."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            elif self._store is not None:
+                row = self._store.execute(
+                    "SELECT value FROM result_cache WHERE cache = ? AND key = ?", (self.name, json.dumps(key))
+                ).fetchone()
+                if row:
+                    value = json.loads(row[0])
+                    self._remember(key, value)
+
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        CACHE_REQUESTS.labels(self.name, "miss" if value is None else "hit").inc()
+        return value
+
+    def set(self, key: tuple, value: Any):
+        if not self.enabled or value is None:
+            return
+        with self._lock:
+            self._remember(key, value)
+            if self._store is not None:
+                self._store.execute(
+                    "INSERT OR REPLACE INTO result_cache (cache, grp, key, value) VALUES (?, ?, ?, ?)",
+                    (self.name, str(key[0]), json.dumps(key), json.dumps(value)),
+                )
+
+    def invalidate(self, groups: Iterable[str]):
+        """Drop every entry of these groups (e.g. parcels with new readings)."""
+        groups = {str(group) for group in groups}
+        if not self.enabled or not groups:
+            return
+        with self._lock:
+            for group in groups:
+                for key in self._groups.pop(group, ()):
+                    self._entries.pop(key, None)
+            if self._store is not None:
+                self._store.executemany(
+                    "DELETE FROM result_cache WHERE cache = ? AND grp = ?", [(self.name, group) for group in groups]
+                )
+
+    def clear(self):
+        """Drop every entry (hit and miss counts are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._groups.clear()
+            if self._store is not None:
+                self._store.execute("DELETE FROM result_cache WHERE cache = ?", (self.name,))
+
+    def stats(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "persistent": self._store is not None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / requests, 4) if requests else None,
+        }
+
+    def _remember(self, key: tuple, value: Any):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        self._groups.setdefault(str(key[0]), set()).add(key)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            keys = self._groups.get(str(evicted[0]))
+            if keys is not None:
+                keys.discard(evicted)
+                if not keys:
+                    del self._groups[str(evicted[0])]
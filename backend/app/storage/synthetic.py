@@ -0,0 +1,267 @@
+"""
+Deterministic synthetic dataset generator for load tests and benchmarks.
+
+Builds N farmers, M parcels per farmer and K dated readings per parcel, with the
+same shapes and null patterns as backend/data (optical indices occasionally
+missing, whole optical readings lost to cloud cover, first reading complete).
+The same seed always yields the same rows, however they are consumed.
+
+Usage (from the backend directory):
+    # straight into DATABASE_URL (or --database-url), replacing existing data
+    python -m app.storage.synthetic --farmers 10000 --parcels 10 --readings 100 --target db
+    # or as farmers.json / parcels.json / parcel_indices.json
+    python -m app.storage.synthetic --farmers 50 --parcels 4 --readings 12 --target json --out data/synthetic
+"""
+import argparse
+import json
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterator
+import numpy as np
+from sqlalchemy.orm import Session, sessionmaker
+from app.models.base import Base, Farmer, Parcel, ParcelIndex, ParcelIndexStats, ParcelCarbon, ParcelForecast, Alert, FarmerReport
+from app.storage.bulk_load import bulk_load
+from app.services.index_stats_service import IndexStatsService
+from app.services.carbon_service import CarbonService
+from app.services.forecast_service import ForecastService
+
+INDEX_COLUMNS = ("ndvi", "ndmi", "ndwi", "soc", "nitrogen", "phosphorus", "potassium", "ph")
+OPTICAL_COLUMNS = ("ndvi", "ndmi", "ndwi")
+
+# Crop -> (NDVI at season start, NDVI gain over the season)
+CROP_PROFILES = {
+    "Wheat": (0.40, 0.30),
+    "Maize": (0.33, 0.35),
+    "Alfalfa": (0.48, 0.20),
+    "Sunflower": (0.36, 0.30),
+    "Soybean": (0.38, 0.28),
+    "Barley": (0.40, 0.25),
+    "Rapeseed": (0.42, 0.25),
+    "Apples": (0.50, 0.15),
+    "Corn": (0.33, 0.35),
+    "Pasture": (0.45, 0.10),
+}
+CROPS = tuple(CROP_PROFILES)
+FIELD_NAMES = (
+    "North Field", "South Slope", "East Meadow", "West Terrace", "River Plot", "Hill Top",
+    "Valley Field", "Orchard Strip", "Central Plot", "Lowland Field", "High Ridge", "South Pasture",
+)
+FIRST_NAMES = ("Ana", "Ion", "Maria", "George", "Darius", "Elena", "Mihai", "Ioana", "Andrei", "Cristina")
+LAST_NAMES = ("Popescu", "Ionescu", "Stan", "Matei", "Enache", "Dumitru", "Constantin", "Marin", "Tudor", "Barbu")
+
+# Probability of a single missing value, per index
+NULL_RATES = {"ndvi": 0.03, "ndmi": 0.12, "ndwi": 0.15}
+CLOUD_RATE = 0.02  # Readings where every optical index is missing
+
+@dataclass
+class SyntheticConfig:
+    farmers: int
+    parcels_per_farmer: int
+    readings_per_parcel: int
+    seed: int = 42
+    start_date: date = date(2025, 3, 1)
+    interval_days: int = 14  # Days between consecutive readings of a parcel
+    linked_ratio: float = 0.6  # Share of farmers with a linked WhatsApp phone
+    chunk_parcels: int = 5000  # Parcels generated per NumPy batch
+
+    @property
+    def parcel_count(self) -> int:
+        return self.farmers * self.parcels_per_farmer
+
+def _rng(config: SyntheticConfig, stream: int, chunk: int = 0) -> np.random.Generator:
+    # Independent stream per table and chunk keeps output identical however rows are consumed
+    return np.random.default_rng([config.seed, stream, chunk])
+
+def _is_linked(config: SyntheticConfig) -> np.ndarray:
+    return _rng(config, 0).random(config.farmers) < config.linked_ratio
+
+def generate_farmers(config: SyntheticConfig) -> Iterator[dict]:
+    linked = _is_linked(config)
+    for n in range(config.farmers):
+        first = FIRST_NAMES[n % len(FIRST_NAMES)]
+        last = LAST_NAMES[(n // len(FIRST_NAMES)) % len(LAST_NAMES)]
+        yield {
+            "id": f"F{n + 1}",
+            "username": f"{first.lower()}.{last.lower()}{n + 1}",
+            "name": f"{first} {last}",
+            "phone": f"+407{n + 1:08d}" if linked[n] else None,
+        }
+
+def generate_reports(config: SyntheticConfig) -> Iterator[dict]:
+    """Report settings for every linked farmer, frequency "none" like populate_db."""
+    for farmer in generate_farmers(config):
+        if farmer["phone"] is not None:
+            yield {"id": f"REP_{farmer['id']}", "phone": farmer["phone"], "report_frequency": "none", "last_sent": None}
+
+def _parcel_attributes(config: SyntheticConfig) -> tuple[np.ndarray, np.ndarray]:
+    rng = _rng(config, 1)
+    crops = rng.integers(0, len(CROPS), config.parcel_count)
+    areas = np.round(rng.uniform(1.0, 30.0, config.parcel_count), 1)
+    return crops, areas
+
+def generate_parcels(config: SyntheticConfig) -> Iterator[dict]:
+    crops, areas = _parcel_attributes(config)
+    for n in range(config.parcel_count):
+        yield {
+            "id": f"P{n + 1}",
+            "farmer_id": f"F{n // config.parcels_per_farmer + 1}",
+            "name": FIELD_NAMES[n % len(FIELD_NAMES)],
+            "area_ha": float(areas[n]),
+            "crop": CROPS[crops[n]],
+        }
+
+def _index_chunk(config: SyntheticConfig, chunk: int, crops: np.ndarray) -> dict:
+    """Index values for one batch of parcels as (parcels, readings) arrays."""
+    rng = _rng(config, 2, chunk)
+    parcels, readings = len(crops), config.readings_per_parcel
+    season = np.sin(np.pi * np.arange(readings) / max(readings - 1, 1))  # 0 -> 1 -> 0 over the series
+    shape = (parcels, readings)
+
+    base = np.array([CROP_PROFILES[c][0] for c in CROPS])[crops][:, None]
+    gain = np.array([CROP_PROFILES[c][1] for c in CROPS])[crops][:, None]
+    ndvi = np.clip(base + gain * season + rng.normal(0, 0.03, shape), -0.1, 0.95)
+    ndmi = np.clip(0.55 * ndvi - 0.02 + rng.normal(0, 0.03, shape), -0.2, 0.6)
+    ndwi = np.clip(0.8 * ndmi + rng.normal(0, 0.03, shape), -0.3, 0.5)
+
+    # Soil properties drift slowly from a per-parcel level; nutrients are consumed over time
+    progress = np.arange(readings) / max(readings, 1)
+    soc = rng.uniform(1.0, 3.2, (parcels, 1)) + rng.normal(0, 0.02, shape)
+    nitrogen = rng.uniform(0.55, 1.3, (parcels, 1)) * (1 - 0.15 * progress) + rng.normal(0, 0.01, shape)
+    phosphorus = rng.uniform(0.28, 0.5, (parcels, 1)) * (1 - 0.08 * progress) + rng.normal(0, 0.005, shape)
+    potassium = rng.uniform(0.45, 0.8, (parcels, 1)) * (1 - 0.05 * progress) + rng.normal(0, 0.005, shape)
+    ph = np.broadcast_to(rng.uniform(5.3, 7.8, (parcels, 1)), shape)
+
+    values = {
+        "ndvi": ndvi, "ndmi": ndmi, "ndwi": ndwi, "soc": soc, "nitrogen": nitrogen,
+        "phosphorus": phosphorus, "potassium": potassium, "ph": ph,
+    }
+    values = {name: np.round(array, 2).astype(object) for name, array in values.items()}
+
+    # Null patterns: single optical gaps plus cloudy readings; the first reading is always complete
+    cloudy = rng.random(shape) < CLOUD_RATE
+    cloudy[:, 0] = False
+    for name in OPTICAL_COLUMNS:
+        missing = cloudy | (rng.random(shape) < NULL_RATES[name])
+        missing[:, 0] = False
+        values[name][missing] = None
+
+    day_offsets = rng.integers(0, config.interval_days, (parcels, 1)) + config.interval_days * np.arange(readings)
+    return {"day_offset": day_offsets, **values}
+
+def _iter_index_chunks(config: SyntheticConfig) -> Iterator[tuple[int, dict]]:
+    crops, _ = _parcel_attributes(config)
+    for chunk, first in enumerate(range(0, config.parcel_count, config.chunk_parcels)):
+        yield first, _index_chunk(config, chunk, crops[first:first + config.chunk_parcels])
+
+def _date_table(config: SyntheticConfig) -> list[date]:
+    days = config.interval_days * (config.readings_per_parcel + 1)
+    return [config.start_date + timedelta(days=d) for d in range(days)]
+
+def generate_indices(config: SyntheticConfig) -> Iterator[dict]:
+    """ParcelIndex rows, parcel by parcel in date order, ids like populate_db."""
+    dates = _date_table(config)
+    readings = config.readings_per_parcel
+    suffixes = [f"_IDX{k + 1}" for k in range(readings)]
+    for first, chunk in _iter_index_chunks(config):
+        parcel_ids = [f"P{first + p + 1}" for p in range(len(chunk["day_offset"]))]
+        # Flat, row-major Python lists: one zip over all columns instead of per-cell indexing
+        columns = [chunk[name].ravel().tolist() for name in INDEX_COLUMNS]
+        row_parcels = [parcel_id for parcel_id in parcel_ids for _ in range(readings)]
+        row_dates = [dates[offset] for offset in chunk["day_offset"].ravel().tolist()]
+        for n, (parcel_id, reading_date, ndvi, ndmi, ndwi, soc, nitrogen, phosphorus, potassium, ph) in enumerate(
+            zip(row_parcels, row_dates, *columns)
+        ):
+            yield {
+                "id": parcel_id + suffixes[n % readings], "parcel_id": parcel_id, "date": reading_date,
+                "ndvi": ndvi, "ndmi": ndmi, "ndwi": ndwi, "soc": soc, "nitrogen": nitrogen,
+                "phosphorus": phosphorus, "potassium": potassium, "ph": ph,
+            }
+
+def write_json(config: SyntheticConfig, out_dir: str) -> dict:
+    """Write the dataset in the backend/data JSON format; parcel_indices.json is streamed."""
+    target = Path(out_dir)
+    target.mkdir(parents=True, exist_ok=True)
+
+    farmers = list(generate_farmers(config))
+    (target / "farmers.json").write_text(json.dumps(farmers, indent=2), encoding="utf-8")
+    parcels = list(generate_parcels(config))
+    (target / "parcels.json").write_text(json.dumps(parcels, indent=2), encoding="utf-8")
+
+    count = 0
+    with open(target / "parcel_indices.json", "w", encoding="utf-8") as f:
+        f.write("{")
+        current = None
+        for row in generate_indices(config):
+            if row["parcel_id"] != current:
+                f.write("" if current is None else "],")
+                current = row["parcel_id"]
+                f.write(f"\n  {json.dumps(current)}: [")
+            else:
+                f.write(",")
+            reading = {"date": row["date"].isoformat(), **{name: row[name] for name in INDEX_COLUMNS}}
+            f.write(json.dumps(reading))
+            count += 1
+        f.write("]\n}\n" if current is not None else "}\n")
+
+    return {"farmers": len(farmers), "parcels": len(parcels), "parcel_indices": count}
+
+def load_into_db(config: SyntheticConfig, db: Session) -> dict:
+    """Replace all data in the session's database with the synthetic dataset."""
+    db.query(ParcelIndexStats).delete()
+    db.query(ParcelCarbon).delete()
+    db.query(ParcelForecast).delete()
+    db.query(Alert).delete()
+    db.query(ParcelIndex).delete()
+    db.query(Parcel).delete()
+    db.query(FarmerReport).delete()
+    db.query(Farmer).delete()
+    db.commit()
+
+    counts = {
+        "farmers": bulk_load(db, Farmer, generate_farmers(config)),
+        "parcels": bulk_load(db, Parcel, generate_parcels(config)),
+        "parcel_indices": bulk_load(db, ParcelIndex, generate_indices(config)),
+        "farmer_reports": bulk_load(db, FarmerReport, generate_reports(config)),
+    }
+    counts["parcel_index_stats"] = IndexStatsService(db).rebuild()
+    counts["parcel_carbon"] = CarbonService(db).rebuild()
+    counts["parcel_forecasts"] = ForecastService(db).rebuild()
+    db.commit()
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic dataset")
+    parser.add_argument("--farmers", type=int, default=1000)
+    parser.add_argument("--parcels", type=int, default=10, help="Parcels per farmer")
+    parser.add_argument("--readings", type=int, default=24, help="Readings per parcel")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--target", choices=("db", "json"), default="db")
+    parser.add_argument("--out", default="data/synthetic", help="Output directory for --target json")
+    parser.add_argument("--database-url", help="Defaults to DATABASE_URL")
+    args = parser.parse_args()
+
+    config = SyntheticConfig(args.farmers, args.parcels, args.readings, seed=args.seed)
+    started = time.perf_counter()
+
+    if args.target == "json":
+        counts = write_json(config, args.out)
+    else:
+        from app.config import settings
+        from app.storage.database import build_engines, normalize_database_url
+
+        engine, _ = build_engines(normalize_database_url(args.database_url or settings.DATABASE_URL), settings.SQLITE_PROFILE)
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        try:
+            counts = load_into_db(config, db)
+        finally:
+            db.close()
+
+    elapsed = time.perf_counter() - started
+    rows = sum(counts.values())
+    print(json.dumps({**counts, "seconds": round(elapsed, 1), "rows_per_second": round(rows / elapsed)}))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Mixed read/write benchmark for the SQLite storage profiles.
+
+Seeds a fresh database file per profile, then runs reader threads (trend
+analysis and parcel lookups through the read repositories) next to writer
+threads (report last_sent updates and phone re-linking) for a fixed duration.
+
+Usage (from the backend directory):
+    python -m benchmarks.sqlite_profile --readers 8 --writers 2 --duration 10
+"""
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import Base, Farmer, Parcel, ParcelIndex, FarmerReport
+from app.repositories.farmer_repo import FarmerRepository
+from app.repositories.report_repo import ReportRepository
+from app.services.trend_analysis_service import TrendAnalysisService
+from app.storage.database import build_engines
+from benchmarks.stats import percentile
+
+def seed(engine, farmers: int, parcels_per_farmer: int, readings: int, seed_value: int = 42):
+    """Fill an empty database with a small deterministic dataset."""
+    rng = random.Random(seed_value)
+    Base.metadata.create_all(bind=engine)
+
+    farmer_rows, report_rows, parcel_rows, index_rows = [], [], [], []
+    start = date(2025, 1, 1)
+    for f in range(farmers):
+        phone = f"+4070{f:07d}"
+        farmer_rows.append({"id": f"F{f}", "username": f"farmer{f}", "name": f"Farmer {f}", "phone": phone})
+        report_rows.append({"id": f"REP{f}", "phone": phone, "report_frequency": "daily"})
+        for p in range(parcels_per_farmer):
+            parcel_id = f"P{f}_{p}"
+            parcel_rows.append({
+                "id": parcel_id, "farmer_id": f"F{f}", "name": f"Field {p}",
+                "area_ha": round(rng.uniform(1, 30), 1), "crop": "Wheat",
+            })
+            for r in range(readings):
+                index_rows.append({
+                    "id": f"{parcel_id}_IDX{r + 1}", "parcel_id": parcel_id,
+                    "date": start + timedelta(days=14 * r),
+                    "ndvi": rng.uniform(0.2, 0.8), "ndmi": rng.uniform(0.05, 0.4),
+                    "ndwi": rng.uniform(0.05, 0.3), "soc": rng.uniform(1.0, 3.0),
+                    "nitrogen": rng.uniform(0.5, 1.2), "phosphorus": rng.uniform(0.3, 0.5),
+                    "potassium": rng.uniform(0.5, 0.8), "ph": rng.uniform(5.0, 8.0),
+                })
+
+    with engine.begin() as conn:
+        conn.execute(insert(Farmer), farmer_rows)
+        conn.execute(insert(FarmerReport), report_rows)
+        conn.execute(insert(Parcel), parcel_rows)
+        conn.execute(insert(ParcelIndex), index_rows)
+    return [row["id"] for row in farmer_rows], [row["id"] for row in parcel_rows]
+
+def run_profile(profile: str, args) -> dict:
+    """Run the mixed workload against a fresh database using one storage profile."""
+    workdir = Path(tempfile.mkdtemp(prefix=f"bench_{profile}_"))
+    url = f"sqlite:///{workdir / 'bench.sqlite'}"
+
+    writer_engine, reader_engine = build_engines(url, profile)
+    farmer_ids, parcel_ids = seed(writer_engine, args.farmers, args.parcels, args.readings)
+    WriteSession = sessionmaker(autoflush=False, bind=writer_engine)
+    ReadSession = sessionmaker(autoflush=False, bind=reader_engine)
+
+    stop_at = time.perf_counter() + args.duration
+    results = {"read": [], "write": []}
+    errors = {"read": 0, "write": 0}
+    lock = threading.Lock()
+
+    def reader(worker_id):
+        rng = random.Random(worker_id)
+        latencies = []
+        failed = 0
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            db = ReadSession()
+            try:
+                TrendAnalysisService(db).analyze_parcel_trends(rng.choice(parcel_ids))
+                latencies.append(time.perf_counter() - started)
+            except OperationalError:
+                failed += 1
+            finally:
+                db.close()
+        with lock:
+            results["read"].extend(latencies)
+            errors["read"] += failed
+
+    def writer(worker_id):
+        rng = random.Random(1000 + worker_id)
+        latencies = []
+        failed = 0
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            db = WriteSession()
+            try:
+                farmer_id = rng.choice(farmer_ids)
+                farmer = FarmerRepository(db).get_by_id(farmer_id)
+                FarmerRepository(db).link_phone_to_farmer(farmer, farmer.phone)
+                ReportRepository(db).update_last_sent(farmer.phone, date.today())
+                latencies.append(time.perf_counter() - started)
+            except OperationalError:
+                db.rollback()
+                failed += 1
+            finally:
+                db.close()
+        with lock:
+            results["write"].extend(latencies)
+            errors["write"] += failed
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    writer_engine.dispose()
+    reader_engine.dispose()
+
+    summary = {"profile": profile}
+    for kind in ("read", "write"):
+        samples = results[kind]
+        summary[kind] = {
+            "ops": len(samples),
+            "ops_per_sec": round(len(samples) / args.duration, 1),
+            "p50_ms": round(percentile(samples, 50) * 1000, 2),
+            "p95_ms": round(percentile(samples, 95) * 1000, 2),
+            "p99_ms": round(percentile(samples, 99) * 1000, 2),
+            "mean_ms": round(statistics.fmean(samples) * 1000, 2) if samples else 0.0,
+            "errors": errors[kind],
+        }
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Mixed read/write benchmark for SQLite storage profiles")
+    parser.add_argument("--profiles", nargs="+", default=["default", "tuned"])
+    parser.add_argument("--farmers", type=int, default=200)
+    parser.add_argument("--parcels", type=int, default=5, help="Parcels per farmer")
+    parser.add_argument("--readings", type=int, default=24, help="Readings per parcel")
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per profile")
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    summaries = [run_profile(profile, args) for profile in args.profiles]
+
+    print(f"{'profile':<10}{'kind':<7}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for summary in summaries:
+        for kind in ("read", "write"):
+            row = summary[kind]
+            print(
+                f"{summary['profile']:<10}{kind:<7}{row['ops_per_sec']:>10}"
+                f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}{row['errors']:>8}"
+            )
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(summaries, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+"""Latency summaries shared by the benchmarks."""
+import statistics
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def summarize(samples: list[float]) -> dict:
+    """Latency stats in milliseconds for samples given in seconds."""
+    return {
+        "mean_ms": round(statistics.fmean(samples) * 1000, 4) if samples else 0.0,
+        "p50_ms": round(percentile(samples, 50) * 1000, 4),
+        "p95_ms": round(percentile(samples, 95) * 1000, 4),
+        "p99_ms": round(percentile(samples, 99) * 1000, 4),
+    }
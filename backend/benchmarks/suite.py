@@ -0,0 +1,284 @@
+"""
+Benchmark suite for the hot paths.
+
+Micro-benchmarks time single calls of the rule-based intent classifier and
+summary generator, trend analysis and WhatsApp formatting. Macro-benchmarks
+time /message and /generate-reports through the ASGI app and populate_db, each
+at several dataset sizes built with app.storage.synthetic. Results are written
+as JSON; compare mode flags regressions against a saved baseline (exit code 1).
+
+Usage (from the backend directory):
+    python -m benchmarks.suite run --sizes 100 1000 --output baseline.json
+    python -m benchmarks.suite run --sizes 100 1000 --output current.json --compare baseline.json
+    python -m benchmarks.suite compare baseline.json current.json --threshold 0.15
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import logging
+import platform
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.models.base import Base, Farmer, FarmerReport, ParcelIndex
+from app.storage.database import build_engines
+from app.storage.synthetic import SyntheticConfig, load_into_db, write_json
+from benchmarks.stats import summarize
+
+DEFAULT_THRESHOLD = 0.15  # Relative p50 slowdown reported as a regression
+
+SAMPLE_MESSAGES = (
+    "show my parcels",
+    "How is parcel P1 doing?",
+    "Tell me details about P2",
+    "Set my report frequency to weekly",
+    "hello there",
+)
+
+def measure(func, setup=None, min_time: float = 1.0, min_rounds: int = 5, max_rounds: int = 100000) -> dict:
+    """
+    Time func repeatedly and summarize per-call latency.
+
+    Fast calls are timed in batches (one sample = `number` calls) so timer
+    overhead does not dominate; with a setup callable every call is timed alone.
+    """
+    number = 1
+    if setup is None:
+        while number < 100000:
+            started = time.perf_counter()
+            for _ in range(number):
+                func()
+            if time.perf_counter() - started >= 0.001:
+                break
+            number *= 10
+
+    samples = []
+    deadline = time.perf_counter() + min_time
+    while len(samples) < max_rounds and (len(samples) < min_rounds or time.perf_counter() < deadline):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - started) / number)
+
+    return {
+        "rounds": len(samples),
+        "calls_per_round": number,
+        "ops_per_sec": round(1 / (sum(samples) / len(samples)), 1),
+        **summarize(samples),
+    }
+
+def _micro_benchmarks(min_time: float) -> dict:
+    from app.ai.intents import RuleBasedIntentClassifier
+    from app.ai.summaries import RuleBasedSummaryGenerator
+    from app.api.whatsapp_webhook import format_whatsapp_message
+
+    classifier = RuleBasedIntentClassifier()
+    messages = itertools.cycle(SAMPLE_MESSAGES)
+
+    generator = RuleBasedSummaryGenerator()
+    latest = ParcelIndex(
+        id="P1_IDX1", parcel_id="P1", date=date(2025, 5, 15), ndvi=0.62, ndmi=0.21, ndwi=None,
+        soc=2.1, nitrogen=0.8, phosphorus=0.4, potassium=0.6, ph=6.4,
+    )
+    indices_data = {"latest_index": latest, "parcel_name": "North Field", "area_ha": 12.3, "crop": "Wheat"}
+
+    payloads = itertools.cycle((
+        {"parcels": [{"id": f"P{i}", "name": "North Field", "area": 12.3, "crop": "Wheat"} for i in range(1, 6)]},
+        {
+            "parcel_id": "P1", "name": "North Field", "area_ha": 12.3, "crop": "Wheat", "data_date": "2025-05-15",
+            "indices": {"ndvi": 0.62, "ndmi": 0.21, "ndwi": None, "soc": 2.1, "nitrogen": 0.8,
+                        "phosphorus": 0.4, "potassium": 0.6, "ph": 6.4},
+        },
+        "Parcel P1 not found.",
+    ))
+
+    return {
+        "micro.intent_classify": measure(lambda: classifier.classify(next(messages)), min_time=min_time),
+        "micro.summary_generate": measure(lambda: generator.generate_parcel_summary("P1", indices_data), min_time=min_time),
+        "micro.format_whatsapp_message": measure(lambda: format_whatsapp_message(next(payloads)), min_time=min_time),
+    }
+
+def _dataset_benchmarks(size: int, args, workdir: Path) -> dict:
+    from app.main import app
+    from app.services.trend_analysis_service import TrendAnalysisService
+    from app.storage.database import get_db, get_read_db
+    from app.storage.populate_db import populate_database
+
+    config = SyntheticConfig(farmers=size, parcels_per_farmer=args.parcels, readings_per_parcel=args.readings)
+    engine, _ = build_engines(f"sqlite:///{workdir / f'bench_{size}.sqlite'}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autoflush=False, bind=engine)
+    label = f"[farmers={size}]"
+    results = {}
+
+    # populate_db from JSON files of this size
+    data_dir = workdir / f"data_{size}"
+    write_json(config, str(data_dir))
+
+    def populate():
+        db = Session()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                populate_database(str(data_dir), db)
+        finally:
+            db.close()
+
+    results[f"macro.populate_db{label}"] = measure(populate, min_time=0, min_rounds=args.rounds)
+
+    db = Session()
+    # Reload the same dataset straight from the generator for the remaining benchmarks
+    load_into_db(config, db)
+    linked = db.query(Farmer.id, Farmer.phone).filter(Farmer.phone.isnot(None)).all()
+
+    parcel_ids = itertools.cycle([f"P{n}" for n in range(1, config.parcel_count + 1, max(1, config.parcel_count // 500))])
+    trend_service = TrendAnalysisService(db)
+    results[f"micro.trend_analysis{label}"] = measure(
+        lambda: trend_service.analyze_parcel_trends(next(parcel_ids)), min_time=args.min_time
+    )
+
+    def override_get_db():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = lambda: None
+    client = TestClient(app)
+
+    def message_payloads():
+        for farmer_id, phone in itertools.cycle(linked):
+            first_parcel = (int(farmer_id[1:]) - 1) * args.parcels + 1
+            for text in ("show my parcels", f"How is parcel P{first_parcel}?", f"details about P{first_parcel}"):
+                yield {"from": phone, "text": text}
+
+    payloads = message_payloads()
+    results[f"macro.message{label}"] = measure(
+        lambda: client.post("/message", json=next(payloads)).raise_for_status(), min_time=args.min_time
+    )
+
+    def reset_reports():
+        db.execute(update(FarmerReport).values(report_frequency="daily", last_sent=None))
+        db.commit()
+
+    results[f"macro.generate_reports{label}"] = measure(
+        lambda: client.post("/generate-reports").raise_for_status(),
+        setup=reset_reports, min_time=0, min_rounds=args.rounds,
+    )
+
+    app.dependency_overrides.clear()
+    db.close()
+    engine.dispose()
+    return results
+
+def run(args) -> dict:
+    # Benchmark the rule-based strategies, never a remote LLM
+    settings.USE_LLM = "false"
+    # Report runs trip the per-request query warnings on purpose; keep the output readable
+    logging.getLogger("app.observability.queries").setLevel(logging.ERROR)
+
+    results = _micro_benchmarks(args.min_time)
+    with tempfile.TemporaryDirectory(prefix="bench_suite_") as tmp:
+        for size in args.sizes:
+            results.update(_dataset_benchmarks(size, args, Path(tmp)))
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "sizes": args.sizes,
+            "parcels_per_farmer": args.parcels,
+            "readings_per_parcel": args.readings,
+        },
+        "results": results,
+    }
+
+def compare(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD) -> list[dict]:
+    """Compare p50 latency per benchmark; slower by more than threshold is a regression."""
+    rows = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None or not base["p50_ms"]:
+            rows.append({"name": name, "baseline_ms": None, "current_ms": result["p50_ms"], "ratio": None, "status": "new"})
+            continue
+        ratio = result["p50_ms"] / base["p50_ms"]
+        if ratio > 1 + threshold:
+            status = "regression"
+        elif ratio < 1 - threshold:
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append({
+            "name": name, "baseline_ms": base["p50_ms"], "current_ms": result["p50_ms"],
+            "ratio": round(ratio, 3), "status": status,
+        })
+    return rows
+
+def _print_results(report: dict):
+    print(f"{'benchmark':<45}{'ops/s':>12}{'p50 ms':>12}{'p95 ms':>12}{'p99 ms':>12}")
+    for name, row in report["results"].items():
+        print(f"{name:<45}{row['ops_per_sec']:>12}{row['p50_ms']:>12}{row['p95_ms']:>12}{row['p99_ms']:>12}")
+
+def _print_comparison(rows: list[dict]) -> bool:
+    print(f"{'benchmark':<45}{'base ms':>12}{'now ms':>12}{'ratio':>8}  status")
+    for row in rows:
+        base = "-" if row["baseline_ms"] is None else row["baseline_ms"]
+        ratio = "-" if row["ratio"] is None else row["ratio"]
+        print(f"{row['name']:<45}{base:>12}{row['current_ms']:>12}{ratio:>8}  {row['status']}")
+    return any(row["status"] == "regression" for row in rows)
+
+def _load(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite for the hot paths")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the benchmarks")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000], help="Farmer counts for dataset benchmarks")
+    run_parser.add_argument("--parcels", type=int, default=5, help="Parcels per farmer")
+    run_parser.add_argument("--readings", type=int, default=12, help="Readings per parcel")
+    run_parser.add_argument("--min-time", type=float, default=1.0, help="Seconds per benchmark")
+    run_parser.add_argument("--rounds", type=int, default=3, help="Rounds for populate_db and /generate-reports")
+    run_parser.add_argument("--output", help="Write the results to this JSON file")
+    run_parser.add_argument("--compare", help="Baseline JSON file to compare against")
+    run_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    compare_parser = commands.add_parser("compare", help="Compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        regressed = _print_comparison(compare(_load(args.baseline), _load(args.current), args.threshold))
+        sys.exit(1 if regressed else 0)
+
+    report = run(args)
+    _print_results(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        print()
+        regressed = _print_comparison(compare(_load(args.compare), report, args.threshold))
+        sys.exit(1 if regressed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Load test for the WhatsApp webhook.
+
+Posts Twilio-form payloads to /webhook/whatsapp from many simulated phones at
+increasing concurrency levels and reports throughput, p50/p95/p99 latency and
+error rate per level. Requests are signed (X-Twilio-Signature) when an auth
+token is given. A local Twilio stand-in captures outbound TwilioMessenger API
+calls; start the server with TWILIO_API_BASE_URL pointing at it.
+
+The webhook answers with TwiML, so a plain chat exchange makes no outbound
+API calls; the stand-in count shows any that do happen (and keeps a load test
+from ever reaching the real Twilio API).
+
+Usage (from the backend directory):
+    # terminal 1 - the app, pointed at the stand-in
+    MESSAGING_PROVIDER=twilio TWILIO_ACCOUNT_SID=ACtest TWILIO_AUTH_TOKEN=secret \\
+    TWILIO_PHONE_NUMBER=+14155238886 TWILIO_API_BASE_URL=http://127.0.0.1:8099 \\
+    uvicorn app.main:app --workers 4
+    # terminal 2 - the load
+    python -m benchmarks.webhook_load --url http://127.0.0.1:8000/webhook/whatsapp \\
+        --auth-token secret --concurrency 1 8 32 128 --duration 15
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import httpx
+
+from benchmarks.stats import summarize
+
+TWILIO_NUMBER = "whatsapp:+14155238886"
+
+def random_message_text(parcel_count: int) -> str:
+    parcel = f"P{random.randint(1, max(parcel_count, 1))}"
+    return random.choice((
+        "show my parcels",
+        f"How is parcel {parcel}?",
+        f"Tell me details about {parcel}",
+        "Set my report frequency to weekly",
+        "hello",
+    ))
+
+def sign(url: str, params: dict, auth_token: str) -> str:
+    """X-Twilio-Signature: base64 HMAC-SHA1 of the URL followed by the sorted form fields."""
+    payload = url + "".join(f"{key}{params[key]}" for key in sorted(params))
+    digest = hmac.new(auth_token.encode(), payload.encode("utf-8"), hashlib.sha1).digest()
+    return base64.b64encode(digest).decode()
+
+def twilio_form(phone: str, text: str, account_sid: str) -> dict:
+    """The form fields Twilio posts for an incoming WhatsApp message."""
+    return {
+        "SmsMessageSid": f"SM{uuid.uuid4().hex}",
+        "NumMedia": "0",
+        "ProfileName": "Load Test",
+        "SmsSid": f"SM{uuid.uuid4().hex}",
+        "WaId": phone.lstrip("+"),
+        "SmsStatus": "received",
+        "Body": text,
+        "To": TWILIO_NUMBER,
+        "NumSegments": "1",
+        "MessageSid": f"SM{uuid.uuid4().hex}",
+        "AccountSid": account_sid,
+        "From": f"whatsapp:{phone}",
+        "ApiVersion": "2010-04-01",
+    }
+
+class TwilioStandIn:
+    """Local HTTP server answering Twilio's Messages API and recording each call."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8099):
+        self.messages: list[dict] = []
+        self._lock = threading.Lock()
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+                fields = {key: values[0] for key, values in parse_qs(body).items()}
+                sid = f"SM{uuid.uuid4().hex}"
+                with stand_in._lock:
+                    stand_in.messages.append({"path": self.path, "to": fields.get("To"), "body": fields.get("Body")})
+
+                payload = json.dumps({
+                    "sid": sid, "status": "queued", "to": fields.get("To"), "from": fields.get("From"),
+                    "body": fields.get("Body"), "num_segments": "1", "direction": "outbound-api",
+                }).encode()
+                self.send_response(201)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self._thread = threading.Thread(target=self.server.serve_forever, name="twilio-stand-in", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self.messages)
+
+async def run_level(url: str, concurrency: int, duration: float, phones: list[str], args) -> dict:
+    """Keep `concurrency` requests in flight for `duration` seconds."""
+    latencies: list[float] = []
+    errors = 0
+    stop_at = time.perf_counter() + duration
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal errors
+        while time.perf_counter() < stop_at:
+            form = twilio_form(random.choice(phones), random_message_text(args.parcels), args.account_sid)
+            headers = {"X-Twilio-Signature": sign(url, form, args.auth_token)} if args.auth_token else {}
+            started = time.perf_counter()
+            try:
+                response = await client.post(url, data=form, headers=headers)
+                # The webhook answers 200 even on failure; only TwiML counts as success
+                ok = response.status_code == 200 and "xml" in response.headers.get("content-type", "")
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=args.timeout) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "error_rate": round(errors / len(latencies), 4) if latencies else 0.0,
+        **summarize(latencies),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for the WhatsApp webhook")
+    parser.add_argument("--url", default="http://127.0.0.1:8000/webhook/whatsapp")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per concurrency level")
+    parser.add_argument("--phones", type=int, default=1000, help="Simulated phones (synthetic dataset numbering)")
+    parser.add_argument("--parcels", type=int, default=10000, help="Highest parcel number used in messages")
+    parser.add_argument("--auth-token", help="Sign requests like Twilio (use the server's TWILIO_AUTH_TOKEN)")
+    parser.add_argument("--account-sid", default="ACloadtest")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--stand-in-port", type=int, default=8099, help="Port of the Twilio stand-in (0 disables it)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    # Same numbering as app.storage.synthetic, so linked phones hit real farmers
+    phones = [f"+407{n:08d}" for n in range(1, args.phones + 1)]
+
+    stand_in = TwilioStandIn(port=args.stand_in_port).start() if args.stand_in_port else None
+    if stand_in:
+        print(f"Twilio stand-in listening on {stand_in.base_url} (set TWILIO_API_BASE_URL on the server)")
+
+    results = []
+    print(f"{'conc':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}{'outbound':>10}")
+    for concurrency in args.concurrency:
+        sent_before = stand_in.count() if stand_in else 0
+        result = asyncio.run(run_level(args.url, concurrency, args.duration, phones, args))
+        result["outbound_messages"] = (stand_in.count() - sent_before) if stand_in else None
+        results.append(result)
+        print(
+            f"{concurrency:>6}{result['throughput_rps']:>10}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}"
+            f"{result['p99_ms']:>10.1f}{result['error_rate']:>9.2%}{str(result['outbound_messages']):>10}"
+        )
+
+    if stand_in:
+        stand_in.stop()
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"url": args.url, "duration": args.duration, "levels": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+from datetime import date, datetime
+import math
+import pytest
+from sqlalchemy import event
+from app.analytics.alert_rules import AlertRule, evaluate_rules, parse_rules
+from app.analytics.series import EPOCH_ORDINAL
+from app.services.alert_rule_service import AlertRuleService, in_quiet_hours
+from app.services.anomaly_service import AnomalyService
+from app.services.index_ingest_service import IndexIngestService
+from app.repositories.index_repo import IndexRepository
+from app.services.messaging_service import MockMessenger
+from app.config import settings
+
+def reading(parcel_id, day, ndvi=None, ph=None):
+    return (parcel_id, date(2025, 6, day), ndvi, None, None, None, None, None, None, ph)
+
+def day(d):
+    return d.toordinal() - EPOCH_ORDINAL
+
+NOON = datetime(2025, 6, 10, 10, 0)  # 13:00 in Bucharest
+NIGHT = datetime(2025, 6, 10, 21, 0)  # Midnight in Bucharest
+
+class TestAlertRules:
+
+    def test_parse_rules(self):
+        """Test the rule syntax and its validation."""
+        rules = parse_rules("ndvi drop 0.1; ph below 5.5 critical")
+        assert rules == [AlertRule("ndvi", "drop", 0.1), AlertRule("ph", "below", 5.5, "critical")]
+        assert rules[1].name == "ph_below_5.5"
+        with pytest.raises(ValueError):
+            parse_rules("ph under 5.5")
+
+    def test_compares_with_previous_reading_only(self):
+        """Test drops against the stored last reading, threshold crossings once, and skipped backfills."""
+        rules = parse_rules("ndvi drop 0.1; ph below 5.5")
+        last = {"P1": {"ndvi": (day(date(2025, 6, 1)), 0.70), "ph": (day(date(2025, 6, 1)), 6.0)}}
+        rows = [
+            reading("P1", 1, ndvi=0.20),  # Re-sent reading: skipped
+            reading("P1", 2, ndvi=0.55, ph=5.3),  # Drop of 0.15, pH crosses 5.5
+            reading("P1", 3, ndvi=0.50, ph=5.2),  # Small drop, pH still low
+            reading("P2", 2, ph=5.0),  # No previous reading: below from the start
+        ]
+        hits = evaluate_rules(rows, last, rules)
+
+        assert [(h.parcel_id, h.day, h.rule.name) for h in hits] == [
+            ("P1", day(date(2025, 6, 2)), "ndvi_drop_0.1"),
+            ("P1", day(date(2025, 6, 2)), "ph_below_5.5"),
+            ("P2", day(date(2025, 6, 2)), "ph_below_5.5"),
+        ]
+        assert hits[0].reference == 0.70 and hits[0].score == pytest.approx(0.15)
+        assert math.isnan(hits[2].previous)
+
+    def test_quiet_hours_wrap_midnight(self):
+        """Test that quiet hours are local and may span midnight."""
+        assert not in_quiet_hours(NOON, "21-7", "Europe/Bucharest")
+        assert in_quiet_hours(NIGHT, "21-7", "Europe/Bucharest")
+        assert not in_quiet_hours(NIGHT, "", "Europe/Bucharest")
+
+class TestAlertRuleService:
+
+    def test_notifies_farmer_once(self, test_db, sample_indices):
+        """Test that triggered rules message the linked farmer, deduplicated across ingests."""
+        messenger = MockMessenger()
+        service = AlertRuleService(test_db, messenger, parse_rules("ndvi drop 0.1; ph below 5.5"))
+
+        first = [reading("P1", 1, ndvi=0.45, ph=5.2)]  # Last stored reading: 2025-05-01, NDVI 0.63, pH 6.4
+        assert service.evaluate(first, now=NOON)["new_alerts"] == 2
+        assert messenger.sent_messages == []  # Sent once the caller has committed
+        test_db.commit()
+        assert service.flush_pending(now=NOON)["sent"] == 2
+        assert len(messenger.sent_messages) == 1
+        assert messenger.sent_messages[0]["to"] == "+40741111111"
+        assert "North Field" in messenger.sent_messages[0]["message"]
+
+        # Re-sending the same reading records and sends nothing new
+        assert service.evaluate(first, now=NOON)["new_alerts"] == 0
+        IndexRepository(test_db).upsert_many(first)
+
+        # Another drop within the dedup window is recorded but not sent again
+        assert service.evaluate([reading("P1", 5, ndvi=0.30)], now=NOON)["new_alerts"] == 1
+        test_db.commit()
+        result = service.flush_pending(now=NOON)
+        assert (result["duplicate"], result["sent"]) == (1, 0)
+        assert len(messenger.sent_messages) == 1
+
+        alerts = AnomalyService(test_db).list_alerts(kind="rule")
+        assert sorted(a["notification"] for a in alerts) == ["duplicate", "sent", "sent"]
+
+    def test_quiet_hours_hold_notifications(self, test_db, sample_indices):
+        """Test that alerts raised at night are sent by the next flush."""
+        messenger = MockMessenger()
+        service = AlertRuleService(test_db, messenger, parse_rules("ph below 5.5"))
+
+        assert service.evaluate([reading("P1", 1, ph=5.0)], now=NIGHT)["new_alerts"] == 1
+        test_db.commit()
+        assert messenger.sent_messages == []
+        assert service.flush_pending(now=NIGHT)["pending"] == 1
+
+        assert service.flush_pending(now=NOON.replace(day=11))["sent"] == 1
+        assert len(messenger.sent_messages) == 1
+        assert service.flush_pending(now=NOON.replace(day=11))["sent"] == 0
+
+    def test_ingest_sends_after_commit(self, test_db, sample_indices, monkeypatch):
+        """Test that ingest messages farmers only once the readings and their alerts are committed."""
+        monkeypatch.setattr(settings, "ALERT_QUIET_HOURS", "")
+        commits = []
+        event.listen(test_db, "after_commit", lambda session: commits.append(session))
+
+        class CheckingMessenger(MockMessenger):
+            def send_message(self, to, message):
+                assert commits, "message sent inside the ingest transaction"
+                return super().send_message(to, message)
+
+        ingest = IndexIngestService(test_db)
+        ingest.alert_service = AlertRuleService(test_db, CheckingMessenger(), parse_rules("ph below 5.5"))
+        result = ingest.ingest([(1, {"parcel_id": "P1", "date": "2025-06-01", "ph": 5.0})])
+
+        assert result["alerts"] == 1
+        assert len(ingest.alert_service.messenger.sent_messages) == 1
+        assert [a["notification"] for a in AnomalyService(test_db).list_alerts(kind="rule")] == ["sent"]
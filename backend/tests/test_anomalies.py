@@ -0,0 +1,61 @@
+from datetime import date, timedelta
+from app.analytics.anomalies import detect_anomalies
+from app.analytics.series import SeriesBatch
+from app.models.base import Farmer, Parcel, ParcelIndex
+from app.services.anomaly_service import AnomalyService
+
+def reading(parcel_id, k, ndvi=None, ndmi=None, ph=None):
+    return (parcel_id, date(2025, 3, 1) + timedelta(days=10 * k), ndvi, ndmi, None, None, None, None, None, ph)
+
+class TestAnomalyDetection:
+    
+    def test_steady_rise_is_not_anomalous(self):
+        """Test that a linear seasonal rise with small noise raises nothing."""
+        noise = [0.01, -0.01, 0.0, 0.01, -0.01, 0.0, 0.01, -0.01, 0.0, 0.01, 0.0, -0.01]
+        rows = [reading("P1", k, ndvi=0.3 + 0.04 * k + e, ph=6.5) for k, e in enumerate(noise)]
+        assert detect_anomalies(SeriesBatch.from_rows(rows), ["Wheat"]) == []
+    
+    def test_spike_and_drop(self):
+        """Test that a sudden NDVI collapse is flagged as both z-score outlier and drop."""
+        values = [0.60, 0.61, 0.59, 0.60, 0.62, 0.60, 0.61, 0.30]
+        rows = [reading("P1", k, ndvi=v) for k, v in enumerate(values)]
+        anomalies = detect_anomalies(SeriesBatch.from_rows(rows), ["Wheat"])
+        
+        kinds = {(a.kind, a.index_name, a.date) for a in anomalies}
+        last_day = rows[-1][1]
+        assert kinds == {("zscore", "ndvi", last_day), ("drop", "ndvi", last_day)}
+        drop = next(a for a in anomalies if a.kind == "drop")
+        assert drop.reference == 0.61
+        assert drop.score == 0.31
+        assert drop.severity == "critical"
+    
+    def test_range_alert_once_per_excursion_and_per_crop(self):
+        """Test that a persistent out-of-range pH alerts on entry only, using the crop's range."""
+        rows = [reading("P1", k, ph=ph) for k, ph in enumerate([6.5, 5.2, 5.1, 5.3, 6.4, 5.0])]
+        rows += [reading("P2", k, ph=7.2) for k in range(3)]  # Fine for wheat, too alkaline for soybean
+        anomalies = detect_anomalies(SeriesBatch.from_rows(rows), ["Wheat", "Soybean"])
+        
+        ph_alerts = [(a.parcel_id, a.date) for a in anomalies if a.kind == "range"]
+        assert ph_alerts == [("P1", rows[1][1]), ("P1", rows[5][1]), ("P2", rows[6][1])]
+
+class TestAnomalyService:
+    
+    def test_scan_is_idempotent_and_queryable(self, test_db, sample_farmer):
+        """Test that rescans add no duplicate alerts and alerts filter by farmer."""
+        test_db.add(Farmer(id="F2", username="other", name="Other"))
+        test_db.add(Parcel(id="PA1", farmer_id="F1", name="Acid Field", area_ha=1.0, crop="Wheat"))
+        test_db.add(Parcel(id="PA2", farmer_id="F2", name="Fine Field", area_ha=1.0, crop="Wheat"))
+        for k in range(3):
+            test_db.add(ParcelIndex(id=f"PA1_{k}", parcel_id="PA1", date=date(2025, 3, 1 + k), ph=5.0))
+            test_db.add(ParcelIndex(id=f"PA2_{k}", parcel_id="PA2", date=date(2025, 3, 1 + k), ph=6.5))
+        test_db.commit()
+        
+        service = AnomalyService(test_db)
+        assert service.scan() == {"parcels": 2, "anomalies": 1, "new_alerts": 1}
+        assert service.scan()["new_alerts"] == 0
+        
+        alerts = service.list_alerts(farmer_id="F1")
+        assert len(alerts) == 1
+        assert alerts[0]["id"] == "PA1_20250301_ph_range"
+        assert alerts[0]["message"] == "pH 5.00 is outside the typical range for Wheat (5.5-7.5)."
+        assert service.list_alerts(farmer_id="F2") == []
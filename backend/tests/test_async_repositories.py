@@ -0,0 +1,69 @@
+import pytest
+from app.repositories.farmer_repo import AsyncFarmerRepository
+from app.repositories.parcel_repo import AsyncParcelRepository
+from app.repositories.index_repo import AsyncIndexRepository
+from app.repositories.report_repo import AsyncReportRepository
+from app.models.base import Farmer, Parcel, ParcelIndex
+from datetime import date
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture
+def seed_rows():
+    """Farmer, parcel and two indices based on the real data patterns."""
+    return [
+        Farmer(id="F1", username="ana.popescu", name="Ana Popescu", phone="+40741111111"),
+        Farmer(id="F2", username="ion.ionescu", name="Ion Ionescu", phone=None),
+        Parcel(id="P1", farmer_id="F1", name="North Field", area_ha=12.3, crop="Wheat"),
+        ParcelIndex(id="P1_IDX1", parcel_id="P1", date=date(2025, 4, 1), ndvi=0.42),
+        ParcelIndex(id="P1_IDX2", parcel_id="P1", date=date(2025, 5, 1), ndvi=0.63),
+    ]
+
+class TestAsyncRepositories:
+    
+    async def test_farmer_lookups(self, async_test_db, seed_rows):
+        """Test getting farmers by phone, username and ID."""
+        async_test_db.add_all(seed_rows)
+        await async_test_db.commit()
+        
+        repo = AsyncFarmerRepository(async_test_db)
+        
+        assert (await repo.get_by_phone("+40741111111")).id == "F1"
+        assert (await repo.get_by_username("ion.ionescu")).id == "F2"
+        assert (await repo.get_by_id("F3")) is None
+        assert len(await repo.get_all()) == 2
+    
+    async def test_link_phone_to_farmer(self, async_test_db, seed_rows):
+        """Test linking a phone number through the async session."""
+        async_test_db.add_all(seed_rows)
+        await async_test_db.commit()
+        
+        repo = AsyncFarmerRepository(async_test_db)
+        farmer = await repo.get_by_username("ion.ionescu")
+        await repo.link_phone_to_farmer(farmer, "+40742222222")
+        
+        linked = await repo.get_by_phone("+40742222222")
+        assert linked is not None
+        assert linked.username == "ion.ionescu"
+    
+    async def test_parcels_and_indices(self, async_test_db, seed_rows):
+        """Test getting parcels and their indices."""
+        async_test_db.add_all(seed_rows)
+        await async_test_db.commit()
+        
+        parcels = await AsyncParcelRepository(async_test_db).get_by_farmer_id("F1")
+        indices = await AsyncIndexRepository(async_test_db).get_by_parcel_id("P1")
+        
+        assert [p.id for p in parcels] == ["P1"]
+        assert len(indices) == 2
+    
+    async def test_report_create_and_update_last_sent(self, async_test_db):
+        """Test creating a report and updating its last_sent date."""
+        repo = AsyncReportRepository(async_test_db)
+        
+        report = await repo.create_or_update("+40745555555", "daily")
+        await repo.update_last_sent("+40745555555", date(2024, 1, 15))
+        
+        updated = await repo.get_by_phone("+40745555555")
+        assert updated.id == report.id
+        assert updated.last_sent == date(2024, 1, 15)
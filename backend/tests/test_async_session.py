@@ -0,0 +1,34 @@
+import pytest
+from app.api.manage import _handle_message
+from app.models.base import Farmer, Parcel, ParcelIndex
+from datetime import date
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture
+def seed_rows():
+    """Farmer, parcel and two indices based on the real data patterns."""
+    return [
+        Farmer(id="F1", username="ana.popescu", name="Ana Popescu", phone="+40741111111"),
+        Parcel(id="P1", farmer_id="F1", name="North Field", area_ha=12.3, crop="Wheat"),
+        ParcelIndex(id="P1_IDX1", parcel_id="P1", date=date(2025, 4, 1), ndvi=0.42),
+        ParcelIndex(id="P1_IDX2", parcel_id="P1", date=date(2025, 5, 1), ndvi=0.63),
+    ]
+
+class TestAsyncSession:
+
+    async def test_message_runs_through_run_sync(self, async_test_db, seed_rows):
+        """Test that the sync service stack answers a message on the async session."""
+        async_test_db.add_all(seed_rows)
+        await async_test_db.commit()
+
+        reply = await async_test_db.run_sync(_handle_message, "+40741111111", "show my parcels")
+        assert "North Field" in str(reply)
+
+        details = await async_test_db.run_sync(_handle_message, "+40741111111", "details P1")
+        assert details["indices"]["ndvi"] == 0.63
+
+    async def test_unlinked_phone(self, async_test_db):
+        """Test the welcome reply for a phone that is not linked yet."""
+        reply = await async_test_db.run_sync(_handle_message, "+40749999999", "hello")
+        assert reply == {"reply": "Welcome! Please type your username to link your account."}
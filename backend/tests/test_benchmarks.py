@@ -0,0 +1,19 @@
+from benchmarks.suite import compare, measure
+
+class TestBenchmarkSuite:
+    
+    def test_measure_reports_latency_stats(self):
+        """Test that measure returns per-call stats for fast functions."""
+        result = measure(lambda: sum(range(100)), min_time=0.01)
+        
+        assert result["rounds"] >= 5
+        assert result["calls_per_round"] > 1
+        assert result["p50_ms"] <= result["p99_ms"]
+    
+    def test_compare_flags_regressions(self):
+        """Test that slower p50 beyond the threshold is a regression."""
+        baseline = {"results": {"a": {"p50_ms": 1.0}, "b": {"p50_ms": 1.0}, "c": {"p50_ms": 1.0}}}
+        current = {"results": {"a": {"p50_ms": 1.3}, "b": {"p50_ms": 1.05}, "c": {"p50_ms": 0.5}, "d": {"p50_ms": 2.0}}}
+        
+        statuses = {row["name"]: row["status"] for row in compare(baseline, current, threshold=0.15)}
+        assert statuses == {"a": "regression", "b": "ok", "c": "improved", "d": "new"}
@@ -0,0 +1,75 @@
+import json
+from datetime import date
+import numpy as np
+import pytest
+from app.analytics.carbon import CO2_PER_C, carbon_balances, stock_per_ha
+from app.analytics.series import SeriesBatch
+from app.models.base import Farmer, Parcel, ParcelCarbon, ParcelIndex
+from app.services.carbon_service import CarbonService
+from app.services.index_ingest_service import IndexIngestService, read_records
+
+def soc_row(parcel_id, day, soc):
+    return (parcel_id, date(2025, 4, day), 0.5, None, None, soc, None, None, None, None)
+
+class TestCarbonBalances:
+    
+    def test_balances_skip_readings_without_soc(self):
+        """Test stock, CO2e and changes per parcel, using only the readings that have SOC."""
+        batch = SeriesBatch.from_rows([
+            soc_row("A", 1, 2.0), soc_row("A", 2, None), soc_row("A", 3, 2.2), soc_row("A", 4, 2.1),
+            soc_row("B", 1, None),
+            soc_row("C", 5, 1.5),
+        ])
+        balances = carbon_balances(batch, np.array([10.0, 4.0, 2.0]), 1.3, 30.0)
+        
+        assert balances.parcels.tolist() == [0, 2]  # B has no SOC reading
+        assert stock_per_ha(2.1, 1.3, 30.0) == pytest.approx(81.9)
+        assert balances.co2e_t[0] == pytest.approx(81.9 * 10 * CO2_PER_C)
+        assert balances.change_co2e_t[0] == pytest.approx((2.1 - 2.2) * 39 * 10 * CO2_PER_C)
+        assert balances.baseline_change_co2e_t[0] == pytest.approx((2.1 - 2.0) * 39 * 10 * CO2_PER_C)
+        assert np.isnan(balances.change_co2e_t[1])  # A single SOC reading has no change
+        assert (balances.previous[0], balances.first[0]) == (2, 0)
+
+class TestCarbonService:
+    
+    def test_rollups_follow_ingest(self, test_db, sample_farmer):
+        """Test that balances are rebuilt, rolled up and refreshed only for parcels with new readings."""
+        test_db.add(Farmer(id="F2", username="other", name="Other"))
+        parcels = [("K1", "F1", "Wheat", 10.0), ("K2", "F1", "Maize", 5.0), ("K3", "F2", "Wheat", 2.0), ("K4", "F2", "Wheat", 1.0)]
+        for parcel_id, farmer_id, crop, area in parcels:
+            test_db.add(Parcel(id=parcel_id, farmer_id=farmer_id, name=parcel_id, area_ha=area, crop=crop))
+        for parcel_id, day, soc in [("K1", 1, 2.0), ("K1", 10, 2.2), ("K2", 1, 1.5), ("K3", 1, 3.0), ("K4", 1, None)]:
+            test_db.add(ParcelIndex(id=f"{parcel_id}_{day}", parcel_id=parcel_id, date=date(2025, 4, day), ndvi=0.5, soc=soc))
+        test_db.commit()
+        service = CarbonService(test_db)
+        assert service.rebuild() == 4
+        test_db.commit()
+        
+        def co2e(soc, area):
+            return soc * 1.3 * 30 * area * CO2_PER_C
+        
+        fleet = service.fleet_summary("crop")
+        assert (fleet["parcels"], fleet["parcels_with_soc"], fleet["area_ha"]) == (4, 3, 17.0)
+        assert fleet["co2e_t"] == pytest.approx(co2e(2.2, 10) + co2e(1.5, 5) + co2e(3.0, 2), abs=0.01)
+        wheat = next(group for group in fleet["groups"] if group["crop"] == "Wheat")
+        assert wheat["change_co2e_t"] == pytest.approx(co2e(0.2, 10), abs=0.01)
+        assert [group["farmer_id"] for group in service.fleet_summary("farmer")["groups"]] == ["F1", "F2"]
+        
+        farmer = service.farmer_summary("F1")
+        assert [crop["crop"] for crop in farmer["crops"]] == ["Maize", "Wheat"]
+        assert farmer["parcels"] == 2 and farmer["stock_t_c"] == pytest.approx((2.2 * 10 + 1.5 * 5) * 39, abs=0.01)
+        assert [parcel["parcel_id"] for parcel in farmer["parcel_balances"]] == ["K1", "K2"]
+        
+        # A new SOC reading updates K2's balance in the ingest transaction; other parcels keep theirs
+        k1 = test_db.get(ParcelCarbon, "K1").co2e_t
+        records = read_records([json.dumps({"parcel_id": "K2", "date": "2025-04-20", "soc": 1.8})], "jsonl")
+        IndexIngestService(test_db).ingest(records)
+        test_db.expire_all()
+        assert service.refresh() == 0
+        assert test_db.get(ParcelCarbon, "K1").co2e_t == k1
+        k2 = test_db.get(ParcelCarbon, "K2")
+        assert (k2.soc, k2.previous_date) == (1.8, date(2025, 4, 1))
+        assert k2.change_co2e_t == pytest.approx(co2e(0.3, 5), abs=0.001)
+        
+        history = service.parcel_history("K2")["readings"]
+        assert [reading["change_co2e_t"] for reading in history] == [None, round(co2e(0.3, 5), 2)]
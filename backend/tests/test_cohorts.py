@@ -0,0 +1,75 @@
+from datetime import date, timedelta
+import numpy as np
+from app.analytics.percentiles import cohort_percentiles, percentile_of
+from app.models.base import Parcel, ParcelIndex
+from app.services.cohort_service import CohortService, ordinal
+from app.services.parcel_service import ParcelService
+from app.services.report_service import ReportService
+
+class TestCohortPercentiles:
+    
+    def test_points_match_quantiles(self):
+        """Test that all cohorts computed together match np.quantile per cohort, small ones dropped."""
+        rng = np.random.default_rng(3)
+        crops, windows = rng.integers(0, 3, 600), rng.integers(0, 4, 600) * 30
+        values = rng.normal(0.5, 0.2, 600).round(2)
+        crops[:4], windows[:4] = 9, 0  # A cohort below the minimum size
+        
+        cohort_crops, cohort_windows, sizes, points = cohort_percentiles(crops, windows, values, 5)
+        assert 9 not in cohort_crops and len(cohort_crops) == 12
+        for crop, window, size, row in zip(cohort_crops, cohort_windows, sizes, points):
+            cohort = values[(crops == crop) & (windows == window)]
+            assert size == len(cohort)
+            assert np.allclose(row, np.quantile(cohort, np.linspace(0, 1, 101)))
+    
+    def test_percentile_of(self):
+        """Test placing values: interpolated between points, mid-run on ties, clamped outside."""
+        points = list(np.linspace(0.0, 1.0, 101))
+        assert percentile_of(points, 0.205) == 20.5
+        assert percentile_of(points, -1.0) == 0.0
+        assert percentile_of(points, 2.0) == 100.0
+        assert percentile_of([0.3] * 50 + [0.5] * 51, 0.3) == 24.5
+        assert [ordinal(n) for n in (1, 2, 3, 4, 11, 12, 13, 21, 22, 99)] == [
+            "1st", "2nd", "3rd", "4th", "11th", "12th", "13th", "21st", "22nd", "99th"
+        ]
+
+class TestCohortService:
+    
+    def test_refresh_and_lookups(self, test_db, sample_farmer):
+        """Test that refreshed distributions place a parcel in its crop cohort in status replies and reports."""
+        for p in range(10):
+            test_db.add(Parcel(id=f"C{p}", farmer_id="F1", name=f"Field {p}", area_ha=1.0, crop="Alfalfa"))
+            # Only each parcel's latest reading in the window counts
+            test_db.add(ParcelIndex(id=f"C{p}_a", parcel_id=f"C{p}", date=date(2025, 5, 2), ndvi=0.9))
+            test_db.add(ParcelIndex(id=f"C{p}_b", parcel_id=f"C{p}", date=date(2025, 5, 10), ndvi=0.30 + 0.05 * p))
+        test_db.add(Parcel(id="W1", farmer_id="F1", name="Lone Wheat", area_ha=1.0, crop="Wheat"))
+        test_db.add(ParcelIndex(id="W1_a", parcel_id="W1", date=date(2025, 5, 10), ndvi=0.5))
+        test_db.commit()
+        
+        assert CohortService(test_db).refresh() == {"cohorts": 1, "distributions": 1}  # Wheat's cohort is too small
+        
+        service = CohortService(test_db)
+        (percentile, parcels, window), = service.percentiles("Alfalfa", (date(2025, 5, 10), 0.40, *[None] * 7)).values()
+        assert (round(percentile), parcels) == (22, 10)
+        assert window <= date(2025, 5, 10) < window + timedelta(days=30)
+        assert service.percentiles("Wheat", (date(2025, 5, 10), 0.5, *[None] * 7)) == {}
+        
+        status = ParcelService(test_db).get_parcel_status("C2", sample_farmer)
+        assert "- NDVI is in the 22nd percentile for Alfalfa" in status
+        assert "Compared with" not in ParcelService(test_db).get_parcel_status("W1", sample_farmer)
+        
+        # Indices from different cohorts are not described under one header
+        grouped = service.describe("Alfalfa", {
+            "ndvi": (22.0, 10, date(2025, 4, 30)),
+            "ndmi": (50.0, 8, date(2025, 4, 30)),
+            "ph": (40.0, 10, date(2025, 3, 31)),
+        })
+        assert grouped.count("**Compared with") == 3
+        assert "**Compared with 8 Alfalfa parcels (2025-04-30 to 2025-05-29):**\n- NDMI is in the 50th" in grouped
+        assert "**Compared with 10 Alfalfa parcels (2025-03-31 to 2025-04-29):**\n- pH is in the 40th" in grouped
+        
+        report = ReportService(test_db)._generate_farmer_report(sample_farmer)
+        by_parcel = {parcel["parcel_id"]: parcel["indices"] for parcel in report["parcels"]}
+        assert by_parcel["C9"]["ndvi"]["percentile"] == 100
+        assert by_parcel["C9"]["ndmi"]["percentile"] is None
+        assert by_parcel["W1"]["ndvi"]["percentile"] is None
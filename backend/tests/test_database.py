@@ -0,0 +1,41 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app.storage.database import build_engines
+
+class TestBuildEngines:
+    
+    def test_default_profile_shares_one_engine(self, tmp_path):
+        """Test that the default profile reads and writes through the same engine."""
+        writer, reader = build_engines(f"sqlite:///{tmp_path / 'default.sqlite'}", "default")
+        
+        assert writer is reader
+        writer.dispose()
+    
+    def test_tuned_profile_enables_wal_and_read_only_pool(self, tmp_path):
+        """Test WAL, pragmas and the read-only pool of the tuned profile."""
+        writer, reader = build_engines(f"sqlite:///{tmp_path / 'tuned.sqlite'}", "tuned")
+        
+        with writer.begin() as conn:
+            conn.execute(text("CREATE TABLE t (x INTEGER)"))
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        
+        with reader.connect() as conn:
+            assert conn.execute(text("SELECT count(*) FROM t")).scalar() == 0
+            with pytest.raises(OperationalError):
+                conn.execute(text("INSERT INTO t VALUES (1)"))
+        
+        writer.dispose()
+        reader.dispose()
+    
+    def test_tuned_profile_ignored_for_memory_database(self):
+        """Test that in-memory databases keep a single engine."""
+        writer, reader = build_engines("sqlite:///:memory:", "tuned")
+        
+        assert writer is reader
+    
+    def test_unknown_profile(self):
+        """Test that an unknown profile is rejected."""
+        with pytest.raises(ValueError):
+            build_engines("sqlite:///:memory:", "fast")
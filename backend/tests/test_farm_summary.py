@@ -0,0 +1,54 @@
+import random
+from datetime import date
+import numpy as np
+from app.ai.summaries import overall_status
+from app.analytics.interpretation import EDGES, grade_many
+from app.analytics.series import INDEX_NAMES
+from app.models.base import Parcel, ParcelIndex
+from app.services.farm_summary_service import FarmSummaryService, STATUS_CLASSES
+
+class TestFarmSummaryService:
+    
+    def test_matches_per_parcel_grading(self, test_db, sample_farmer):
+        """Test that the SQL aggregates agree with grading each parcel's latest reading in Python."""
+        rng = random.Random(7)
+        # Band bounds and their neighbours, so exclusive and inclusive bounds are both hit
+        candidates = {name: sorted({round(edge, 2) + d for edge in EDGES[name] for d in (-0.01, 0.0, 0.01)}) + [None] for name in INDEX_NAMES}
+        latest = {}
+        for p in range(40):
+            parcel_id = f"FS{p}"
+            area = round(rng.uniform(0.5, 20), 1)
+            test_db.add(Parcel(id=parcel_id, farmer_id="F1", name=f"Field {p}", area_ha=area, crop=rng.choice(["Wheat", "Maize", "Soybean"])))
+            for k in range(p % 3):  # Parcels without readings, with one and with an older one
+                values = {name: rng.choice(candidates[name]) for name in INDEX_NAMES}
+                test_db.add(ParcelIndex(id=f"{parcel_id}_{k}", parcel_id=parcel_id, date=date(2025, 5, 1 + k), **values))
+                latest[parcel_id] = (area, values)
+        test_db.commit()
+        
+        summary = FarmSummaryService(test_db).get_summary("F1", worst=40)
+        
+        values = np.array([[np.nan if v[name] is None else v[name] for name in INDEX_NAMES] for _, v in latest.values()])
+        grades = np.stack([grade_many(name, values[:, j]) for j, name in enumerate(INDEX_NAMES)], axis=1)
+        counts = [(grades == code).sum(axis=1) for code in (2, 1, 0)]
+        expected = dict(zip(latest, overall_status(*counts)))
+        
+        assert summary["parcels"] == 40
+        assert summary["statuses"]["no_data"] == 40 - len(latest)
+        for code, status in enumerate(STATUS_CLASSES):
+            assert summary["statuses"][status] == sum(1 for s in expected.values() if s == code)
+        with_ndvi = [(area, v["ndvi"]) for area, v in latest.values() if v["ndvi"] is not None]
+        assert summary["averages"]["ndvi"] == round(sum(a * x for a, x in with_ndvi) / sum(a for a, _ in with_ndvi), 3)
+        assert sum(crop["parcels"] for crop in summary["crops"]) == 40
+        
+        worst = summary["worst_parcels"]
+        assert len(worst) == len(latest)  # Parcels without readings are never listed
+        shares = [(2 * w["good"] + w["moderate"]) / (w["good"] + w["moderate"] + w["poor"]) for w in worst]
+        assert shares == sorted(shares)
+        assert all(w["status"] == STATUS_CLASSES[expected[w["parcel_id"]]] for w in worst)
+    
+    def test_farmer_without_parcels(self, test_db, sample_farmer):
+        """Test an empty holding."""
+        summary = FarmSummaryService(test_db).get_summary("F1")
+        assert summary["parcels"] == 0
+        assert summary["averages"] == {"ndvi": None, "ndmi": None, "soc": None}
+        assert summary["worst_parcels"] == []
@@ -0,0 +1,92 @@
+import json
+from datetime import date, timedelta
+import numpy as np
+import pytest
+from app.analytics.forecast import forecast_next
+from app.analytics.series import SeriesBatch, day_to_date
+from app.config import settings
+from app.models.base import Parcel, ParcelForecast, ParcelIndex
+from app.services.forecast_service import ForecastService
+from app.services.index_ingest_service import IndexIngestService, read_records
+from app.services.parcel_service import ParcelService
+from app.services.trend_analysis_service import TrendAnalysisService
+
+def reading(parcel_id, day, ndvi, ph=None):
+    return (parcel_id, date(2025, 4, 1) + timedelta(days=day), ndvi, None, None, None, None, None, None, ph)
+
+class TestForecastNext:
+
+    def test_lines_bands_and_fallbacks(self):
+        """Test the extrapolated value, its band, the window and the single-reading fallback, per parcel."""
+        noisy = [0.30, 0.36, 0.38, 0.46, 0.47]
+        batch = SeriesBatch.from_rows(
+            [reading("A", 0, 0.9)] + [reading("A", 10 * (i + 1), value) for i, value in enumerate(noisy)]
+            + [reading("B", 0, 0.40, 6.0), reading("B", 20, 0.50, None)]
+            + [reading("C", 0, 0.99)]
+        )
+        forecasts = forecast_next(batch, window=5, default_interval=15)
+
+        # A: the first reading is outside the window; next pass 10 days after the last
+        assert day_to_date(forecasts.day[0]) == date(2025, 5, 31)
+        slope, intercept = np.polyfit([10, 20, 30, 40, 50], noisy, 1)
+        assert forecasts.value[0, 0] == pytest.approx(slope * 60 + intercept)
+        assert forecasts.lower[0, 0] < forecasts.value[0, 0] < forecasts.upper[0, 0]
+        assert forecasts.points[0, 0] == 5
+
+        # B: two values give a line without a band; a single pH value is carried forward
+        assert forecasts.value[1, 0] == pytest.approx(0.60)
+        assert np.isnan(forecasts.lower[1, 0])
+        assert (forecasts.value[1, 7], forecasts.points[1, 7]) == (6.0, 1)
+        assert forecasts.points[1, 1] == 0 and np.isnan(forecasts.value[1, 1])
+
+        # C: a single reading uses the default interval
+        assert day_to_date(forecasts.day[2]) == date(2025, 4, 16)
+
+    def test_values_are_clipped_to_the_index_range(self):
+        """Test that a steep line cannot forecast an NDVI above 1."""
+        batch = SeriesBatch.from_rows([reading("A", 0, 0.5), reading("A", 10, 0.8), reading("A", 20, 0.98)])
+        forecasts = forecast_next(batch)
+        assert forecasts.value[0, 0] == 1.0 and forecasts.upper[0, 0] == 1.0
+
+class TestForecastService:
+
+    def test_forecasts_follow_ingest_and_reach_details_and_trends(self, test_db, sample_farmer):
+        """Test stored forecasts, their refresh after ingest and their place in details and trends."""
+        test_db.add(Parcel(id="Q1", farmer_id=sample_farmer.id, name="Forecast", area_ha=2.0, crop="Wheat"))
+        for i, ndvi in enumerate([0.40, 0.45, 0.50]):
+            test_db.add(ParcelIndex(id=f"Q1_{i}", parcel_id="Q1", date=date(2025, 4, 1) + timedelta(days=10 * i), ndvi=ndvi))
+        test_db.commit()
+        service = ForecastService(test_db)
+        assert service.rebuild() == 1
+        test_db.commit()
+
+        ndvi = service.parcel_forecasts("Q1")["ndvi"]
+        assert (ndvi["date"], ndvi["value"], ndvi["points"]) == ("2025-05-01", 0.55, 3)
+        assert ndvi["lower"] == ndvi["upper"] == 0.55  # A perfect line leaves no residual spread
+
+        records = read_records([json.dumps({"parcel_id": "Q1", "date": "2025-05-01", "ndvi": 0.70})], "jsonl")
+        IndexIngestService(test_db).ingest(records)
+        test_db.expire_all()
+        assert service.refresh() == 0
+        stored = test_db.get(ParcelForecast, ("Q1", "ndvi"))
+        assert stored.base_date == date(2025, 5, 1) and stored.lower < stored.value < stored.upper
+
+        details = ParcelService(test_db).get_parcel_details("Q1", sample_farmer)
+        assert details["forecast"]["ndvi"]["date"] == "2025-05-11"
+        trends = TrendAnalysisService(test_db).analyze_parcel_trends("Q1")
+        assert trends["trends"]["ndvi"]["forecast"] == details["forecast"]["ndvi"]
+        bulk = next(TrendAnalysisService(test_db).iter_bulk_trends(sample_farmer.id))
+        assert bulk["trends"]["ndvi"]["forecast"] == details["forecast"]["ndvi"]
+
+    def test_cached_trends_follow_the_forecast_settings(self, test_db, sample_farmer, monkeypatch):
+        """Test that trends cached before a forecast rebuild with a new window are not served after it."""
+        test_db.add(Parcel(id="Q2", farmer_id=sample_farmer.id, name="Window", area_ha=1.0, crop="Wheat"))
+        for i, ndvi in enumerate([0.40, 0.45, 0.55]):
+            test_db.add(ParcelIndex(id=f"Q2_{i}", parcel_id="Q2", date=date(2025, 4, 1) + timedelta(days=10 * i), ndvi=ndvi))
+        test_db.commit()
+        assert TrendAnalysisService(test_db).analyze_parcel_trends("Q2")["trends"]["ndvi"]["forecast"]["points"] == 3
+
+        monkeypatch.setattr(settings, "FORECAST_WINDOW", 2)
+        ForecastService(test_db).rebuild()
+        test_db.commit()
+        assert TrendAnalysisService(test_db).analyze_parcel_trends("Q2")["trends"]["ndvi"]["forecast"]["points"] == 2
@@ -0,0 +1,68 @@
+from datetime import date, timedelta
+import numpy as np
+import pytest
+from app.analytics.gapfill import FLAG_CARRIED, FLAG_INTERPOLATED, FLAG_MISSING, FLAG_OBSERVED, fill_gaps
+from app.analytics.series import SeriesBatch
+from app.models.base import Parcel, ParcelIndex
+from app.services.gapfill_service import GapFillService, gapfill_cache
+from app.services.parcel_service import ParcelService
+from app.services.trend_analysis_service import TrendAnalysisService
+
+def ndwi_row(parcel_id, day, ndwi):
+    return (parcel_id, date(2025, 4, 1) + timedelta(days=day), 0.5, None, ndwi, None, None, None, None, None)
+
+class TestFillGaps:
+
+    def test_interpolates_in_time_and_carries_forward(self):
+        """Test time-weighted interpolation, carrying forward and the max gap, per parcel."""
+        batch = SeriesBatch.from_rows([
+            ndwi_row("A", 0, 0.10), ndwi_row("A", 10, None), ndwi_row("A", 40, 0.50), ndwi_row("A", 50, None),
+            ndwi_row("B", 0, None), ndwi_row("B", 30, 0.20), ndwi_row("B", 100, None), ndwi_row("B", 200, 0.40),
+        ])
+        values, flags = fill_gaps(batch, 45)
+        ndwi = 2
+
+        assert values[1, ndwi] == pytest.approx(0.10 + 0.40 * 10 / 40)  # A quarter of the way in time
+        assert values[3, ndwi] == pytest.approx(0.50)
+        assert flags[:, ndwi].tolist() == [
+            FLAG_OBSERVED, FLAG_INTERPOLATED, FLAG_OBSERVED, FLAG_CARRIED,
+            FLAG_MISSING,  # Before B's first value, and A's values never leak into B
+            FLAG_OBSERVED,
+            FLAG_MISSING,  # Between readings 170 days apart
+            FLAG_OBSERVED,
+        ]
+        assert np.isnan(values[4, ndwi]) and np.isnan(values[6, ndwi])
+        assert (flags[:, 3] == FLAG_MISSING).all()  # An index never measured stays missing
+
+class TestGapFilledConsumers:
+
+    def add_parcel(self, test_db, farmer_id):
+        test_db.add(Parcel(id="G1", farmer_id=farmer_id, name="Gappy", area_ha=3.0, crop="Wheat"))
+        for i, (ndvi, ndwi) in enumerate([(0.4, 0.10), (0.5, None), (0.6, 0.30), (0.7, None)]):
+            test_db.add(ParcelIndex(id=f"G1_{i}", parcel_id="G1", date=date(2025, 4, 1) + timedelta(days=10 * i), ndvi=ndvi, ndwi=ndwi))
+        test_db.commit()
+
+    def test_details_and_trends_use_cached_filled_series(self, test_db, sample_farmer):
+        """Test that details flag the carried latest value and trends fit interpolated points only, sharing one cached series."""
+        self.add_parcel(test_db, sample_farmer.id)
+        misses = gapfill_cache.misses
+
+        details = ParcelService(test_db).get_parcel_details("G1", sample_farmer)
+        assert details["indices"]["ndwi"] == 0.3
+        assert details["filled"] == {"ndwi": "carried_forward"}
+
+        ndwi = TrendAnalysisService(test_db).analyze_parcel_trends("G1")["trends"]["ndwi"]
+        # The interpolated value is fitted, the carried-forward one is not
+        assert (ndwi["data_points"], ndwi["filled_points"]) == (2, 1)
+        assert (ndwi["last_value"], ndwi["change"]) == (0.3, 0.2)
+        assert gapfill_cache.misses == misses + 1
+
+    def test_parcel_series(self, test_db, sample_farmer):
+        """Test that the series flags estimated values and leaves measured ones alone."""
+        self.add_parcel(test_db, sample_farmer.id)
+
+        readings = GapFillService(test_db).parcel_series("G1")["readings"]
+        assert readings[1]["values"]["ndwi"] == pytest.approx(0.2)
+        assert readings[1]["filled"] == {"ndwi": "interpolated"}
+        assert readings[0]["filled"] == {}
+        assert readings[3]["values"]["ndvi"] == 0.7
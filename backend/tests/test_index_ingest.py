@@ -0,0 +1,67 @@
+import json
+from datetime import date
+from app.models.base import ParcelIndex
+from app.repositories.index_stats_repo import IndexStatsRepository
+from app.services.index_ingest_service import IndexIngestService, read_records
+from app.services.index_stats_service import IndexStatsService
+
+def jsonl(*records):
+    return read_records([json.dumps(record) for record in records], "jsonl")
+
+class TestIndexIngest:
+
+    def test_insert_and_idempotent_resend(self, test_db, sample_indices):
+        """Test that new readings are stored once and a re-sent batch changes nothing."""
+        IndexStatsService(test_db).rebuild()
+        test_db.commit()
+        batch = [
+            {"parcel_id": "P1", "date": "2025-06-01", "ndvi": 0.66, "ph": 6.5},
+            {"parcel_id": "P1", "date": "2025-07-01", "ndvi": 0.70, "ph": 6.5},
+        ]
+
+        result = IndexIngestService(test_db).ingest(jsonl(*batch))
+        assert (result["inserted"], result["updated"], result["unchanged"], result["rejected"]) == (2, 0, 0, 0)
+        stored = test_db.get(ParcelIndex, "P1_20250601")
+        assert (stored.ndvi, stored.ph, stored.ndmi) == (0.66, 6.5, None)
+        assert IndexStatsRepository(test_db).get_version("P1") == (4, date(2025, 7, 1), 0)  # Updated with the readings
+        assert IndexIngestService(test_db).refresh_stats() == 0
+
+        result = IndexIngestService(test_db).ingest(jsonl(*batch))
+        assert (result["inserted"], result["updated"], result["unchanged"]) == (0, 0, 2)
+        assert test_db.query(ParcelIndex).count() == 4
+
+    def test_correction_replaces_reading_and_stats(self, test_db, sample_indices):
+        """Test that a reading for a stored date replaces it and the running stats follow."""
+        IndexStatsService(test_db).rebuild()
+        test_db.commit()
+
+        result = IndexIngestService(test_db).ingest(jsonl({"parcel_id": "P1", "date": "2025-05-01", "ndvi": 0.50}))
+        assert (result["inserted"], result["updated"]) == (0, 1)
+        corrected = test_db.get(ParcelIndex, "P1_IDX2")  # Keeps its id
+        assert (corrected.ndvi, corrected.ndmi) == (0.50, None)
+
+        ndvi = IndexStatsRepository(test_db).get_by_parcel_id("P1")
+        assert (ndvi["ndvi"].count, ndvi["ndvi"].last_value) == (2, 0.50)
+        assert "ndmi" in ndvi and ndvi["ndmi"].count == 1
+
+    def test_bulk_validation(self, test_db, sample_parcel):
+        """Test that invalid readings are rejected by line while the rest are stored."""
+        lines = [
+            "parcel_id,date,ndvi,ph",
+            "P1,2025-06-01,0.6,6.4",
+            "P1,2025-06-01,0.6,6.4",
+            "P9,2025-06-01,0.6,6.4",
+            "P1,2025-06-31,0.6,6.4",
+            "P1,2025-06-02,1.6,6.4",
+            "P1,2025-06-03,,",
+            "P1,2025-06-04,abc,6.4",
+        ]
+        result = IndexIngestService(test_db).ingest(read_records(lines, "csv"))
+
+        assert (result["received"], result["inserted"], result["rejected"]) == (7, 1, 6)
+        assert [error["line"] for error in result["errors"]] == [3, 5, 6, 7, 8, 4]
+        assert result["errors"][0]["error"] == "duplicate reading for P1 on 2025-06-01"
+        assert result["errors"][-1]["error"] == "unknown parcel P9"
+
+        result = IndexIngestService(test_db).ingest(read_records(['{"parcel_id": "P1", "date": "2025-06-05", "NDVI": 0.5}', "{"], "jsonl"))
+        assert [error["error"][:14] for error in result["errors"]] == ["unknown fields", "invalid JSON: "]
@@ -1,4 +1,6 @@
+import numpy as np
 import pytest
+from app.analytics.series import INDEX_NAMES
 from app.services.index_service import IndexInterpretationService
 
 class TestIndexInterpretationService:
@@ -44,4 +46,18 @@ class TestIndexInterpretationService:
         status = self.service.soil_ph_status(5.0)
         assert "acidic" in status.lower() or "low" in status.lower()
     
-    
\ No newline at end of file
+    def test_band_boundaries(self):
+        """Test that each bound falls in the band the thresholds specify."""
+        assert self.service.grade("ndvi", 0.30) == "moderate"  # < 0.30 is poor
+        assert self.service.label("ndvi", 0.75) == "vegetation is healthy"  # <= 0.75 is healthy
+        assert self.service.grade("ph", 7.0) == "good"
+        assert self.service.grade("ph", 7.2) == "moderate"
+        assert self.service.grade("ph", 7.6) == "poor"
+        assert self.service.describe("soc", None) == "No data available"
+    
+    def test_classify_many_matches_scalar(self):
+        """Test that array classification gives every value its scalar band."""
+        values = np.concatenate([np.linspace(-1, 9, 2001), [5.5, 6.0, 7.0, 7.5, np.nan]])
+        for index_name in INDEX_NAMES:
+            labels = self.service.classify_many(index_name, values, "label")
+            assert list(labels) == [self.service.label(index_name, v if v == v else None) for v in values]
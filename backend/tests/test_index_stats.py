@@ -0,0 +1,165 @@
+import numpy as np
+import pytest
+from datetime import date, timedelta
+from app.analytics.running_stats import READINGS_KEY, running_stats_from_batch
+from app.analytics.series import INDEX_NAMES, SeriesBatch
+from app.models.base import Parcel, ParcelCarbon, ParcelForecast, ParcelIndexStats
+from app.repositories.index_repo import IndexRepository
+from app.services.carbon_service import CarbonService
+from app.services.forecast_service import ForecastService
+from app.services.index_ingest_service import IndexIngestService
+from app.services.index_stats_service import IndexStatsService
+from app.services.trend_analysis_service import TrendAnalysisService, trend_cache
+
+def make_rows(parcel_id, n, seed=0, start_day=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for k in range(n):
+        ndvi = None if rng.random() < 0.2 else float(0.3 + 0.01 * k + rng.normal(0, 0.03))
+        rows.append((parcel_id, date(2025, 1, 1) + timedelta(days=start_day + 10 * k), ndvi, float(rng.normal(0.1, 0.05)),
+                     None, 2.0 + 0.01 * k, None, None, None, float(6.5 + rng.normal(0, 0.1))))
+    return rows
+
+def assert_same_trends(actual_trends, expected_trends):
+    assert actual_trends["period"] == expected_trends["period"]
+    assert actual_trends["trends"].keys() == expected_trends["trends"].keys()
+    for name, expected in expected_trends["trends"].items():
+        actual = actual_trends["trends"][name]
+        for key, value in expected.items():
+            if isinstance(value, float):
+                assert actual[key] == pytest.approx(value, abs=1e-6), (name, key)
+            else:
+                assert actual[key] == value, (name, key)
+
+class TestRunningStats:
+    
+    def test_merge_equals_single_pass(self):
+        """Test that merging aggregates of two parts (one of them earlier) equals aggregating all readings."""
+        rows = make_rows("P1", 30, seed=3)
+        whole = running_stats_from_batch(SeriesBatch.from_rows(rows))["P1"]
+        late = running_stats_from_batch(SeriesBatch.from_rows(rows[12:]))["P1"]
+        early = running_stats_from_batch(SeriesBatch.from_rows(rows[:12]))["P1"]
+        
+        for name, expected in whole.items():
+            merged = late[name].merge(early[name]) if name in late and name in early else (late.get(name) or early[name])
+            assert merged.count == expected.count
+            assert merged.origin == expected.origin
+            assert merged.first_day == expected.first_day and merged.last_day == expected.last_day
+            assert merged.recent == expected.recent
+            for attribute in ("sum_t", "sum_tt", "sum_y", "sum_yy", "sum_ty"):
+                assert getattr(merged, attribute) == pytest.approx(getattr(expected, attribute))
+        
+        ndvi = [row[2] for row in rows if row[2] is not None]
+        assert whole["ndvi"].mean == pytest.approx(np.mean(ndvi))
+        assert whole["ndvi"].variance == pytest.approx(np.var(ndvi))
+        assert whole[READINGS_KEY].count == 30
+
+class TestIndexStatsService:
+    
+    @pytest.fixture
+    def parcels(self, test_db, sample_farmer):
+        for parcel_id in ("PS1", "PS2"):
+            test_db.add(Parcel(id=parcel_id, farmer_id=sample_farmer.id, name=f"Field {parcel_id}", area_ha=3.0, crop="Wheat"))
+        test_db.commit()
+    
+    def _ingest(self, db, rows):
+        records = [
+            (line, {"parcel_id": parcel_id, "date": str(day), **{name: value for name, value in zip(INDEX_NAMES, values) if value is not None}})
+            for line, (parcel_id, day, *values) in enumerate(rows, start=1)
+        ]
+        assert IndexIngestService(db).ingest(records)["rejected"] == 0
+    
+    def test_incremental_trends_match_full_history(self, test_db, parcels):
+        """Test that trends from the running aggregates equal trends recomputed from all readings."""
+        rows = make_rows("PS1", 25, seed=1) + make_rows("PS2", 9, seed=2)
+        self._ingest(test_db, rows[:10])
+        self._ingest(test_db, rows[10:20])
+        self._ingest(test_db, rows[20:])
+        
+        service = TrendAnalysisService(test_db)
+        from_stats = service.analyze_parcel_trends("PS1")
+        test_db.query(ParcelIndexStats).delete()
+        trend_cache.clear()
+        assert_same_trends(from_stats, service.analyze_parcel_trends("PS1"))
+    
+    def test_rebuild_matches_ingest(self, test_db, parcels):
+        """Test that rebuilding from parcel_indices gives the aggregates kept up to date by ingest."""
+        self._ingest(test_db, make_rows("PS1", 8, seed=4))
+        self._ingest(test_db, make_rows("PS1", 4, seed=5, start_day=200) + make_rows("PS2", 3, seed=6))
+        recorded = {(s.parcel_id, s.index_name): (s.count, s.sum_ty, s.last_date, s.recent) for s in test_db.query(ParcelIndexStats)}
+        
+        assert IndexStatsService(test_db).rebuild() == 2
+        test_db.commit()
+        rebuilt = {(s.parcel_id, s.index_name): (s.count, s.sum_ty, s.last_date, s.recent) for s in test_db.query(ParcelIndexStats)}
+        
+        assert rebuilt.keys() == recorded.keys()
+        for key, (count, sum_ty, last_date, recent) in rebuilt.items():
+            assert recorded[key][0] == count
+            assert recorded[key][1] == pytest.approx(sum_ty)
+            assert recorded[key][2:] == (last_date, recent)
+    
+    def test_appended_readings_match_history(self, test_db, parcels, monkeypatch):
+        """Test that readings after a parcel's latest one are folded in without reading its history."""
+        rows = make_rows("PS1", 20, seed=7) + make_rows("PS2", 9, seed=8)
+        self._ingest(test_db, rows[:12] + rows[20:25])
+        
+        reads = []
+        get_series = IndexRepository.get_series
+        monkeypatch.setattr(IndexRepository, "get_series", lambda repo, parcel_ids: reads.append(parcel_ids) or get_series(repo, parcel_ids))
+        self._ingest(test_db, rows[12:20] + rows[25:])
+        assert reads == []
+        self._ingest(test_db, [("PS2", date(2025, 1, 6), 0.5, None, None, 2.2, None, None, None, None)])  # Backfill
+        assert reads == [["PS2"]]
+        
+        def snapshot():
+            stats = {(s.parcel_id, s.index_name): (s.count, s.sum_ty, s.first_date, s.last_date, s.recent) for s in test_db.query(ParcelIndexStats)}
+            carbon = {c.parcel_id: (c.soc_date, c.co2e_t, c.previous_date, c.change_co2e_t, c.baseline_change_co2e_t) for c in test_db.query(ParcelCarbon)}
+            forecasts = {(f.parcel_id, f.index_name): (f.forecast_date, f.value, f.lower, f.points) for f in test_db.query(ParcelForecast)}
+            return stats, carbon, forecasts
+        
+        folded = snapshot()
+        IndexStatsService(test_db).rebuild()
+        CarbonService(test_db).rebuild()
+        ForecastService(test_db).rebuild()
+        test_db.commit()
+        rebuilt = snapshot()
+        
+        assert folded[1:] == rebuilt[1:] and len(rebuilt[2]) == 8
+        assert folded[0].keys() == rebuilt[0].keys()
+        for key, (count, sum_ty, *rest) in rebuilt[0].items():
+            assert folded[0][key][0] == count
+            assert folded[0][key][1] == pytest.approx(sum_ty)
+            assert folded[0][key][2:] == tuple(rest)
+    
+    def test_trailing_gaps_keep_the_stats_path(self, test_db, parcels, monkeypatch):
+        """Test that only gaps inside an index's span send trend analysis to the full history."""
+        rows = []
+        for k in range(10):
+            day = date(2025, 1, 1) + timedelta(days=10 * k)
+            ndvi = 0.3 + 0.02 * k
+            rows.append(("PS1", day, ndvi, 0.1 + 0.01 * k if k < 8 else None, None, None, None, None, None, 6.5))  # NDMI stops
+            rows.append(("PS2", day, ndvi, 0.1 + 0.01 * k if k != 4 else None, None, None, None, None, None, 6.5))  # NDMI skips one
+        self._ingest(test_db, rows)
+        
+        service = TrendAnalysisService(test_db)
+        read = []
+        parcel_batch = service.gapfill.parcel_batch
+        monkeypatch.setattr(service.gapfill, "parcel_batch", lambda parcel_id, *args: read.append(parcel_id) or parcel_batch(parcel_id, *args))
+        from_stats = [service.analyze_parcel_trends(parcel_id) for parcel_id in ("PS1", "PS2")]
+        assert read == ["PS2"]
+        
+        test_db.query(ParcelIndexStats).delete()
+        trend_cache.clear()
+        for parcel_id, trends in zip(("PS1", "PS2"), from_stats):
+            assert_same_trends(trends, service.analyze_parcel_trends(parcel_id))
+        ndmi = [trends["trends"]["ndmi"] for trends in from_stats]
+        assert [(t["data_points"], t["filled_points"]) for t in ndmi] == [(8, 0), (9, 1)]  # PS2's gap is interpolated
+    
+    def test_single_reading_is_insufficient(self, test_db, parcels):
+        """Test that aggregates of one reading report insufficient data."""
+        self._ingest(test_db, make_rows("PS1", 1))
+        
+        result = TrendAnalysisService(test_db).analyze_parcel_trends("PS1")
+        
+        assert result["status"] == "insufficient_data"
+        assert result["data_points"] == 1
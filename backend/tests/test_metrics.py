@@ -0,0 +1,21 @@
+from app.observability.metrics import INTENTS, render_metrics
+from app.services.intent_service import IntentService
+
+class TestMetrics:
+    
+    def test_intent_distribution_counted(self, test_db, sample_farmer, sample_parcel):
+        """Test that handled messages are counted per intent."""
+        counter = INTENTS.labels(intent="LIST_PARCELS")
+        before = counter._value.get()
+        
+        IntentService(test_db).handle_message(sample_farmer.phone, "Show my parcels")
+        
+        assert counter._value.get() == before + 1
+    
+    def test_render_metrics_text_format(self):
+        """Test that metrics render in the Prometheus text format."""
+        body, content_type = render_metrics()
+        
+        assert content_type.startswith("text/plain")
+        assert b"chat_intents_total" in body
+        assert b"http_request_duration_seconds" in body
@@ -0,0 +1,78 @@
+import threading
+import time
+import pytest
+from collections import Counter
+from app.config import settings
+from fastapi import HTTPException
+from app.api.admin import require_admin
+from app.observability.profiling import StackSampler, finish_profile, save_profile, list_profiles, get_profile_path, should_profile
+
+def busy_loop(stop: threading.Event):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+class TestProfiling:
+    
+    def test_sampler_captures_busy_thread(self):
+        """Test that the sampler records stacks of a thread doing work."""
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_loop, args=(stop,))
+        worker.start()
+        
+        sampler = StackSampler(interval=0.001)
+        sampler.start()
+        time.sleep(0.05)
+        samples = sampler.stop()
+        stop.set()
+        worker.join()
+        
+        assert any("busy_loop" in stack for stack in samples)
+    
+    def test_save_list_and_prune(self, tmp_path, monkeypatch):
+        """Test saving folded profiles and keeping only the newest ones."""
+        monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+        monkeypatch.setattr(settings, "PROFILE_KEEP", 2)
+        
+        for _ in range(3):
+            save_profile(Counter({"main;handle_message;query": 3}), "POST", "/message")
+        
+        profiles = list_profiles()
+        assert len(profiles) == 2
+        path = get_profile_path(profiles[0]["name"])
+        assert path.read_text() == "main;handle_message;query 3\n"
+    
+    def test_profile_path_rejects_traversal(self, tmp_path, monkeypatch):
+        """Test that only plain profile file names resolve."""
+        monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+        
+        assert get_profile_path("../farmers.sqlite") is None
+        assert get_profile_path("missing.folded") is None
+    
+    def test_should_profile_requires_admin_token(self, monkeypatch):
+        """Test that the profile header only works with the admin token."""
+        monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+        monkeypatch.setattr(settings, "PROFILING_SAMPLE_RATE", 0.0)
+        
+        assert should_profile({"x-profile": "1", "x-admin-token": "secret"}) is True
+        assert should_profile({"x-profile": "1", "x-admin-token": "wrong"}) is False
+        assert should_profile({"x-profile": "1", "x-admin-token": "sécret"}) is False
+        assert should_profile({}) is False
+    
+    def test_admin_token_with_non_ascii_characters_is_rejected(self, monkeypatch):
+        """Test that a non-ASCII admin token is a 403, not a TypeError."""
+        monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+        
+        require_admin("secret")
+        with pytest.raises(HTTPException) as error:
+            require_admin("sécret")
+        assert error.value.status_code == 403
+    
+    def test_finish_profile_saves_samples(self, tmp_path, monkeypatch):
+        """Test that the middleware's off-loop finisher stops the sampler and writes its samples."""
+        monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+        sampler = StackSampler(0.001)
+        sampler.samples["a;b"] += 3
+        sampler.start()
+        
+        path = finish_profile(sampler, "GET", "/x")
+        assert path is not None and "a;b 3\n" in path.read_text()
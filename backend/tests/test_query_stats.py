@@ -0,0 +1,66 @@
+import asyncio
+import pytest
+from app.observability import queries
+from app.observability.queries import QueryStats, QueryStatsMiddleware, track_queries, current_stats, install_query_instrumentation
+from app.services.parcel_service import ParcelService
+from app.services.report_service import ReportService
+from app.models.base import Farmer, FarmerReport
+
+class TestQueryStats:
+    
+    def setup_method(self):
+        install_query_instrumentation()
+    
+    def test_keeps_slowest_statements(self):
+        """Test that only the slowest statements are kept, slowest first."""
+        stats = QueryStats(keep_slowest=2)
+        stats.record("A", 0.001)
+        stats.record("B", 0.005)
+        stats.record("C", 0.003)
+        
+        assert stats.count == 3
+        assert [s["statement"] for s in stats.slowest] == ["B", "C"]
+        assert stats.total_ms == pytest.approx(9.0)
+    
+    def test_counts_queries_inside_block_only(self, test_db, sample_farmer, sample_parcel, sample_indices):
+        """Test that statements are counted while tracking and not afterwards."""
+        parcel_id, _ = sample_parcel.id, sample_farmer.id  # Load the fixtures before tracking
+        with track_queries() as stats:
+            ParcelService(test_db).get_parcel_status(parcel_id, sample_farmer)
+        
+        # The parcel, its readings and the crop's percentile distributions
+        assert stats.count == 3
+        assert current_stats() is None
+        
+        count_after_block = stats.count
+        ParcelService(test_db).get_all_parcels()
+        assert stats.count == count_after_block
+    
+    def test_report_run_query_count(self, test_db, sample_farmer, sample_parcel, sample_indices):
+        """Test that a report run's queries are visible to the tracker and do not grow per farmer."""
+        test_db.add(FarmerReport(id="R1", phone=sample_farmer.phone, report_frequency="daily"))
+        test_db.add(Farmer(id="F2", username="ion.ionescu", name="Ion Ionescu", phone="+40742222222"))
+        test_db.add(FarmerReport(id="R2", phone="+40742222222", report_frequency="weekly"))
+        test_db.commit()
+        
+        with track_queries() as stats:
+            reports = ReportService(test_db).generate_reports()
+        
+        assert [report["report_type"] for report in reports] == ["daily", "weekly"]
+        # Farmers stream, the batch's report settings, parcels, latest readings,
+        # percentile distributions and the last_sent update
+        assert stats.count == 6
+        assert stats.total_ms > 0
+    
+    def test_failing_request_is_checked(self, monkeypatch):
+        """Test that the middleware checks the thresholds of a request that raises."""
+        checked = []
+        monkeypatch.setattr(queries, "check_thresholds", lambda stats, label: checked.append(label))
+        
+        async def failing_app(scope, receive, send):
+            raise RuntimeError("boom")
+        
+        middleware = QueryStatsMiddleware(failing_app)
+        with pytest.raises(RuntimeError):
+            asyncio.run(middleware({"type": "http", "method": "GET", "path": "/x"}, None, None))
+        assert checked == ["GET /x"]
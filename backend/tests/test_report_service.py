@@ -1,5 +1,8 @@
 import pytest
 from datetime import date, timedelta
+from types import SimpleNamespace
+from app.ai.summaries import RuleBasedSummaryGenerator
+from app.analytics.series import INDEX_NAMES
 from app.services.report_service import ReportService
 from app.models.base import FarmerReport
 
@@ -17,7 +20,7 @@ class TestReportService:
         test_db.commit()
         
         service = ReportService(test_db)
-        should_receive = service._should_receive_report_today(sample_farmer.phone)
+        should_receive = service._should_receive_report_today(service.report_repo.get_by_phone(sample_farmer.phone))
         
         assert should_receive is True
     
@@ -33,7 +36,7 @@ class TestReportService:
         test_db.commit()
         
         service = ReportService(test_db)
-        should_receive = service._should_receive_report_today(sample_farmer.phone)
+        should_receive = service._should_receive_report_today(service.report_repo.get_by_phone(sample_farmer.phone))
         
         assert should_receive is True
     
@@ -50,7 +53,7 @@ class TestReportService:
         test_db.commit()
         
         service = ReportService(test_db)
-        should_receive = service._should_receive_report_today(sample_farmer.phone)
+        should_receive = service._should_receive_report_today(service.report_repo.get_by_phone(sample_farmer.phone))
         
         assert should_receive is True
     
@@ -66,7 +69,7 @@ class TestReportService:
         test_db.commit()
         
         service = ReportService(test_db)
-        should_receive = service._should_receive_report_today(sample_farmer.phone)
+        should_receive = service._should_receive_report_today(service.report_repo.get_by_phone(sample_farmer.phone))
         
         assert should_receive is False
     
@@ -100,3 +103,22 @@ class TestReportService:
         # Verify last_sent was updated
         test_db.refresh(report)
         assert report.last_sent == date.today()
+    
+    def test_batch_summaries_match_single(self):
+        """Test that the batch summary API renders exactly what the per-parcel one does."""
+        generator = RuleBasedSummaryGenerator()
+        readings = [
+            (date(2025, 5, 1), 0.30, 0.15, None, 2.5, 1.0, 0.35, 0.7, 7.2),  # Values on band bounds
+            (date(2025, 5, 2), -0.0, None, None, None, None, None, None, 5.0),
+            (date(2025, 5, 3), None, None, None, None, None, None, None, None),
+            None,
+        ]
+        parcels = [{"parcel_id": f"P{i}", "parcel_name": "Field", "area_ha": 2.5, "crop": "Wheat"} for i in range(len(readings))]
+        
+        batch = generator.generate_parcel_summaries(parcels, readings)
+        for parcel, reading, summary in zip(parcels, readings, batch):
+            latest = SimpleNamespace(date=reading[0], **dict(zip(INDEX_NAMES, reading[1:]))) if reading else None
+            assert summary == generator.generate_parcel_summary(parcel["parcel_id"], {**parcel, "latest_index": latest})
+        assert "**Vegetation (NDVI: -0.00):** Vegetation is poor" in batch[1]
+        assert "NEEDS ATTENTION" in batch[1] and "Overall" not in batch[2]
+        assert batch[3] == "Parcel P3: no data available yet"
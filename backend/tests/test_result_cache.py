@@ -0,0 +1,129 @@
+from datetime import date
+from app.ai.summaries import CachedSummaryGenerator, LLMSummaryGenerator, RuleBasedSummaryGenerator, summary_cache
+from app.models.base import Parcel
+from app.repositories.index_repo import IndexRepository
+from app.services.gapfill_service import gapfill_cache
+from app.services.index_ingest_service import IndexIngestService
+from app.ai.trends import LLMTrendSummarizer
+from app.services.trend_analysis_service import TrendAnalysisService, trend_cache
+from app.storage.result_cache import ResultCache
+
+class TestResultCache:
+    
+    def test_lru_eviction_and_invalidation(self):
+        """Test that the least recently used entry is evicted and invalidation drops a whole group."""
+        cache = ResultCache("test_lru", max_entries=2)
+        cache.set(("P1", 1), {"v": 1})
+        cache.set(("P2", 1), {"v": 2})
+        assert cache.get(("P1", 1)) == {"v": 1}
+        cache.set(("P3", 1), {"v": 3})
+        
+        assert cache.get(("P2", 1)) is None
+        cache.invalidate(["P1"])
+        assert cache.get(("P1", 1)) is None
+        assert cache.get(("P3", 1)) == {"v": 3}
+        assert cache.stats()["hits"] == 2
+        assert cache.stats()["hit_rate"] == 0.5
+    
+    def test_persistent_tier(self, tmp_path):
+        """Test that entries survive a new cache instance and invalidation reaches the file."""
+        path = str(tmp_path / "cache.sqlite")
+        ResultCache("test_persist", sqlite_path=path).set(("P1", "2025-05-01", 3), {"trend": "stable"})
+        
+        reopened = ResultCache("test_persist", sqlite_path=path)
+        assert reopened.get(("P1", "2025-05-01", 3)) == {"trend": "stable"}
+        reopened.invalidate(["P1"])
+        assert ResultCache("test_persist", sqlite_path=path).get(("P1", "2025-05-01", 3)) is None
+
+class TestTrendCache:
+    
+    def test_cached_until_new_readings(self, test_db, sample_farmer):
+        """Test that repeated analysis is served from the cache and new readings invalidate it."""
+        test_db.add(Parcel(id="PC1", farmer_id=sample_farmer.id, name="Cached", area_ha=2.0, crop="Wheat"))
+        test_db.commit()
+        rows = [("PC1", date(2025, 5, 1 + 7 * k), 0.3 + 0.1 * k, None, None, None, None, None, None, None) for k in range(4)]
+        ingest = IndexIngestService(test_db)
+        ingest.ingest((k, {"parcel_id": "PC1", "date": str(row[1]), "ndvi": row[2]}) for k, row in enumerate(rows[:3]))
+        
+        service = TrendAnalysisService(test_db)
+        hits = trend_cache.hits
+        first = service.analyze_parcel_trends("PC1")
+        assert service.analyze_parcel_trends("PC1") is first
+        assert trend_cache.hits == hits + 1
+        
+        ingest.ingest([(3, {"parcel_id": "PC1", "date": str(rows[3][1]), "ndvi": rows[3][2]})])
+        
+        updated = service.analyze_parcel_trends("PC1")
+        assert updated["period"]["data_points"] == 4
+        assert trend_cache.hits == hits + 1
+    
+    def test_corrected_reading_changes_the_key(self, test_db, sample_farmer, monkeypatch):
+        """Test that a replaced reading is not served from another worker's cache, which ingest does not invalidate."""
+        test_db.add(Parcel(id="PC2", farmer_id=sample_farmer.id, name="Corrected", area_ha=2.0, crop="Wheat"))
+        test_db.commit()
+        ingest = IndexIngestService(test_db)
+        ingest.ingest([(1, {"parcel_id": "PC2", "date": "2025-05-01", "ndvi": 0.3}), (2, {"parcel_id": "PC2", "date": "2025-05-11", "ndvi": 0.4})])
+        assert TrendAnalysisService(test_db).analyze_parcel_trends("PC2")["trends"]["ndvi"]["last_value"] == 0.4
+        
+        monkeypatch.setattr(trend_cache, "invalidate", lambda parcel_ids: None)
+        monkeypatch.setattr(gapfill_cache, "invalidate", lambda parcel_ids: None)
+        ingest.ingest([(1, {"parcel_id": "PC2", "date": "2025-05-11", "ndvi": 0.6})])
+        assert IndexRepository(test_db).get_version("PC2") == (2, date(2025, 5, 11), 1)
+        assert TrendAnalysisService(test_db).analyze_parcel_trends("PC2")["trends"]["ndvi"]["last_value"] == 0.6
+
+    def test_llm_fallback_trends_are_not_cached(self, test_db, sample_indices):
+        """Test that trends summarized by the rules after an LLM failure are analyzed again next time."""
+        class FailingClient:
+            def generate(self, prompt):
+                raise RuntimeError("LLM unavailable")
+        
+        service = TrendAnalysisService(test_db)
+        service.summarizer = LLMTrendSummarizer(FailingClient())
+        misses = trend_cache.misses
+        
+        assert service.analyze_parcel_trends("P1")["summary"].startswith("Trend Analysis for")
+        service.analyze_parcel_trends("P1")
+        assert trend_cache.misses == misses + 2
+
+class TestSummaryCache:
+    
+    def test_summaries_cached_per_reading(self):
+        """Test that only uncached summaries are generated and invalidation or new values regenerate them."""
+        calls = []
+        class CountingGenerator(RuleBasedSummaryGenerator):
+            def generate_parcel_summaries(self, parcels, readings):
+                calls.append([parcel["parcel_id"] for parcel in parcels])
+                return super().generate_parcel_summaries(parcels, readings)
+        
+        generator = CachedSummaryGenerator(CountingGenerator(), "rule_based")
+        hits = summary_cache.hits
+        parcels = [{"parcel_id": pid, "parcel_name": "Field", "area_ha": 2.0, "crop": "Wheat"} for pid in ("S1", "S2", "S3")]
+        readings = [(date(2025, 5, 1), 0.6, 0.2, None, None, None, None, None, 6.5)] * 2 + [None]
+        
+        first = generator.generate_parcel_summaries(parcels, readings)
+        assert generator.generate_parcel_summaries(parcels, readings) == first
+        assert calls == [["S1", "S2", "S3"], ["S3"]]  # Parcels without readings are not cached
+        
+        summary_cache.invalidate(["S1"])
+        newer = [(date(2025, 5, 8), 0.2, 0.2, None, None, None, None, None, 6.5)] + readings[1:]
+        updated = generator.generate_parcel_summaries(parcels, newer)
+        assert calls[-1] == ["S1", "S3"]
+        assert updated[1] == first[1] and updated[0] != first[0]
+        assert summary_cache.hits == hits + 3
+    
+    def test_llm_fallback_is_not_cached(self):
+        """Test that the rule-based text of a failed LLM call is returned but the LLM is tried again next time."""
+        calls = []
+        class FailingClient:
+            def generate(self, prompt):
+                calls.append(prompt)
+                raise RuntimeError("LLM unavailable")
+        
+        generator = CachedSummaryGenerator(LLMSummaryGenerator(FailingClient()), "llm:test")
+        parcels = [{"parcel_id": "S4", "parcel_name": "Field", "area_ha": 2.0, "crop": "Wheat"}]
+        readings = [(date(2025, 5, 1), 0.6, 0.2, None, None, None, None, None, 6.5)]
+        
+        first = generator.generate_parcel_summaries(parcels, readings)
+        assert first == RuleBasedSummaryGenerator().generate_parcel_summaries(parcels, readings)
+        generator.generate_parcel_summaries(parcels, readings)
+        assert len(calls) == 2
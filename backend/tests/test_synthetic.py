@@ -0,0 +1,57 @@
+import json
+from app.models.base import Farmer, Parcel, ParcelIndex, ParcelIndexStats, FarmerReport
+from app.storage.synthetic import SyntheticConfig, generate_indices, generate_parcels, load_into_db, write_json
+
+class TestSyntheticData:
+
+    def test_same_seed_same_rows(self):
+        """Test that generation is deterministic for a seed."""
+        config = SyntheticConfig(farmers=5, parcels_per_farmer=3, readings_per_parcel=6, seed=7, chunk_parcels=4)
+
+        assert list(generate_indices(config)) == list(generate_indices(config))
+        assert list(generate_parcels(config)) == list(generate_parcels(config))
+        other_seed = SyntheticConfig(farmers=5, parcels_per_farmer=3, readings_per_parcel=6, seed=8)
+        assert list(generate_indices(config)) != list(generate_indices(other_seed))
+
+    def test_shapes_dates_and_null_patterns(self):
+        """Test row counts, increasing dates and optical gaps with complete first readings."""
+        config = SyntheticConfig(farmers=20, parcels_per_farmer=5, readings_per_parcel=20)
+        rows = list(generate_indices(config))
+
+        assert len(rows) == 20 * 5 * 20
+        p1 = [r for r in rows if r["parcel_id"] == "P1"]
+        assert [r["id"] for r in p1[:2]] == ["P1_IDX1", "P1_IDX2"]
+        assert all(a["date"] < b["date"] for a, b in zip(p1, p1[1:]))
+
+        first_readings = rows[::20]
+        assert all(r[name] is not None for r in first_readings for name in ("ndvi", "ndmi", "ndwi"))
+        assert any(r["ndmi"] is None for r in rows)
+        assert any(r["ndwi"] is None for r in rows)
+        assert all(r["soc"] is not None and r["ph"] is not None for r in rows)
+
+    def test_load_into_db(self, test_db):
+        """Test loading the dataset replaces the database contents."""
+        config = SyntheticConfig(farmers=4, parcels_per_farmer=2, readings_per_parcel=3)
+        counts = load_into_db(config, test_db)
+
+        assert counts["parcel_indices"] == 24
+        assert test_db.query(Farmer).count() == 4
+        assert test_db.query(Parcel).count() == 8
+        assert test_db.query(ParcelIndex).count() == 24
+        linked = test_db.query(Farmer).filter(Farmer.phone.isnot(None)).count()
+        assert test_db.query(FarmerReport).count() == linked
+        assert counts["parcel_index_stats"] == 8
+        assert test_db.query(ParcelIndexStats).filter(ParcelIndexStats.index_name == "_readings").count() == 8
+
+    def test_write_json_matches_seed_format(self, tmp_path):
+        """Test that the JSON output uses the backend/data layout."""
+        config = SyntheticConfig(farmers=2, parcels_per_farmer=2, readings_per_parcel=3)
+        write_json(config, str(tmp_path))
+
+        farmers = json.loads((tmp_path / "farmers.json").read_text())
+        parcels = json.loads((tmp_path / "parcels.json").read_text())
+        indices = json.loads((tmp_path / "parcel_indices.json").read_text())
+        assert {f["id"] for f in farmers} == {"F1", "F2"}
+        assert set(indices) == {p["id"] for p in parcels}
+        assert len(indices["P1"]) == 3
+        assert indices["P1"][0]["date"] == str(next(generate_indices(config))["date"])
@@ -0,0 +1,69 @@
+import json
+import pytest
+from app.observability.tracing import Trace, TraceStore, start_trace, span, traced, install_sql_spans, trace_store
+from app.services.intent_service import IntentService
+
+@traced("format")
+def render(value: int) -> str:
+    return f"value={value}"
+
+class TestTracing:
+
+    def setup_method(self):
+        install_sql_spans()
+
+    def test_traced_is_noop_without_trace(self):
+        """Test that decorated functions run normally outside a trace."""
+        assert render(1) == "value=1"
+
+    def test_spans_nest_under_current_span(self):
+        """Test that spans record their parent and kind."""
+        with start_trace("test") as trace:
+            with span("outer", "service"):
+                render(2)
+
+        by_name = {s["name"]: s for s in trace.spans}
+        assert by_name["render"]["parent_id"] == by_name["outer"]["span_id"]
+        assert by_name["outer"]["parent_id"] == by_name["test"]["span_id"]
+        assert by_name["render"]["kind"] == "format"
+        assert trace_store.get(trace.trace_id) is trace
+
+    def test_breakdown_uses_self_time(self):
+        """Test that child time is not counted twice in the per-kind breakdown."""
+        trace = Trace("manual")
+        trace.spans = [
+            {"span_id": "a", "parent_id": None, "kind": "request", "duration_ms": 10.0},
+            {"span_id": "b", "parent_id": "a", "kind": "service", "duration_ms": 8.0},
+            {"span_id": "c", "parent_id": "b", "kind": "db", "duration_ms": 5.0},
+        ]
+
+        breakdown = trace.breakdown()
+        assert breakdown["request"] == pytest.approx(2.0)
+        assert breakdown["service"] == pytest.approx(3.0)
+        assert breakdown["db"] == pytest.approx(5.0)
+        assert trace.duration_ms == pytest.approx(10.0)
+
+    def test_handle_message_records_service_ai_and_db_spans(self, test_db, sample_farmer, sample_parcel, sample_indices):
+        """Test that a chat message is traced through services, strategies and SQL."""
+        with start_trace("message") as trace:
+            IntentService(test_db).handle_message(sample_farmer.phone, f"How is parcel {sample_parcel.id}?")
+
+        names = {s["name"] for s in trace.spans}
+        kinds = {s["kind"] for s in trace.spans}
+        assert "IntentService.handle_message" in names
+        assert "ParcelService.get_parcel_status" in names
+        assert {"service", "ai", "db"} <= kinds
+        assert any(s["name"] == "sql" for s in trace.spans)
+
+    def test_store_is_bounded_and_writes_jsonl(self, tmp_path):
+        """Test the ring buffer size and the JSON lines export."""
+        path = tmp_path / "traces.jsonl"
+        store = TraceStore(size=2, file_path=str(path))
+        traces = [Trace(f"t{i}") for i in range(3)]
+        for trace in traces:
+            store.add(trace)
+
+        assert [t.name for t in store.recent()] == ["t2", "t1"]
+        assert store.get(traces[0].trace_id) is None
+        lines = path.read_text().splitlines()
+        assert [json.loads(line)["name"] for line in lines] == ["t0", "t1", "t2"]
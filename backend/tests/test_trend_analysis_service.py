@@ -1,6 +1,6 @@
 import pytest
 from app.services.trend_analysis_service import TrendAnalysisService
-from app.models.base import Parcel, ParcelIndex
+from app.models.base import Farmer, Parcel, ParcelIndex
 from datetime import date
 
 class TestTrendAnalysisService:
@@ -132,6 +132,34 @@ class TestTrendAnalysisService:
         assert result["trends"]["ph"]["trend"] == "stable"
         assert "stable" in result["trends"]["ph"]["interpretation"].lower()
     
+    def test_full_history_with_nulls(self, test_db, sample_farmer):
+        """Test that every reading is used and null readings are skipped."""
+        parcel = Parcel(
+            id="P_TREND5",
+            farmer_id=sample_farmer.id,
+            name="Long History",
+            area_ha=10.0,
+            crop="Wheat"
+        )
+        test_db.add(parcel)
+        # NDVI rises steadily; first and last NDMI are equal but the middle readings dip
+        values = [(0.30, 0.30), (0.35, None), (0.40, 0.10), (0.45, 0.10), (0.50, 0.30)]
+        for i, (ndvi, ndmi) in enumerate(values):
+            test_db.add(ParcelIndex(id=f"IDX_L{i}", parcel_id=parcel.id, date=date(2025, 4, 1 + 7 * i), ndvi=ndvi, ndmi=ndmi))
+        test_db.commit()
+        
+        service = TrendAnalysisService(test_db)
+        result = service.analyze_parcel_trends(parcel.id)
+        
+        ndvi = result["trends"]["ndvi"]
+        assert ndvi["trend"] == "increasing"
+        assert ndvi["data_points"] == 5
+        assert ndvi["r_squared"] == pytest.approx(1.0)
+        assert ndvi["percent_change"] == pytest.approx(66.7)
+        assert result["trends"]["ndmi"]["data_points"] == 4
+        assert result["trends"]["ndmi"]["trend"] == "stable"
+        assert "ndwi" not in result["trends"]
+    
     def test_insufficient_data(self, test_db, sample_farmer):
         """Test handling insufficient data."""
         parcel = Parcel(
@@ -159,3 +187,33 @@ class TestTrendAnalysisService:
         assert "start_date" in result["period"]
         assert "end_date" in result["period"]
         assert result["period"]["data_points"] == 2
+    
+    def test_bulk_trends_match_single_parcel(self, test_db, sample_farmer):
+        """Test that bulk trends per parcel equal the single-parcel analysis, across chunks."""
+        other = Farmer(id="F2", username="other", name="Other Farmer")
+        test_db.add(other)
+        for n in range(1, 6):
+            test_db.add(Parcel(id=f"PB{n}", farmer_id="F1", name=f"Field {n}", area_ha=5.0, crop="Maize"))
+            for i in range(4):
+                test_db.add(ParcelIndex(id=f"PB{n}_I{i}", parcel_id=f"PB{n}", date=date(2025, 5, 1 + 5 * i), ndvi=0.2 + 0.05 * n * i, soc=2.0))
+        test_db.add(Parcel(id="PB6", farmer_id="F1", name="Empty", area_ha=1.0, crop="Maize"))
+        test_db.add(Parcel(id="PX1", farmer_id="F2", name="Elsewhere", area_ha=1.0, crop="Maize"))
+        test_db.add(ParcelIndex(id="PX1_I0", parcel_id="PX1", date=date(2025, 5, 1), ndvi=0.4))
+        test_db.commit()
+        
+        service = TrendAnalysisService(test_db)
+        results = list(service.iter_bulk_trends("F1", chunk_parcels=2))
+        
+        assert [r["parcel_id"] for r in results] == ["PB1", "PB2", "PB3", "PB4", "PB5", "PB6"]
+        assert results[-1]["status"] == "insufficient_data"
+        assert results[-1]["data_points"] == 0
+        for result in results[:-1]:
+            single = service.analyze_parcel_trends(result["parcel_id"])
+            assert result["trends"] == single["trends"]
+            assert result["period"] == single["period"]
+            assert "summary" not in result
+        
+        fleet = {r["parcel_id"]: r for r in service.iter_bulk_trends(include_summary=True)}
+        assert len(fleet) == 7
+        assert fleet["PX1"]["status"] == "insufficient_data"
+        assert fleet["PB1"]["summary"].startswith("Trend Analysis for Field 1")
@@ -0,0 +1,57 @@
+import math
+import numpy as np
+import pytest
+from datetime import date, timedelta
+from app.analytics.series import SeriesBatch, INDEX_NAMES
+from app.analytics.trend_engine import compute_trends
+
+NDVI, NDMI = INDEX_NAMES.index("ndvi"), INDEX_NAMES.index("ndmi")
+
+def row(parcel_id, day, ndvi=None, ndmi=None):
+    return (parcel_id, date(2025, 1, 1) + timedelta(days=day), ndvi, ndmi, None, None, None, None, None, None)
+
+class TestTrendEngine:
+    
+    def test_matches_numpy_polyfit_per_parcel(self):
+        """Test slope and R² against np.polyfit for several parcels in one batch."""
+        rng = np.random.default_rng(1)
+        rows = []
+        for p in range(5):
+            for d in range(0, 200, 10):
+                rows.append(row(f"P{p}", d, ndvi=0.3 + 0.001 * p * d + rng.normal(0, 0.02)))
+        batch = SeriesBatch.from_rows(rows)
+        stats = compute_trends(batch)
+        
+        for i in range(5):
+            x = np.arange(0, 200, 10)
+            y = batch.values[batch.offsets[i]:batch.offsets[i + 1], NDVI]
+            slope, intercept = np.polyfit(x, y, 1)
+            r2 = np.corrcoef(x, y)[0, 1] ** 2
+            assert stats.slope_per_day[i, NDVI] == pytest.approx(slope)
+            assert stats.r_squared[i, NDVI] == pytest.approx(r2)
+    
+    def test_nulls_are_skipped(self):
+        """Test that first/last/count/rolling mean use non-null readings only."""
+        rows = [row("P1", 0, 0.2, None), row("P1", 10, None, 0.1), row("P1", 20, 0.4, None), row("P1", 30, 0.6, None)]
+        stats = compute_trends(SeriesBatch.from_rows(rows), window=2)
+        
+        assert stats.count[0, NDVI] == 3
+        assert stats.first_value[0, NDVI] == pytest.approx(0.2)
+        assert stats.last_value[0, NDVI] == pytest.approx(0.6)
+        assert stats.percent_change[0, NDVI] == pytest.approx(200.0)
+        assert stats.rolling_mean[0, NDVI] == pytest.approx(0.5)
+        assert stats.count[0, NDMI] == 1
+        assert math.isnan(stats.slope_per_day[0, NDMI])
+    
+    def test_flat_series_has_no_r_squared(self):
+        """Test that a constant series has zero slope and undefined R²."""
+        rows = [row("P1", d, ndvi=0.5) for d in (0, 10, 20)]
+        stats = compute_trends(SeriesBatch.from_rows(rows))
+        
+        assert stats.slope_per_day[0, NDVI] == pytest.approx(0.0)
+        assert math.isnan(stats.r_squared[0, NDVI])
+    
+    def test_empty_batch(self):
+        """Test that an empty batch yields empty arrays."""
+        stats = compute_trends(SeriesBatch.from_rows([]))
+        assert stats.count.shape == (0, len(INDEX_NAMES))
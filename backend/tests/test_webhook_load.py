@@ -0,0 +1,31 @@
+from twilio.request_validator import RequestValidator
+from app.config import settings
+from app.integrations.twilio_messenger import TwilioMessenger
+from benchmarks.webhook_load import TwilioStandIn, sign, twilio_form
+
+class TestWebhookLoad:
+    
+    def test_signature_matches_twilio_validator(self):
+        """Test that load-test requests carry a signature the webhook accepts."""
+        url = "http://127.0.0.1:8000/webhook/whatsapp"
+        form = twilio_form("+40741111111", "show my parcels", "ACtest")
+        
+        assert RequestValidator("secret").validate(url, form, sign(url, form, "secret"))
+    
+    def test_stand_in_captures_twilio_messenger_calls(self, monkeypatch):
+        """Test that TWILIO_API_BASE_URL sends outbound messages to the stand-in."""
+        stand_in = TwilioStandIn(port=0).start()
+        monkeypatch.setattr(settings, "TWILIO_ACCOUNT_SID", "ACtest")
+        monkeypatch.setattr(settings, "TWILIO_AUTH_TOKEN", "secret")
+        monkeypatch.setattr(settings, "TWILIO_PHONE_NUMBER", "+14155238886")
+        monkeypatch.setattr(settings, "TWILIO_API_BASE_URL", stand_in.base_url)
+        try:
+            assert TwilioMessenger().send_message("+40741111111", "Weekly report") is True
+        finally:
+            stand_in.stop()
+        
+        assert stand_in.messages == [{
+            "path": "/2010-04-01/Accounts/ACtest/Messages.json",
+            "to": "whatsapp:+40741111111",
+            "body": "Weekly report",
+        }]